@@ -12,6 +12,7 @@ import logging
 import os
 import time
 
+import click
 from flask import Flask, render_template, send_from_directory, url_for
 from flask_cors import CORS
 from flask_limiter import Limiter
@@ -274,11 +275,40 @@ def create_app(config_name=None):
     from app.models import project as _project_models              # noqa: F401
     from app.models import program_governance as _program_governance_models  # noqa: F401
     from app.models import change_management as _change_management_models  # noqa: F401
+    from app.models import sequence as _sequence_models            # noqa: F401
 
     # Faz 3: Auto-sync program_id → project_id on operational models
     from app.models._project_id_sync import register_all as _register_project_id_sync
     _register_project_id_sync()
 
+    # F5: keep materialized report rollups in step with executions/defects
+    from app.services.report_rollups import init_report_rollups
+    init_report_rollups()
+
+    # F5: version-stamped result cache for dashboards and reports
+    from app.services.result_cache import init_result_cache
+    init_result_cache()
+
+    # Explore: batched pre-commit fit propagation for dirty L3/L2 nodes
+    from app.services.fit_propagation import init_fit_propagation
+    init_fit_propagation()
+
+    # Explore: ProcessLevel closure table follows hierarchy creates/moves/deletes
+    from app.services.process_closure import init_process_closure
+    init_process_closure()
+
+    # Cutover: per-plan runbook graphs patched on task/dependency commits
+    from app.services.runbook_graph import init_runbook_graph
+    init_runbook_graph()
+
+    # Cutover: war-room live-status snapshots patched on commit
+    from app.services.cutover_live import init_cutover_live
+    init_cutover_live()
+
+    # Auth: version-stamped permission snapshots bumped on RBAC commits
+    from app.services.permission_service import init_permission_snapshots
+    init_permission_snapshots()
+
     # ── Auto-create tables (safe for production — CREATE IF NOT EXISTS) ──
     if os.getenv("SKIP_AUTO_CREATE_ALL", "").lower() not in {"1", "true", "yes"}:
         with app.app_context():
@@ -425,6 +455,55 @@ def create_app(config_name=None):
         db.session.commit()
         logger.info("Seeded %s new spec templates.", count)
 
+    @app.cli.command("ai-task-worker")
+    @click.option("--once", is_flag=True, help="Drain pending durable AI tasks and exit.")
+    def ai_task_worker_cmd(once):
+        """Run the durable AI task queue (claims pending AITask rows)."""
+        from app.ai.task_runner import run_worker
+        count = run_worker(app, once=once)
+        logger.info("AI task worker processed %s task(s).", count)
+
+    @app.cli.command("report-rollups")
+    @click.option("--program-id", type=int, default=None, help="Limit to one program.")
+    @click.option("--rebuild", is_flag=True, help="Re-derive the rollups from the raw tables.")
+    def report_rollups_cmd(program_id, rebuild):
+        """Check (default) or rebuild the materialized report rollups."""
+        from app.services import report_rollups
+        if rebuild:
+            result = report_rollups.rebuild(program_id)
+            db.session.commit()
+            click.echo(f"Rebuilt {result['execution_buckets']} execution and "
+                       f"{result['defect_buckets']} defect bucket(s).")
+            return
+        result = report_rollups.check(program_id)
+        for section in ("executions", "defects"):
+            s = result[section]
+            click.echo(f"{section}: {s['buckets']} bucket(s), {s['missing']} missing, "
+                       f"{s['stale']} stale, {s['mismatched']} mismatched")
+            for sample in s["samples"]:
+                click.echo(f"  {sample}")
+        if not result["consistent"]:
+            raise SystemExit(1)
+
+    @app.cli.command("process-closure")
+    @click.option("--project-id", type=int, default=None, help="Limit to one project.")
+    @click.option("--rebuild", is_flag=True, help="Re-derive the closure from parent_id links.")
+    def process_closure_cmd(project_id, rebuild):
+        """Check (default) or rebuild the ProcessLevel closure table."""
+        from app.services import process_closure
+        if rebuild:
+            rows = process_closure.rebuild(project_id)
+            db.session.commit()
+            click.echo(f"Rebuilt {rows} closure row(s).")
+            return
+        result = process_closure.check(project_id)
+        click.echo(f"{result['pairs']} pair(s), {result['missing']} missing, "
+                   f"{result['stale']} stale, {result['mismatched']} mismatched")
+        for sample in result["samples"]:
+            click.echo(f"  {sample}")
+        if not result["consistent"]:
+            raise SystemExit(1)
+
     # ── SPA catch-all ────────────────────────────────────────────────────
     def _resolve_asset_version() -> str:
         """Return a deploy-scoped static asset version to bust stale browser and SW caches."""
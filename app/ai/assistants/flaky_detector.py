@@ -2,7 +2,8 @@
 F4 — Flaky Test Detector.
 
 Algorithm per §4.3:
-  1. For each test case, get last N executions (default 10)
+  1. For each test case, get last N executions (default 10) — one
+     windowed query via app.services.testing.execution_history
   2. Compute status oscillation (pass→fail or fail→pass transitions)
   3. Flakiness score = oscillation / (N-1) × 100
   4. Score > threshold (40%) → flag as flaky
@@ -11,10 +12,13 @@ Algorithm per §4.3:
 """
 
 import logging
-from collections import defaultdict
 
-from app.models import db
-from app.models.testing import TestCase, TestExecution
+from app.models.testing import TestCase
+from app.services.testing.execution_history import (
+    environment_correlation,
+    iter_history_chunks,
+    oscillation_score,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -37,43 +41,54 @@ class FlakyTestDetector:
     ) -> dict:
         """Analyze all test cases for flakiness.
 
+        Execution history comes from one windowed query, streamed in chunks;
+        test case details are loaded only for the flagged ones.
+
         Returns:
             dict with flaky_tests list, total_analyzed, threshold
         """
-        test_cases = TestCase.query.filter_by(program_id=program_id).all()
-        flaky = []
+        candidates = []
         total = 0
 
-        for tc in test_cases:
-            executions = (
-                TestExecution.query
-                .filter_by(test_case_id=tc.id)
-                .order_by(TestExecution.executed_at.desc())
-                .limit(window)
-                .all()
-            )
-            if len(executions) < 2:
-                continue
+        for chunk in iter_history_chunks(program_id, window=window):
+            for tc_id, results, envs, (score, oscillations) in zip(
+                chunk.test_case_ids, chunk.results, chunk.environments, chunk.oscillations(), strict=True,
+            ):
+                if len(results) < 2:
+                    continue
+                total += 1
+                if score >= threshold:
+                    env_corr = environment_correlation(results, envs)
+                    candidates.append({
+                        "test_case_id": tc_id,
+                        "flakiness_score": round(score, 1),
+                        "oscillations": oscillations,
+                        "execution_count": len(results),
+                        "result_sequence": results,
+                        "environment_correlation": env_corr,
+                        "recommendation": self._recommend(score, env_corr),
+                    })
+
+        details = {}
+        if candidates:
+            rows = TestCase.query.with_entities(
+                TestCase.id, TestCase.code, TestCase.title, TestCase.module, TestCase.test_layer,
+            ).filter(TestCase.id.in_([c["test_case_id"] for c in candidates])).all()
+            details = {r.id: r for r in rows}
 
-            total += 1
-            results = [e.result for e in reversed(executions)]  # chronological
-            score, oscillations = self._compute_flakiness(results)
-
-            if score >= threshold:
-                env_corr = self._environment_correlation(executions)
-                flaky.append({
-                    "test_case_id": tc.id,
-                    "code": tc.code,
-                    "title": tc.title,
-                    "module": tc.module,
-                    "test_layer": tc.test_layer,
-                    "flakiness_score": round(score, 1),
-                    "oscillations": oscillations,
-                    "execution_count": len(executions),
-                    "result_sequence": results,
-                    "environment_correlation": env_corr,
-                    "recommendation": self._recommend(score, env_corr),
-                })
+        flaky = []
+        for c in candidates:
+            tc = details.get(c["test_case_id"])
+            if tc is None:
+                continue
+            flaky.append({
+                "test_case_id": tc.id,
+                "code": tc.code,
+                "title": tc.title,
+                "module": tc.module,
+                "test_layer": tc.test_layer,
+                **{k: v for k, v in c.items() if k != "test_case_id"},
+            })
 
         flaky.sort(key=lambda x: x["flakiness_score"], reverse=True)
 
@@ -88,48 +103,7 @@ class FlakyTestDetector:
     @staticmethod
     def _compute_flakiness(results: list[str]) -> tuple[float, int]:
         """Compute oscillation-based flakiness score."""
-        if len(results) < 2:
-            return 0.0, 0
-        oscillations = 0
-        for i in range(1, len(results)):
-            prev, curr = results[i - 1], results[i]
-            # Count pass↔fail transitions (ignore not_run/blocked/deferred)
-            effective = {"pass", "fail"}
-            if prev in effective and curr in effective and prev != curr:
-                oscillations += 1
-        score = (oscillations / (len(results) - 1)) * 100
-        return score, oscillations
-
-    @staticmethod
-    def _environment_correlation(executions: list) -> dict | None:
-        """Check if failures correlate with a specific environment."""
-        env_results = defaultdict(lambda: {"pass": 0, "fail": 0, "other": 0})
-        for e in executions:
-            env = getattr(e, "environment", None) or "unknown"
-            r = e.result or "other"
-            if r in ("pass", "fail"):
-                env_results[env][r] += 1
-            else:
-                env_results[env]["other"] += 1
-
-        if len(env_results) < 2:
-            return None
-
-        # Find environment with highest fail ratio
-        worst = None
-        worst_ratio = 0
-        for env, counts in env_results.items():
-            total = counts["pass"] + counts["fail"]
-            if total == 0:
-                continue
-            fail_ratio = counts["fail"] / total
-            if fail_ratio > worst_ratio:
-                worst_ratio = fail_ratio
-                worst = env
-
-        if worst and worst_ratio > 0.5:
-            return {"environment": worst, "fail_ratio": round(worst_ratio, 2)}
-        return None
+        return oscillation_score(results)
 
     @staticmethod
     def _recommend(score: float, env_corr: dict | None) -> str:
@@ -16,7 +16,8 @@ from collections import defaultdict
 from datetime import datetime, timedelta, timezone
 
 from app.models import db
-from app.models.testing import TestCase, TestCycle, TestExecution, Defect
+from app.models.testing import TestCase, TestCycle, Defect
+from app.services.testing.execution_history import iter_history_chunks
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +25,7 @@ SEVERITY_WEIGHT = {"S1": 4, "S2": 3, "S3": 2, "S4": 1}
 PRIORITY_WEIGHT = {"Critical": 4, "High": 3, "Medium": 2, "Low": 1}
 DEFAULT_WINDOW_DAYS = 30
 DEFAULT_CONFIDENCE_TARGET = 0.90
+PASS_RATE_WINDOW = 5  # most recent executions per test case
 
 
 class SuiteOptimizer:
@@ -55,7 +57,10 @@ class SuiteOptimizer:
 
         # Fallback: all TCs in program
         if program_id:
-            test_cases = TestCase.query.filter_by(program_id=program_id).all()
+            test_cases = TestCase.query.with_entities(
+                TestCase.id, TestCase.code, TestCase.title, TestCase.module,
+                TestCase.test_layer, TestCase.priority, TestCase.updated_at,
+            ).filter_by(program_id=program_id).all()
         else:
             test_cases = []
 
@@ -77,20 +82,10 @@ class SuiteOptimizer:
                 defect_scores[d.test_case_id] += w
 
         # ── Execution history (pass confidence) ──
+        # Never executed → absent → pass rate 0.0 (high risk)
         pass_rates = {}
-        for tc in test_cases:
-            execs = (
-                TestExecution.query
-                .filter_by(test_case_id=tc.id)
-                .order_by(TestExecution.executed_at.desc())
-                .limit(5)
-                .all()
-            )
-            if execs:
-                p = sum(1 for e in execs if e.result == "pass")
-                pass_rates[tc.id] = p / len(execs)
-            else:
-                pass_rates[tc.id] = 0.0  # never executed → high risk
+        for chunk in iter_history_chunks(program_id, window=PASS_RATE_WINDOW):
+            pass_rates.update(zip(chunk.test_case_ids, chunk.pass_rates(), strict=True))
 
         # ── Build risk ranking ──
         ranking = []
@@ -0,0 +1,135 @@
+"""
+SAP Transformation Management Platform
+Async Bridge — run asyncio LLM I/O from synchronous Flask / TaskRunner code.
+
+One daemon thread per process owns a long-lived event loop. The async
+provider clients (and their pooled HTTP connections) are bound to that
+loop, so sync callers never create a loop per request. A caller submits
+coroutines and blocks only on the combined result: fanning out N LLM calls
+costs one waiting thread, not N.
+
+DB work (cache, budget, usage logs) stays on the calling thread. Coroutines
+sent through the bridge must only do network I/O.
+
+Usage:
+    from app.ai.async_bridge import get_async_bridge
+    bridge = get_async_bridge()
+    result = bridge.run(gateway.achat(messages, model="gpt-4o-mini"))
+    results = bridge.gather([gateway.achat(m) for m in batch], limit=8)
+"""
+
+import asyncio
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+BRIDGE_MAX_CONCURRENCY = int(os.getenv("AI_ASYNC_MAX_CONCURRENCY", "16"))
+BRIDGE_TIMEOUT = float(os.getenv("AI_ASYNC_TIMEOUT", "300"))  # seconds per run()/gather()
+
+
+class AsyncBridge:
+    """Background event loop with a sync submit API."""
+
+    def __init__(self):
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._close_hooks = []
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """The bridge loop, started on first use."""
+        with self._lock:
+            if self._loop is None or self._loop.is_closed():
+                ready = threading.Event()
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=self._serve, args=(self._loop, ready),
+                    name="ai-async-bridge", daemon=True,
+                )
+                self._thread.start()
+                ready.wait()
+            return self._loop
+
+    @staticmethod
+    def _serve(loop, ready):
+        asyncio.set_event_loop(loop)
+        loop.call_soon(ready.set)
+        loop.run_forever()
+
+    def in_bridge_thread(self) -> bool:
+        return self._thread is not None and threading.current_thread() is self._thread
+
+    def run(self, coro, timeout: float | None = BRIDGE_TIMEOUT):
+        """Run one coroutine on the bridge loop and return its result."""
+        if self.in_bridge_thread():
+            coro.close()
+            raise RuntimeError("AsyncBridge.run() called from the bridge loop; await the coroutine instead")
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        try:
+            return future.result(timeout)
+        except TimeoutError:
+            future.cancel()
+            raise
+
+    def gather(self, coros, *, limit: int = BRIDGE_MAX_CONCURRENCY, return_exceptions: bool = True,
+               timeout: float | None = BRIDGE_TIMEOUT) -> list:
+        """
+        Run many coroutines concurrently (at most *limit* in flight).
+
+        Results keep input order; with return_exceptions (default) a failed
+        coroutine yields its exception instead of aborting the batch.
+        """
+        coros = list(coros)
+        if not coros:
+            return []
+        return self.run(_bounded_gather(coros, limit, return_exceptions), timeout=timeout)
+
+    def on_close(self, hook):
+        """Register an async callable run by close() (e.g. HTTP client aclose)."""
+        self._close_hooks.append(hook)
+
+    def close(self):
+        """Close registered clients and stop the loop (tests / worker shutdown)."""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+            hooks, self._close_hooks = self._close_hooks, []
+        if loop is None or loop.is_closed():
+            return
+        for hook in hooks:
+            try:
+                asyncio.run_coroutine_threadsafe(hook(), loop).result(5)
+            except Exception as e:
+                logger.debug("AsyncBridge close hook failed: %s", e)
+        loop.call_soon_threadsafe(loop.stop)
+        if thread is not None:
+            thread.join(5)
+        loop.close()
+
+
+async def _bounded_gather(coros, limit, return_exceptions):
+    semaphore = asyncio.Semaphore(max(1, limit))
+
+    async def _guarded(coro):
+        async with semaphore:
+            return await coro
+
+    return await asyncio.gather(*(_guarded(c) for c in coros), return_exceptions=return_exceptions)
+
+
+# ── Process-wide instance ─────────────────────────────────────────────────────
+
+_bridge: AsyncBridge | None = None
+_bridge_lock = threading.Lock()
+
+
+def get_async_bridge() -> AsyncBridge:
+    """Return the process-wide bridge (created lazily)."""
+    global _bridge
+    with _bridge_lock:
+        if _bridge is None:
+            _bridge = AsyncBridge()
+        return _bridge
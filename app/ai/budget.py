@@ -7,16 +7,52 @@ Enforces per-program and per-user token/cost budgets:
     - Record usage after successful call
     - Auto-reset when period rolls over
     - CRUD API for budget management
+
+The gateway goes through BudgetLedger, which keeps per-budget counters in
+process memory, enforces limits against them and reconciles into
+AITokenBudget with atomic increments every AI_BUDGET_FLUSH_INTERVAL seconds
+(on a timer, and once more at interpreter exit), each in its own short
+transaction.
+Usage from other workers is picked up when a snapshot is older than
+AI_BUDGET_SNAPSHOT_TTL, so enforcement is at most that stale.
 """
 
+import atexit
 import logging
+import os
+import threading
+import time
+import weakref
 from datetime import datetime, timedelta, timezone
 
+from flask import current_app, has_app_context
+
 from app.models import db
 from app.models.ai import AITokenBudget
 
 logger = logging.getLogger(__name__)
 
+BUDGET_LEDGER_ENABLED = os.getenv("AI_BUDGET_LEDGER", "true").lower() == "true"
+BUDGET_FLUSH_INTERVAL = float(os.getenv("AI_BUDGET_FLUSH_INTERVAL", "5"))    # seconds
+BUDGET_SNAPSHOT_TTL = float(os.getenv("AI_BUDGET_SNAPSHOT_TTL", "30"))       # seconds
+
+# Bumped by every budget mutation in this process so ledgers drop their snapshots
+_budget_generation = 0
+# Ledgers with a flush timer running; flushed once more at interpreter exit
+_ledgers: "weakref.WeakSet[BudgetLedger]" = weakref.WeakSet()
+
+
+def _bump_generation():
+    global _budget_generation
+    _budget_generation += 1
+
+
+def _as_utc(dt: datetime | None) -> datetime | None:
+    # SQLite stores naive datetimes; coerce to UTC-aware for comparison
+    if dt is not None and dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt
+
 
 class TokenBudgetService:
     """Manages AI token budgets per program/user."""
@@ -111,6 +147,7 @@ class TokenBudgetService:
             db.session.add(budget)
 
         db.session.commit()
+        _bump_generation()
         return budget
 
     def reset_budget(self, budget_id: int) -> AITokenBudget | None:
@@ -125,6 +162,7 @@ class TokenBudgetService:
         budget.period_start = now
         budget.reset_at = self._compute_reset_at(budget.period, now)
         db.session.commit()
+        _bump_generation()
         return budget
 
     def list_budgets(self, program_id: int | None = None) -> list[dict]:
@@ -141,6 +179,7 @@ class TokenBudgetService:
             return False
         db.session.delete(budget)
         db.session.commit()
+        _bump_generation()
         return True
 
     # ── Internal ──────────────────────────────────────────────────────────
@@ -150,11 +189,7 @@ class TokenBudgetService:
         if not budget.reset_at:
             return
         now = datetime.now(timezone.utc)
-        reset_at = budget.reset_at
-        # SQLite stores naive datetimes; coerce to UTC-aware for comparison
-        if reset_at.tzinfo is None:
-            reset_at = reset_at.replace(tzinfo=timezone.utc)
-        if now >= reset_at:
+        if now >= _as_utc(budget.reset_at):
             logger.info("Auto-resetting budget %d (period=%s)", budget.id, budget.period)
             budget.tokens_used = 0
             budget.cost_used_usd = 0.0
@@ -177,3 +212,313 @@ class TokenBudgetService:
             # Daily — reset at midnight UTC next day
             next_day = from_dt + timedelta(days=1)
             return next_day.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+# ── In-memory ledger ──────────────────────────────────────────────────────────
+
+
+class _BudgetCounter:
+    """Snapshot of one AITokenBudget row plus usage not yet written back."""
+
+    __slots__ = (
+        "budget_id", "program_id", "user", "period", "token_limit", "cost_limit_usd",
+        "period_start", "reset_at", "base_tokens", "base_cost", "base_requests",
+        "tokens", "cost", "requests", "reset_from", "loaded_at",
+    )
+
+    def __init__(self, budget: AITokenBudget):
+        self.budget_id = budget.id
+        self.program_id = budget.program_id
+        self.user = budget.user
+        self.period = budget.period
+        self.token_limit = budget.token_limit
+        self.cost_limit_usd = budget.cost_limit_usd
+        self.period_start = _as_utc(budget.period_start)
+        self.reset_at = _as_utc(budget.reset_at)
+        self.base_tokens = budget.tokens_used or 0
+        self.base_cost = budget.cost_used_usd or 0.0
+        self.base_requests = budget.request_count or 0
+        self.tokens = 0
+        self.cost = 0.0
+        self.requests = 0
+        self.reset_from = None   # old reset_at still to be reset in the DB
+        self.loaded_at = time.monotonic()
+
+    @property
+    def tokens_used(self) -> int:
+        return self.base_tokens + self.tokens
+
+    @property
+    def cost_used_usd(self) -> float:
+        return self.base_cost + self.cost
+
+    @property
+    def dirty(self) -> bool:
+        return bool(self.requests or self.reset_from is not None)
+
+    def roll_period(self, now: datetime):
+        """Start a new period in memory; the DB row is reset on the next flush."""
+        if self.reset_at is None or now < self.reset_at:
+            return
+        logger.info("Budget %d period rolled over (period=%s)", self.budget_id, self.period)
+        if self.reset_from is None:
+            self.reset_from = self.reset_at
+        self.base_tokens = self.tokens = 0
+        self.base_cost = self.cost = 0.0
+        self.base_requests = self.requests = 0
+        self.period_start = now
+        self.reset_at = TokenBudgetService._compute_reset_at(self.period, now)
+
+    def is_exceeded(self) -> bool:
+        return self.tokens_used >= self.token_limit or self.cost_used_usd >= self.cost_limit_usd
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.budget_id,
+            "program_id": self.program_id,
+            "user": self.user,
+            "period": self.period,
+            "token_limit": self.token_limit,
+            "cost_limit_usd": self.cost_limit_usd,
+            "tokens_used": self.tokens_used,
+            "cost_used_usd": round(self.cost_used_usd, 6),
+            "request_count": self.base_requests + self.requests,
+            "is_exceeded": self.is_exceeded(),
+            "remaining_tokens": max(0, self.token_limit - self.tokens_used),
+            "remaining_cost_usd": round(max(0.0, self.cost_limit_usd - self.cost_used_usd), 6),
+            "period_start": self.period_start.isoformat() if self.period_start else None,
+            "reset_at": self.reset_at.isoformat() if self.reset_at else None,
+        }
+
+
+class BudgetLedger:
+    """
+    Hot-path budget enforcement for the LLM gateway.
+
+    check_budget() and record_usage() mirror TokenBudgetService but work on
+    in-memory counters: the only DB traffic is a budget lookup per
+    (program, user) every snapshot TTL and one ``UPDATE ... SET tokens_used =
+    tokens_used + :delta`` per dirty budget per flush interval. Period
+    rollovers are applied in memory and written back with a compare-and-set
+    on reset_at, so concurrent workers reset a row only once.
+    """
+
+    def __init__(self, flush_interval: float = BUDGET_FLUSH_INTERVAL,
+                 snapshot_ttl: float = BUDGET_SNAPSHOT_TTL):
+        self.flush_interval = flush_interval
+        self.snapshot_ttl = snapshot_ttl
+        self._lock = threading.Lock()
+        self._lookups: dict[tuple, tuple[int | None, float]] = {}
+        self._counters: dict[int, _BudgetCounter] = {}
+        self._generation = _budget_generation
+        self._last_flush = time.monotonic()
+        self._app = None
+        self._stats = {"checks": 0, "denied": 0, "records": 0, "flushes": 0, "lookups": 0}
+
+    def check_budget(self, program_id: int | None = None, user: str | None = None) -> dict:
+        """Same contract as TokenBudgetService.check_budget."""
+        self._sync_generation()
+        counter = self._counter_for(program_id, user)
+        with self._lock:
+            self._stats["checks"] += 1
+            if counter is None:
+                return {"allowed": True, "reason": None, "budget": None}
+            counter.roll_period(datetime.now(timezone.utc))
+            if counter.is_exceeded():
+                self._stats["denied"] += 1
+                return {
+                    "allowed": False,
+                    "reason": (
+                        f"Token budget exceeded: {counter.tokens_used}/{counter.token_limit} tokens, "
+                        f"${counter.cost_used_usd:.4f}/${counter.cost_limit_usd:.2f} cost. "
+                        f"Resets at {counter.reset_at.isoformat() if counter.reset_at else 'N/A'}."
+                    ),
+                    "budget": counter.to_dict(),
+                }
+            return {"allowed": True, "reason": None, "budget": counter.to_dict()}
+
+    def record_usage(self, program_id: int | None, user: str | None,
+                     tokens: int, cost_usd: float):
+        """Add usage to the program and user budgets; flushes when the interval has passed."""
+        self._sync_generation()
+        counters = []
+        if program_id is not None:
+            counters.append(self._counter_for(program_id, None))
+        if user:
+            counters.append(self._counter_for(None, user))
+
+        now = datetime.now(timezone.utc)
+        seen = set()
+        with self._lock:
+            self._stats["records"] += 1
+            for counter in counters:
+                if counter is None or counter.budget_id in seen:
+                    continue
+                seen.add(counter.budget_id)
+                counter.roll_period(now)
+                counter.tokens += tokens
+                counter.cost += cost_usd
+                counter.requests += 1
+            due = time.monotonic() - self._last_flush >= self.flush_interval
+        self._start_timer()
+        if due:
+            self.flush()
+
+    def flush(self) -> int:
+        """
+        Write pending usage and period resets into AITokenBudget.
+
+        Runs in its own short transaction rather than the caller's session,
+        so pooled usage of other requests never depends on this request
+        committing. Returns the number of budgets written.
+        """
+        with self._lock:
+            self._last_flush = time.monotonic()
+            pending = []
+            for counter in self._counters.values():
+                if not counter.dirty:
+                    continue
+                pending.append((counter, counter.tokens, counter.cost, counter.requests, counter.reset_from))
+                counter.base_tokens += counter.tokens
+                counter.base_cost += counter.cost
+                counter.base_requests += counter.requests
+                counter.tokens, counter.cost, counter.requests = 0, 0.0, 0
+                counter.reset_from = None
+            if pending:
+                self._stats["flushes"] += 1
+        if not pending:
+            return 0
+
+        table = AITokenBudget.__table__
+        try:
+            with db.engine.begin() as conn:
+                for counter, tokens, cost, requests, reset_from in pending:
+                    if reset_from is not None:
+                        # Only the first worker to notice the rollover zeroes the row
+                        conn.execute(
+                            table.update()
+                            .where(table.c.id == counter.budget_id, table.c.reset_at == reset_from)
+                            .values(tokens_used=0, cost_used_usd=0.0, request_count=0,
+                                    period_start=counter.period_start, reset_at=counter.reset_at)
+                        )
+                    if requests:
+                        conn.execute(
+                            table.update()
+                            .where(table.c.id == counter.budget_id)
+                            .values(tokens_used=table.c.tokens_used + tokens,
+                                    cost_used_usd=table.c.cost_used_usd + cost,
+                                    request_count=table.c.request_count + requests)
+                        )
+        except Exception as e:
+            logger.warning("Budget ledger flush failed, usage re-queued: %s", e)
+            with self._lock:
+                for counter, tokens, cost, requests, reset_from in pending:
+                    counter.base_tokens -= tokens
+                    counter.base_cost -= cost
+                    counter.base_requests -= requests
+                    counter.tokens += tokens
+                    counter.cost += cost
+                    counter.requests += requests
+                    counter.reset_from = counter.reset_from or reset_from
+            return 0
+        return len(pending)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                **self._stats,
+                "budgets": len(self._counters),
+                "pending_budgets": sum(1 for c in self._counters.values() if c.dirty),
+            }
+
+    # ── Internal ──────────────────────────────────────────────────────────
+
+    def _start_timer(self):
+        """Start the background flush once usage is recorded inside an app."""
+        if self._app is not None or not has_app_context():
+            return
+        with self._lock:
+            if self._app is not None:
+                return
+            self._app = current_app._get_current_object()
+        _ledgers.add(self)
+        threading.Thread(
+            target=_flush_periodically, args=(weakref.ref(self), max(self.flush_interval, 1.0)),
+            name="ai-budget-flush", daemon=True,
+        ).start()
+
+    def _flush_in_app(self):
+        try:
+            with self._app.app_context():
+                self.flush()
+        except Exception as e:
+            logger.warning("Budget ledger background flush failed: %s", e)
+
+    def _sync_generation(self):
+        """
+        Drop snapshots after a budget was created/updated/reset/deleted in this process.
+
+        Unflushed usage is dropped with them: after a reset or delete it no
+        longer applies, and after a limit change it is at most one flush
+        interval of this worker's usage.
+        """
+        if self._generation == _budget_generation:
+            return
+        with self._lock:
+            self._generation = _budget_generation
+            self._lookups.clear()
+            self._counters.clear()
+
+    def _counter_for(self, program_id: int | None, user: str | None) -> _BudgetCounter | None:
+        """Resolve the budget for a key, reloading the snapshot when it is stale."""
+        key = (program_id, user or None)
+        now = time.monotonic()
+        with self._lock:
+            hit = self._lookups.get(key)
+            if hit and now - hit[1] < self.snapshot_ttl:
+                budget_id = hit[0]
+                counter = self._counters.get(budget_id) if budget_id is not None else None
+                if budget_id is None or (counter and now - counter.loaded_at < self.snapshot_ttl):
+                    return counter
+
+        # Stale or unknown: write back what we have, then read the row again
+        self.flush()
+        q = AITokenBudget.query
+        if program_id is not None:
+            q = q.filter_by(program_id=program_id)
+        if user:
+            q = q.filter_by(user=user)
+        budget = q.first()
+
+        with self._lock:
+            self._stats["lookups"] += 1
+            self._lookups[key] = (budget.id if budget else None, now)
+            if budget is None:
+                return None
+            counter = self._counters.get(budget.id)
+            if counter is None or now - counter.loaded_at >= self.snapshot_ttl:
+                fresh = _BudgetCounter(budget)
+                if counter is not None:
+                    # Usage recorded between our flush and the read stays pending
+                    fresh.tokens, fresh.cost, fresh.requests = counter.tokens, counter.cost, counter.requests
+                    fresh.reset_from = counter.reset_from
+                counter = self._counters[budget.id] = fresh
+            return counter
+
+
+def _flush_periodically(ledger_ref, interval: float):
+    """Timer thread: flush a ledger every interval, so idle workers do not sit on usage."""
+    while True:
+        time.sleep(interval)
+        ledger = ledger_ref()
+        if ledger is None:
+            return
+        ledger._flush_in_app()
+        del ledger
+
+
+@atexit.register
+def _flush_at_exit():
+    """Write back what exiting workers still hold."""
+    for ledger in list(_ledgers):
+        ledger._flush_in_app()
@@ -2,9 +2,14 @@
 SAP Transformation Management Platform
 AI Response Cache — Sprint 20 (Performance).
 
-Two-tier caching:
-    1. In-memory TTLCache for hot responses (sub-millisecond reads)
-    2. DB-backed AIResponseCache for persistence across restarts
+Three-tier caching:
+    1. In-process LRU bounded by entries and bytes (sub-millisecond reads)
+    2. Shared Redis tier (cache_service) so gunicorn workers share hits —
+       only when REDIS_URL points at a real Redis
+    3. DB-backed AIResponseCache for persistence across restarts
+
+DB misses are remembered for a short negative TTL so a cold prompt does
+not query AIResponseCache again on every request.
 
 Skip cache for:
     - Conversations (multi-turn context changes every message)
@@ -14,30 +19,62 @@ Skip cache for:
 import hashlib
 import json
 import logging
+import os
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
 from threading import Lock
 
 from app.models import db
 from app.models.ai import AIResponseCache
+from app.services import cache_service
 
 logger = logging.getLogger(__name__)
 
 # Default TTL in seconds
 DEFAULT_TTL_SECONDS = 300  # 5 minutes
 MAX_MEMORY_ENTRIES = 500
+MAX_MEMORY_BYTES = int(os.getenv("AI_CACHE_MEMORY_BYTES", str(32 * 1024 * 1024)))
+NEGATIVE_TTL_SECONDS = float(os.getenv("AI_CACHE_NEGATIVE_TTL", "30"))
+SHARED_TIER_ENABLED = os.getenv("AI_CACHE_SHARED", "true").lower() == "true"
+SHARED_KEY_PREFIX = "ai:resp:"
 
 # Purposes that should never be cached (context-dependent)
 SKIP_CACHE_PURPOSES = {"conversation", "conversation_general"}
 
 
+class _PurposeStats(dict):
+    """Per-purpose counters (defaults to zero)."""
+
+    def __missing__(self, purpose):
+        value = self[purpose] = {"hits": 0, "misses": 0, "evictions": 0}
+        return value
+
+
 class ResponseCacheService:
-    """LLM response cache with in-memory + DB tiers."""
+    """LLM response cache with in-memory LRU, shared Redis and DB tiers."""
 
-    def __init__(self, ttl_seconds: int = DEFAULT_TTL_SECONDS):
+    def __init__(self, ttl_seconds: int = DEFAULT_TTL_SECONDS, *,
+                 max_entries: int = MAX_MEMORY_ENTRIES,
+                 max_bytes: int = MAX_MEMORY_BYTES,
+                 negative_ttl: float = NEGATIVE_TTL_SECONDS,
+                 shared: bool | None = None):
         self.ttl_seconds = ttl_seconds
-        self._memory: dict[str, dict] = {}  # prompt_hash → {response, expires_at}
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.negative_ttl = negative_ttl
+        if shared is None:
+            shared = SHARED_TIER_ENABLED and cache_service.is_shared_backend()
+        self.shared = shared
+        # prompt_hash → {response, expires_at, size, purpose}; order = recency
+        self._memory: OrderedDict[str, dict] = OrderedDict()
+        self._memory_bytes = 0
+        self._negative: dict[str, float] = {}   # prompt_hash → monotonic expiry
         self._lock = Lock()
         self._stats = {"hits": 0, "misses": 0, "sets": 0, "evictions": 0}
+        self._tier_hits = {"memory": 0, "shared": 0, "db": 0}
+        self._negative_hits = 0
+        self._by_purpose = _PurposeStats()
 
     @staticmethod
     def compute_hash(messages: list, model: str) -> str:
@@ -45,44 +82,70 @@ class ResponseCacheService:
         payload = json.dumps({"messages": messages, "model": model}, sort_keys=True)
         return hashlib.sha256(payload.encode()).hexdigest()
 
-    def get(self, prompt_hash: str) -> dict | None:
+    def get(self, prompt_hash: str, purpose: str = "", *, use_negative: bool = True) -> dict | None:
         """
-        Look up cached response. Check memory first, then DB.
+        Look up cached response: memory, then shared tier, then DB.
+
+        Args:
+            prompt_hash: Key from compute_hash().
+            purpose: Caller purpose, for per-purpose hit/miss metrics.
+            use_negative: Trust a recent DB miss (False when polling for
+                another worker's result).
 
         Returns:
             dict with cached LLM response or None if miss/expired.
         """
         now = datetime.now(timezone.utc)
 
-        # Tier 1: in-memory
+        # Tier 1: in-memory LRU
         with self._lock:
             entry = self._memory.get(prompt_hash)
             if entry and entry["expires_at"] > now:
-                self._stats["hits"] += 1
+                self._memory.move_to_end(prompt_hash)
+                self._record_hit("memory", purpose)
                 return entry["response"]
             elif entry:
                 # Expired in-memory entry
-                del self._memory[prompt_hash]
+                self._drop(prompt_hash)
+
+        # Tier 2: shared Redis
+        if self.shared:
+            shared = self._shared_get(prompt_hash)
+            if shared is not None:
+                expires_at = datetime.fromisoformat(shared["expires_at"])
+                if expires_at > now:
+                    with self._lock:
+                        self._remember(prompt_hash, shared["response"], expires_at, purpose)
+                        self._record_hit("shared", purpose)
+                    return shared["response"]
+
+        with self._lock:
+            if use_negative and self._negative.get(prompt_hash, 0) > time.monotonic():
+                self._negative_hits += 1
+                self._record_miss(purpose)
+                return None
 
-        # Tier 2: DB
+        # Tier 3: DB
         try:
             cached = AIResponseCache.query.filter_by(prompt_hash=prompt_hash).first()
             if cached and not cached.is_expired():
-                # Promote to in-memory
+                # Promote to the faster tiers
                 response = json.loads(cached.response_json)
+                expires_at = cached.expires_at
+                if expires_at.tzinfo is None:
+                    expires_at = expires_at.replace(tzinfo=timezone.utc)
                 with self._lock:
-                    self._memory[prompt_hash] = {
-                        "response": response,
-                        "expires_at": cached.expires_at,
-                    }
-                    self._enforce_memory_limit()
+                    self._remember(prompt_hash, response, expires_at, purpose or cached.purpose or "")
+                if self.shared:
+                    self._shared_set(prompt_hash, response, expires_at, now)
 
                 # Update hit stats
                 cached.hit_count = (cached.hit_count or 0) + 1
                 cached.last_hit_at = now
                 db.session.flush()
 
-                self._stats["hits"] += 1
+                with self._lock:
+                    self._record_hit("db", purpose)
                 return response
             elif cached:
                 # Expired DB entry — clean up
@@ -90,26 +153,36 @@ class ResponseCacheService:
                 db.session.flush()
         except Exception as exc:
             logger.warning("Cache DB lookup failed: %s", exc)
+            with self._lock:
+                self._record_miss(purpose)
+            return None
 
-        self._stats["misses"] += 1
+        with self._lock:
+            if self.negative_ttl > 0:
+                self._negative[prompt_hash] = time.monotonic() + self.negative_ttl
+                if len(self._negative) > self.max_entries * 4:
+                    self._prune_negative()
+            self._record_miss(purpose)
         return None
 
     def set(self, prompt_hash: str, response: dict, model: str = "",
             purpose: str = "", prompt_tokens: int = 0,
             completion_tokens: int = 0, ttl_seconds: int | None = None):
-        """Store a response in both memory and DB cache."""
+        """Store a response in all tiers."""
         ttl = ttl_seconds or self.ttl_seconds
-        expires_at = datetime.now(timezone.utc) + timedelta(seconds=ttl)
+        now = datetime.now(timezone.utc)
+        expires_at = now + timedelta(seconds=ttl)
 
         # Tier 1: in-memory
         with self._lock:
-            self._memory[prompt_hash] = {
-                "response": response,
-                "expires_at": expires_at,
-            }
-            self._enforce_memory_limit()
+            self._negative.pop(prompt_hash, None)
+            self._remember(prompt_hash, response, expires_at, purpose)
+
+        # Tier 2: shared
+        if self.shared:
+            self._shared_set(prompt_hash, response, expires_at, now)
 
-        # Tier 2: DB
+        # Tier 3: DB
         try:
             existing = AIResponseCache.query.filter_by(prompt_hash=prompt_hash).first()
             if existing:
@@ -140,12 +213,25 @@ class ResponseCacheService:
         """
         with self._lock:
             if prompt_hash:
-                self._memory.pop(prompt_hash, None)
+                if prompt_hash in self._memory:
+                    self._drop(prompt_hash)
+                self._negative.pop(prompt_hash, None)
             else:
                 count = len(self._memory)
                 self._memory.clear()
+                self._memory_bytes = 0
+                self._negative.clear()
                 self._stats["evictions"] += count
 
+        if self.shared:
+            try:
+                if prompt_hash:
+                    cache_service.delete_cached(SHARED_KEY_PREFIX + prompt_hash)
+                else:
+                    cache_service.delete_pattern(SHARED_KEY_PREFIX + "*")
+            except Exception as exc:
+                logger.warning("Shared cache invalidation failed: %s", exc)
+
         try:
             if prompt_hash:
                 AIResponseCache.query.filter_by(prompt_hash=prompt_hash).delete()
@@ -169,7 +255,7 @@ class ResponseCacheService:
             return 0
 
     def get_stats(self) -> dict:
-        """Return cache statistics."""
+        """Return cache statistics (overall, per tier and per purpose)."""
         total = self._stats["hits"] + self._stats["misses"]
         hit_rate = (self._stats["hits"] / total * 100) if total > 0 else 0.0
 
@@ -181,6 +267,18 @@ class ResponseCacheService:
 
         with self._lock:
             mem_count = len(self._memory)
+            mem_bytes = self._memory_bytes
+            by_purpose = {
+                purpose: {
+                    **counts,
+                    "hit_rate_pct": round(
+                        counts["hits"] / (counts["hits"] + counts["misses"]) * 100, 2,
+                    ) if counts["hits"] + counts["misses"] else 0.0,
+                }
+                for purpose, counts in self._by_purpose.items()
+            }
+            tier_hits = dict(self._tier_hits)
+            negative_entries = len(self._negative)
 
         return {
             "hits": self._stats["hits"],
@@ -189,23 +287,84 @@ class ResponseCacheService:
             "evictions": self._stats["evictions"],
             "hit_rate_pct": round(hit_rate, 2),
             "memory_entries": mem_count,
+            "memory_bytes": mem_bytes,
+            "memory_max_bytes": self.max_bytes,
             "db_entries": db_count,
             "ttl_seconds": self.ttl_seconds,
+            "tier_hits": tier_hits,
+            "negative_hits": self._negative_hits,
+            "negative_entries": negative_entries,
+            "shared_tier": self.shared,
+            "by_purpose": by_purpose,
         }
 
     def should_cache(self, purpose: str) -> bool:
         """Check if a given purpose should be cached."""
         return purpose not in SKIP_CACHE_PURPOSES and not purpose.startswith("conversation_")
 
+    # ── Memory tier (callers hold self._lock) ─────────────────────────────
+
+    def _remember(self, prompt_hash: str, response: dict, expires_at: datetime, purpose: str):
+        """Insert/refresh an LRU entry, then evict down to the entry and byte limits."""
+        size = len(prompt_hash) + len(json.dumps(response, default=str))
+        if prompt_hash in self._memory:
+            self._drop(prompt_hash)
+        if size > self.max_bytes // 8:
+            return  # one huge response must not flush the whole tier
+        self._memory[prompt_hash] = {
+            "response": response, "expires_at": expires_at, "size": size, "purpose": purpose,
+        }
+        self._memory_bytes += size
+        self._enforce_memory_limit()
+
+    def _drop(self, prompt_hash: str) -> dict:
+        entry = self._memory.pop(prompt_hash)
+        self._memory_bytes -= entry["size"]
+        return entry
+
     def _enforce_memory_limit(self):
-        """Evict oldest entries if memory cache exceeds limit. Must hold lock."""
-        if len(self._memory) > MAX_MEMORY_ENTRIES:
-            # Sort by expires_at, evict oldest
-            sorted_keys = sorted(
-                self._memory.keys(),
-                key=lambda k: self._memory[k]["expires_at"],
+        """Evict least recently used entries past the entry/byte limits."""
+        while self._memory and (len(self._memory) > self.max_entries
+                                or self._memory_bytes > self.max_bytes):
+            oldest = next(iter(self._memory))
+            entry = self._drop(oldest)
+            self._stats["evictions"] += 1
+            self._by_purpose[entry["purpose"] or "unknown"]["evictions"] += 1
+
+    def _prune_negative(self):
+        now = time.monotonic()
+        for key in [k for k, exp in self._negative.items() if exp <= now]:
+            del self._negative[key]
+
+    def _record_hit(self, tier: str, purpose: str):
+        self._stats["hits"] += 1
+        self._tier_hits[tier] += 1
+        self._by_purpose[purpose or "unknown"]["hits"] += 1
+
+    def _record_miss(self, purpose: str):
+        self._stats["misses"] += 1
+        self._by_purpose[purpose or "unknown"]["misses"] += 1
+
+    # ── Shared tier ───────────────────────────────────────────────────────
+
+    @staticmethod
+    def _shared_get(prompt_hash: str) -> dict | None:
+        try:
+            return cache_service.get_cached(SHARED_KEY_PREFIX + prompt_hash)
+        except Exception as exc:
+            logger.debug("Shared cache read failed: %s", exc)
+            return None
+
+    @staticmethod
+    def _shared_set(prompt_hash: str, response: dict, expires_at: datetime, now: datetime):
+        ttl = int((expires_at - now).total_seconds())
+        if ttl <= 0:
+            return
+        try:
+            cache_service.set_cached(
+                SHARED_KEY_PREFIX + prompt_hash,
+                {"response": response, "expires_at": expires_at.isoformat()},
+                ttl=ttl,
             )
-            to_remove = len(self._memory) - MAX_MEMORY_ENTRIES
-            for key in sorted_keys[:to_remove]:
-                del self._memory[key]
-                self._stats["evictions"] += 1
+        except Exception as exc:
+            logger.debug("Shared cache write failed: %s", exc)
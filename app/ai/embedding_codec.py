@@ -0,0 +1,108 @@
+"""
+SAP Transformation Management Platform
+Embedding Codec — compact binary storage for RAG vectors.
+
+AIEmbedding vectors are stored as a packed little-endian blob in
+`embedding_blob`, tagged by `embedding_format`:
+
+    float32  4 bytes/dim — lossless (default)
+    float16  2 bytes/dim — ~1e-3 relative error, fine for cosine ranking
+    int8     1 byte/dim + 4-byte float32 scale header (symmetric quantisation)
+
+Dimension and model live in the existing `embedding_dim` / `embedding_model`
+columns. Legacy rows that still carry `embedding_json` are decoded
+transparently until the backfill migration has run.
+
+Usage:
+    from app.ai.embedding_codec import pack_embedding, unpack_embedding
+    blob = pack_embedding(vector, "float16")
+    vec = unpack_embedding(blob, "float16")
+"""
+
+import json
+import os
+import struct
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover — numpy is an optional accelerator
+    np = None
+
+EMBEDDING_FORMATS = {"float32", "float16", "int8"}
+# Format for new rows; "json" stores text vectors only (PostgreSQL rows always
+# keep embedding_json as well, for pgvector)
+EMBEDDING_STORAGE_FORMAT = os.getenv("AI_EMBEDDING_FORMAT", "float32")
+
+_INT8_HEADER = struct.Struct("<f")
+
+
+def pack_embedding(vector, fmt: str = "float32") -> bytes:
+    """Encode a float vector into the binary storage format."""
+    if fmt not in EMBEDDING_FORMATS:
+        raise ValueError(f"Unknown embedding format: {fmt}")
+
+    if np is not None:
+        arr = np.asarray(vector, dtype=np.float32)
+        if fmt == "float32":
+            return arr.astype("<f4").tobytes()
+        if fmt == "float16":
+            return arr.astype("<f2").tobytes()
+        max_abs = float(np.max(np.abs(arr))) if arr.size else 0.0
+        scale = max_abs / 127.0 if max_abs else 1.0
+        quantised = np.clip(np.rint(arr / scale), -127, 127).astype(np.int8)
+        return _INT8_HEADER.pack(scale) + quantised.tobytes()
+
+    values = [float(v) for v in vector]
+    if fmt == "float32":
+        return struct.pack(f"<{len(values)}f", *values)
+    if fmt == "float16":
+        return struct.pack(f"<{len(values)}e", *values)
+    max_abs = max((abs(v) for v in values), default=0.0)
+    scale = max_abs / 127.0 if max_abs else 1.0
+    quantised = [max(-127, min(127, round(v / scale))) for v in values]
+    return _INT8_HEADER.pack(scale) + struct.pack(f"<{len(quantised)}b", *quantised)
+
+
+def unpack_embedding(blob: bytes, fmt: str = "float32"):
+    """
+    Decode a stored blob.
+
+    Returns a float32 NumPy array when NumPy is available, else list[float].
+    """
+    if fmt not in EMBEDDING_FORMATS:
+        raise ValueError(f"Unknown embedding format: {fmt}")
+
+    if np is not None:
+        if fmt == "float32":
+            return np.frombuffer(blob, dtype="<f4").astype(np.float32, copy=False)
+        if fmt == "float16":
+            return np.frombuffer(blob, dtype="<f2").astype(np.float32)
+        (scale,) = _INT8_HEADER.unpack_from(blob)
+        return np.frombuffer(blob, dtype=np.int8, offset=_INT8_HEADER.size).astype(np.float32) * scale
+
+    if fmt == "float32":
+        values = array("f")
+        values.frombytes(blob)
+        return values.tolist()
+    if fmt == "float16":
+        return list(struct.unpack(f"<{len(blob) // 2}e", blob))
+    (scale,) = _INT8_HEADER.unpack_from(blob)
+    body = blob[_INT8_HEADER.size:]
+    return [v * scale for v in struct.unpack(f"<{len(body)}b", body)]
+
+
+def embedding_vector(emb):
+    """
+    Return the vector of an AIEmbedding row (binary first, JSON for legacy rows).
+
+    Returns None if the row has no vector or it cannot be decoded.
+    """
+    if emb.embedding_blob is not None:
+        return unpack_embedding(emb.embedding_blob, emb.embedding_format or "float32")
+    if emb.embedding_json:
+        try:
+            return json.loads(emb.embedding_json)
+        except (json.JSONDecodeError, ValueError):
+            return None
+    return None
@@ -12,6 +12,9 @@ Provider-agnostic LLM router with:
     - S20: Smart model selector (purpose → tier routing)
     - S20: Provider fallback chain on failure
     - S20: Token budget enforcement (per-program/user)
+    - Single-flight coalescing of identical in-flight cacheable prompts
+    - Async provider clients (pooled HTTP, non-blocking retries) via AsyncBridge
+    - Concurrent fan-out: chat_many() / embed_batches()
 
 Usage:
     from app.ai.gateway import LLMGateway
@@ -19,6 +22,7 @@ Usage:
     result = gw.chat("Classify this requirement", model="claude-3-5-haiku-20241022")
 """
 
+import asyncio
 import hashlib
 import json
 import logging
@@ -26,11 +30,76 @@ import os
 import time
 from abc import ABC, abstractmethod
 
+from app.ai.async_bridge import BRIDGE_MAX_CONCURRENCY, get_async_bridge
 from app.models import db
 from app.models.ai import AIUsageLog, AIAuditLog, calculate_cost
 
 logger = logging.getLogger(__name__)
 
+# Max concurrent provider calls for embed_batches()
+EMBED_MAX_WORKERS = int(os.getenv("LLM_EMBED_MAX_WORKERS", "4"))
+
+# Pooled async HTTP clients (one pool per provider per event loop)
+AI_HTTP_MAX_CONNECTIONS = int(os.getenv("AI_HTTP_MAX_CONNECTIONS", "20"))
+AI_HTTP_TIMEOUT = float(os.getenv("AI_HTTP_TIMEOUT", "120"))  # seconds
+
+
+class LLMCallError(RuntimeError):
+    """Primary provider retries and every fallback failed."""
+
+    def __init__(self, message, *, last_error=None, provider_name="", fallback_tried=False):
+        super().__init__(message)
+        self.last_error = last_error
+        self.provider_name = provider_name
+        self.fallback_tried = fallback_tried
+
+
+def _pooled_http_client():
+    """
+    httpx.AsyncClient with a bounded keep-alive pool; HTTP/2 when the
+    optional `h2` package is installed.
+    """
+    import httpx
+    try:
+        import h2  # noqa: F401
+        http2 = True
+    except ImportError:
+        http2 = False
+    return httpx.AsyncClient(
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=AI_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=AI_HTTP_MAX_CONNECTIONS,
+            keepalive_expiry=30,
+        ),
+        timeout=httpx.Timeout(AI_HTTP_TIMEOUT, connect=10.0),
+    )
+
+
+class _AsyncClientSlot:
+    """
+    Lazily built async SDK client bound to the running event loop.
+
+    Pooled connections cannot be shared across loops, so a client is rebuilt
+    if a different loop awaits it (normally only the AsyncBridge loop does).
+    """
+
+    def __init__(self, factory):
+        self._factory = factory  # Callable(httpx.AsyncClient) → SDK client
+        self._loop = None
+        self._client = None
+
+    def get(self):
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            http_client = _pooled_http_client()
+            self._client = self._factory(http_client)
+            self._loop = loop
+            bridge = get_async_bridge()
+            if bridge.in_bridge_thread():
+                bridge.on_close(http_client.aclose)
+        return self._client
+
 
 # ── Provider Abstract Base ────────────────────────────────────────────────────
 
@@ -62,6 +131,19 @@ class LLMProvider(ABC):
         """
         ...
 
+    async def achat(self, messages: list, model: str, **kwargs) -> dict:
+        """
+        Async chat completion (same contract as chat()).
+
+        Default runs chat() on a worker thread; providers with an async SDK
+        override this with a pooled, non-blocking client.
+        """
+        return await asyncio.to_thread(self.chat, messages, model, **kwargs)
+
+    async def aembed(self, texts: list[str], model: str) -> list[list[float]]:
+        """Async embed(); default runs embed() on a worker thread."""
+        return await asyncio.to_thread(self.embed, texts, model)
+
     def stream(self, messages: list, model: str, **kwargs):
         """
         Stream a chat completion, yielding SSE-compatible event dicts.
@@ -95,19 +177,30 @@ class AnthropicProvider(LLMProvider):
     def __init__(self):
         self.api_key = os.getenv("ANTHROPIC_API_KEY", "")
         self._client = None
+        self._async_client = None
 
     def _get_client(self):
         if self._client is None:
             try:
                 import anthropic
                 self._client = anthropic.Anthropic(api_key=self.api_key)
-            except ImportError:
-                raise RuntimeError("anthropic package not installed. Run: pip install anthropic")
+            except ImportError as exc:
+                raise RuntimeError("anthropic package not installed. Run: pip install anthropic") from exc
         return self._client
 
-    def chat(self, messages: list, model: str = "claude-3-5-haiku-20241022", **kwargs) -> dict:
-        client = self._get_client()
+    def _get_async_client(self):
+        if self._async_client is None:
+            try:
+                import anthropic
+            except ImportError as exc:
+                raise RuntimeError("anthropic package not installed. Run: pip install anthropic") from exc
+            self._async_client = _AsyncClientSlot(
+                lambda http: anthropic.AsyncAnthropic(api_key=self.api_key, http_client=http),
+            )
+        return self._async_client.get()
 
+    @staticmethod
+    def _build_params(messages: list, model: str, kwargs: dict) -> dict:
         # Separate system message
         system_msg = ""
         chat_messages = []
@@ -125,9 +218,10 @@ class AnthropicProvider(LLMProvider):
         }
         if system_msg:
             params["system"] = system_msg
+        return params
 
-        response = client.messages.create(**params)
-
+    @staticmethod
+    def _parse_response(response, model: str) -> dict:
         return {
             "content": response.content[0].text,
             "prompt_tokens": response.usage.input_tokens,
@@ -135,6 +229,19 @@ class AnthropicProvider(LLMProvider):
             "model": model,
         }
 
+    def chat(self, messages: list, model: str = "claude-3-5-haiku-20241022", **kwargs) -> dict:
+        client = self._get_client()
+        response = client.messages.create(**self._build_params(messages, model, kwargs))
+        return self._parse_response(response, model)
+
+    async def achat(self, messages: list, model: str = "claude-3-5-haiku-20241022", **kwargs) -> dict:
+        client = self._get_async_client()
+        response = await client.messages.create(**self._build_params(messages, model, kwargs))
+        return self._parse_response(response, model)
+
+    async def aembed(self, texts: list[str], model: str = "text-embedding-3-small") -> list[list[float]]:
+        raise NotImplementedError("Use OpenAI provider for embeddings")
+
     def embed(self, texts: list[str], model: str = "text-embedding-3-small") -> list[list[float]]:
         # Anthropic doesn't have embeddings, delegate to OpenAI
         raise NotImplementedError("Use OpenAI provider for embeddings")
@@ -195,24 +302,39 @@ class OpenAIProvider(LLMProvider):
     def __init__(self):
         self.api_key = os.getenv("OPENAI_API_KEY", "")
         self._client = None
+        self._async_client = None
 
     def _get_client(self):
         if self._client is None:
             try:
                 import openai
                 self._client = openai.OpenAI(api_key=self.api_key)
-            except ImportError:
-                raise RuntimeError("openai package not installed. Run: pip install openai")
+            except ImportError as exc:
+                raise RuntimeError("openai package not installed. Run: pip install openai") from exc
         return self._client
 
-    def chat(self, messages: list, model: str = "gpt-4o-mini", **kwargs) -> dict:
-        client = self._get_client()
-        response = client.chat.completions.create(
-            model=model,
-            messages=messages,
-            max_tokens=kwargs.get("max_tokens", 4096),
-            temperature=kwargs.get("temperature", 0.3),
-        )
+    def _get_async_client(self):
+        if self._async_client is None:
+            try:
+                import openai
+            except ImportError as exc:
+                raise RuntimeError("openai package not installed. Run: pip install openai") from exc
+            self._async_client = _AsyncClientSlot(
+                lambda http: openai.AsyncOpenAI(api_key=self.api_key, http_client=http),
+            )
+        return self._async_client.get()
+
+    @staticmethod
+    def _build_params(messages: list, model: str, kwargs: dict) -> dict:
+        return {
+            "model": model,
+            "messages": messages,
+            "max_tokens": kwargs.get("max_tokens", 4096),
+            "temperature": kwargs.get("temperature", 0.3),
+        }
+
+    @staticmethod
+    def _parse_response(response, model: str) -> dict:
         choice = response.choices[0]
         return {
             "content": choice.message.content,
@@ -221,11 +343,26 @@ class OpenAIProvider(LLMProvider):
             "model": model,
         }
 
+    def chat(self, messages: list, model: str = "gpt-4o-mini", **kwargs) -> dict:
+        client = self._get_client()
+        response = client.chat.completions.create(**self._build_params(messages, model, kwargs))
+        return self._parse_response(response, model)
+
+    async def achat(self, messages: list, model: str = "gpt-4o-mini", **kwargs) -> dict:
+        client = self._get_async_client()
+        response = await client.chat.completions.create(**self._build_params(messages, model, kwargs))
+        return self._parse_response(response, model)
+
     def embed(self, texts: list[str], model: str = "text-embedding-3-small") -> list[list[float]]:
         client = self._get_client()
         response = client.embeddings.create(model=model, input=texts)
         return [item.embedding for item in response.data]
 
+    async def aembed(self, texts: list[str], model: str = "text-embedding-3-small") -> list[list[float]]:
+        client = self._get_async_client()
+        response = await client.embeddings.create(model=model, input=texts)
+        return [item.embedding for item in response.data]
+
     def stream(self, messages: list, model: str = "gpt-4o-mini", **kwargs):
         """
         Stream a chat completion using OpenAI's native streaming API.
@@ -289,14 +426,15 @@ class GeminiProvider(LLMProvider):
             try:
                 from google import genai
                 self._client = genai.Client(api_key=self.api_key)
-            except ImportError:
+            except ImportError as exc:
                 raise RuntimeError(
                     "google-genai package not installed. Run: pip install google-genai"
-                )
+                ) from exc
         return self._client
 
-    def chat(self, messages: list, model: str = "gemini-2.5-flash", **kwargs) -> dict:
-        client = self._get_client()
+    @staticmethod
+    def _build_request(messages: list, kwargs: dict):
+        """Return (contents, config) for generate_content."""
         from google.genai import types
 
         # Separate system instruction from conversation messages
@@ -321,13 +459,10 @@ class GeminiProvider(LLMProvider):
         )
         if system_parts:
             config.system_instruction = "\n\n".join(system_parts)
+        return contents, config
 
-        response = client.models.generate_content(
-            model=model,
-            contents=contents,
-            config=config,
-        )
-
+    @staticmethod
+    def _parse_response(response, model: str) -> dict:
         prompt_tokens = getattr(response.usage_metadata, "prompt_token_count", 0) or 0
         completion_tokens = getattr(response.usage_metadata, "candidates_token_count", 0) or 0
 
@@ -338,18 +473,44 @@ class GeminiProvider(LLMProvider):
             "model": model,
         }
 
-    def embed(self, texts: list[str], model: str = "gemini-embedding-001") -> list[list[float]]:
-        client = self._get_client()
+    @staticmethod
+    def _embed_config():
         from google.genai import types
 
-        result = client.models.embed_content(
+        return types.EmbedContentConfig(
+            task_type="RETRIEVAL_DOCUMENT",
+            output_dimensionality=1536,  # good balance of quality vs storage
+        )
+
+    def chat(self, messages: list, model: str = "gemini-2.5-flash", **kwargs) -> dict:
+        client = self._get_client()
+        contents, config = self._build_request(messages, kwargs)
+        response = client.models.generate_content(
+            model=model,
+            contents=contents,
+            config=config,
+        )
+        return self._parse_response(response, model)
+
+    async def achat(self, messages: list, model: str = "gemini-2.5-flash", **kwargs) -> dict:
+        # google-genai's async surface keeps its own pooled HTTP client
+        client = self._get_client()
+        contents, config = self._build_request(messages, kwargs)
+        response = await client.aio.models.generate_content(
             model=model,
-            contents=texts,
-            config=types.EmbedContentConfig(
-                task_type="RETRIEVAL_DOCUMENT",
-                output_dimensionality=1536,  # good balance of quality vs storage
-            ),
+            contents=contents,
+            config=config,
         )
+        return self._parse_response(response, model)
+
+    def embed(self, texts: list[str], model: str = "gemini-embedding-001") -> list[list[float]]:
+        client = self._get_client()
+        result = client.models.embed_content(model=model, contents=texts, config=self._embed_config())
+        return [e.values for e in result.embeddings]
+
+    async def aembed(self, texts: list[str], model: str = "gemini-embedding-001") -> list[list[float]]:
+        client = self._get_client()
+        result = await client.aio.models.embed_content(model=model, contents=texts, config=self._embed_config())
         return [e.values for e in result.embeddings]
 
     def stream(self, messages: list, model: str = "gemini-2.5-flash", **kwargs):
@@ -691,6 +852,8 @@ class LLMGateway:
         self._cache = None
         self._model_selector = None
         self._budget_service = None
+        self._budget_ledger = None
+        self._single_flight = None
         self._init_perf_services()
 
     # ── S20 Performance Service Initialisation ────────────────────────────
@@ -712,11 +875,17 @@ class LLMGateway:
             logger.debug("ModelSelector not available: %s", e)
 
         try:
-            from app.ai.budget import TokenBudgetService
+            from app.ai.budget import BUDGET_LEDGER_ENABLED, BudgetLedger, TokenBudgetService
             self._budget_service = TokenBudgetService()
+            if BUDGET_LEDGER_ENABLED:
+                self._budget_ledger = BudgetLedger()
         except Exception as e:
             logger.debug("TokenBudgetService not available: %s", e)
 
+        from app.ai.single_flight import SINGLE_FLIGHT_ENABLED, SingleFlight
+        if SINGLE_FLIGHT_ENABLED:
+            self._single_flight = SingleFlight()
+
     def _init_providers(self):
         """Initialize available providers based on environment."""
         # Always register local stub
@@ -768,6 +937,8 @@ class LLMGateway:
             - Budget enforcement (token + cost limits)
             - Smart model selection by purpose
             - Fallback chain on provider failure
+            - Single-flight: concurrent identical cacheable prompts share
+              one provider call (followers get ``coalesced: True``)
 
         Args:
             messages: Chat messages.
@@ -791,36 +962,12 @@ class LLMGateway:
             model = self.DEFAULT_CHAT_MODEL
 
         # ── S20: Cache lookup ─────────────────────────────────────────────
-        cache_hit = False
-        if (not skip_cache
-                and self._cache
-                and self._cache.should_cache(purpose)):
-            prompt_hash_cache = self._cache.compute_hash(messages, model)
-            cached = self._cache.get(prompt_hash_cache)
+        cacheable = bool(not skip_cache and self._cache and self._cache.should_cache(purpose))
+        prompt_hash_cache = self._cache.compute_hash(messages, model) if cacheable else None
+        if cacheable:
+            cached = self._cache.get(prompt_hash_cache, purpose=purpose)
             if cached is not None:
-                cache_hit = True
-                # cached is the raw response value (str or dict) stored via set()
-                if isinstance(cached, dict):
-                    content = cached.get("content", str(cached))
-                    p_tok = cached.get("prompt_tokens", 0)
-                    c_tok = cached.get("completion_tokens", 0)
-                    c_model = cached.get("model", model)
-                else:
-                    content = str(cached)
-                    p_tok = 0
-                    c_tok = 0
-                    c_model = model
-                result = {
-                    "content": content,
-                    "prompt_tokens": p_tok,
-                    "completion_tokens": c_tok,
-                    "model": c_model,
-                    "cost_usd": 0.0,
-                    "latency_ms": 0,
-                    "provider": "cache",
-                    "cache_hit": True,
-                    "fallback_provider": None,
-                }
+                result = self._result_from_cached(cached, model)
                 self._log_usage(
                     provider="cache", model=model,
                     prompt_tokens=0, completion_tokens=0,
@@ -831,187 +978,341 @@ class LLMGateway:
                 return result
 
         # ── S20: Budget check ─────────────────────────────────────────────
-        if not skip_budget and self._budget_service:
-            budget_check = self._budget_service.check_budget(
-                program_id=program_id, user=user,
-            )
+        if not skip_budget:
+            budget_check = self._check_budget(program_id, user)
             if not budget_check["allowed"]:
                 raise RuntimeError(f"Budget exceeded: {budget_check['reason']}")
 
-        # ── Build provider chain (primary + fallbacks) ────────────────────
-        provider, provider_name = self._get_provider(model)
+        def _call():
+            return self._call_providers(
+                messages, model, purpose=purpose, user=user, program_id=program_id,
+                max_retries=max_retries, skip_cache=skip_cache, skip_budget=skip_budget,
+                **kwargs,
+            )
+
+        if not cacheable or self._single_flight is None:
+            return _call()
+
+        # ── Single-flight: identical in-flight prompts share one provider call
+        start_time = time.time()
+        result, shared = self._single_flight.do(
+            prompt_hash_cache, _call,
+            poll=lambda: self._poll_cached_result(prompt_hash_cache, model),
+        )
+        if not shared:
+            return result
+
+        latency_ms = int((time.time() - start_time) * 1000)
+        result = {**result, "cost_usd": 0.0, "latency_ms": latency_ms, "coalesced": True}
+        self._log_usage(
+            provider="coalesced", model=result.get("model", model),
+            prompt_tokens=0, completion_tokens=0,
+            cost_usd=0.0, latency_ms=latency_ms,
+            user=user, purpose=purpose, program_id=program_id,
+            success=True, cache_hit=True,
+        )
+        return result
+
+    @staticmethod
+    def _result_from_cached(cached, model: str) -> dict:
+        """Shape a ResponseCacheService value like a provider result."""
+        # cached is the raw response value (str or dict) stored via set()
+        if isinstance(cached, dict):
+            content = cached.get("content", str(cached))
+            p_tok = cached.get("prompt_tokens", 0)
+            c_tok = cached.get("completion_tokens", 0)
+            c_model = cached.get("model", model)
+        else:
+            content = str(cached)
+            p_tok = 0
+            c_tok = 0
+            c_model = model
+        return {
+            "content": content,
+            "prompt_tokens": p_tok,
+            "completion_tokens": c_tok,
+            "model": c_model,
+            "cost_usd": 0.0,
+            "latency_ms": 0,
+            "provider": "cache",
+            "cache_hit": True,
+            "fallback_provider": None,
+        }
+
+    def _poll_cached_result(self, prompt_hash: str, model: str) -> dict | None:
+        """Cache probe used while another worker's leader call is in flight."""
+        cached = self._cache.get(prompt_hash, use_negative=False)
+        return None if cached is None else self._result_from_cached(cached, model)
+
+    def _call_providers(
+        self,
+        messages: list,
+        model: str,
+        *,
+        purpose: str,
+        user: str,
+        program_id: int | None,
+        max_retries: int,
+        skip_cache: bool,
+        skip_budget: bool,
+        **kwargs,
+    ) -> dict:
+        """Primary provider with retries, then the fallback chain (cache miss path)."""
         prompt_hash = hashlib.sha256(json.dumps(messages).encode()).hexdigest()
         prompt_summary = messages[-1]["content"][:500] if messages else ""
+        try:
+            result = get_async_bridge().run(
+                self.achat(messages, model, max_retries=max_retries, **kwargs),
+            )
+        except LLMCallError as e:
+            self._record_failure(
+                e, model=model, user=user, purpose=purpose, program_id=program_id,
+                prompt_hash=prompt_hash, prompt_summary=prompt_summary,
+            )
+            raise
+        self._record_success(
+            result, messages, model, purpose=purpose, user=user, program_id=program_id,
+            skip_cache=skip_cache, skip_budget=skip_budget,
+            prompt_hash=prompt_hash, prompt_summary=prompt_summary,
+        )
+        return result
+
+    def _record_success(self, result, messages, model, *, purpose, user, program_id,
+                        skip_cache, skip_budget, prompt_hash, prompt_summary):
+        """Cache, budget and usage/audit bookkeeping for a provider result."""
+        provider_name = result["provider"]
+        served_model = result["model"] if result["fallback_provider"] else model
+        cost = result["cost_usd"]
+        latency_ms = result["latency_ms"]
+        fallback_provider_used = result["fallback_provider"]
+        total_tokens = result["prompt_tokens"] + result["completion_tokens"]
+
+        # S20: Store in cache (keyed by the requested model, also for fallback results)
+        if (not skip_cache
+                and self._cache
+                and self._cache.should_cache(purpose)):
+            self._cache.set(
+                prompt_hash=self._cache.compute_hash(messages, model),
+                response={
+                    "content": result["content"],
+                    "model": served_model,
+                    "prompt_tokens": result["prompt_tokens"],
+                    "completion_tokens": result["completion_tokens"],
+                },
+                model=served_model,
+                purpose=purpose,
+                prompt_tokens=result["prompt_tokens"],
+                completion_tokens=result["completion_tokens"],
+            )
 
-        fallback_chain: list[tuple[str, str]] = []  # (model, provider_name)
-        if self._model_selector:
-            for fb_model in self._model_selector.get_fallback_chain(model):
-                fb_prov = self.PROVIDER_MAP.get(fb_model, "local")
-                if fb_prov in self._providers:
-                    fallback_chain.append((fb_model, fb_prov))
+        # S20: Record budget usage
+        if not skip_budget:
+            self._record_budget_usage(program_id, user, total_tokens, cost)
 
-        # ── Primary attempt with retries ──────────────────────────────────
-        last_error = None
-        fallback_provider_used = None
+        # Log usage + audit
+        self._log_usage(
+            provider=provider_name, model=served_model,
+            prompt_tokens=result["prompt_tokens"],
+            completion_tokens=result["completion_tokens"],
+            cost_usd=cost, latency_ms=latency_ms,
+            user=user, purpose=purpose, program_id=program_id,
+            success=True, cache_hit=False,
+            fallback_provider=fallback_provider_used,
+        )
+        self._log_audit(
+            action="llm_call", provider=provider_name, model=served_model,
+            user=user, program_id=program_id,
+            prompt_hash=prompt_hash, prompt_summary=prompt_summary,
+            tokens_used=total_tokens,
+            cost_usd=cost, latency_ms=latency_ms,
+            response_summary=result["content"][:500],
+            success=True, cache_hit=False,
+            fallback_used=fallback_provider_used is not None,
+        )
 
-        for attempt in range(1, max_retries + 1):
-            start_time = time.time()
-            try:
-                result = provider.chat(messages, model, **kwargs)
-                latency_ms = int((time.time() - start_time) * 1000)
-
-                cost = calculate_cost(model, result["prompt_tokens"], result["completion_tokens"])
-                result["cost_usd"] = cost
-                result["latency_ms"] = latency_ms
-                result["provider"] = provider_name
-                result["cache_hit"] = False
-                result["fallback_provider"] = fallback_provider_used
-
-                # S20: Store in cache
-                if (not skip_cache
-                        and self._cache
-                        and self._cache.should_cache(purpose)):
-                    self._cache.set(
-                        prompt_hash=self._cache.compute_hash(messages, model),
-                        response={
-                            "content": result["content"],
-                            "model": model,
-                            "prompt_tokens": result["prompt_tokens"],
-                            "completion_tokens": result["completion_tokens"],
-                        },
-                        model=model,
-                        purpose=purpose,
-                        prompt_tokens=result["prompt_tokens"],
-                        completion_tokens=result["completion_tokens"],
-                    )
+    def _record_failure(self, error, *, model, user, purpose, program_id, prompt_hash, prompt_summary):
+        """Usage/audit records for a call whose primary and fallbacks all failed."""
+        self._log_usage(
+            provider=error.provider_name, model=model,
+            prompt_tokens=0, completion_tokens=0,
+            cost_usd=0.0, latency_ms=0,
+            user=user, purpose=purpose, program_id=program_id,
+            success=False, error_message=str(error.last_error),
+            cache_hit=False, fallback_provider=None,
+        )
+        self._log_audit(
+            action="llm_call", provider=error.provider_name, model=model,
+            user=user, program_id=program_id,
+            prompt_hash=prompt_hash, prompt_summary=prompt_summary,
+            tokens_used=0, cost_usd=0.0, latency_ms=0,
+            response_summary="", success=False, error_message=str(error.last_error),
+            cache_hit=False, fallback_used=error.fallback_tried,
+        )
 
-                # S20: Record budget usage
-                if not skip_budget and self._budget_service:
-                    total_tokens = result["prompt_tokens"] + result["completion_tokens"]
-                    self._budget_service.record_usage(
-                        program_id=program_id, user=user,
-                        tokens=total_tokens, cost_usd=cost,
-                    )
+    # ── Async API (network I/O only) ──────────────────────────────────────
 
-                # Log usage + audit
-                self._log_usage(
-                    provider=provider_name, model=model,
-                    prompt_tokens=result["prompt_tokens"],
-                    completion_tokens=result["completion_tokens"],
-                    cost_usd=cost, latency_ms=latency_ms,
-                    user=user, purpose=purpose, program_id=program_id,
-                    success=True, cache_hit=False,
-                    fallback_provider=fallback_provider_used,
-                )
-                self._log_audit(
-                    action="llm_call", provider=provider_name, model=model,
-                    user=user, program_id=program_id,
-                    prompt_hash=prompt_hash, prompt_summary=prompt_summary,
-                    tokens_used=result["prompt_tokens"] + result["completion_tokens"],
-                    cost_usd=cost, latency_ms=latency_ms,
-                    response_summary=result["content"][:500],
-                    success=True, cache_hit=False,
-                    fallback_used=fallback_provider_used is not None,
-                )
+    async def achat(
+        self,
+        messages: list,
+        model: str | None = None,
+        *,
+        purpose: str = "",
+        max_retries: int = 3,
+        **kwargs,
+    ) -> dict:
+        """
+        Async chat completion: primary provider with non-blocking retries,
+        then the fallback chain.
 
-                return result
+        Performs network I/O only — no cache, budget or DB logging, so it is
+        safe to await on the AsyncBridge loop. chat() and chat_many() wrap it
+        with the bookkeeping.
 
+        Returns:
+            dict: {content, prompt_tokens, completion_tokens, model, cost_usd,
+                   latency_ms, provider, cache_hit, fallback_provider}
+
+        Raises:
+            LLMCallError: primary retries and all fallbacks failed.
+        """
+        if model is None and self._model_selector:
+            model = self._model_selector.select(purpose=purpose)
+        if model is None:
+            model = self.DEFAULT_CHAT_MODEL
+
+        provider, provider_name = self._get_provider(model)
+        last_error = None
+
+        for attempt in range(1, max_retries + 1):
+            start_time = time.time()
+            try:
+                result = await provider.achat(messages, model, **kwargs)
+                return self._finish_result(result, model, provider_name, start_time, None)
             except Exception as e:
                 last_error = e
-                latency_ms = int((time.time() - start_time) * 1000)
                 logger.warning("LLM call attempt %d/%d failed: %s", attempt, max_retries, e)
-
                 if attempt < max_retries:
-                    backoff = min(2 ** (attempt - 1), 4)
-                    import threading as _threading
-                    _threading.Event().wait(backoff)
+                    await asyncio.sleep(min(2 ** (attempt - 1), 4))
 
         # ── S20: Fallback chain after primary exhausted ───────────────────
+        fallback_chain = self._fallback_chain(model)
         for fb_model, fb_prov_name in fallback_chain:
             fb_provider = self._providers[fb_prov_name]
             logger.info("Trying fallback: model=%s provider=%s", fb_model, fb_prov_name)
             start_time = time.time()
             try:
-                result = fb_provider.chat(messages, fb_model, **kwargs)
-                latency_ms = int((time.time() - start_time) * 1000)
-                cost = calculate_cost(fb_model, result["prompt_tokens"], result["completion_tokens"])
-
-                fallback_provider_used = fb_prov_name
-                result["cost_usd"] = cost
-                result["latency_ms"] = latency_ms
-                result["provider"] = fb_prov_name
-                result["cache_hit"] = False
-                result["fallback_provider"] = fallback_provider_used
-
-                # Cache the fallback result too
-                if (not skip_cache
-                        and self._cache
-                        and self._cache.should_cache(purpose)):
-                    self._cache.set(
-                        prompt_hash=self._cache.compute_hash(messages, model),
-                        response={
-                            "content": result["content"],
-                            "model": fb_model,
-                            "prompt_tokens": result["prompt_tokens"],
-                            "completion_tokens": result["completion_tokens"],
-                        },
-                        model=fb_model,
-                        purpose=purpose,
-                        prompt_tokens=result["prompt_tokens"],
-                        completion_tokens=result["completion_tokens"],
-                    )
+                result = await fb_provider.achat(messages, fb_model, **kwargs)
+                return self._finish_result(result, fb_model, fb_prov_name, start_time, fb_prov_name)
+            except Exception as fb_err:
+                logger.warning("Fallback %s/%s failed: %s", fb_prov_name, fb_model, fb_err)
+                last_error = fb_err
 
-                # Budget recording
-                if not skip_budget and self._budget_service:
-                    total_tokens = result["prompt_tokens"] + result["completion_tokens"]
-                    self._budget_service.record_usage(
-                        program_id=program_id, user=user,
-                        tokens=total_tokens, cost_usd=cost,
+        raise LLMCallError(
+            f"LLM call failed after {max_retries} retries: {last_error}",
+            last_error=last_error, provider_name=provider_name,
+            fallback_tried=len(fallback_chain) > 0,
+        )
+
+    async def aembed(self, texts: list[str], model: str | None = None) -> list[list[float]]:
+        """Async embeddings (network I/O only; see embed() for the logged variant)."""
+        provider, _ = self._get_provider(model or self.DEFAULT_EMBED_MODEL)
+        return await provider.aembed(texts, model or self.DEFAULT_EMBED_MODEL)
+
+    def chat_many(
+        self,
+        requests: list[dict],
+        *,
+        purpose: str = "",
+        user: str = "system",
+        program_id: int | None = None,
+        max_retries: int = 3,
+        skip_cache: bool = False,
+        skip_budget: bool = False,
+        limit: int = BRIDGE_MAX_CONCURRENCY,
+    ) -> list[dict | Exception]:
+        """
+        Fan out many chat completions concurrently from sync code.
+
+        Cache hits are served first; misses run as one batch of achat()
+        coroutines on the AsyncBridge (at most *limit* in flight) while the
+        calling thread waits once. Caching, budget and logging happen on the
+        calling thread afterwards.
+
+        Args:
+            requests: [{"messages": [...], "model": optional, **provider kwargs}]
+
+        Returns:
+            One result dict per request, or the exception that request raised.
+        """
+        if not skip_budget:
+            budget_check = self._check_budget(program_id, user)
+            if not budget_check["allowed"]:
+                raise RuntimeError(f"Budget exceeded: {budget_check['reason']}")
+
+        cacheable = bool(not skip_cache and self._cache and self._cache.should_cache(purpose))
+        results: list = [None] * len(requests)
+        pending = []  # (index, messages, model, kwargs)
+        for i, req in enumerate(requests):
+            req = dict(req)
+            messages = req.pop("messages")
+            model = req.pop("model", None)
+            if model is None and self._model_selector:
+                model = self._model_selector.select(purpose=purpose)
+            model = model or self.DEFAULT_CHAT_MODEL
+            if cacheable:
+                cached = self._cache.get(self._cache.compute_hash(messages, model), purpose=purpose)
+                if cached is not None:
+                    results[i] = self._result_from_cached(cached, model)
+                    self._log_usage(
+                        provider="cache", model=model,
+                        prompt_tokens=0, completion_tokens=0,
+                        cost_usd=0.0, latency_ms=0,
+                        user=user, purpose=purpose, program_id=program_id,
+                        success=True, cache_hit=True,
                     )
+                    continue
+            pending.append((i, messages, model, req))
 
-                self._log_usage(
-                    provider=fb_prov_name, model=fb_model,
-                    prompt_tokens=result["prompt_tokens"],
-                    completion_tokens=result["completion_tokens"],
-                    cost_usd=cost, latency_ms=latency_ms,
-                    user=user, purpose=purpose, program_id=program_id,
-                    success=True, cache_hit=False,
-                    fallback_provider=fallback_provider_used,
+        outcomes = get_async_bridge().gather(
+            [self.achat(m, model, max_retries=max_retries, **kw) for _, m, model, kw in pending],
+            limit=limit,
+        )
+        for (i, messages, model, _), outcome in zip(pending, outcomes):
+            prompt_hash = hashlib.sha256(json.dumps(messages).encode()).hexdigest()
+            prompt_summary = messages[-1]["content"][:500] if messages else ""
+            if isinstance(outcome, LLMCallError):
+                self._record_failure(
+                    outcome, model=model, user=user, purpose=purpose, program_id=program_id,
+                    prompt_hash=prompt_hash, prompt_summary=prompt_summary,
                 )
-                self._log_audit(
-                    action="llm_call", provider=fb_prov_name, model=fb_model,
-                    user=user, program_id=program_id,
+            elif not isinstance(outcome, BaseException):
+                self._record_success(
+                    outcome, messages, model, purpose=purpose, user=user, program_id=program_id,
+                    skip_cache=skip_cache, skip_budget=skip_budget,
                     prompt_hash=prompt_hash, prompt_summary=prompt_summary,
-                    tokens_used=result["prompt_tokens"] + result["completion_tokens"],
-                    cost_usd=cost, latency_ms=latency_ms,
-                    response_summary=result["content"][:500],
-                    success=True, cache_hit=False, fallback_used=True,
                 )
+            results[i] = outcome
+        return results
 
-                return result
-
-            except Exception as fb_err:
-                logger.warning("Fallback %s/%s failed: %s", fb_prov_name, fb_model, fb_err)
-                last_error = fb_err
+    def _fallback_chain(self, model: str) -> list[tuple[str, str]]:
+        """Fallback (model, provider_name) pairs with a registered provider."""
+        chain = []
+        if self._model_selector:
+            for fb_model in self._model_selector.get_fallback_chain(model):
+                fb_prov = self.PROVIDER_MAP.get(fb_model, "local")
+                if fb_prov in self._providers:
+                    chain.append((fb_model, fb_prov))
+        return chain
 
-        # All retries + fallbacks exhausted
-        self._log_usage(
-            provider=provider_name, model=model,
-            prompt_tokens=0, completion_tokens=0,
-            cost_usd=0.0, latency_ms=0,
-            user=user, purpose=purpose, program_id=program_id,
-            success=False, error_message=str(last_error),
-            cache_hit=False, fallback_provider=None,
-        )
-        self._log_audit(
-            action="llm_call", provider=provider_name, model=model,
-            user=user, program_id=program_id,
-            prompt_hash=prompt_hash, prompt_summary=prompt_summary,
-            tokens_used=0, cost_usd=0.0, latency_ms=0,
-            response_summary="", success=False, error_message=str(last_error),
-            cache_hit=False, fallback_used=len(fallback_chain) > 0,
-        )
-        raise RuntimeError(f"LLM call failed after {max_retries} retries: {last_error}")
+    @staticmethod
+    def _finish_result(result, model, provider_name, start_time, fallback_provider) -> dict:
+        """Add cost/latency/provider metadata to a raw provider result."""
+        result["latency_ms"] = int((time.time() - start_time) * 1000)
+        result["cost_usd"] = calculate_cost(model, result["prompt_tokens"], result["completion_tokens"])
+        result["provider"] = provider_name
+        result["cache_hit"] = False
+        result["fallback_provider"] = fallback_provider
+        return result
 
     def embed(
         self,
@@ -1075,6 +1376,80 @@ class LLMGateway:
             )
             raise
 
+    def embed_batches(
+        self,
+        batches: list[list[str]],
+        model: str | None = None,
+        *,
+        purpose: str = "embedding",
+        user: str = "system",
+        program_id: int | None = None,
+        max_workers: int = EMBED_MAX_WORKERS,
+    ) -> list[list[list[float]] | None]:
+        """
+        Embed several text batches concurrently.
+
+        Provider calls run as aembed() coroutines on the AsyncBridge with at
+        most *max_workers* in flight (they are network-bound and touch no DB
+        state); usage and audit records are written afterwards on the calling
+        thread as one aggregated entry, since they need the request's DB
+        session.
+
+        Args:
+            batches: Lists of strings, each sized for one provider call.
+            model: Embedding model (defaults to DEFAULT_EMBED_MODEL).
+            max_workers: Upper bound on in-flight provider calls.
+
+        Returns:
+            One entry per batch: its vectors, or None if that call failed.
+        """
+        if model is None:
+            model = self.DEFAULT_EMBED_MODEL
+        if not batches:
+            return []
+
+        provider, provider_name = self._get_provider(model)
+        start_time = time.time()
+        results: list[list[list[float]] | None] = [None] * len(batches)
+        errors = []
+
+        outcomes = get_async_bridge().gather(
+            [provider.aembed(texts, model) for texts in batches], limit=max_workers,
+        )
+        for i, outcome in enumerate(outcomes):
+            if isinstance(outcome, BaseException):
+                logger.error("Embedding batch %d/%d failed: %s", i + 1, len(batches), outcome)
+                errors.append(str(outcome))
+            else:
+                results[i] = outcome
+
+        latency_ms = int((time.time() - start_time) * 1000)
+        n_texts = sum(len(b) for b in batches)
+        total_tokens = sum(
+            len(t.split()) * 2  # rough estimate
+            for texts, vectors in zip(batches, results) if vectors is not None
+            for t in texts
+        )
+        cost = calculate_cost(model, total_tokens, 0)
+        success = not errors
+
+        self._log_usage(
+            provider=provider_name, model=model,
+            prompt_tokens=total_tokens, completion_tokens=0,
+            cost_usd=cost, latency_ms=latency_ms,
+            user=user, purpose=purpose, program_id=program_id,
+            success=success, error_message=None if success else errors[0],
+        )
+        self._log_audit(
+            action="embedding_create", provider=provider_name, model=model,
+            user=user, program_id=program_id,
+            prompt_hash="", prompt_summary=f"Embedding {n_texts} texts in {len(batches)} batches",
+            tokens_used=total_tokens, cost_usd=cost, latency_ms=latency_ms,
+            response_summary=f"{len(batches) - len(errors)}/{len(batches)} batches embedded",
+            success=success, error_message=None if success else errors[0],
+        )
+        return results
+
     def stream(
         self,
         messages: list,
@@ -1109,13 +1484,10 @@ class LLMGateway:
         if model is None:
             model = self.DEFAULT_CHAT_MODEL
 
-        if self._budget_service:
-            budget_check = self._budget_service.check_budget(
-                program_id=program_id, user=user,
-            )
-            if not budget_check["allowed"]:
-                yield {"type": "error", "message": f"Budget exceeded: {budget_check['reason']}"}
-                return
+        budget_check = self._check_budget(program_id, user)
+        if not budget_check["allowed"]:
+            yield {"type": "error", "message": f"Budget exceeded: {budget_check['reason']}"}
+            return
 
         provider, provider_name = self._get_provider(model)
         prompt_hash = hashlib.sha256(json.dumps(messages).encode()).hexdigest()
@@ -1128,12 +1500,10 @@ class LLMGateway:
                     cost = calculate_cost(model, usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0))
                     usage["cost_usd"] = cost
                     usage["provider"] = provider_name
-                    if self._budget_service:
-                        self._budget_service.record_usage(
-                            program_id=program_id, user=user,
-                            tokens=usage.get("prompt_tokens", 0) + usage.get("completion_tokens", 0),
-                            cost_usd=cost,
-                        )
+                    self._record_budget_usage(
+                        program_id, user,
+                        usage.get("prompt_tokens", 0) + usage.get("completion_tokens", 0), cost,
+                    )
                     self._log_usage(
                         provider=provider_name, model=model,
                         prompt_tokens=usage.get("prompt_tokens", 0),
@@ -1163,6 +1533,21 @@ class LLMGateway:
             )
             yield {"type": "error", "message": str(e)}
 
+    # ── Budget ────────────────────────────────────────────────────────────
+
+    def _check_budget(self, program_id, user) -> dict:
+        """Budget check via the in-memory ledger when enabled, else the DB service."""
+        if self._budget_service is None:
+            return {"allowed": True, "reason": None, "budget": None}
+        budget = self._budget_ledger or self._budget_service
+        return budget.check_budget(program_id=program_id, user=user)
+
+    def _record_budget_usage(self, program_id, user, tokens, cost_usd):
+        if self._budget_service is None:
+            return
+        budget = self._budget_ledger or self._budget_service
+        budget.record_usage(program_id=program_id, user=user, tokens=tokens, cost_usd=cost_usd)
+
     # ── Internal Logging ──────────────────────────────────────────────────
 
     @staticmethod
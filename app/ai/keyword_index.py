@@ -0,0 +1,224 @@
+"""
+SAP Transformation Management Platform
+Keyword Index — persisted inverted index for the RAG BM25 leg.
+
+Replaces per-query re-tokenisation of every candidate chunk with postings
+stored in `ai_keyword_postings` (term → chunk, tf) plus the chunk length in
+`AIEmbedding.token_count`. Document frequencies are per-program posting
+counts, so a query only reads the postings of its own terms.
+
+Scoring uses MaxScore-style early termination: terms are processed in
+descending IDF order and, once the current k-th best score exceeds the
+best any unseen document could still reach, the remaining (low-IDF, long)
+posting lists are only read for documents already seen that those terms
+could still lift past it.
+
+Maintenance (write paths only — search() never writes):
+    - index_records(): called when RAGPipeline stores new active chunks
+    - remove():        called when chunks are deactivated
+    - ensure_indexed(): catches up active rows without postings (re-activated
+      KB versions, rows written outside the pipeline) on index_entity and
+      KB activation
+
+Usage:
+    from app.ai.keyword_index import KeywordIndex
+    scores = KeywordIndex.search("payment block", program_id=1, limit=30)
+"""
+
+import heapq
+import logging
+import math
+import re
+from collections import Counter, defaultdict
+
+from app.models import db
+from app.models.ai import AIEmbedding, AIKeywordPosting
+
+logger = logging.getLogger(__name__)
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+MAX_TERM_LENGTH = 64          # Matches AIKeywordPosting.term column size
+CATCH_UP_BATCH = 500          # Rows indexed per ensure_indexed round trip
+_IN_CLAUSE_CHUNK = 500        # Keep IN (...) lists well below SQLite's variable limit
+
+
+def tokenize(text: str) -> list[str]:
+    """Simple whitespace + punctuation tokenizer, lowercased."""
+    return re.findall(r"\b\w+\b", (text or "").lower())
+
+
+class KeywordIndex:
+    """Static helpers over the persisted inverted index."""
+
+    # ── Maintenance ───────────────────────────────────────────────────────
+
+    @staticmethod
+    def index_records(records: list[AIEmbedding]) -> int:
+        """
+        Add postings for freshly stored (flushed) chunks and set token_count.
+
+        Returns the number of postings written. Caller commits.
+        """
+        rows = []
+        for rec in records:
+            counts = Counter(t[:MAX_TERM_LENGTH] for t in tokenize(rec.chunk_text))
+            rec.token_count = sum(counts.values())
+            rows.extend(
+                {"embedding_id": rec.id, "program_id": rec.program_id, "term": term, "tf": tf}
+                for term, tf in counts.items()
+            )
+        if rows:
+            db.session.execute(db.insert(AIKeywordPosting), rows)
+        return len(rows)
+
+    @staticmethod
+    def remove(embedding_ids: list[int]) -> int:
+        """
+        Delete postings for deactivated chunks. Caller commits.
+
+        token_count is reset to NULL so a chunk that is re-activated later
+        (KB version rollback) is indexed again on activation.
+        """
+        removed = 0
+        for chunk in _chunks(list(embedding_ids)):
+            removed += AIKeywordPosting.query.filter(
+                AIKeywordPosting.embedding_id.in_(chunk),
+            ).delete(synchronize_session=False)
+            AIEmbedding.query.filter(AIEmbedding.id.in_(chunk)).update(
+                {"token_count": None}, synchronize_session=False,
+            )
+        return removed
+
+    @staticmethod
+    def remove_matching(query) -> int:
+        """remove() for every chunk matched by an AIEmbedding query."""
+        ids = [row.id for row in query.with_entities(AIEmbedding.id).all()]
+        return KeywordIndex.remove(ids)
+
+    @staticmethod
+    def ensure_indexed(base_q) -> int:
+        """
+        Index active rows matched by *base_q* that have no postings yet
+        (re-activated rows, rows written outside RAGPipeline). Flushes only;
+        caller commits.
+        """
+        total = 0
+        while True:
+            pending = base_q.filter(AIEmbedding.token_count.is_(None)).limit(CATCH_UP_BATCH).all()
+            if not pending:
+                break
+            KeywordIndex.index_records(pending)
+            db.session.flush()
+            total += len(pending)
+            if len(pending) < CATCH_UP_BATCH:
+                break
+        if total:
+            logger.info("KeywordIndex: caught up %d unindexed chunks", total)
+        return total
+
+    # ── Search ────────────────────────────────────────────────────────────
+
+    @staticmethod
+    def search(
+        query: str,
+        *,
+        program_id: int | None = None,
+        entity_type: str | None = None,
+        module: str | None = None,
+        limit: int = 30,
+    ) -> dict[int, float]:
+        """
+        BM25 scores for the best *limit* chunks, normalised to [0, 1].
+
+        Collection statistics (N, avgdl, df) are per program; entity_type
+        and module only restrict which postings are scored.
+        """
+        terms = sorted({t[:MAX_TERM_LENGTH] for t in tokenize(query)})
+        if not terms or limit <= 0:
+            return {}
+
+        n_docs, avg_dl = KeywordIndex._collection_stats(program_id)
+        if not n_docs:
+            return {}
+        df = KeywordIndex._document_frequencies(terms, program_id)
+        idf = {
+            t: math.log((n_docs - df[t] + 0.5) / (df[t] + 0.5) + 1)
+            for t in terms if df.get(t)
+        }
+        if not idf:
+            return {}
+
+        # Highest-IDF terms first; suffix_bound[i] = best score achievable from terms[i:]
+        ordered = sorted(idf, key=idf.get, reverse=True)
+        suffix_bound = [0.0] * (len(ordered) + 1)
+        for i in range(len(ordered) - 1, -1, -1):
+            suffix_bound[i] = suffix_bound[i + 1] + idf[ordered[i]] * (BM25_K1 + 1)
+
+        filters = dict(program_id=program_id, entity_type=entity_type, module=module)
+        scores: dict[int, float] = defaultdict(float)
+        for i, term in enumerate(ordered):
+            restrict_to = None
+            if len(scores) >= limit:
+                threshold = heapq.nlargest(limit, scores.values())[-1]
+                if threshold >= suffix_bound[i]:
+                    # Unseen documents can no longer reach the top set; seen ones
+                    # only while the remaining terms could still lift them past it
+                    restrict_to = [doc for doc, score in scores.items()
+                                   if score + suffix_bound[i] > threshold]
+            for emb_id, tf, dl in KeywordIndex._postings(term, restrict_to, **filters):
+                norm = tf * (BM25_K1 + 1) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * (dl or 0) / max(avg_dl, 1)))
+                scores[emb_id] += idf[term] * norm
+
+        top = heapq.nlargest(limit, scores.items(), key=lambda x: x[1])
+        if not top:
+            return {}
+        max_score = top[0][1] or 1.0
+        return {emb_id: score / max_score for emb_id, score in top}
+
+    # ── Internal ──────────────────────────────────────────────────────────
+
+    @staticmethod
+    def _collection_stats(program_id) -> tuple[int, float]:
+        q = db.session.query(
+            db.func.count(AIEmbedding.id),
+            db.func.avg(AIEmbedding.token_count),
+        ).filter(AIEmbedding.is_active.is_(True), AIEmbedding.token_count.isnot(None))
+        if program_id:
+            q = q.filter(AIEmbedding.program_id == program_id)
+        n_docs, avg_dl = q.one()
+        return int(n_docs or 0), float(avg_dl or 0.0)
+
+    @staticmethod
+    def _document_frequencies(terms, program_id) -> dict[str, int]:
+        q = db.session.query(
+            AIKeywordPosting.term, db.func.count(AIKeywordPosting.id),
+        ).filter(AIKeywordPosting.term.in_(terms))
+        if program_id:
+            q = q.filter(AIKeywordPosting.program_id == program_id)
+        return dict(q.group_by(AIKeywordPosting.term).all())
+
+    @staticmethod
+    def _postings(term, restrict_to, *, program_id, entity_type, module):
+        q = (
+            db.session.query(AIKeywordPosting.embedding_id, AIKeywordPosting.tf, AIEmbedding.token_count)
+            .join(AIEmbedding, AIEmbedding.id == AIKeywordPosting.embedding_id)
+            .filter(AIKeywordPosting.term == term, AIEmbedding.is_active.is_(True))
+        )
+        if program_id:
+            q = q.filter(AIKeywordPosting.program_id == program_id)
+        if entity_type:
+            q = q.filter(AIEmbedding.entity_type == entity_type)
+        if module:
+            q = q.filter(AIEmbedding.module == module)
+        if restrict_to is None:
+            return q.all()
+        rows = []
+        for chunk in _chunks(restrict_to):
+            rows.extend(q.filter(AIKeywordPosting.embedding_id.in_(chunk)).all())
+        return rows
+
+
+def _chunks(items: list, size: int = _IN_CLAUSE_CHUNK):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
@@ -3,15 +3,28 @@ SAP Transformation Management Platform
 AI Orchestrator — Sprint 21.
 
 Chains multiple AI assistants in predefined workflows.
+Steps declare their dependencies and independent steps run concurrently.
 Uses the TaskRunner for async execution tracking.
 """
 
+import hashlib
 import json
 import logging
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from datetime import datetime, timezone
 
+from flask import current_app, has_app_context
+
+from app.ai.task_runner import current_task_id
+from app.services import cache_service
+
 logger = logging.getLogger(__name__)
 
+WORKFLOW_MAX_PARALLEL = int(os.getenv("AI_WORKFLOW_MAX_PARALLEL", "4"))
+WORKFLOW_STEP_CACHE_TTL = int(os.getenv("AI_WORKFLOW_STEP_CACHE_TTL", "3600"))  # seconds, 0 = off
+
 
 # ── Workflow Definitions ──────────────────────────────────────────────────
 
@@ -20,63 +33,125 @@ WORKFLOW_DEFINITIONS = {
         "name": "Requirement → Change Impact → Test Cases → WRICEF Spec",
         "description": "Full traceability pipeline from a requirement through to specification",
         "steps": [
-            {"assistant": "requirement_analyst", "method": "analyze", "input_key": "text"},
-            {"assistant": "change_impact", "method": "analyze", "input_key": "requirement_text",
-             "map_from": {"requirement_text": "$.summary"}},
-            {"assistant": "test_case_generator", "method": "generate", "input_key": "requirement_text",
-             "map_from": {"requirement_text": "$.summary"}},
-            {"assistant": "wricef_spec", "method": "generate_spec", "input_key": "requirement_text",
-             "map_from": {"requirement_text": "$.summary"}},
+            {"id": "requirement", "assistant": "requirement_analyst", "method": "analyze",
+             "input_key": "text"},
+            {"id": "impact", "assistant": "change_impact", "method": "analyze", "input_key": "requirement_text",
+             "depends_on": ["requirement"], "map_from": {"requirement_text": "$.summary"}},
+            {"id": "test_cases", "assistant": "test_case_generator", "method": "generate",
+             "input_key": "requirement_text",
+             "depends_on": ["requirement"], "map_from": {"requirement_text": "$.summary"}},
+            {"id": "spec", "assistant": "wricef_spec", "method": "generate_spec", "input_key": "requirement_text",
+             "depends_on": ["requirement"], "map_from": {"requirement_text": "$.summary"}},
         ],
     },
     "risk_to_mitigation": {
         "name": "Risk Assessment → Change Impact → Test Cases",
         "description": "From risk analysis through impact and test coverage",
         "steps": [
-            {"assistant": "risk_assessment", "method": "assess", "input_key": "context"},
-            {"assistant": "change_impact", "method": "analyze", "input_key": "requirement_text",
-             "map_from": {"requirement_text": "$.top_risks"}},
-            {"assistant": "test_case_generator", "method": "generate", "input_key": "requirement_text",
-             "map_from": {"requirement_text": "$.top_risks"}},
+            {"id": "risks", "assistant": "risk_assessment", "method": "assess", "input_key": "context"},
+            {"id": "impact", "assistant": "change_impact", "method": "analyze", "input_key": "requirement_text",
+             "depends_on": ["risks"], "map_from": {"requirement_text": "$.top_risks"}},
+            {"id": "test_cases", "assistant": "test_case_generator", "method": "generate",
+             "input_key": "requirement_text",
+             "depends_on": ["risks"], "map_from": {"requirement_text": "$.top_risks"}},
         ],
     },
     "migration_full_analysis": {
         "name": "Data Migration → Reconciliation → Risk Assessment",
         "description": "Complete data migration workflow with reconciliation and risk",
         "steps": [
-            {"assistant": "data_migration", "method": "analyze", "input_key": "scope"},
-            {"assistant": "data_migration", "method": "reconciliation_check", "input_key": "data_object",
-             "map_from": {"data_object": "$.strategy"}},
-            {"assistant": "risk_assessment", "method": "assess", "input_key": "context",
-             "map_from": {"context": "$.risk_areas"}},
+            {"id": "migration", "assistant": "data_migration", "method": "analyze", "input_key": "scope"},
+            {"id": "reconciliation", "assistant": "data_migration", "method": "reconciliation_check",
+             "input_key": "data_object",
+             "depends_on": ["migration"], "map_from": {"data_object": "$.strategy"}},
+            {"id": "risks", "assistant": "risk_assessment", "method": "assess", "input_key": "context",
+             "depends_on": ["migration"], "map_from": {"context": "$.risk_areas"}},
         ],
     },
     "integration_validation": {
         "name": "Integration Dependencies → Switch Plan Validate → Risk",
         "description": "Integration analysis and switch plan validation workflow",
         "steps": [
-            {"assistant": "integration_analyst", "method": "analyze_dependencies", "input_key": "program_id"},
-            {"assistant": "risk_assessment", "method": "assess", "input_key": "context",
-             "map_from": {"context": "$.risks"}},
+            {"id": "dependencies", "assistant": "integration_analyst", "method": "analyze_dependencies",
+             "input_key": "program_id"},
+            {"id": "risks", "assistant": "risk_assessment", "method": "assess", "input_key": "context",
+             "depends_on": ["dependencies"], "map_from": {"context": "$.risks"}},
         ],
     },
 }
 
 
+def plan_workflow(defn: dict) -> list[dict]:
+    """
+    Normalise a workflow definition into DAG nodes.
+
+    Each node gets an ``id`` (default ``step<N>``) and a ``depends_on`` list.
+    Legacy steps without ``depends_on`` keep their old meaning: a step with
+    ``map_from`` reads the previous step, a step without it is a root.
+
+    Raises:
+        ValueError: On duplicate ids, unknown dependencies or cycles.
+    """
+    nodes = []
+    ids = set()
+    for i, step in enumerate(defn["steps"]):
+        node = dict(step)
+        node["index"] = i
+        node["id"] = step.get("id") or f"step{i + 1}"
+        if node["id"] in ids:
+            raise ValueError(f"Duplicate workflow step id: {node['id']}")
+        ids.add(node["id"])
+        if "depends_on" in step:
+            node["depends_on"] = list(step["depends_on"])
+        elif step.get("map_from") and nodes:
+            node["depends_on"] = [nodes[-1]["id"]]
+        else:
+            node["depends_on"] = []
+        nodes.append(node)
+
+    for node in nodes:
+        unknown = [d for d in node["depends_on"] if d not in ids]
+        if unknown:
+            raise ValueError(f"Step {node['id']} depends on unknown step(s): {unknown}")
+
+    # Kahn's algorithm — only used to reject cycles up front
+    remaining = {n["id"]: set(n["depends_on"]) for n in nodes}
+    while remaining:
+        ready = [k for k, deps in remaining.items() if not deps]
+        if not ready:
+            raise ValueError(f"Workflow has a dependency cycle: {sorted(remaining)}")
+        for k in ready:
+            del remaining[k]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+    return nodes
+
+
 class AIOrchestrator:
     """
     Orchestrates multi-step AI workflows by chaining assistants
-    and threading outputs forward as inputs to the next step.
+    and threading outputs forward as inputs to dependent steps.
+
+    Steps form a DAG (``depends_on``); every step whose dependencies have
+    finished runs concurrently on a small thread pool, so a workflow takes
+    roughly the time of its critical path. Step outputs are memoised in the
+    shared cache by an input hash, so re-running a workflow with the same
+    inputs skips the LLM calls.
     """
 
-    def __init__(self, assistants: dict, task_runner=None):
+    def __init__(self, assistants: dict, task_runner=None, max_parallel: int | None = None,
+                 step_cache_ttl: int | None = None):
         """
         Args:
             assistants: Dict mapping assistant_name → assistant instance.
             task_runner: Optional TaskRunner for async execution.
+            max_parallel: Concurrent steps per workflow (default AI_WORKFLOW_MAX_PARALLEL).
+            step_cache_ttl: Step memo TTL in seconds, 0 disables (default AI_WORKFLOW_STEP_CACHE_TTL).
         """
         self.assistants = assistants
         self.task_runner = task_runner
+        self.max_parallel = max(1, max_parallel if max_parallel is not None else WORKFLOW_MAX_PARALLEL)
+        self.step_cache_ttl = step_cache_ttl if step_cache_ttl is not None else WORKFLOW_STEP_CACHE_TTL
 
     def list_workflows(self) -> list[dict]:
         """List all registered workflows."""
@@ -86,12 +161,17 @@ class AIOrchestrator:
                 "name": defn["name"],
                 "description": defn["description"],
                 "steps": len(defn["steps"]),
+                "graph": [
+                    {"id": n["id"], "assistant": n["assistant"], "method": n["method"],
+                     "depends_on": n["depends_on"]}
+                    for n in plan_workflow(defn)
+                ],
             }
             for key, defn in WORKFLOW_DEFINITIONS.items()
         ]
 
     def execute(self, workflow_name: str, initial_input: dict,
-                program_id: int = 0, user: str = "system") -> dict:
+                program_id: int = 0, user: str = "system", *, use_cache: bool = True) -> dict:
         """
         Execute a workflow synchronously.
 
@@ -100,104 +180,95 @@ class AIOrchestrator:
             initial_input: Dict of initial parameters.
             program_id: Associated program.
             user: User triggering the workflow.
+            use_cache: Read memoised step outputs (fresh outputs are always stored).
 
         Returns:
-            Dict with step_results, final_output, workflow, status, etc.
+            Dict with step_results, final_output, workflow, status, timings, etc.
+        """
+        for event in self.iter_execute(workflow_name, initial_input, program_id, user, use_cache=use_cache):
+            if event["type"] in ("done", "error"):
+                return event["result"]
+        return {}  # pragma: no cover — iter_execute always ends with done/error
+
+    def iter_execute(self, workflow_name: str, initial_input: dict,
+                     program_id: int = 0, user: str = "system", *, use_cache: bool = True):
+        """
+        Execute a workflow, yielding events as steps finish.
+
+        Yields:
+            {"type": "step", "result": step_result} — in completion order
+            {"type": "done", "result": workflow_result} — once, last
+            {"type": "error", "result": {...}} — unknown workflow (only event)
         """
         defn = WORKFLOW_DEFINITIONS.get(workflow_name)
         if not defn:
-            return {
+            yield {"type": "error", "result": {
                 "error": f"Unknown workflow: {workflow_name}",
                 "available_workflows": list(WORKFLOW_DEFINITIONS.keys()),
-            }
+            }}
+            return
+
+        nodes = plan_workflow(defn)
+        by_id = {n["id"]: n for n in nodes}
+        pending = {n["id"]: set(n["depends_on"]) for n in nodes}
+        outputs: dict[str, dict] = {}
+        results: dict[str, dict] = {}
+        started = time.perf_counter()
+
+        app = current_app._get_current_object() if has_app_context() else None
+        pool = ThreadPoolExecutor(max_workers=self.max_parallel, thread_name_prefix="ai-workflow")
+        running = {}
+        try:
+            while pending or running:
+                ready = [sid for sid, deps in pending.items() if not deps]
+                for sid in ready:
+                    del pending[sid]
+                    node = by_id[sid]
+                    dep_outputs = [outputs[d] for d in node["depends_on"] if d in outputs]
+                    prepared = self._prepare_step(node, initial_input, dep_outputs, program_id)
+                    if "status" in prepared:  # skipped before running
+                        running[_done_future(prepared)] = sid
+                    else:
+                        running[pool.submit(self._run_step, app, node, prepared, use_cache)] = sid
 
-        step_results = []
-        current_data = dict(initial_input)
-        last_output = {}
-
-        for i, step in enumerate(defn["steps"]):
-            assistant_name = step["assistant"]
-            method_name = step["method"]
-            input_key = step.get("input_key")
-
-            assistant = self.assistants.get(assistant_name)
-            if not assistant:
-                step_results.append({
-                    "step": i + 1,
-                    "assistant": assistant_name,
-                    "method": method_name,
-                    "status": "skipped",
-                    "reason": f"Assistant '{assistant_name}' not available",
-                })
-                continue
-
-            method = getattr(assistant, method_name, None)
-            if not method:
-                step_results.append({
-                    "step": i + 1,
-                    "assistant": assistant_name,
-                    "method": method_name,
-                    "status": "skipped",
-                    "reason": f"Method '{method_name}' not found",
-                })
-                continue
-
-            # Build kwargs for this step
-            kwargs = {"program_id": program_id}
-            if "create_suggestion" in method.__code__.co_varnames:
-                kwargs["create_suggestion"] = False
-
-            # Map outputs from previous steps if mapping defined
-            if step.get("map_from") and last_output:
-                for param, json_path in step["map_from"].items():
-                    mapped = self._resolve_path(last_output, json_path)
-                    if mapped is not None:
-                        kwargs[param] = mapped if isinstance(mapped, str) else json.dumps(mapped)
-
-            # Provide input_key from initial_input if not already mapped
-            if input_key and input_key not in kwargs:
-                if input_key in current_data:
-                    kwargs[input_key] = current_data[input_key]
-
-            try:
-                result = method(**kwargs)
-                step_results.append({
-                    "step": i + 1,
-                    "assistant": assistant_name,
-                    "method": method_name,
-                    "status": "completed",
-                    "output": result,
-                })
-                if isinstance(result, dict):
-                    last_output = result
-            except Exception as exc:
-                logger.warning(
-                    "Workflow %s step %d failed: %s", workflow_name, i + 1, exc
-                )
-                step_results.append({
-                    "step": i + 1,
-                    "assistant": assistant_name,
-                    "method": method_name,
-                    "status": "failed",
-                    "error": str(exc),
-                })
-                last_output = {}
-
-        completed_steps = sum(
-            1 for s in step_results if s["status"] == "completed"
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    sid = running.pop(future)
+                    step_result = future.result()
+                    results[sid] = step_result
+                    if step_result["status"] == "completed" and isinstance(step_result.get("output"), dict):
+                        outputs[sid] = step_result["output"]
+                    for deps in pending.values():
+                        deps.discard(sid)
+                    if step_result["status"] == "failed":
+                        logger.warning("Workflow %s step %s failed: %s",
+                                       workflow_name, sid, step_result.get("error"))
+                    yield {"type": "step", "result": step_result}
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+        step_results = [results[n["id"]] for n in nodes]
+        completed_steps = sum(1 for s in step_results if s["status"] == "completed")
+        final_output = next(
+            (outputs[n["id"]] for n in reversed(nodes) if n["id"] in outputs), {},
         )
-        return {
+        yield {"type": "done", "result": {
             "workflow": workflow_name,
             "workflow_name": defn["name"],
-            "status": "completed" if completed_steps == len(defn["steps"]) else "partial",
-            "total_steps": len(defn["steps"]),
+            "status": "completed" if completed_steps == len(nodes) else "partial",
+            "total_steps": len(nodes),
             "completed_steps": completed_steps,
             "step_results": step_results,
-            "final_output": last_output,
+            "final_output": final_output,
+            "timings": {
+                "elapsed_ms": int((time.perf_counter() - started) * 1000),
+                "sequential_ms": sum(s.get("latency_ms", 0) for s in step_results),
+                "critical_path_ms": self._critical_path_ms(nodes, results),
+            },
             "executed_at": datetime.now(timezone.utc).isoformat(),
             "user": user,
             "program_id": program_id,
-        }
+        }}
 
     def execute_async(self, workflow_name: str, initial_input: dict,
                       program_id: int = 0, user: str = "system") -> dict:
@@ -212,8 +283,20 @@ class AIOrchestrator:
                 "available_workflows": list(WORKFLOW_DEFINITIONS.keys()),
             }
 
+        total = len(defn["steps"])
+        runner = self.task_runner
+
         def _run(input_data):
-            return self.execute(workflow_name, input_data, program_id, user)
+            task_id = current_task_id()
+            finished = 0
+            for event in self.iter_execute(workflow_name, input_data, program_id, user):
+                if event["type"] == "step":
+                    finished += 1
+                    if task_id and finished < total:
+                        runner.update_progress(task_id, int(finished * 100 / total))
+                else:
+                    return event["result"]
+            return {}
 
         task = self.task_runner.submit(
             task_type=f"workflow_{workflow_name}",
@@ -225,6 +308,110 @@ class AIOrchestrator:
         )
         return task
 
+    # ── Step execution ─────────────────────────────────────────────────
+
+    def _prepare_step(self, node: dict, initial_input: dict, dep_outputs: list[dict],
+                      program_id: int) -> dict:
+        """Resolve the method and kwargs for a step, or return a skipped result."""
+        assistant_name = node["assistant"]
+        method_name = node["method"]
+        base = {"step": node["index"] + 1, "id": node["id"],
+                "assistant": assistant_name, "method": method_name}
+
+        assistant = self.assistants.get(assistant_name)
+        if not assistant:
+            return {**base, "status": "skipped", "latency_ms": 0,
+                    "reason": f"Assistant '{assistant_name}' not available"}
+        method = getattr(assistant, method_name, None)
+        if not method:
+            return {**base, "status": "skipped", "latency_ms": 0,
+                    "reason": f"Method '{method_name}' not found"}
+
+        # Build kwargs for this step
+        kwargs = {"program_id": program_id}
+        if "create_suggestion" in method.__code__.co_varnames:
+            kwargs["create_suggestion"] = False
+
+        # Map outputs from dependencies (first dependency that has the path wins)
+        for param, json_path in (node.get("map_from") or {}).items():
+            for dep_output in dep_outputs:
+                mapped = self._resolve_path(dep_output, json_path)
+                if mapped is not None:
+                    kwargs[param] = mapped if isinstance(mapped, str) else json.dumps(mapped)
+                    break
+
+        # Provide input_key from initial_input if not already mapped
+        input_key = node.get("input_key")
+        if input_key and input_key not in kwargs and input_key in initial_input:
+            kwargs[input_key] = initial_input[input_key]
+
+        return {"base": base, "method": method, "kwargs": kwargs}
+
+    def _run_step(self, app, node: dict, prepared: dict, use_cache: bool) -> dict:
+        """Pool worker: run one step in its own app context."""
+        if app is None:
+            return self._call_step(node, prepared, use_cache)
+        with app.app_context():
+            return self._call_step(node, prepared, use_cache)
+
+    def _call_step(self, node: dict, prepared: dict, use_cache: bool) -> dict:
+        base, method, kwargs = prepared["base"], prepared["method"], prepared["kwargs"]
+        started = time.perf_counter()
+        cache_key = self._step_cache_key(node, kwargs) if self.step_cache_ttl > 0 else None
+
+        if cache_key and use_cache:
+            cached = self._cache_get(cache_key)
+            if cached is not None:
+                return {**base, "status": "completed", "output": cached, "cached": True,
+                        "latency_ms": int((time.perf_counter() - started) * 1000)}
+
+        try:
+            result = method(**kwargs)
+        except Exception as exc:
+            return {**base, "status": "failed", "error": str(exc),
+                    "latency_ms": int((time.perf_counter() - started) * 1000)}
+
+        if cache_key and isinstance(result, dict) and not result.get("error"):
+            self._cache_set(cache_key, result)
+        return {**base, "status": "completed", "output": result, "cached": False,
+                "latency_ms": int((time.perf_counter() - started) * 1000)}
+
+    @staticmethod
+    def _step_cache_key(node: dict, kwargs: dict) -> str:
+        payload = json.dumps(
+            {"assistant": node["assistant"], "method": node["method"], "kwargs": kwargs},
+            sort_keys=True, default=str,
+        )
+        return f"ai:wf:step:{hashlib.sha256(payload.encode()).hexdigest()}"
+
+    def _cache_get(self, key: str):
+        try:
+            return cache_service.get_cached(key)
+        except Exception as e:
+            logger.debug("Workflow step cache read failed: %s", e)
+            return None
+
+    def _cache_set(self, key: str, value: dict):
+        try:
+            cache_service.set_cached(key, value, ttl=self.step_cache_ttl)
+        except (TypeError, ValueError):
+            logger.debug("Workflow step output not JSON-serialisable; not memoised")
+        except Exception as e:
+            logger.debug("Workflow step cache write failed: %s", e)
+
+    @staticmethod
+    def _critical_path_ms(nodes: list[dict], results: dict) -> int:
+        """Longest dependency chain by measured step latency (nodes are topologically valid)."""
+        finish: dict[str, int] = {}
+        remaining = list(nodes)
+        while remaining:
+            for node in list(remaining):
+                if all(d in finish for d in node["depends_on"]):
+                    start = max((finish[d] for d in node["depends_on"]), default=0)
+                    finish[node["id"]] = start + results[node["id"]].get("latency_ms", 0)
+                    remaining.remove(node)
+        return max(finish.values(), default=0)
+
     # ── Helpers ────────────────────────────────────────────────────────
 
     @staticmethod
@@ -244,3 +431,9 @@ class AIOrchestrator:
             else:
                 return None
         return current
+
+
+def _done_future(value) -> Future:
+    future = Future()
+    future.set_result(value)
+    return future
@@ -7,8 +7,11 @@ Entity-aware chunking + hybrid search (semantic + keyword).
 Features:
     - Entity-aware chunking strategies per model type
     - Embedding generation (via LLM Gateway)
-    - Hybrid search: semantic (cosine) + keyword (FTS) + RRF fusion
-    - Batch indexing for bulk operations
+    - Hybrid search: semantic (cosine) + keyword (BM25) + RRF fusion
+    - Persisted inverted index for the keyword leg (app.ai.keyword_index)
+    - ANN vector index for the semantic leg when pgvector is absent
+    - Binary packed vectors (float32 / float16 / int8) instead of JSON text
+    - Bulk indexing: one hash prefetch, concurrent batched embeds, batched commits
     - Content-hash-based staleness detection (Sprint 9.5)
     - Non-destructive versioned re-indexing
 
@@ -23,11 +26,14 @@ import hashlib
 import json
 import logging
 import math
-import re
 from collections import defaultdict
 
+from app.ai.embedding_codec import EMBEDDING_STORAGE_FORMAT, embedding_vector, pack_embedding
+from app.ai.keyword_index import KeywordIndex
+from app.ai.task_runner import TaskRunner, current_task_id, register_task_handler
+from app.ai.vector_index import get_vector_index_registry
 from app.models import db
-from app.models.ai import AIEmbedding, compute_content_hash
+from app.models.ai import AIEmbedding, AITask, KBVersion, compute_content_hash
 
 logger = logging.getLogger(__name__)
 
@@ -36,6 +42,10 @@ logger = logging.getLogger(__name__)
 MAX_CHUNK_TOKENS = 512        # Max tokens per chunk (approx words × 1.3)
 OVERLAP_TOKENS = 64           # Overlap between consecutive chunks
 EMBEDDING_DIM = 1536          # text-embedding-3-small dimension
+EMBED_BATCH_SIZE = 100        # Texts per provider embed call (batch_index)
+INDEX_COMMIT_BATCH = 200      # Changed entities per commit (batch_index)
+_IN_CLAUSE_CHUNK = 500        # Keep IN (...) lists well below SQLite's variable limit
+CATCH_UP_WINDOW = 1000        # Ids below the ANN synced id re-scanned for late commits
 
 
 # ── Chunking Engine ───────────────────────────────────────────────────────────
@@ -302,14 +312,24 @@ class RAGPipeline:
     Handles indexing (chunk + embed + store) and searching (hybrid retrieval).
     """
 
-    def __init__(self, gateway=None):
+    def __init__(self, gateway=None, vector_index=None):
         """
         Args:
             gateway: LLMGateway instance for embedding calls.
                      If None, embeddings must be provided externally.
+            vector_index: VectorIndexRegistry for the semantic leg.
+                          If None, the process-wide registry is used.
         """
         self.gateway = gateway
         self.chunker = ChunkingEngine()
+        self._vector_index = vector_index
+
+    @property
+    def vector_index(self):
+        """ANN registry (None when disabled or NumPy is unavailable)."""
+        if self._vector_index is not None:
+            return self._vector_index
+        return get_vector_index_registry()
 
     # ── Indexing ──────────────────────────────────────────────────────────
 
@@ -347,28 +367,29 @@ class RAGPipeline:
         content_hash = compute_content_hash(full_text)
 
         # Check if content is unchanged (skip re-embedding)
-        existing = AIEmbedding.query.filter_by(
+        active_q = AIEmbedding.query.filter_by(
             entity_type=entity_type,
             entity_id=entity_id,
             is_active=True,
-        ).first()
+        )
+        existing = active_q.first()
         if existing and existing.content_hash == content_hash:
             logger.debug("Entity %s/%d unchanged (hash match), skipping", entity_type, entity_id)
             return []
 
         # Deactivate old embeddings (non-destructive)
-        AIEmbedding.query.filter_by(
-            entity_type=entity_type, entity_id=entity_id, is_active=True,
-        ).update({"is_active": False})
+        deactivated = active_q.with_entities(AIEmbedding.id, AIEmbedding.program_id).all()
+        active_q.update({"is_active": False})
+        KeywordIndex.remove([row.id for row in deactivated])
 
         if not chunks:
             db.session.commit()
+            self._sync_vector_index(entity_type, deactivated, [], None)
             return []
 
         # Generate embeddings if gateway available
         embeddings_vectors = None
         embedding_model_name = None
-        embedding_dim = None
         if embed and self.gateway:
             try:
                 texts = [c["text"] for c in chunks]
@@ -376,70 +397,246 @@ class RAGPipeline:
                     texts, purpose="rag_indexing", program_id=program_id,
                 )
                 embedding_model_name = getattr(self.gateway, "embedding_model", None)
-                if embeddings_vectors and embeddings_vectors[0]:
-                    embedding_dim = len(embeddings_vectors[0])
             except Exception as e:
                 logger.warning("Embedding generation failed, storing without vectors: %s", e)
 
         # Store chunks
+        records = self._build_records(
+            entity_type, entity_id, program_id, chunks, embeddings_vectors,
+            kb_version=kb_version, content_hash=content_hash,
+            embedding_model=embedding_model_name, source_updated_at=source_updated_at,
+        )
+        db.session.add_all(records)
+        db.session.flush()
+        KeywordIndex.index_records(records)
+        KeywordIndex.ensure_indexed(AIEmbedding.query.filter(AIEmbedding.is_active.is_(True)))
+        db.session.commit()
+        self._sync_vector_index(entity_type, deactivated, records, embeddings_vectors)
+        return records
+
+    @staticmethod
+    def _build_records(entity_type, entity_id, program_id, chunks, vectors, *,
+                       kb_version, content_hash, embedding_model, source_updated_at):
+        """Build (unsaved) AIEmbedding rows for one entity's chunks."""
         records = []
         for i, chunk in enumerate(chunks):
-            vec_json = None
-            if embeddings_vectors and i < len(embeddings_vectors):
-                vec_json = json.dumps(embeddings_vectors[i])
-
-            rec = AIEmbedding(
+            vec = vectors[i] if vectors and i < len(vectors) else None
+            vec_json = vec_blob = vec_format = None
+            if vec:
+                if EMBEDDING_STORAGE_FORMAT != "json":
+                    vec_blob = pack_embedding(vec, EMBEDDING_STORAGE_FORMAT)
+                    vec_format = EMBEDDING_STORAGE_FORMAT
+                if vec_blob is None or _on_postgresql():
+                    vec_json = json.dumps(list(vec))  # pgvector scores the text column
+
+            records.append(AIEmbedding(
                 entity_type=entity_type,
                 entity_id=entity_id,
                 program_id=program_id,
                 chunk_text=chunk["text"],
                 chunk_index=chunk["chunk_index"],
                 embedding_json=vec_json,
+                embedding_blob=vec_blob,
+                embedding_format=vec_format,
                 module=chunk.get("module", ""),
                 phase=chunk.get("phase", ""),
                 metadata_json=chunk.get("metadata", "{}"),
                 kb_version=kb_version,
                 content_hash=content_hash,
-                embedding_model=embedding_model_name,
-                embedding_dim=embedding_dim,
+                embedding_model=embedding_model if vec else None,
+                embedding_dim=len(vec) if vec else None,
                 is_active=True,
                 source_updated_at=source_updated_at,
-            )
-            db.session.add(rec)
-            records.append(rec)
-
-        db.session.commit()
+            ))
         return records
 
+    def _sync_vector_index(self, entity_type, deactivated, records, vectors):
+        """Apply an indexing write to the ANN index (remove old, add new)."""
+        registry = self.vector_index
+        if registry is None:
+            return
+        try:
+            removed_by_program = defaultdict(list)
+            for emb_id, prog_id in deactivated:
+                removed_by_program[prog_id].append(emb_id)
+            for prog_id, ids in removed_by_program.items():
+                registry.remove(prog_id, entity_type, ids)
+
+            if records and vectors:
+                added_by_program = defaultdict(lambda: ([], [], []))
+                for rec, vec in zip(records, vectors):
+                    if vec:
+                        ids, vecs, tags = added_by_program[rec.program_id]
+                        ids.append(rec.id)
+                        vecs.append(vec)
+                        tags.append(rec.module)
+                for prog_id, (ids, vecs, tags) in added_by_program.items():
+                    registry.add(prog_id, entity_type, ids, vecs, tags)
+            registry.flush()
+        except Exception as e:
+            logger.warning("Vector index update failed for %s: %s", entity_type, e)
+
     def batch_index(
         self,
         entities: list[dict],
         program_id: int | None = None,
         embed: bool = True,
+        *,
+        kb_version: str = "1.0.0",
+        commit_every: int = INDEX_COMMIT_BATCH,
+        embed_batch_size: int = EMBED_BATCH_SIZE,
+        max_workers: int | None = None,
+        task_id: int | None = None,
     ) -> int:
         """
-        Index multiple entities in batch.
+        Index multiple entities in bulk.
+
+        Unlike calling index_entity() in a loop, the active content hashes of
+        all entities are fetched up front, chunk texts of many entities are
+        packed into provider-sized embed calls that run concurrently, and rows
+        are inserted and committed once per *commit_every* changed entities.
 
         Args:
             entities: List of {"entity_type": ..., "entity_id": ..., "data": {...}}
+                      (optional "program_id", "source_updated_at").
             program_id: Default program association.
             embed: Generate embeddings.
+            kb_version: Version tag for this indexing run.
+            commit_every: Changed entities per transaction.
+            embed_batch_size: Texts per provider embed call.
+            max_workers: Concurrent embed calls (gateway default if None).
+            task_id: AITask to report progress to; a cancelled task stops
+                     the run after the current batch.
 
         Returns:
             Total number of chunks created.
         """
-        total = 0
+        # Chunk + hash everything first (CPU only); the last entry per entity wins
+        prepared = {}
         for ent in entities:
-            recs = self.index_entity(
-                entity_type=ent["entity_type"],
-                entity_id=ent["entity_id"],
-                entity_data=ent["data"],
-                program_id=ent.get("program_id", program_id),
-                embed=embed,
+            chunks = self.chunker.chunk_entity(ent["entity_type"], ent["data"])
+            prepared[(ent["entity_type"], ent["entity_id"])] = {
+                "entity_type": ent["entity_type"],
+                "entity_id": ent["entity_id"],
+                "program_id": ent.get("program_id", program_id),
+                "chunks": chunks,
+                "content_hash": compute_content_hash(" ".join(c["text"] for c in chunks)),
+                "source_updated_at": ent.get("source_updated_at"),
+            }
+
+        active = _active_rows_by_entity(list(prepared))
+        changed = [
+            item for key, item in prepared.items()
+            if key not in active or active[key]["content_hash"] != item["content_hash"]
+        ]
+        logger.info("batch_index: %d entities, %d changed", len(prepared), len(changed))
+
+        runner = TaskRunner() if task_id else None
+        total = 0
+        commit_every = max(1, commit_every)
+        for start in range(0, len(changed), commit_every):
+            if runner and _task_cancelled(task_id):
+                logger.info("batch_index: task %d cancelled after %d entities", task_id, start)
+                break
+            batch = changed[start:start + commit_every]
+            total += self._index_batch(
+                batch, active, embed, kb_version, embed_batch_size, max_workers, program_id,
             )
-            total += len(recs)
+            if runner:
+                runner.update_progress(task_id, int((start + len(batch)) * 100 / len(changed)))
+                db.session.commit()
+
+        if self.vector_index is not None:
+            self.vector_index.flush(force=True)
         return total
 
+    def _index_batch(self, batch, active, embed, kb_version, embed_batch_size, max_workers,
+                     program_id) -> int:
+        """Deactivate, embed, insert and commit one batch_index() batch."""
+        # Deactivate previous versions in bulk
+        deactivated = defaultdict(list)
+        old_ids = []
+        for item in batch:
+            rows = active.get((item["entity_type"], item["entity_id"]), {}).get("rows", [])
+            deactivated[item["entity_type"]].extend(rows)
+            old_ids.extend(emb_id for emb_id, _ in rows)
+        for start in range(0, len(old_ids), _IN_CLAUSE_CHUNK):
+            AIEmbedding.query.filter(
+                AIEmbedding.id.in_(old_ids[start:start + _IN_CLAUSE_CHUNK]),
+            ).update({"is_active": False}, synchronize_session=False)
+        KeywordIndex.remove(old_ids)
+
+        # Embed all chunk texts of the batch in provider-sized concurrent calls
+        texts = [c["text"] for item in batch for c in item["chunks"]]
+        flat_vectors = None
+        if embed and self.gateway and texts:
+            flat_vectors = self._embed_texts(texts, embed_batch_size, max_workers, program_id)
+        embedding_model_name = getattr(self.gateway, "embedding_model", None)
+
+        records_by_type = defaultdict(list)
+        vectors_by_type = defaultdict(list)
+        offset = 0
+        for item in batch:
+            n = len(item["chunks"])
+            vectors = flat_vectors[offset:offset + n] if flat_vectors else None
+            offset += n
+            records = self._build_records(
+                item["entity_type"], item["entity_id"], item["program_id"],
+                item["chunks"], vectors,
+                kb_version=kb_version, content_hash=item["content_hash"],
+                embedding_model=embedding_model_name,
+                source_updated_at=item["source_updated_at"],
+            )
+            records_by_type[item["entity_type"]].extend(records)
+            vectors_by_type[item["entity_type"]].extend(vectors or [None] * n)
+
+        all_records = [rec for recs in records_by_type.values() for rec in recs]
+        db.session.add_all(all_records)
+        db.session.flush()
+        KeywordIndex.index_records(all_records)
+        db.session.commit()
+
+        for entity_type in set(deactivated) | set(records_by_type):
+            self._sync_vector_index(
+                entity_type, deactivated.get(entity_type, []),
+                records_by_type.get(entity_type, []), vectors_by_type.get(entity_type),
+            )
+        return len(all_records)
+
+    def _embed_texts(self, texts, batch_size, max_workers, program_id) -> list | None:
+        """
+        Embed *texts* in provider-sized batches, concurrently when the gateway
+        supports it. Failed batches leave None in their slots.
+        """
+        batches = [texts[i:i + batch_size] for i in range(0, len(texts), max(1, batch_size))]
+        try:
+            if hasattr(self.gateway, "embed_batches"):
+                kwargs = {"max_workers": max_workers} if max_workers else {}
+                results = self.gateway.embed_batches(
+                    batches, purpose="rag_indexing", program_id=program_id, **kwargs,
+                )
+            else:
+                results = []
+                for chunk in batches:
+                    try:
+                        results.append(self.gateway.embed(
+                            chunk, purpose="rag_indexing", program_id=program_id,
+                        ))
+                    except Exception as e:
+                        logger.warning("Embedding batch failed, storing without vectors: %s", e)
+                        results.append(None)
+        except Exception as e:
+            logger.warning("Embedding generation failed, storing without vectors: %s", e)
+            return None
+
+        vectors = []
+        for chunk, result in zip(batches, results):
+            if result and len(result) == len(chunk):
+                vectors.extend(result)
+            else:
+                vectors.extend([None] * len(chunk))
+        return vectors
+
     # ── Search ────────────────────────────────────────────────────────────
 
     def search(
@@ -477,10 +674,6 @@ class RAGPipeline:
         if module:
             base_q = base_q.filter(AIEmbedding.module == module)
 
-        candidates = base_q.all()
-        if not candidates:
-            return []
-
         # Semantic search scores
         semantic_scores = {}
         query_vec = None
@@ -493,38 +686,60 @@ class RAGPipeline:
 
         if query_vec:
             # Try pgvector distance operator first (database-side cosine similarity)
-            # Requires: pgvector extension + embedding_json column with valid JSON vectors
+            # Requires: pgvector extension; scores the embedding_json text vectors
             try:
-                from flask import current_app
-                db_uri = current_app.config.get("SQLALCHEMY_DATABASE_URI", "")
-                if not db_uri.startswith("postgresql"):
+                if not _on_postgresql():
                     raise RuntimeError("pgvector only available on PostgreSQL")
                 vec_str = "[" + ",".join(str(v) for v in query_vec) + "]"
                 semantic_q = (
-                    db.session.query(
+                    base_q.with_entities(
                         AIEmbedding.id,
                         (1 - db.literal_column(f"embedding_json::vector <=> '{vec_str}'::vector")).label("sim"),
                     )
-                    .filter(AIEmbedding.id.in_([c.id for c in candidates]))
                     .filter(AIEmbedding.embedding_json.isnot(None))
                     .order_by(db.literal_column("sim").desc())
                     .limit(top_k * 3)
                     .all()
                 )
                 semantic_scores = {row[0]: float(row[1]) for row in semantic_q}
+                # Rows stored as blobs only (written before PostgreSQL kept the text column)
+                for emb in base_q.filter(
+                    AIEmbedding.embedding_json.is_(None), AIEmbedding.embedding_blob.isnot(None),
+                ).all():
+                    emb_vec = embedding_vector(emb)
+                    if emb_vec is not None:
+                        semantic_scores[emb.id] = _cosine_similarity(query_vec, list(emb_vec))
             except Exception:
-                # Fallback to Python cosine similarity (SQLite / no pgvector)
-                for emb in candidates:
-                    if emb.embedding_json:
-                        try:
-                            emb_vec = json.loads(emb.embedding_json)
-                            sim = _cosine_similarity(query_vec, emb_vec)
-                            semantic_scores[emb.id] = sim
-                        except (json.JSONDecodeError, ValueError):
-                            pass
-
-        # Keyword search scores (BM25-like)
-        keyword_scores = _keyword_search(query, candidates)
+                # Fallback: in-process ANN index (SQLite / no pgvector)
+                index_scores = None
+                try:
+                    index_scores = self._index_semantic_scores(
+                        query_vec, base_q, program_id, entity_type, module, top_k * 3,
+                    )
+                except Exception as e:
+                    logger.warning("Vector index search failed: %s", e)
+                if index_scores is not None:
+                    semantic_scores = index_scores
+                else:
+                    # Last resort: Python cosine similarity (no NumPy)
+                    has_vector = db.or_(
+                        AIEmbedding.embedding_blob.isnot(None),
+                        AIEmbedding.embedding_json.isnot(None),
+                    )
+                    for emb in base_q.filter(has_vector).all():
+                        emb_vec = embedding_vector(emb)
+                        if emb_vec is not None:
+                            semantic_scores[emb.id] = _cosine_similarity(query_vec, list(emb_vec))
+
+        # Keyword search scores (BM25 over the persisted inverted index)
+        keyword_scores = {}
+        try:
+            keyword_scores = KeywordIndex.search(
+                query, program_id=program_id, entity_type=entity_type,
+                module=module, limit=top_k * 3,
+            )
+        except Exception as e:
+            logger.warning("Keyword index search failed: %s", e)
 
         # RRF (Reciprocal Rank Fusion) combination
         combined = _rrf_fusion(
@@ -537,7 +752,7 @@ class RAGPipeline:
         sorted_results = sorted(combined.items(), key=lambda x: x[1], reverse=True)[:top_k]
 
         # Build result objects
-        emb_map = {e.id: e for e in candidates}
+        emb_map = {e.id: e for e in _load_embeddings([emb_id for emb_id, _ in sorted_results])}
         results = []
         for emb_id, score in sorted_results:
             emb = emb_map.get(emb_id)
@@ -558,6 +773,88 @@ class RAGPipeline:
 
         return results
 
+    def _index_semantic_scores(self, query_vec, base_q, program_id, entity_type, module,
+                               limit: int) -> dict[int, float] | None:
+        """
+        Semantic leg via the ANN index; the filters are applied inside it.
+
+        Program and entity type select the partitions, module is a row tag.
+        Before searching, each partition pulls in the active rows above its
+        synced id, or just under it (written by another worker, or before the
+        index existed).
+        Hits deactivated elsewhere since are dropped by an O(k) active
+        check and evicted. Returns None when no index is available.
+        """
+        registry = self.vector_index
+        if registry is None:
+            return None
+        registry.sync_stamp(_active_kb_stamp())
+
+        if program_id and entity_type:
+            partitions = [(program_id, entity_type)]
+        else:
+            partitions = base_q.with_entities(AIEmbedding.program_id, AIEmbedding.entity_type).distinct().all()
+
+        scores = {}
+        for key in partitions:
+            index = registry.get(*key)
+            self._catch_up_partition(registry, index, *key)
+            for emb_id, sim in index.search(query_vec, limit * 2, tag=module):
+                scores[emb_id] = sim
+        registry.flush()
+        if not scores:
+            return scores
+
+        hit_ids = list(scores)
+        active = {
+            row[0] for row in db.session.query(AIEmbedding.id)
+            .filter(AIEmbedding.id.in_(hit_ids), AIEmbedding.is_active.is_(True))
+        }
+        stale = [emb_id for emb_id in hit_ids if emb_id not in active]
+        if stale:
+            for key in partitions:
+                registry.remove(*key, stale)
+            for emb_id in stale:
+                del scores[emb_id]
+        if len(scores) > limit:
+            scores = dict(sorted(scores.items(), key=lambda x: x[1], reverse=True)[:limit])
+        return scores
+
+    @staticmethod
+    def _catch_up_partition(registry, index, program_id, entity_type):
+        """Add the partition's active rows from just under index.synced_id up that the index lacks.
+
+        Ids are allocated before commit, so a row of a concurrent writer can
+        land below an id already seen: the last CATCH_UP_WINDOW ids under
+        the mark are re-scanned on every catch-up.
+        """
+        program_filter = (AIEmbedding.program_id.is_(None) if program_id is None
+                          else AIEmbedding.program_id == program_id)
+        new_ids = [
+            row[0] for row in db.session.query(AIEmbedding.id).filter(
+                program_filter,
+                AIEmbedding.entity_type == entity_type,
+                AIEmbedding.is_active.is_(True),
+                AIEmbedding.id > index.synced_id - CATCH_UP_WINDOW,
+                db.or_(AIEmbedding.embedding_blob.isnot(None), AIEmbedding.embedding_json.isnot(None)),
+            )
+        ]
+        if not new_ids:
+            return
+        missing = [emb_id for emb_id in new_ids if emb_id not in index]
+        index.synced_id = max(index.synced_id, max(new_ids))
+        if not missing:
+            return
+        ids, vectors, tags = [], [], []
+        for emb in _load_embeddings(missing):
+            vec = embedding_vector(emb)
+            if vec is not None:
+                ids.append(emb.id)
+                vectors.append(vec)
+                tags.append(emb.module)
+        if ids:
+            registry.add(program_id, entity_type, ids, vectors, tags)
+
     # ── Statistics ────────────────────────────────────────────────────────
 
     @staticmethod
@@ -568,7 +865,10 @@ class RAGPipeline:
             base_q = base_q.filter(AIEmbedding.program_id == program_id)
 
         total = base_q.count()
-        with_embedding = base_q.filter(AIEmbedding.embedding_json.isnot(None)).count()
+        with_embedding = base_q.filter(db.or_(
+            AIEmbedding.embedding_blob.isnot(None),
+            AIEmbedding.embedding_json.isnot(None),
+        )).count()
 
         # Group by entity type
         type_counts = {}
@@ -622,6 +922,11 @@ class RAGPipeline:
 
 # ── Helper Functions ──────────────────────────────────────────────────────────
 
+def _on_postgresql() -> bool:
+    """pgvector is only reachable on PostgreSQL, where rows keep their JSON vectors."""
+    return db.engine.dialect.name == "postgresql"
+
+
 def _cosine_similarity(vec_a: list[float], vec_b: list[float]) -> float:
     """Compute cosine similarity between two vectors."""
     if len(vec_a) != len(vec_b):
@@ -636,64 +941,60 @@ def _cosine_similarity(vec_a: list[float], vec_b: list[float]) -> float:
     return dot / (norm_a * norm_b)
 
 
-def _keyword_search(query: str, candidates: list[AIEmbedding]) -> dict[int, float]:
-    """
-    BM25-like keyword scoring.
+def _active_kb_stamp() -> str | None:
+    """Identity of the active KB version; the vector index is rebuilt when it changes."""
+    row = (
+        db.session.query(KBVersion.version, KBVersion.activated_at)
+        .filter(KBVersion.status == "active")
+        .order_by(KBVersion.activated_at.desc())
+        .first()
+    )
+    if row is None:
+        return None
+    return f"{row.version}@{row.activated_at.isoformat() if row.activated_at else ''}"
 
-    Tokenizes query and chunk texts, computes TF-IDF-like score.
-    """
-    query_tokens = set(_tokenize(query))
-    if not query_tokens:
-        return {}
 
-    # Document frequency
-    df = defaultdict(int)
-    doc_tokens_map = {}
-    for emb in candidates:
-        tokens = _tokenize(emb.chunk_text)
-        doc_tokens_map[emb.id] = tokens
-        for t in set(tokens):
-            df[t] += 1
-
-    n = len(candidates)
-    scores = {}
-
-    # Hoist avg_dl outside the loop — O(N) instead of O(N²)
-    avg_dl = sum(len(doc_tokens_map[e.id]) for e in candidates) / max(n, 1)
-    k1 = 1.2
-    b = 0.75
-
-    for emb in candidates:
-        tokens = doc_tokens_map[emb.id]
-        if not tokens:
-            continue
-
-        # BM25 score
-        score = 0.0
-        tf_map = defaultdict(int)
-        for t in tokens:
-            tf_map[t] += 1
-
-        dl = len(tokens)
+def _load_embeddings(ids: list[int]) -> list[AIEmbedding]:
+    """Load full AIEmbedding rows by id, in IN-clause sized chunks."""
+    rows = []
+    for start in range(0, len(ids), _IN_CLAUSE_CHUNK):
+        rows.extend(AIEmbedding.query.filter(AIEmbedding.id.in_(ids[start:start + _IN_CLAUSE_CHUNK])).all())
+    return rows
 
-        for qt in query_tokens:
-            if qt in tf_map:
-                tf = tf_map[qt]
-                idf = math.log((n - df.get(qt, 0) + 0.5) / (df.get(qt, 0) + 0.5) + 1)
-                tf_norm = (tf * (k1 + 1)) / (tf + k1 * (1 - b + b * dl / max(avg_dl, 1)))
-                score += idf * tf_norm
 
-        if score > 0:
-            scores[emb.id] = score
+def _active_rows_by_entity(keys: list[tuple[str, int]]) -> dict[tuple[str, int], dict]:
+    """
+    Active chunk ids and content hash for many entities in one pass.
 
-    # Normalize to [0, 1]
-    max_score = max(scores.values()) if scores else 1.0
-    return {k: v / max_score for k, v in scores.items()}
+    Returns {(entity_type, entity_id): {"content_hash": str, "rows": [(id, program_id)]}}.
+    """
+    ids_by_type = defaultdict(set)
+    for entity_type, entity_id in keys:
+        ids_by_type[entity_type].add(entity_id)
+
+    active = {}
+    for entity_type, entity_ids in ids_by_type.items():
+        entity_ids = sorted(entity_ids)
+        for start in range(0, len(entity_ids), _IN_CLAUSE_CHUNK):
+            rows = db.session.query(
+                AIEmbedding.id, AIEmbedding.entity_id,
+                AIEmbedding.program_id, AIEmbedding.content_hash,
+            ).filter(
+                AIEmbedding.entity_type == entity_type,
+                AIEmbedding.entity_id.in_(entity_ids[start:start + _IN_CLAUSE_CHUNK]),
+                AIEmbedding.is_active.is_(True),
+            ).order_by(AIEmbedding.id).all()
+            for row in rows:
+                entry = active.setdefault(
+                    (entity_type, row.entity_id), {"content_hash": row.content_hash, "rows": []},
+                )
+                entry["rows"].append((row.id, row.program_id))
+    return active
 
 
-def _tokenize(text: str) -> list[str]:
-    """Simple whitespace + punctuation tokenizer, lowercased."""
-    return re.findall(r'\b\w+\b', text.lower())
+def _task_cancelled(task_id: int) -> bool:
+    task = db.session.get(AITask, task_id)
+    return task is not None and task.status == "cancelled"
 
 
 def _rrf_fusion(
@@ -733,3 +1034,19 @@ def _scores_to_ranks(scores: dict[int, float]) -> dict[int, int]:
     """Convert score dict to rank dict (1-based)."""
     sorted_items = sorted(scores.items(), key=lambda x: x[1], reverse=True)
     return {doc_id: rank + 1 for rank, (doc_id, _) in enumerate(sorted_items)}
+
+
+@register_task_handler("rag_batch_index")
+def _run_batch_index_task(input_data: dict) -> dict:
+    """Durable TaskRunner handler behind POST /ai/embeddings/index {"async": true}."""
+    from app.ai.gateway import LLMGateway
+
+    rag = RAGPipeline(gateway=LLMGateway())
+    total = rag.batch_index(
+        input_data["entities"],
+        program_id=input_data.get("program_id"),
+        embed=input_data.get("embed", True),
+        kb_version=input_data.get("kb_version", "1.0.0"),
+        task_id=current_task_id(),
+    )
+    return {"indexed_chunks": total}
@@ -0,0 +1,161 @@
+"""
+SAP Transformation Management Platform
+Single-Flight — request coalescing for identical in-flight LLM calls.
+
+When several requests issue the same cacheable prompt at once, they all
+miss ResponseCacheService and would each pay for a provider call. The
+first caller for a key becomes the *leader* and runs the call; concurrent
+callers with the same key (*followers*) wait for it and share its result
+or its exception. Followers wait for as long as the leader runs — the
+leader always finishes (result or exception) once the gateway's own
+provider timeouts and retries are spent, so there is no separate,
+shorter follower deadline that could fail a request the leader is about
+to answer.
+
+Across workers (optional, AI_SINGLE_FLIGHT_DISTRIBUTED=true): the leader
+also takes a short Redis lock (app.services.cache_service.acquire_lock).
+A leader that finds the lock held elsewhere polls the response cache
+until the remote leader has stored the answer, and only calls the
+provider itself if the remote lock disappears or the wait times out.
+
+Usage:
+    from app.ai.single_flight import SingleFlight
+    flight = SingleFlight()
+    result, shared = flight.do(prompt_hash, lambda: provider_call())
+"""
+
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+SINGLE_FLIGHT_ENABLED = os.getenv("AI_SINGLE_FLIGHT", "true").lower() == "true"
+SINGLE_FLIGHT_DISTRIBUTED = os.getenv("AI_SINGLE_FLIGHT_DISTRIBUTED", "false").lower() == "true"
+SINGLE_FLIGHT_TIMEOUT = float(os.getenv("AI_SINGLE_FLIGHT_TIMEOUT", "60"))  # remote-leader wait, seconds
+REMOTE_POLL_INTERVAL = 0.1    # seconds between response-cache polls
+
+
+class _Call:
+    """One in-flight leader call and the followers waiting on it."""
+
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesces concurrent calls that share a key."""
+
+    def __init__(self, *, distributed: bool = SINGLE_FLIGHT_DISTRIBUTED,
+                 timeout: float = SINGLE_FLIGHT_TIMEOUT):
+        self.distributed = distributed
+        self.timeout = timeout
+        self._calls: dict[str, _Call] = {}
+        self._lock = threading.Lock()
+        self._stats = {"leaders": 0, "coalesced": 0, "remote_coalesced": 0, "remote_timeouts": 0}
+
+    def do(self, key: str, fn, *, poll=None) -> tuple:
+        """
+        Run *fn* once per key among concurrent callers.
+
+        Args:
+            key: Coalescing key (the response-cache prompt hash).
+            fn: Zero-argument callable performing the real work.
+            poll: Optional zero-argument callable returning the finished
+                  result from a shared store (or None); used to wait on a
+                  leader in another worker when distributed.
+
+        Returns:
+            (result, shared) — shared is True when the result came from
+            another caller's execution.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self._stats["coalesced"] += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self._stats["leaders"] += 1
+                leader = True
+
+        if not leader:
+            # The leader sets done in its finally block, whatever fn does
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        shared = False
+        try:
+            call.result, shared = self._lead(key, fn, poll)
+            return call.result, shared
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def _lead(self, key, fn, poll):
+        """Leader path: optionally coordinate with other workers, then call fn."""
+        if not (self.distributed and poll is not None):
+            return fn(), False
+
+        from app.services.cache_service import acquire_lock, is_locked, release_lock
+
+        lock_name = f"ai:single_flight:{key}"
+        try:
+            token = acquire_lock(lock_name, ttl=max(1, int(self.timeout)))
+        except Exception as e:
+            logger.debug("Single-flight lock unavailable, calling directly: %s", e)
+            return fn(), False
+
+        if token is None:
+            # Another worker is computing this prompt — wait for its cached answer
+            deadline = time.monotonic() + self.timeout
+            while time.monotonic() < deadline:
+                result = poll()
+                if result is not None:
+                    with self._lock:
+                        self._stats["remote_coalesced"] += 1
+                    return result, True
+                if not is_locked(lock_name):
+                    break
+                threading.Event().wait(REMOTE_POLL_INTERVAL)
+            else:
+                with self._lock:
+                    self._stats["remote_timeouts"] += 1
+            result = poll()
+            if result is not None:
+                with self._lock:
+                    self._stats["remote_coalesced"] += 1
+                return result, True
+            return fn(), False
+
+        try:
+            return fn(), False
+        finally:
+            try:
+                release_lock(lock_name, token)
+            except Exception as e:
+                logger.debug("Single-flight lock release failed: %s", e)
+
+    def get_stats(self) -> dict:
+        """Return coalescing counters."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["in_flight"] = len(self._calls)
+        total = stats["leaders"] + stats["coalesced"]
+        stats["coalesced_pct"] = round(stats["coalesced"] / total * 100, 2) if total else 0.0
+        stats["distributed"] = self.distributed
+        return stats
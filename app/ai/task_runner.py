@@ -2,22 +2,106 @@
 SAP Transformation Management Platform
 Async AI Task Runner — Sprint 21.
 
-Lightweight async task runner for long-running AI operations.
-Tasks run in background threads with status polling via the API.
+Runs long-running AI operations on a bounded per-process worker pool,
+with status polling via the API.
+
+Two kinds of task:
+    - In-process tasks — submit(..., execute_fn=callable). The callable only
+      exists in this worker: the row is marked running on acceptance and the
+      job waits on the local pool. A worker restart loses it (the row is
+      failed once its lease goes stale).
+    - Durable tasks — task types registered with @register_task_handler and
+      submitted without execute_fn. They are stored as pending AITask rows;
+      any worker's dispatcher claims them (compare-and-set on status), renews
+      a heartbeat lease while they run, and requeues rows whose lease went
+      stale (crashed worker) up to AI_TASK_MAX_ATTEMPTS.
+
+Scheduling:
+    - Priority lanes: high (0) / normal (5) / low (9), FIFO within a lane
+    - AI_TASK_WORKERS threads per process
+    - AI_TASK_TENANT_CONCURRENCY running tasks per tenant
+    - At most AI_TASK_MAX_QUEUED in-process jobs waiting per process;
+      submit() raises TaskQueueFull beyond that
+
+Cancellation: cancel() marks the row cancelled and signals the running job
+(on another worker, via the next heartbeat). Work is interrupted
+cooperatively: update_progress() raises TaskCancelled inside a cancelled
+task, and long loops can poll is_cancelled().
 """
 
+import itertools
 import json
 import logging
+import os
+import socket
 import threading
-from datetime import datetime, timezone
+from collections import Counter
+from datetime import datetime, timedelta, timezone
 
 from app.models import db
 from app.models.ai import AITask
 
 logger = logging.getLogger(__name__)
 
-# In-memory registry of running jobs (task_id → Thread)
-_running_tasks: dict[int, threading.Thread] = {}
+AI_TASK_WORKERS = int(os.getenv("AI_TASK_WORKERS", "4"))
+AI_TASK_TENANT_CONCURRENCY = int(os.getenv("AI_TASK_TENANT_CONCURRENCY", "2"))
+AI_TASK_POLL_INTERVAL = float(os.getenv("AI_TASK_POLL_INTERVAL", "2"))    # seconds
+AI_TASK_LEASE_SECONDS = int(os.getenv("AI_TASK_LEASE_SECONDS", "120"))
+AI_TASK_MAX_ATTEMPTS = int(os.getenv("AI_TASK_MAX_ATTEMPTS", "3"))
+AI_TASK_MAX_QUEUED = int(os.getenv("AI_TASK_MAX_QUEUED", "100"))
+
+PRIORITY_LANES = {"high": 0, "normal": 5, "low": 9}
+
+# Durable task handlers: task_type → Callable(input_data) → dict result
+_TASK_HANDLERS: dict = {}
+
+# Jobs accepted by this process, queued or running (task_id → _Job)
+_running_tasks: dict = {}
+
+# Task executing on the current thread (see current_task_id / is_cancelled)
+_task_context = threading.local()
+
+
+class TaskCancelled(Exception):
+    """Raised inside a task whose AITask row was cancelled."""
+
+
+class TaskQueueFull(RuntimeError):
+    """Raised by submit() when this process already holds AI_TASK_MAX_QUEUED waiting jobs."""
+
+
+def register_task_handler(task_type: str):
+    """Decorator registering a durable handler for *task_type*."""
+    def _register(fn):
+        _TASK_HANDLERS[task_type] = fn
+        return fn
+    return _register
+
+
+def current_task_id() -> int | None:
+    """Return the AITask id being executed on this thread, if any.
+
+    Lets an execute_fn report progress without the id being threaded
+    through its input payload.
+    """
+    return getattr(_task_context, "task_id", None)
+
+
+def is_cancelled() -> bool:
+    """True if the task running on this thread has been cancelled."""
+    event = getattr(_task_context, "cancel_event", None)
+    return bool(event is not None and event.is_set())
+
+
+def _worker_id() -> str:
+    # Resolved per call: gunicorn forks after import
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _lane(priority) -> int:
+    if isinstance(priority, str):
+        return PRIORITY_LANES.get(priority, PRIORITY_LANES["normal"])
+    return int(priority)
 
 
 class TaskRunner:
@@ -32,6 +116,8 @@ class TaskRunner:
         program_id: int | None = None,
         workflow_name: str | None = None,
         execute_fn=None,
+        priority: str | int = "normal",
+        tenant_id: int | None = None,
     ) -> dict:
         """
         Submit an async AI task.
@@ -42,11 +128,19 @@ class TaskRunner:
             user: Who submitted the task.
             program_id: Associated program.
             workflow_name: Associated workflow (if orchestration).
-            execute_fn: Callable(input_data) → dict result.
-                        If None, task stays pending for external pickup.
+            execute_fn: Callable(input_data) → dict result, run in-process.
+                        If None and task_type has a registered handler, the
+                        task is queued durably; otherwise it stays pending
+                        for external pickup.
+            priority: "high" | "normal" | "low" (or a lane number).
+            tenant_id: Tenant for per-tenant concurrency limits.
 
         Returns:
             Task dict (serializable).
+
+        Raises:
+            TaskQueueFull: execute_fn given and the local queue is full
+                           (the row is recorded as failed).
         """
         task = AITask(
             task_type=task_type,
@@ -56,25 +150,36 @@ class TaskRunner:
             user=user,
             program_id=program_id,
             workflow_name=workflow_name,
+            priority=_lane(priority),
+            tenant_id=tenant_id,
+            attempts=0,
         )
         db.session.add(task)
         db.session.flush()
         task_id = task.id
 
         if execute_fn:
+            now = datetime.now(timezone.utc)
             task.status = "running"
-            task.started_at = datetime.now(timezone.utc)
+            task.claimed_by = _worker_id()
+            task.heartbeat_at = now
+            task.attempts = 1
             db.session.flush()
-            # NOTE: we commit here so the background thread can read the task
+            # NOTE: we commit here so the pool thread can read the task
             db.session.commit()
-
-            t = threading.Thread(
-                target=self._execute_in_background,
-                args=(task_id, input_data, execute_fn),
-                daemon=True,
-            )
-            _running_tasks[task_id] = t
-            t.start()
+            try:
+                _get_pool().enqueue(_Job(task_id, tenant_id, task.priority, execute_fn, input_data))
+            except TaskQueueFull as e:
+                task.status = "failed"
+                task.error_message = str(e)
+                task.completed_at = datetime.now(timezone.utc)
+                task.claimed_by = None
+                db.session.commit()
+                raise
+        elif task_type in _TASK_HANDLERS:
+            # Durable: committed so any worker's dispatcher can claim it
+            db.session.commit()
+            _get_pool().wake()
 
         return task.to_dict()
 
@@ -86,7 +191,7 @@ class TaskRunner:
         return task.to_dict()
 
     def cancel(self, task_id: int) -> dict | None:
-        """Cancel a pending/running task."""
+        """Cancel a pending/running task (signals it if running here)."""
         task = db.session.get(AITask, task_id)
         if not task:
             return None
@@ -95,8 +200,11 @@ class TaskRunner:
         task.status = "cancelled"
         task.completed_at = datetime.now(timezone.utc)
         db.session.flush()
-        # Remove from running registry
-        _running_tasks.pop(task_id, None)
+        # Committed so the owning worker's next heartbeat sees it
+        db.session.commit()
+        job = _running_tasks.pop(task_id, None)
+        if job is not None:
+            job.cancel_event.set()
         return task.to_dict()
 
     def list_tasks(
@@ -114,49 +222,375 @@ class TaskRunner:
         return [t.to_dict() for t in q.limit(limit).all()]
 
     def update_progress(self, task_id: int, progress_pct: int):
-        """Update task progress (called from within execute_fn)."""
+        """
+        Update task progress (called from within execute_fn).
+
+        Raises TaskCancelled when called from the task's own thread after
+        it was cancelled, so cancellation interrupts the work here.
+        """
+        if task_id == current_task_id() and is_cancelled():
+            raise TaskCancelled(f"Task {task_id} cancelled")
         task = db.session.get(AITask, task_id)
         if task and task.status == "running":
             task.progress_pct = min(progress_pct, 100)
             db.session.flush()
+        elif task and task.status == "cancelled" and task_id == current_task_id():
+            raise TaskCancelled(f"Task {task_id} cancelled")
 
-    # ── Internal ──────────────────────────────────────────────────────────
+    def process_pending(self, max_tasks: int | None = None) -> int:
+        """
+        Claim durable pending tasks and run them on the calling thread.
 
-    def _execute_in_background(self, task_id: int, input_data: dict, execute_fn):
-        """Run the task function in a background thread."""
-        # We need an app context for DB access
-        try:
-            from flask import current_app
-            app = current_app._get_current_object()
-        except RuntimeError:
-            # If no app context, try to import and create one
+        Used by the `flask ai-task-worker --once` command and tests; the
+        pool's dispatcher does the same in the background. Leases are
+        renewed from a side thread while each job runs, so a task longer
+        than AI_TASK_LEASE_SECONDS is not reclaimed and run twice.
+        Returns the number of tasks executed.
+        """
+        from flask import current_app
+
+        app = current_app._get_current_object()
+        done = 0
+        while max_tasks is None or done < max_tasks:
+            reclaim_stale_tasks()
+            jobs = claim_pending_tasks(1)
+            if not jobs:
+                break
+            with _LeaseHeartbeat(app):
+                _execute_job(jobs[0])
+            done += 1
+        return done
+
+
+# ── Queue operations (DB) ─────────────────────────────────────────────────────
+
+
+class _Job:
+    """A task accepted by this process."""
+
+    __slots__ = ("task_id", "tenant_id", "priority", "fn", "input_data", "seq", "cancel_event")
+
+    def __init__(self, task_id, tenant_id, priority, fn, input_data):
+        self.task_id = task_id
+        self.tenant_id = tenant_id
+        self.priority = priority
+        self.fn = fn
+        self.input_data = input_data
+        self.seq = 0
+        self.cancel_event = threading.Event()
+
+
+def claim_pending_tasks(limit: int) -> list:
+    """
+    Claim up to *limit* pending durable tasks for this worker.
+
+    Candidates are read in (priority, id) order; each is claimed with a
+    compare-and-set UPDATE on status, so concurrent workers never run the
+    same row. Tenants at AI_TASK_TENANT_CONCURRENCY running tasks are
+    skipped. Commits.
+    """
+    if limit <= 0 or not _TASK_HANDLERS:
+        return []
+    running = Counter(dict(
+        db.session.query(AITask.tenant_id, db.func.count(AITask.id))
+        .filter(AITask.status == "running", AITask.tenant_id.isnot(None))
+        .group_by(AITask.tenant_id).all()
+    ))
+    candidates = (
+        db.session.query(AITask.id, AITask.tenant_id, AITask.priority, AITask.task_type, AITask.input_json)
+        .filter(AITask.status == "pending", AITask.task_type.in_(list(_TASK_HANDLERS)))
+        .order_by(AITask.priority, AITask.id)
+        .limit(limit * 4)
+        .all()
+    )
+    now = datetime.now(timezone.utc)
+    worker = _worker_id()
+    jobs = []
+    for cand in candidates:
+        if len(jobs) >= limit:
+            break
+        if cand.tenant_id is not None and running[cand.tenant_id] >= AI_TASK_TENANT_CONCURRENCY:
+            continue
+        claimed = AITask.query.filter(AITask.id == cand.id, AITask.status == "pending").update(
+            {
+                "status": "running",
+                "claimed_by": worker,
+                "heartbeat_at": now,
+                "started_at": now,
+                "attempts": AITask.attempts + 1,
+            },
+            synchronize_session=False,
+        )
+        if not claimed:
+            continue  # another worker won the race
+        running[cand.tenant_id] += 1
+        input_data = json.loads(cand.input_json) if cand.input_json else {}
+        jobs.append(_Job(cand.id, cand.tenant_id, cand.priority,
+                         _TASK_HANDLERS[cand.task_type], input_data))
+    db.session.commit()
+    return jobs
+
+
+def reclaim_stale_tasks() -> int:
+    """
+    Requeue (or fail) running tasks whose worker stopped renewing its lease.
+
+    Durable tasks go back to pending until AI_TASK_MAX_ATTEMPTS; in-process
+    tasks cannot be resumed elsewhere and are failed. Commits.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=AI_TASK_LEASE_SECONDS)
+    stale = AITask.query.filter(
+        AITask.status == "running",
+        db.or_(
+            AITask.heartbeat_at < cutoff,
+            db.and_(AITask.heartbeat_at.is_(None), AITask.started_at < cutoff),
+        ),
+    ).all()
+    for task in stale:
+        if task.task_type in _TASK_HANDLERS and (task.attempts or 0) < AI_TASK_MAX_ATTEMPTS:
+            logger.warning("TaskRunner: requeueing task %d (lease of %s expired)", task.id, task.claimed_by)
+            task.status = "pending"
+            task.claimed_by = None
+            task.heartbeat_at = None
+        else:
+            task.status = "failed"
+            task.error_message = f"Worker {task.claimed_by or 'unknown'} lost the task"
+            task.completed_at = datetime.now(timezone.utc)
+    if stale:
+        db.session.commit()
+    return len(stale)
+
+
+def _renew_leases():
+    """Heartbeat local jobs and pick up cancellations made on other workers."""
+    ids = list(_running_tasks)
+    if not ids:
+        return
+    AITask.query.filter(AITask.id.in_(ids), AITask.status == "running").update(
+        {"heartbeat_at": datetime.now(timezone.utc)}, synchronize_session=False,
+    )
+    cancelled = [row.id for row in db.session.query(AITask.id).filter(
+        AITask.id.in_(ids), AITask.status == "cancelled",
+    )]
+    db.session.commit()
+    for task_id in cancelled:
+        job = _running_tasks.get(task_id)
+        if job is not None:
+            job.cancel_event.set()
+
+
+class _LeaseHeartbeat:
+    """Renew this process's leases every AI_TASK_POLL_INTERVAL while the block runs."""
+
+    def __init__(self, app):
+        self.app = app
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._beat, name="ai-task-heartbeat", daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    def _beat(self):
+        while not self._stop.wait(AI_TASK_POLL_INTERVAL):
             try:
-                from app import create_app
-                app = create_app()
-            except Exception:
-                logger.error("TaskRunner: Cannot obtain Flask app for background task %d", task_id)
+                with self.app.app_context():
+                    _renew_leases()
+            except Exception as e:
+                logger.warning("TaskRunner heartbeat failed: %s", e)
+
+
+def _execute_job(job: "_Job"):
+    """Run one job on the current thread (inside an app context)."""
+    _running_tasks[job.task_id] = job
+    _task_context.task_id = job.task_id
+    _task_context.cancel_event = job.cancel_event
+    try:
+        task = db.session.get(AITask, job.task_id)
+        if task is None or task.status != "running":
+            return  # cancelled while queued
+        if task.started_at is None:
+            task.started_at = datetime.now(timezone.utc)
+            db.session.commit()
+
+        result = job.fn(job.input_data)
+        task = db.session.get(AITask, job.task_id, populate_existing=True)
+        if task and task.status != "cancelled":
+            task.status = "completed"
+            task.progress_pct = 100
+            task.result_json = json.dumps(result, default=str)
+            task.completed_at = datetime.now(timezone.utc)
+            task.claimed_by = None
+            db.session.commit()
+    except TaskCancelled:
+        db.session.rollback()
+        logger.info("TaskRunner: task %d interrupted by cancellation", job.task_id)
+    except Exception as e:
+        logger.error("TaskRunner: Task %d failed: %s", job.task_id, e)
+        try:
+            db.session.rollback()
+            task = db.session.get(AITask, job.task_id)
+            if task and task.status != "cancelled":
+                task.status = "failed"
+                task.error_message = str(e)
+                task.completed_at = datetime.now(timezone.utc)
+                db.session.commit()
+        except Exception:
+            pass
+    finally:
+        _task_context.task_id = None
+        _task_context.cancel_event = None
+        _running_tasks.pop(job.task_id, None)
+
+
+# ── Worker pool ───────────────────────────────────────────────────────────────
+
+
+class _WorkerPool:
+    """
+    Fixed set of worker threads over a priority queue, plus a dispatcher
+    thread that feeds it durable tasks claimed from the DB.
+    """
+
+    def __init__(self, app, workers: int = AI_TASK_WORKERS,
+                 tenant_limit: int = AI_TASK_TENANT_CONCURRENCY,
+                 max_queued: int = AI_TASK_MAX_QUEUED):
+        self.app = app
+        self.workers = max(1, workers)
+        self.tenant_limit = max(1, tenant_limit)
+        self.max_queued = max(1, max_queued)
+        self._cond = threading.Condition()
+        self._queue: list = []
+        self._seq = itertools.count()
+        self._busy = 0
+        self._tenant_running = Counter()
+        self._threads: list = []
+        self._dispatcher = None
+        self._wake = threading.Event()
+
+    def enqueue(self, job: "_Job"):
+        self._start_workers()
+        if self._dispatch_enabled():
+            self._start_dispatcher()  # renews this job's lease
+        with self._cond:
+            if len(self._queue) >= self.max_queued:
+                raise TaskQueueFull(f"AI task queue is full ({self.max_queued} waiting)")
+            job.seq = next(self._seq)
+            _running_tasks[job.task_id] = job
+            self._queue.append(job)
+            self._cond.notify()
+
+    def free_slots(self) -> int:
+        with self._cond:
+            return max(0, self.workers - self._busy - len(self._queue))
+
+    def wake(self):
+        """Nudge the dispatcher (a durable task was just submitted)."""
+        if self._dispatch_enabled():
+            self._start_dispatcher()
+            self._wake.set()
+
+    def _dispatch_enabled(self) -> bool:
+        # Tests drive the queue explicitly via TaskRunner.process_pending()
+        return not self.app.config.get("TESTING") and os.getenv("AI_TASK_DISPATCHER", "true") == "true"
+
+    def _start_workers(self):
+        with self._cond:
+            if self._threads:
                 return
+            for i in range(self.workers):
+                t = threading.Thread(target=self._work, name=f"ai-task-{i}", daemon=True)
+                self._threads.append(t)
+                t.start()
 
-        with app.app_context():
+    def _start_dispatcher(self):
+        self._start_workers()
+        with self._cond:
+            if self._dispatcher is not None:
+                return
+            self._dispatcher = threading.Thread(target=self._dispatch, name="ai-task-dispatch", daemon=True)
+            self._dispatcher.start()
+
+    def _take(self) -> "_Job":
+        """Highest-priority queued job whose tenant is under its limit."""
+        with self._cond:
+            while True:
+                eligible = [
+                    j for j in self._queue
+                    if j.tenant_id is None or self._tenant_running[j.tenant_id] < self.tenant_limit
+                ]
+                if eligible:
+                    job = min(eligible, key=lambda j: (j.priority, j.seq))
+                    self._queue.remove(job)
+                    self._busy += 1
+                    self._tenant_running[job.tenant_id] += 1
+                    return job
+                self._cond.wait()
+
+    def _work(self):
+        while True:
+            job = self._take()
             try:
-                result = execute_fn(input_data)
-                task = db.session.get(AITask, task_id)
-                if task and task.status != "cancelled":
-                    task.status = "completed"
-                    task.progress_pct = 100
-                    task.result_json = json.dumps(result, default=str)
-                    task.completed_at = datetime.now(timezone.utc)
-                    db.session.commit()
-            except Exception as e:
-                logger.error("TaskRunner: Task %d failed: %s", task_id, e)
-                try:
-                    task = db.session.get(AITask, task_id)
-                    if task:
-                        task.status = "failed"
-                        task.error_message = str(e)
-                        task.completed_at = datetime.now(timezone.utc)
-                        db.session.commit()
-                except Exception:
-                    pass
+                with self.app.app_context():
+                    _execute_job(job)
             finally:
-                _running_tasks.pop(task_id, None)
+                with self._cond:
+                    self._busy -= 1
+                    self._tenant_running[job.tenant_id] -= 1
+                    self._cond.notify_all()
+                self._wake.set()
+
+    def _dispatch(self):
+        while True:
+            try:
+                with self.app.app_context():
+                    _renew_leases()
+                    reclaim_stale_tasks()
+                    for job in claim_pending_tasks(self.free_slots()):
+                        self.enqueue(job)
+            except Exception as e:
+                logger.warning("TaskRunner dispatcher cycle failed: %s", e)
+            self._wake.wait(AI_TASK_POLL_INTERVAL)
+            self._wake.clear()
+
+    def serve_forever(self):
+        """Run the dispatcher on the calling thread (dedicated worker process)."""
+        self._start_workers()
+        self._dispatch()
+
+
+_pool: _WorkerPool | None = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> _WorkerPool:
+    """Process-wide pool, bound to the current Flask app on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            try:
+                from flask import current_app
+                app = current_app._get_current_object()
+            except RuntimeError:
+                # If no app context, try to import and create one
+                from app import create_app
+                app = create_app()
+            _pool = _WorkerPool(app)
+        return _pool
+
+
+def run_worker(app, *, once: bool = False) -> int:
+    """Entry point for `flask ai-task-worker`: drain once, or serve forever."""
+    global _pool
+    with app.app_context():
+        if once:
+            return TaskRunner().process_pending()
+    with _pool_lock:
+        if _pool is None:
+            _pool = _WorkerPool(app)
+    _pool.serve_forever()
+    return 0
@@ -0,0 +1,698 @@
+"""
+SAP Transformation Management Platform
+Vector Index — approximate nearest-neighbour search for the RAG pipeline.
+
+In-process ANN index over a contiguous float32 matrix, partitioned per
+(program_id, entity_type). Used as the semantic leg of RAGPipeline.search
+when pgvector is not available, replacing the per-candidate JSON decode +
+pure-Python cosine loop.
+
+Backends:
+    - FlatVectorIndex: exact scan (single vectorised matrix product)
+    - IVFVectorIndex:  inverted-file index with a spherical k-means coarse
+                       quantiser; a query only scans the vectors of the
+                       `nprobe` nearest lists, so cost grows ~√n instead of n
+
+Each row carries an optional tag (the SAP module) so module filters are
+applied inside the index. Indexes are updated incrementally from
+RAGPipeline.index_entity and persisted to AI_VECTOR_INDEX_DIR per
+partition: every flush writes a new version of the .npy files and then
+swaps a small JSON manifest naming it, so a reader in another worker
+always loads ids and vectors from the same version. The vector matrix is
+memory-mapped (copy-on-write) on load, so a cold worker scores straight
+off the page cache instead of decoding rows from the DB.
+
+NumPy is optional: without it the registry is disabled and RAG falls back
+to the legacy Python cosine loop.
+
+Usage:
+    from app.ai.vector_index import get_vector_index_registry
+    registry = get_vector_index_registry()
+    registry.get(program_id, "requirement").add([emb.id], [vector])
+    hits = registry.get(program_id, "requirement").search(query_vec, k=10)
+"""
+
+import json
+import logging
+import math
+import os
+import re
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover — numpy is an optional accelerator
+    np = None
+
+logger = logging.getLogger(__name__)
+
+# ── Configuration ─────────────────────────────────────────────────────────────
+
+VECTOR_INDEX_BACKEND = os.getenv("AI_VECTOR_INDEX_BACKEND", "ivf")  # ivf | flat | none
+VECTOR_INDEX_DIR = os.getenv("AI_VECTOR_INDEX_DIR", "")              # empty → memory only
+VECTOR_INDEX_SAVE_INTERVAL = int(os.getenv("AI_VECTOR_INDEX_SAVE_INTERVAL", "60"))
+
+IVF_TRAIN_MIN = 4096          # Below this the IVF index scans exactly
+IVF_NPROBE = int(os.getenv("AI_VECTOR_INDEX_NPROBE", "8"))
+IVF_KMEANS_ITERATIONS = 10
+IVF_KMEANS_SAMPLE = 65536     # Max vectors used to train centroids
+IVF_RETRAIN_FACTOR = 4        # Retrain once the index grows 4× past its training size
+
+_INITIAL_CAPACITY = 256
+_COMPACT_RATIO = 0.25         # Compact storage when >25% of rows are tombstones
+
+
+# ── Index Interface ───────────────────────────────────────────────────────────
+
+class VectorIndex(ABC):
+    """
+    Abstract interface for in-process vector indexes.
+
+    Vectors are L2-normalised on insert so that cosine similarity is a dot
+    product. Ids are AIEmbedding primary keys.
+    """
+
+    backend = "abstract"
+
+    @abstractmethod
+    def add(self, ids: list[int], vectors: list[list[float]], tags=None) -> int:
+        """Insert (or replace) vectors, each with an optional tag. Returns the number stored."""
+        ...
+
+    @abstractmethod
+    def remove(self, ids) -> int:
+        """Remove vectors by id. Returns the number of vectors removed."""
+        ...
+
+    @abstractmethod
+    def search(self, query_vec: list[float], k: int,
+               allowed_ids=None, tag=None) -> list[tuple[int, float]]:
+        """
+        Return up to k (id, cosine_similarity) pairs, best first.
+
+        Args:
+            query_vec: Query embedding.
+            k: Number of neighbours.
+            allowed_ids: Optional set of ids the result must be restricted to.
+            tag: Only return rows added with this tag (e.g. SAP module).
+        """
+        ...
+
+    @abstractmethod
+    def __len__(self) -> int:
+        ...
+
+    @abstractmethod
+    def __contains__(self, emb_id) -> bool:
+        ...
+
+
+# ── Flat (exact) Index ────────────────────────────────────────────────────────
+
+class FlatVectorIndex(VectorIndex):
+    """Exact cosine search over a contiguous float32 matrix."""
+
+    backend = "flat"
+
+    def __init__(self, dim: int | None = None):
+        self.dim = dim
+        self._lock = threading.RLock()
+        self._matrix = None      # (capacity, dim) float32, rows L2-normalised
+        self._ids = None         # (capacity,) int64
+        self._alive = None       # (capacity,) bool
+        self._tags = None        # (capacity,) int32 code into _tag_names, -1 = untagged
+        self._tag_names: list[str] = []
+        self._tag_codes: dict[str, int] = {}
+        self._size = 0           # rows in use (alive + tombstones)
+        self._dead = 0
+        self._pos: dict[int, int] = {}  # id → row
+        self.synced_id = 0       # highest DB id pulled in by a catch-up (see RAGPipeline)
+
+    def __len__(self) -> int:
+        return len(self._pos)
+
+    def __contains__(self, emb_id) -> bool:
+        return emb_id in self._pos
+
+    # ── Mutation ──────────────────────────────────────────────────────────
+
+    def add(self, ids: list[int], vectors: list[list[float]], tags=None) -> int:
+        if not ids:
+            return 0
+        if self.dim is None:
+            self.dim = len(vectors[0])
+        if tags is None:
+            tags = [None] * len(ids)
+
+        keep_ids, keep_vecs, keep_tags = [], [], []
+        for emb_id, vec, tag in zip(ids, vectors, tags):
+            if vec is None or len(vec) != self.dim:
+                logger.debug("VectorIndex: skipping id=%s (dim mismatch)", emb_id)
+                continue
+            keep_ids.append(int(emb_id))
+            keep_vecs.append(vec)
+            keep_tags.append(tag)
+        if not keep_ids:
+            return 0
+
+        block = _normalise_rows(np.asarray(keep_vecs, dtype=np.float32))
+        with self._lock:
+            self._remove_locked(keep_ids)
+            self._ensure_capacity(self._size + len(keep_ids))
+            start = self._size
+            end = start + len(keep_ids)
+            self._matrix[start:end] = block
+            self._ids[start:end] = keep_ids
+            self._alive[start:end] = True
+            self._tags[start:end] = [self._tag_code(tag) for tag in keep_tags]
+            for offset, emb_id in enumerate(keep_ids):
+                self._pos[emb_id] = start + offset
+            self._size = end
+            self._on_rows_added(start, end)
+        return len(keep_ids)
+
+    def remove(self, ids) -> int:
+        with self._lock:
+            removed = self._remove_locked(ids)
+            if self._dead and self._dead > _COMPACT_RATIO * max(self._size, 1):
+                self._compact()
+            return removed
+
+    def _remove_locked(self, ids) -> int:
+        removed = 0
+        for emb_id in ids:
+            row = self._pos.pop(int(emb_id), None)
+            if row is not None:
+                self._alive[row] = False
+                self._dead += 1
+                removed += 1
+        return removed
+
+    def _tag_code(self, tag) -> int:
+        """Integer code of a tag, registering new ones. Must hold lock."""
+        if tag is None:
+            return -1
+        code = self._tag_codes.get(tag)
+        if code is None:
+            code = self._tag_codes[tag] = len(self._tag_names)
+            self._tag_names.append(tag)
+        return code
+
+    def _ensure_capacity(self, needed: int):
+        if self._matrix is not None and needed <= self._matrix.shape[0]:
+            return
+        capacity = max(_INITIAL_CAPACITY, needed,
+                       2 * (self._matrix.shape[0] if self._matrix is not None else 0))
+        matrix = np.zeros((capacity, self.dim), dtype=np.float32)
+        ids = np.zeros(capacity, dtype=np.int64)
+        alive = np.zeros(capacity, dtype=bool)
+        tags = np.full(capacity, -1, dtype=np.int32)
+        if self._matrix is not None:
+            matrix[:self._size] = self._matrix[:self._size]
+            ids[:self._size] = self._ids[:self._size]
+            alive[:self._size] = self._alive[:self._size]
+            tags[:self._size] = self._tags[:self._size]
+        self._matrix, self._ids, self._alive, self._tags = matrix, ids, alive, tags
+
+    def _compact(self):
+        """Drop tombstoned rows. Must hold lock."""
+        live_rows = np.flatnonzero(self._alive[:self._size])
+        count = len(live_rows)
+        self._matrix[:count] = self._matrix[live_rows]
+        self._ids[:count] = self._ids[live_rows]
+        self._tags[:count] = self._tags[live_rows]
+        self._alive[:count] = True
+        self._alive[count:] = False
+        self._size = count
+        self._dead = 0
+        self._pos = {int(emb_id): row for row, emb_id in enumerate(self._ids[:count])}
+        self._on_compacted(live_rows)
+
+    # Hooks for subclasses that keep per-row structures
+    def _on_rows_added(self, start: int, end: int):
+        pass
+
+    def _on_compacted(self, live_rows):
+        pass
+
+    # ── Search ────────────────────────────────────────────────────────────
+
+    def search(self, query_vec: list[float], k: int,
+               allowed_ids=None, tag=None) -> list[tuple[int, float]]:
+        with self._lock:
+            if not self._pos or self.dim is None or len(query_vec) != self.dim:
+                return []
+            if tag is not None and tag not in self._tag_codes:
+                return []
+            rows = self._candidate_rows(allowed_ids, tag)
+            return self._score_rows(_normalise_vector(query_vec), rows, k)
+
+    def _candidate_rows(self, allowed_ids, tag=None):
+        """Rows to score: live rows, or just the allowed ids, with the tag. Must hold lock."""
+        if allowed_ids is None:
+            rows = np.flatnonzero(self._alive[:self._size])
+        else:
+            rows = np.fromiter(
+                (self._pos[i] for i in allowed_ids if i in self._pos), dtype=np.int64,
+            )
+        return self._filter_tag(rows, tag)
+
+    def _filter_tag(self, rows, tag):
+        if tag is None or not len(rows):
+            return rows
+        return rows[self._tags[rows] == self._tag_codes.get(tag, -2)]
+
+    def _score_rows(self, query, rows, k: int) -> list[tuple[int, float]]:
+        if len(rows) == 0 or k <= 0:
+            return []
+        sims = self._matrix[rows] @ query
+        if len(rows) > k:
+            top = np.argpartition(-sims, k - 1)[:k]
+        else:
+            top = np.arange(len(rows))
+        top = top[np.argsort(-sims[top])]
+        return [(int(self._ids[rows[i]]), float(sims[i])) for i in top]
+
+    # ── Persistence ───────────────────────────────────────────────────────
+
+    def to_arrays(self) -> tuple:
+        """Return (ids, matrix, tags, tag_names) of live rows for persistence."""
+        with self._lock:
+            if not self._size:
+                return (np.array([], dtype=np.int64), np.zeros((0, self.dim or 0), dtype=np.float32),
+                        np.array([], dtype=np.int32), [])
+            live = np.flatnonzero(self._alive[:self._size])
+            return self._ids[live], self._matrix[live], self._tags[live], list(self._tag_names)
+
+    def load_arrays(self, ids, matrix, tags=None, tag_names=()):
+        """
+        Adopt persisted (ids, matrix, tags) as-is — rows are already normalised.
+
+        `matrix` may be a copy-on-write memmap; the first insert that needs
+        more capacity copies it into RAM.
+        """
+        with self._lock:
+            count = len(ids)
+            if not count:
+                return
+            self.dim = int(matrix.shape[1])
+            self._matrix = matrix
+            self._ids = np.asarray(ids, dtype=np.int64).copy()
+            self._alive = np.ones(count, dtype=bool)
+            self._tags = (np.asarray(tags, dtype=np.int32).copy() if tags is not None
+                          else np.full(count, -1, dtype=np.int32))
+            self._tag_names = list(tag_names)
+            self._tag_codes = {name: code for code, name in enumerate(self._tag_names)}
+            self._size = count
+            self._dead = 0
+            self._pos = {int(emb_id): row for row, emb_id in enumerate(self._ids)}
+            self._on_loaded()
+
+    def _on_loaded(self):
+        pass
+
+
+# ── IVF (approximate) Index ───────────────────────────────────────────────────
+
+class IVFVectorIndex(FlatVectorIndex):
+    """
+    Inverted-file index: vectors are bucketed under their nearest k-means
+    centroid and a query scans only the nprobe closest buckets.
+
+    Until IVF_TRAIN_MIN vectors are present the index behaves like
+    FlatVectorIndex. Once the index grows IVF_RETRAIN_FACTOR× past its last
+    training size, the next search starts a background thread to (re)train
+    the centroids; searches keep using the current lists (or an exact scan)
+    until the new centroids are swapped in.
+    """
+
+    backend = "ivf"
+
+    def __init__(self, dim: int | None = None, nprobe: int = IVF_NPROBE,
+                 train_min: int = IVF_TRAIN_MIN):
+        super().__init__(dim)
+        self.nprobe = nprobe
+        self.train_min = train_min
+        self._centroids = None    # (nlist, dim) float32
+        self._assign = None       # (capacity,) int32 list id per row
+        self._lists: list[list[int]] = []
+        self._trained_size = 0
+        self._trainer = None      # background training thread
+
+    @property
+    def is_trained(self) -> bool:
+        return self._centroids is not None
+
+    def _ensure_capacity(self, needed: int):
+        old_capacity = self._matrix.shape[0] if self._matrix is not None else 0
+        super()._ensure_capacity(needed)
+        if self._matrix.shape[0] != old_capacity:
+            assign = np.full(self._matrix.shape[0], -1, dtype=np.int32)
+            if self._assign is not None:
+                assign[:self._size] = self._assign[:self._size]
+            self._assign = assign
+
+    def _on_rows_added(self, start: int, end: int):
+        if not self.is_trained:
+            return
+        lists = self._nearest_centroid(self._matrix[start:end])
+        self._assign[start:end] = lists
+        for offset, list_id in enumerate(lists):
+            self._lists[int(list_id)].append(start + offset)
+
+    def _on_loaded(self):
+        self._assign = np.full(self._size, -1, dtype=np.int32)
+        self._centroids = None
+        self._trained_size = 0
+
+    def _on_compacted(self, live_rows):
+        if not self.is_trained:
+            return
+        count = len(live_rows)
+        self._assign[:count] = self._assign[live_rows]
+        self._assign[count:] = -1
+        self._rebuild_lists()
+
+    def _rebuild_lists(self):
+        self._lists = [[] for _ in range(len(self._centroids))]
+        for row, list_id in enumerate(self._assign[:self._size]):
+            if list_id >= 0:
+                self._lists[int(list_id)].append(row)
+
+    def _nearest_centroid(self, block):
+        return np.argmax(block @ self._centroids.T, axis=1).astype(np.int32)
+
+    def train(self):
+        """(Re)train centroids with spherical k-means and reassign all rows.
+
+        k-means runs on a copied sample outside the lock, so searches and
+        inserts continue meanwhile; only the final reassignment holds it.
+        """
+        with self._lock:
+            if self._dead:
+                self._compact()
+            n = self._size
+            if n < self.train_min:
+                return
+            rng = np.random.default_rng(0)
+            sample = np.array(self._matrix[rng.choice(n, size=min(n, IVF_KMEANS_SAMPLE), replace=False)])
+        nlist = max(1, int(math.sqrt(n)))
+        centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+        for _ in range(IVF_KMEANS_ITERATIONS):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            for c in range(nlist):
+                members = sample[labels == c]
+                if len(members):
+                    centroids[c] = members.sum(axis=0)
+            centroids = _normalise_rows(centroids)
+        with self._lock:
+            # Rows may have been added or compacted away while training
+            self._centroids = centroids
+            self._assign[:self._size] = self._nearest_centroid(self._matrix[:self._size])
+            self._rebuild_lists()
+            self._trained_size = len(self._pos)
+        logger.info("IVFVectorIndex trained: %d vectors, %d lists", n, nlist)
+
+    def _needs_training(self) -> bool:
+        """Must hold lock."""
+        size = len(self._pos)
+        if size < self.train_min:
+            return False
+        return not self.is_trained or size > IVF_RETRAIN_FACTOR * self._trained_size
+
+    def _schedule_training(self):
+        """Start a background training run if one is due and none is running. Must hold lock."""
+        if not self._needs_training() or (self._trainer is not None and self._trainer.is_alive()):
+            return
+        self._trainer = threading.Thread(target=self._train_in_background, name="ivf-train", daemon=True)
+        self._trainer.start()
+
+    def _train_in_background(self):
+        try:
+            self.train()
+        except Exception:
+            logger.warning("IVFVectorIndex: background training failed", exc_info=True)
+
+    def wait_for_training(self, timeout: float | None = None) -> bool:
+        """Block until a running background training finishes (tests, warm-up)."""
+        trainer = self._trainer
+        if trainer is not None:
+            trainer.join(timeout)
+        return self.is_trained
+
+    def search(self, query_vec: list[float], k: int,
+               allowed_ids=None, tag=None) -> list[tuple[int, float]]:
+        with self._lock:
+            self._schedule_training()
+            if not self._pos or self.dim is None or len(query_vec) != self.dim:
+                return []
+            if tag is not None and tag not in self._tag_codes:
+                return []
+            query = _normalise_vector(query_vec)
+            # Small allowed sets are cheaper to score exactly
+            if not self.is_trained or (allowed_ids is not None and len(allowed_ids) <= k * 32):
+                return self._score_rows(query, self._candidate_rows(allowed_ids, tag), k)
+
+            nprobe = min(self.nprobe, len(self._centroids))
+            order = np.argsort(-(self._centroids @ query))[:nprobe]
+            rows = np.fromiter(
+                (r for c in order for r in self._lists[int(c)]), dtype=np.int64,
+            )
+            rows = rows[self._alive[rows]] if len(rows) else rows
+            rows = self._filter_tag(rows, tag)
+            if allowed_ids is not None and len(rows):
+                allowed = np.fromiter(allowed_ids, dtype=np.int64)
+                rows = rows[np.isin(self._ids[rows], allowed)]
+            hits = self._score_rows(query, rows, k)
+            if len(hits) < k:
+                # Probed lists too sparse for the filter — widen to an exact scan
+                hits = self._score_rows(query, self._candidate_rows(allowed_ids, tag), k)
+            return hits
+
+
+# ── Registry ──────────────────────────────────────────────────────────────────
+
+_BACKENDS = {
+    "flat": FlatVectorIndex,
+    "ivf": IVFVectorIndex,
+}
+
+
+class VectorIndexRegistry:
+    """
+    Holds one VectorIndex per (program_id, entity_type) partition.
+
+    Partitions are loaded from disk on first access (when a persist
+    directory is configured) and written back by flush(), which callers
+    invoke after indexing; writes are throttled to save_interval seconds.
+
+    `stamp` identifies the data the partitions were built from (RAG uses
+    the active KB version). sync_stamp() drops every partition when it
+    changes, and persisted partitions written under another stamp are
+    ignored on load.
+    """
+
+    def __init__(self, backend: str = VECTOR_INDEX_BACKEND,
+                 persist_dir: str = VECTOR_INDEX_DIR,
+                 save_interval: int = VECTOR_INDEX_SAVE_INTERVAL):
+        if backend not in _BACKENDS:
+            raise ValueError(f"Unknown vector index backend: {backend}")
+        self.backend = backend
+        self.persist_dir = persist_dir
+        self.save_interval = save_interval
+        self._indexes: dict[tuple, VectorIndex] = {}
+        self._dirty: set[tuple] = set()
+        self._last_save = 0.0
+        self._lock = threading.Lock()
+        self.stamp = None
+
+    def get(self, program_id: int | None, entity_type: str) -> VectorIndex:
+        """Return the partition index, loading or creating it on demand."""
+        key = (program_id, entity_type)
+        with self._lock:
+            index = self._indexes.get(key)
+            if index is None:
+                index = _BACKENDS[self.backend]()
+                self._load(key, index)
+                self._indexes[key] = index
+            return index
+
+    def sync_stamp(self, stamp) -> bool:
+        """Adopt a new data stamp, dropping all partitions if it changed. True if dropped."""
+        with self._lock:
+            if stamp == self.stamp:
+                return False
+            self.stamp = stamp
+            self._indexes.clear()
+            self._dirty.clear()
+            return True
+
+    def add(self, program_id, entity_type, ids, vectors, tags=None) -> int:
+        added = self.get(program_id, entity_type).add(ids, vectors, tags)
+        if added:
+            self._dirty.add((program_id, entity_type))
+        return added
+
+    def remove(self, program_id, entity_type, ids) -> int:
+        removed = self.get(program_id, entity_type).remove(ids)
+        if removed:
+            self._dirty.add((program_id, entity_type))
+        return removed
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "backend": self.backend,
+                "partitions": len(self._indexes),
+                "vectors": sum(len(ix) for ix in self._indexes.values()),
+                "persist_dir": self.persist_dir or None,
+            }
+
+    def clear(self):
+        """Drop all in-memory partitions (files on disk are left untouched)."""
+        with self._lock:
+            self._indexes.clear()
+            self._dirty.clear()
+
+    # ── Persistence ───────────────────────────────────────────────────────
+
+    def flush(self, force: bool = False) -> int:
+        """Persist dirty partitions. Returns the number of partitions written."""
+        if not self.persist_dir or not self._dirty:
+            return 0
+        now = time.time()
+        if not force and now - self._last_save < self.save_interval:
+            return 0
+        os.makedirs(self.persist_dir, exist_ok=True)
+        written = 0
+        for key in list(self._dirty):
+            index = self._indexes.get(key)
+            if index is None:
+                continue
+            manifest_path = self._manifest_path(key)
+            # Clean before the snapshot: an add() during the write marks it dirty again
+            self._dirty.discard(key)
+            try:
+                self._write_partition(key, index)
+                written += 1
+            except OSError as exc:
+                self._dirty.add(key)
+                logger.warning("VectorIndex: failed to persist %s: %s", manifest_path, exc)
+        self._last_save = now
+        return written
+
+    def _write_partition(self, key, index: VectorIndex):
+        """Write a new version of the partition's arrays, then swap the manifest to it."""
+        ids, matrix, tags, tag_names = index.to_arrays()
+        previous = self._read_manifest(key)
+        version = uuid.uuid4().hex[:12]
+        for name, arr in (("ids", ids), ("vectors", matrix), ("tags", tags)):
+            with open(self._array_path(key, version, name), "wb") as fh:
+                np.save(fh, np.ascontiguousarray(arr))
+        manifest = {
+            "version": version,
+            "count": int(len(ids)),
+            "stamp": self.stamp,
+            "synced_id": int(index.synced_id),
+            "tags": tag_names,
+        }
+        tmp_path = f"{self._manifest_path(key)}.{version}.tmp"
+        with open(tmp_path, "w") as fh:
+            json.dump(manifest, fh)
+        os.replace(tmp_path, self._manifest_path(key))
+        # Keep the previous version for readers that opened its manifest just before the swap
+        keep = {version, previous.get("version") if previous else None}
+        self._remove_versions(key, keep)
+
+    def _remove_versions(self, key, keep):
+        prefix = os.path.basename(self._stem(key)) + "."
+        for name in os.listdir(self.persist_dir):
+            if not name.startswith(prefix) or not name.endswith(".npy"):
+                continue
+            version = name[len(prefix):].split(".", 1)[0]
+            if version not in keep:
+                try:
+                    os.remove(os.path.join(self.persist_dir, name))
+                except OSError:
+                    pass
+
+    def _read_manifest(self, key) -> dict | None:
+        try:
+            with open(self._manifest_path(key)) as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            return None
+
+    def _load(self, key, index: VectorIndex):
+        if not self.persist_dir:
+            return
+        manifest = self._read_manifest(key)
+        if manifest is None:
+            return
+        if manifest.get("stamp") != self.stamp:
+            logger.info("VectorIndex: ignoring %s written for another data stamp", self._manifest_path(key))
+            return
+        version = manifest["version"]
+        try:
+            ids = np.load(self._array_path(key, version, "ids"))
+            matrix = np.load(self._array_path(key, version, "vectors"), mmap_mode="c")
+            tags = np.load(self._array_path(key, version, "tags"))
+            if matrix.ndim != 2 or not len(matrix) == len(ids) == len(tags) == manifest["count"]:
+                raise ValueError("ids/matrix length mismatch")
+            index.load_arrays(ids, matrix, tags, manifest.get("tags", []))
+            index.synced_id = int(manifest.get("synced_id", 0))
+            logger.info("VectorIndex: mapped %d vectors from %s", len(index), self._manifest_path(key))
+        except Exception as exc:
+            logger.warning("VectorIndex: could not load %s: %s", self._manifest_path(key), exc)
+
+    def _stem(self, key) -> str:
+        program_id, entity_type = key
+        safe_type = re.sub(r"[^A-Za-z0-9_-]", "_", entity_type or "any")
+        program = "global" if program_id is None else str(program_id)
+        return os.path.join(self.persist_dir, f"p{program}__{safe_type}")
+
+    def _manifest_path(self, key) -> str:
+        return f"{self._stem(key)}.json"
+
+    def _array_path(self, key, version: str, name: str) -> str:
+        return f"{self._stem(key)}.{version}.{name}.npy"
+
+
+_registry: VectorIndexRegistry | None = None
+_registry_lock = threading.Lock()
+
+
+def get_vector_index_registry() -> VectorIndexRegistry | None:
+    """Process-wide registry, or None when disabled or NumPy is unavailable."""
+    global _registry
+    if np is None or VECTOR_INDEX_BACKEND == "none":
+        return None
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = VectorIndexRegistry()
+    return _registry
+
+
+def reset_vector_index_registry():
+    """Drop the in-memory registry (tests / after a DB reset)."""
+    global _registry
+    with _registry_lock:
+        _registry = None
+
+
+# ── Helpers ───────────────────────────────────────────────────────────────────
+
+def _normalise_rows(block):
+    norms = np.linalg.norm(block, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (block / norms).astype(np.float32, copy=False)
+
+
+def _normalise_vector(vec):
+    arr = np.asarray(vec, dtype=np.float32)
+    norm = float(np.linalg.norm(arr))
+    return arr / norm if norm else arr
@@ -5,6 +5,8 @@ Blueprint registry.
 
 from flask import request
 
+from app.services.helpers.pagination import paginate
+
 
 def paginate_query(query, default_limit=200, max_limit=1000):
     """Apply limit/offset pagination to a SQLAlchemy query.
@@ -27,3 +29,33 @@ def paginate_query(query, default_limit=200, max_limit=1000):
         offset = 0
     items = query.limit(limit).offset(offset).all()
     return items, total
+
+
+def paginate_request(query, order, default_limit=200, max_limit=1000):
+    """Offset or keyset pagination of ``query`` driven by request args.
+
+    Query params:
+        cursor — opaque keyset cursor; present (even empty) selects keyset mode
+        limit  — max items (default 200, capped at max_limit)
+        offset — starting position in offset mode (default 0)
+        count  — exact | estimate | none (keyset default: exact on first page only)
+
+    ``order`` lists the order_by expressions ending in a unique column.
+
+    Returns:
+        (items_list, meta) where meta is {"total"} in offset mode and
+        {"total", "next_cursor", "has_more"} in keyset mode.
+
+    Raises:
+        ValueError (CursorError) on a malformed cursor or count mode.
+    """
+    return paginate(
+        query,
+        order,
+        cursor=request.args.get("cursor"),
+        limit=request.args.get("limit"),
+        offset=request.args.get("offset"),
+        count=request.args.get("count"),
+        default_limit=default_limit,
+        max_limit=max_limit,
+    )
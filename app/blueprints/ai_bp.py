@@ -509,18 +509,31 @@ def embedding_stats():
 @ai_bp.route("/embeddings/index", methods=["POST"])
 @require_permission("ai.admin")
 def index_entities():
-    """Batch-index entities into the vector store."""
+    """Batch-index entities into the vector store (``"async": true`` runs it as an AITask)."""
     data = request.get_json(silent=True) or {}
     entities = data.get("entities", [])
     if not entities:
         return jsonify({"error": "entities array is required"}), 400
 
     rag = _get_rag()
-    total = rag.batch_index(
-        entities,
-        program_id=data.get("program_id"),
-        embed=data.get("embed", True),
-    )
+    options = {
+        "program_id": data.get("program_id"),
+        "embed": data.get("embed", True),
+        "kb_version": data.get("kb_version", "1.0.0"),
+    }
+    if data.get("async"):
+        # Durable task: survives worker restarts, claimed by any worker's pool
+        task = _get_task_runner().submit(
+            task_type="rag_batch_index",
+            input_data={"entities": entities, **options},
+            user=getattr(g, "user", "system"),
+            program_id=options["program_id"],
+            priority=data.get("priority", "low"),
+            tenant_id=getattr(g, "tenant_id", None),
+        )
+        return jsonify(task), 202
+
+    total = rag.batch_index(entities, **options)
     return jsonify({"indexed_chunks": total}), 201
 
 
@@ -1463,12 +1476,16 @@ def performance_by_assistant():
 @ai_bp.route("/cache/stats", methods=["GET"])
 @require_permission("ai.view")
 def cache_stats():
-    """In-memory + DB cache statistics."""
+    """In-memory + DB cache statistics, plus single-flight coalescing counters."""
     gw = _get_gateway()
     if gw._cache:
         stats = gw._cache.get_stats()
     else:
         stats = {"enabled": False}
+    if gw._single_flight:
+        stats["single_flight"] = gw._single_flight.get_stats()
+    if gw._budget_ledger:
+        stats["budget_ledger"] = gw._budget_ledger.get_stats()
     return jsonify(stats)
 
 
@@ -1542,10 +1559,10 @@ def reset_budget(budget_id):
 @ai_bp.route("/budgets/status", methods=["GET"])
 @require_permission("ai.view")
 def budget_status():
-    """Check budget status for a program/user."""
+    """Check budget status for a program/user (includes usage not yet flushed by the gateway)."""
     program_id = request.args.get("program_id", type=int)
     user = request.args.get("user")
-    svc = _get_budget_service()
+    svc = _get_gateway()._budget_ledger or _get_budget_service()
     result = svc.check_budget(program_id=program_id, user=user)
     return jsonify(result)
 
@@ -1732,6 +1749,8 @@ def create_task():
         user=data.get("user", getattr(g, "user", "system")),
         program_id=data.get("program_id"),
         workflow_name=data.get("workflow_name"),
+        priority=data.get("priority", "normal"),
+        tenant_id=getattr(g, "tenant_id", None),
     )
     return jsonify(result), 201
 
@@ -1816,25 +1835,53 @@ def list_workflows():
 @require_permission("ai.generate")
 @_ai_generate_limit
 def execute_workflow(workflow_name):
-    """Execute an AI workflow (sync or async)."""
+    """
+    Execute an AI workflow (sync, async or streamed).
+
+    Request body (JSON):
+        input      (dict): Initial workflow parameters.
+        program_id (int):  Associated program.
+        async      (bool): Submit to the TaskRunner and return the task.
+        stream     (bool): Stream step results as Server-Sent Events.
+        refresh    (bool): Ignore memoised step outputs.
+
+    Stream events:
+        data: {"type": "step",  "result": dict}   — one per step, as it finishes
+        data: {"type": "done",  "result": dict}   — full workflow result
+        data: {"type": "error", "result": dict}
+    """
     data = request.get_json(silent=True) or {}
     orchestrator = _get_orchestrator()
+    params = {
+        "workflow_name": workflow_name,
+        "initial_input": data.get("input", {}),
+        "program_id": data.get("program_id", 0),
+        "user": data.get("user", getattr(g, "user", "system")),
+    }
+    use_cache = not data.get("refresh", False)
 
-    is_async = data.get("async", False)
-    if is_async:
-        result = orchestrator.execute_async(
-            workflow_name=workflow_name,
-            initial_input=data.get("input", {}),
-            program_id=data.get("program_id", 0),
-            user=data.get("user", getattr(g, "user", "system")),
-        )
+    if data.get("async", False):
+        from app.ai.task_runner import TaskQueueFull
+
+        try:
+            result = orchestrator.execute_async(**params)
+        except TaskQueueFull as e:
+            return jsonify({"error": str(e)}), 503
+    elif data.get("stream", False):
+        def _generate():
+            try:
+                for event in orchestrator.iter_execute(**params, use_cache=use_cache):
+                    yield f"data: {json.dumps(event, default=str)}\n\n"
+            except Exception:
+                logger.exception("workflow stream error workflow=%s", workflow_name)
+                yield f"data: {json.dumps({'type': 'error', 'result': {'error': 'Internal server error'}})}\n\n"
+
+        resp = Response(stream_with_context(_generate()), content_type="text/event-stream")
+        resp.headers["X-Accel-Buffering"] = "no"
+        resp.headers["Cache-Control"] = "no-cache"
+        return resp
     else:
-        result = orchestrator.execute(
-            workflow_name=workflow_name,
-            initial_input=data.get("input", {}),
-            program_id=data.get("program_id", 0),
-            user=data.get("user", getattr(g, "user", "system")),
-        )
+        result = orchestrator.execute(**params, use_cache=use_cache)
     return jsonify(result)
 
 
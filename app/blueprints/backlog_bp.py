@@ -54,7 +54,7 @@ from app.models.backlog import (
     BacklogItem, ConfigItem, FunctionalSpec, TechnicalSpec, Sprint, SpecTemplate,
 )
 from app.models.program import Program
-from app.blueprints import paginate_query
+from app.blueprints import paginate_request
 from app.services import backlog_service
 from app.services.helpers.scoped_queries import get_scoped_or_none
 from app.utils.helpers import db_commit_or_error, get_or_404 as _get_or_404
@@ -166,8 +166,11 @@ def list_backlog(program_id):
             except (ValueError, TypeError):
                 return jsonify({"error": "sprint_id must be an integer"}), 400
 
-    items, total = paginate_query(query.order_by(BacklogItem.board_order, BacklogItem.id))
-    return jsonify({"items": [i.to_dict() for i in items], "total": total}), 200
+    try:
+        items, meta = paginate_request(query, (BacklogItem.board_order, BacklogItem.id))
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+    return jsonify({"items": [i.to_dict() for i in items], **meta}), 200
 
 
 @backlog_bp.route("/programs/<int:program_id>/backlog", methods=["POST"])
@@ -480,6 +483,13 @@ def list_config_items(program_id):
         if val:
             query = query.filter(getattr(ConfigItem, param) == val)
 
+    if "cursor" in request.args:
+        try:
+            items, meta = paginate_request(query, (ConfigItem.id,))
+        except ValueError as exc:
+            return jsonify({"error": str(exc)}), 400
+        return jsonify({"items": [i.to_dict() for i in items], **meta}), 200
+
     items = query.order_by(ConfigItem.id).all()
     return jsonify([i.to_dict() for i in items]), 200
 
@@ -852,24 +852,38 @@ def start_cutover_clock(plan_id: int):
 
 @cutover_bp.route("/plans/<int:plan_id>/live-status", methods=["GET"])
 def get_live_status(plan_id: int):
-    """Return war-room snapshot for 30s-polling dashboard.
+    """Return war-room snapshot for the polling dashboard.
 
-    Query params: program_id (required), tenant_id (required)
+    Query params: program_id (required), tenant_id (required),
+                  since (optional — switches to long-polling)
     Returns: war-room snapshot dict (clock, tasks, go_no_go, workstreams, critical_path).
+    With since (empty on the first call): waits a few seconds for a change,
+    then returns {"version", "snapshot"} or {"version", "delta"} — pass the
+    returned version as the next since. Delta values are the changed keys
+    only (nested dicts diffed, removed keys null).
     """
     program_id = request.args.get("program_id", type=int)
     tenant_id = request.args.get("tenant_id", type=int)
     if not program_id or not tenant_id:
         return jsonify({"error": "program_id and tenant_id query params are required"}), 400
+    since = request.args.get("since")
     try:
-        snapshot = cutover_service.get_cutover_live_status(
-            tenant_id=tenant_id,
-            program_id=program_id,
-            plan_id=plan_id,
-        )
+        if since is not None:
+            result = cutover_service.poll_live_status(
+                tenant_id=tenant_id,
+                program_id=program_id,
+                plan_id=plan_id,
+                since=since or None,
+            )
+        else:
+            result = cutover_service.get_cutover_live_status(
+                tenant_id=tenant_id,
+                program_id=program_id,
+                plan_id=plan_id,
+            )
     except ValueError as exc:
         return jsonify({"error": str(exc)}), 404
-    return jsonify(snapshot), 200
+    return jsonify(result), 200
 
 
 @cutover_bp.route("/tasks/<int:task_id>/start-task", methods=["POST"])
@@ -957,9 +971,11 @@ def flag_issue(task_id: int):
 def get_critical_path(plan_id: int):
     """Calculate and return critical-path task IDs for a cutover plan.
 
-    Query params: program_id (required), tenant_id (required)
+    Query params: program_id (required), tenant_id (required),
+        include_schedule (optional, "true" adds per-task slack/float)
     Side-effect: sets is_critical_path=True on critical-path tasks.
-    Returns: { "critical_path_task_ids": [int, ...], "count": int }
+    Returns: { "critical_path_task_ids": [int, ...], "count": int,
+               "schedule": {"makespan_min": int, "tasks": [...]} (if requested) }
     """
     program_id = request.args.get("program_id", type=int)
     tenant_id = request.args.get("tenant_id", type=int)
@@ -971,8 +987,15 @@ def get_critical_path(plan_id: int):
             program_id=program_id,
             plan_id=plan_id,
         )
+        result = {"critical_path_task_ids": task_ids, "count": len(task_ids)}
+        if request.args.get("include_schedule", "").lower() == "true":
+            result["schedule"] = cutover_service.get_critical_path_schedule(
+                tenant_id=tenant_id,
+                program_id=program_id,
+                plan_id=plan_id,
+            )
     except ValueError as exc:
         msg = str(exc)
         code = 409 if "circular" in msg.lower() else 404
         return jsonify({"error": msg}), code
-    return jsonify({"critical_path_task_ids": task_ids, "count": len(task_ids)}), 200
+    return jsonify(result), 200
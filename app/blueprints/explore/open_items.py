@@ -54,8 +54,13 @@ def list_open_items():
         "sort_dir": request.args.get("sort_dir", "desc"),
         "page": request.args.get("page", 1, type=int),
         "per_page": request.args.get("per_page", 50, type=int),
+        "cursor": request.args.get("cursor"),
+        "count": request.args.get("count"),
     }
-    result = explore_service.list_open_items_service(filters)
+    try:
+        result = explore_service.list_open_items_service(filters)
+    except ValueError as exc:
+        return api_error(E.VALIDATION_INVALID, str(exc))
     return jsonify(result)
 
 
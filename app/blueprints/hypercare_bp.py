@@ -62,6 +62,7 @@ import logging
 from flask import Blueprint, g, jsonify, request
 
 import app.services.hypercare_service as svc
+from app.services import dashboard_refresh
 
 logger = logging.getLogger(__name__)
 
@@ -818,8 +819,16 @@ def get_analytics(plan_id: int):
 def get_war_room(plan_id: int):
     """Enhanced war room dashboard with health RAG, escalations, exit readiness."""
     try:
-        result = svc.get_war_room_dashboard(_tenant_id(), plan_id)
-        return jsonify(result), 200
+        tenant_id = _tenant_id()
+        result, meta = dashboard_refresh.serve(
+            "war_room", (tenant_id, plan_id),
+            lambda: svc.get_war_room_dashboard(tenant_id, plan_id),
+            program_id=svc.get_plan_program_id(tenant_id, plan_id),
+            tags=svc.WAR_ROOM_TAGS,
+        )
+        return dashboard_refresh.apply_headers(
+            jsonify(dashboard_refresh.with_computed_at(result, meta)), meta,
+        ), 200
     except ValueError as e:
         return jsonify({"error": str(e)}), 404
     except Exception:
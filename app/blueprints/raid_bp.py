@@ -44,7 +44,7 @@ from app.models.raid import (
 from app.services import raid_service
 from app.services.notification import NotificationService
 from app.services.helpers.scoped_queries import get_scoped_or_none
-from app.blueprints import paginate_query
+from app.blueprints import paginate_request
 from app.utils.helpers import db_commit_or_error
 
 logger = logging.getLogger(__name__)
@@ -146,8 +146,11 @@ def list_risks(pid):
     if rag:
         q = q.filter_by(rag_status=rag)
 
-    risks, total = paginate_query(q.order_by(Risk.risk_score.desc(), Risk.id))
-    return jsonify({"items": [r.to_dict() for r in risks], "total": total})
+    try:
+        risks, meta = paginate_request(q, (Risk.risk_score.desc(), Risk.id))
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+    return jsonify({"items": [r.to_dict() for r in risks], **meta})
 
 
 @raid_bp.route("/programs/<int:pid>/risks", methods=["POST"])
@@ -251,6 +254,13 @@ def list_actions(pid):
     if action_type:
         q = q.filter_by(action_type=action_type)
 
+    if "cursor" in request.args:
+        try:
+            actions, meta = paginate_request(q, (Action.due_date, Action.id))
+        except ValueError as exc:
+            return jsonify({"error": str(exc)}), 400
+        return jsonify({"items": [a.to_dict() for a in actions], **meta})
+
     actions = q.order_by(Action.due_date.asc().nullslast(), Action.id).all()
     return jsonify([a.to_dict() for a in actions])
 
@@ -357,6 +367,13 @@ def list_issues(pid):
     if priority:
         q = q.filter_by(priority=priority)
 
+    if "cursor" in request.args:
+        try:
+            issues, meta = paginate_request(q, (Issue.id.desc(),))
+        except ValueError as exc:
+            return jsonify({"error": str(exc)}), 400
+        return jsonify({"items": [i.to_dict() for i in issues], **meta})
+
     issues = q.order_by(Issue.id.desc()).all()
     return jsonify([i.to_dict() for i in issues])
 
@@ -461,6 +478,13 @@ def list_decisions(pid):
     if priority:
         q = q.filter_by(priority=priority)
 
+    if "cursor" in request.args:
+        try:
+            decisions, meta = paginate_request(q, (Decision.id.desc(),))
+        except ValueError as exc:
+            return jsonify({"error": str(exc)}), 400
+        return jsonify({"items": [d.to_dict() for d in decisions], **meta})
+
     decisions = q.order_by(Decision.id.desc()).all()
     return jsonify([d.to_dict() for d in decisions])
 
@@ -1,10 +1,19 @@
 """Testing blueprint route registrations for analytics and reporting surfaces."""
 
-from flask import jsonify, request
+from datetime import datetime, timezone
+
+from flask import Response, jsonify, request, stream_with_context
 
 from app.models.program import Program
+from app.services import dashboard_refresh
 from app.services.testing import analytics as testing_analytics_service
 
+_STREAM_MIMETYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
 
 def register_testing_analytics_routes(
     bp,
@@ -14,19 +23,52 @@ def register_testing_analytics_routes(
 ):
     """Register analytics/reporting routes on the shared testing blueprint."""
 
+    def _cockpit_response(name, pid, compute):
+        project_id = resolved_testing_project_id(pid)
+        payload, meta = dashboard_refresh.serve(
+            name,
+            (pid, project_id),
+            lambda: compute(pid, project_id=project_id),
+            program_id=pid,
+            tags=testing_analytics_service.COCKPIT_TAGS,
+        )
+        return dashboard_refresh.apply_headers(
+            jsonify(dashboard_refresh.with_computed_at(payload, meta)), meta,
+        )
+
     @bp.route("/programs/<int:pid>/testing/traceability-matrix", methods=["GET"])
     def traceability_matrix(pid):
-        """Build and return the full Requirement-TestCase-Defect matrix."""
+        """Build and return the full Requirement-TestCase-Defect matrix.
+
+        ``?format=ndjson|csv|xlsx`` streams the matrix in requirement pages
+        instead of materialising it into one JSON document.
+        """
         program, err = get_or_404(Program, pid)
         if err:
             return err
 
-        result = testing_analytics_service.compute_traceability_matrix(
-            pid,
-            request.args.get("source", "explore"),
-            project_id=resolved_testing_project_id(pid),
+        source = request.args.get("source", "explore")
+        project_id = resolved_testing_project_id(pid)
+        fmt = (request.args.get("format") or "json").lower()
+        if fmt == "json":
+            return jsonify(testing_analytics_service.compute_traceability_matrix(
+                pid,
+                source,
+                project_id=project_id,
+            ))
+        if fmt not in _STREAM_MIMETYPES:
+            return jsonify({"error": "format must be one of: json, ndjson, csv, xlsx"}), 400
+
+        chunks = testing_analytics_service.stream_traceability_matrix(
+            pid, fmt, source, project_id=project_id,
         )
-        return jsonify(result)
+        headers = {}
+        if fmt != "ndjson":
+            date_str = datetime.now(timezone.utc).strftime("%Y%m%d")
+            headers["Content-Disposition"] = (
+                f"attachment; filename=Traceability_Program{pid}_{date_str}.{fmt}"
+            )
+        return Response(stream_with_context(chunks), mimetype=_STREAM_MIMETYPES[fmt], headers=headers)
 
     @bp.route("/programs/<int:pid>/testing/regression-sets", methods=["GET"])
     def regression_sets(pid):
@@ -78,10 +120,7 @@ def register_testing_analytics_routes(
         program, err = get_or_404(Program, pid)
         if err:
             return err
-        return jsonify(testing_analytics_service.compute_release_readiness(
-            pid,
-            project_id=resolved_testing_project_id(pid),
-        ))
+        return _cockpit_response("release_readiness", pid, testing_analytics_service.compute_release_readiness)
 
     @bp.route("/programs/<int:pid>/testing/dashboard/cycle-risk", methods=["GET"])
     def testing_cycle_risk_dashboard(pid):
@@ -89,10 +128,7 @@ def register_testing_analytics_routes(
         program, err = get_or_404(Program, pid)
         if err:
             return err
-        return jsonify(testing_analytics_service.compute_cycle_risk_dashboard(
-            pid,
-            project_id=resolved_testing_project_id(pid),
-        ))
+        return _cockpit_response("cycle_risk", pid, testing_analytics_service.compute_cycle_risk_dashboard)
 
     @bp.route("/programs/<int:pid>/testing/dashboard/retest-readiness", methods=["GET"])
     def testing_retest_readiness_dashboard(pid):
@@ -111,10 +147,7 @@ def register_testing_analytics_routes(
         program, err = get_or_404(Program, pid)
         if err:
             return err
-        return jsonify(testing_analytics_service.compute_go_no_go(
-            pid,
-            project_id=resolved_testing_project_id(pid),
-        ))
+        return _cockpit_response("go_no_go", pid, testing_analytics_service.compute_go_no_go)
 
     @bp.route("/programs/<int:pid>/testing/scope-coverage/<string:l3_id>", methods=["GET"])
     def l3_scope_coverage(pid, l3_id):
@@ -82,6 +82,8 @@ def register_testing_catalog_routes(
                 search=request.args.get("search"),
                 limit=request.args.get("limit"),
                 offset=request.args.get("offset"),
+                cursor=request.args.get("cursor"),
+                count=request.args.get("count"),
             )
         except ValueError as exc:
             return jsonify({"error": str(exc)}), 400
@@ -158,7 +160,7 @@ def register_testing_catalog_routes(
             }), 400
 
         module = data.get("module", "GEN")
-        code = data.get("code") or f"TC-{module.upper()}-{TestCase.query.filter_by(program_id=pid).count() + 1:04d}"
+        code = data.get("code") or f"TC-{module.upper()}-{catalog_service.reserve_test_case_numbers(pid)[0]:04d}"
         try:
             assigned_to_id = normalize_member_scope(
                 pid,
@@ -764,6 +766,8 @@ def register_testing_catalog_routes(
                 suite_type=request.args.get("suite_type"),
                 limit=request.args.get("limit"),
                 offset=request.args.get("offset"),
+                cursor=request.args.get("cursor"),
+                count=request.args.get("count"),
             )
         except ValueError as exc:
             return jsonify({"error": str(exc)}), 400
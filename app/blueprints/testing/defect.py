@@ -36,6 +36,8 @@ def register_testing_defect_routes(
                 search=request.args.get("search"),
                 limit=request.args.get("limit"),
                 offset=request.args.get("offset"),
+                cursor=request.args.get("cursor"),
+                count=request.args.get("count"),
             )
         except ValueError as exc:
             return jsonify({"error": str(exc)}), 400
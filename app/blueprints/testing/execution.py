@@ -98,14 +98,20 @@ def register_testing_execution_routes(
         cycle, err = get_or_404(TestCycle, cycle_id)
         if err:
             return err
-        return jsonify(execution_queries.list_test_runs(
-            cycle.id,
-            run_type=request.args.get("run_type"),
-            status=request.args.get("status"),
-            result=request.args.get("result"),
-            limit=request.args.get("limit"),
-            offset=request.args.get("offset"),
-        ))
+        try:
+            result = execution_queries.list_test_runs(
+                cycle.id,
+                run_type=request.args.get("run_type"),
+                status=request.args.get("status"),
+                result=request.args.get("result"),
+                limit=request.args.get("limit"),
+                offset=request.args.get("offset"),
+                cursor=request.args.get("cursor"),
+                count=request.args.get("count"),
+            )
+        except ValueError as exc:
+            return jsonify({"error": str(exc)}), 400
+        return jsonify(result)
 
     @bp.route("/testing/cycles/<int:cycle_id>/runs", methods=["POST"])
     def create_test_run(cycle_id):
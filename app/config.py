@@ -56,6 +56,11 @@ class Config:
     JWT_ACCESS_EXPIRES = int(os.getenv("JWT_ACCESS_EXPIRES", "900"))      # 15 minutes
     JWT_REFRESH_EXPIRES = int(os.getenv("JWT_REFRESH_EXPIRES", "604800"))  # 7 days
 
+    # Cockpit dashboards: serve stale while one worker refreshes.
+    # "name=fresh:max_stale,..." seconds, e.g. "go_no_go=30:600,war_room=10"
+    DASHBOARD_SWR_ENABLED = os.getenv("DASHBOARD_SWR_ENABLED", "true").lower() == "true"
+    DASHBOARD_FRESHNESS = os.getenv("DASHBOARD_FRESHNESS", "")
+
 
 class DevelopmentConfig(Config):
     """Development environment configuration."""
@@ -77,6 +82,8 @@ class TestingConfig(Config):
     # Auth disabled in test environment
     API_AUTH_ENABLED = "false"
     RATELIMIT_ENABLED = False
+    # Compute dashboards inline so tests see their own writes
+    DASHBOARD_SWR_ENABLED = False
 
     # SQLite in-memory doesn't support pool settings
     SQLALCHEMY_ENGINE_OPTIONS = {}
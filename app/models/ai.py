@@ -5,6 +5,7 @@ AI domain models — Sprint 7 + 9.5 KB Versioning + S19 Multi-turn + S20 Perf +
 Models:
     - AIUsageLog: Token/cost tracking per LLM call
     - AIEmbedding: Vector store for RAG (pgvector-ready, SQLite-safe)
+    - AIKeywordPosting: Inverted index postings for the RAG keyword (BM25) leg
     - AISuggestion: AI recommendation queue (approve/reject workflow)
     - AIAuditLog: Full audit trail for every AI invocation
     - KBVersion: Knowledge Base version tracking
@@ -191,8 +192,8 @@ class AIEmbedding(_TenantQueryMixin, db.Model):
     """
     Vector store for RAG retrieval.
 
-    In production (PostgreSQL + pgvector), `embedding` is a vector(1536) column.
-    In dev/test (SQLite), embeddings are stored as JSON text and searched in Python.
+    Vectors are stored as a packed binary blob (see app.ai.embedding_codec);
+    `embedding_json` is kept for legacy rows and, on PostgreSQL, the pgvector path.
     """
 
     __tablename__ = "ai_embeddings"
@@ -215,6 +216,12 @@ class AIEmbedding(_TenantQueryMixin, db.Model):
     # Embedding vector — stored as JSON string for SQLite compatibility
     # In PostgreSQL migration, this becomes vector(1536) with HNSW index
     embedding_json = db.Column(db.Text, nullable=True, comment="JSON-encoded float[] for SQLite; vector(1536) in PG")
+    # Packed binary vector — float32 / float16 / int8 (see app.ai.embedding_codec)
+    embedding_blob = db.Column(db.LargeBinary, nullable=True, comment="Packed little-endian vector")
+    embedding_format = db.Column(db.String(10), nullable=True, comment="float32 | float16 | int8")
+    # BM25 document length; NULL = not yet in the keyword inverted index
+    token_count = db.Column(db.Integer, nullable=True, index=True,
+                            comment="Token count of chunk_text (BM25 doc length)")
 
     # Metadata for filtering
     module = db.Column(db.String(50), nullable=True, comment="SAP module: FI, MM, SD...")
@@ -243,6 +250,10 @@ class AIEmbedding(_TenantQueryMixin, db.Model):
         db.Index("ix_ai_embedding_entity", "entity_type", "entity_id"),
     )
 
+    @property
+    def has_embedding(self) -> bool:
+        return self.embedding_blob is not None or self.embedding_json is not None
+
     def to_dict(self):
         return {
             "id": self.id,
@@ -253,7 +264,8 @@ class AIEmbedding(_TenantQueryMixin, db.Model):
             "chunk_index": self.chunk_index,
             "module": self.module,
             "phase": self.phase,
-            "has_embedding": self.embedding_json is not None,
+            "has_embedding": self.has_embedding,
+            "embedding_format": self.embedding_format,
             "kb_version": self.kb_version,
             "content_hash": self.content_hash,
             "embedding_model": self.embedding_model,
@@ -264,6 +276,33 @@ class AIEmbedding(_TenantQueryMixin, db.Model):
         }
 
 
+# ── AIKeywordPosting ──────────────────────────────────────────────────────────
+
+class AIKeywordPosting(db.Model):
+    """
+    Inverted-index posting for the RAG keyword (BM25) leg.
+
+    One row per (term, active chunk). Maintained by app.ai.keyword_index when
+    RAGPipeline activates or deactivates chunks; document frequency for a
+    term is the posting count within the program.
+    """
+
+    __tablename__ = "ai_keyword_postings"
+
+    id = db.Column(db.Integer, primary_key=True)
+    embedding_id = db.Column(
+        db.Integer, db.ForeignKey("ai_embeddings.id", ondelete="CASCADE"),
+        nullable=False, index=True,
+    )
+    program_id = db.Column(db.Integer, db.ForeignKey("programs.id", ondelete="CASCADE"), nullable=True)
+    term = db.Column(db.String(64), nullable=False)
+    tf = db.Column(db.Integer, nullable=False, default=1, comment="Term frequency within the chunk")
+
+    __table_args__ = (
+        db.Index("ix_ai_keyword_posting_program_term", "program_id", "term"),
+    )
+
+
 # ── KBVersion ─────────────────────────────────────────────────────────────────
 
 KB_VERSION_STATUSES = {"building", "active", "archived"}
@@ -513,7 +552,11 @@ class AIResponseCache(db.Model):
     last_hit_at = db.Column(db.DateTime(timezone=True), nullable=True)
 
     def is_expired(self):
-        return datetime.now(timezone.utc) > self.expires_at
+        expires_at = self.expires_at
+        # SQLite stores naive datetimes; coerce to UTC-aware for comparison
+        if expires_at.tzinfo is None:
+            expires_at = expires_at.replace(tzinfo=timezone.utc)
+        return datetime.now(timezone.utc) > expires_at
 
     def to_dict(self):
         return {
@@ -814,6 +857,13 @@ class AITask(_TenantQueryMixin, db.Model):
     program_id = db.Column(db.Integer, db.ForeignKey("programs.id", ondelete="SET NULL"), nullable=True)
     workflow_name = db.Column(db.String(100), nullable=True)
 
+    # Durable queue (claimed by any worker's TaskRunner pool)
+    priority = db.Column(db.Integer, nullable=False, default=5,
+                         comment="Lane: 0 high, 5 normal, 9 low — lower runs first")
+    claimed_by = db.Column(db.String(100), nullable=True, comment="Worker id holding the lease")
+    heartbeat_at = db.Column(db.DateTime, nullable=True, comment="Lease renewal; stale → requeued")
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+
     # Timing
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
     started_at = db.Column(db.DateTime, nullable=True)
@@ -824,6 +874,7 @@ class AITask(_TenantQueryMixin, db.Model):
             "status IN ('pending','running','completed','failed','cancelled')",
             name="ck_ai_task_status",
         ),
+        db.Index("ix_ai_task_queue", "status", "priority", "id"),
     )
 
     def to_dict(self):
@@ -839,6 +890,8 @@ class AITask(_TenantQueryMixin, db.Model):
             "user": self.user,
             "program_id": self.program_id,
             "workflow_name": self.workflow_name,
+            "priority": self.priority,
+            "attempts": self.attempts,
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "started_at": self.started_at.isoformat() if self.started_at else None,
             "completed_at": self.completed_at.isoformat() if self.completed_at else None,
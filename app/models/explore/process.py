@@ -1,8 +1,9 @@
 """
 Explore Phase — Process Hierarchy Models
 
-ProcessLevel (L1-L4), ProcessStep (L4 within workshop context),
-L4SeedCatalog (SAP Best Practice reference), BPMNDiagram.
+ProcessLevel (L1-L4), ProcessLevelClosure (ancestor/descendant pairs),
+ProcessStep (L4 within workshop context), L4SeedCatalog (SAP Best Practice
+reference), BPMNDiagram.
 """
 
 import uuid
@@ -13,6 +14,7 @@ from app.models import db
 
 __all__ = [
     "ProcessLevel",
+    "ProcessLevelClosure",
     "ProcessStep",
     "L1SeedCatalog",
     "L2SeedCatalog",
@@ -207,6 +209,43 @@ class ProcessLevel(db.Model):
         return f"<ProcessLevel L{self.level} {self.code}: {self.name}>"
 
 
+# ═════════════════════════════════════════════════════════════════════════════
+# 1b. ProcessLevelClosure — transitive ancestor/descendant pairs
+# ═════════════════════════════════════════════════════════════════════════════
+
+class ProcessLevelClosure(db.Model):
+    """
+    One row per (ancestor, descendant) pair of the ProcessLevel tree,
+    including the (node, node, 0) self pair.
+
+    Maintained by app.services.process_closure on create / move / delete;
+    never edit directly.
+    """
+
+    __tablename__ = "process_level_closure"
+    __table_args__ = (
+        db.Index("idx_plc_descendant_depth", "descendant_id", "depth"),
+        db.Index("idx_plc_project_ancestor", "project_id", "ancestor_id"),
+    )
+
+    ancestor_id = db.Column(
+        db.String(36), db.ForeignKey("process_levels.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    descendant_id = db.Column(
+        db.String(36), db.ForeignKey("process_levels.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    depth = db.Column(db.Integer, nullable=False, comment="0 = self, 1 = parent/child, ...")
+    project_id = db.Column(
+        db.Integer, db.ForeignKey("projects.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+
+    def __repr__(self):
+        return f"<ProcessLevelClosure {self.ancestor_id} → {self.descendant_id} d={self.depth}>"
+
+
 # ═════════════════════════════════════════════════════════════════════════════
 # 6. ProcessStep — L4 within workshop context (T-006)
 # ═════════════════════════════════════════════════════════════════════════════
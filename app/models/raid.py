@@ -469,24 +469,28 @@ def _next_code(model_class, prefix: str) -> str:
     Generate the next sequential code for a RAID entity.
     E.g. RSK-001, RSK-002, ...
 
-    Race-safe: uses MAX(id) ordering and SELECT ... FOR UPDATE where supported.
-    Callers should handle IntegrityError and retry if a unique constraint exists.
+    Race-safe: drawn from the table's counter in sequence_allocator, which
+    is seeded once from the newest existing code.
     """
+    from app.services import sequence_allocator  # lazy import — avoid circular
+
     full_prefix = prefix + "-"
-    last = (
-        model_class.query
-        .filter(model_class.code.like(f"{full_prefix}%"))
-        .order_by(model_class.id.desc())
-        .with_for_update(skip_locked=True)
-        .first()
-    )
-    if last and last.code.startswith(full_prefix):
-        try:
-            num = int(last.code.split("-")[1]) + 1
-        except (IndexError, ValueError):
-            num = 1
-    else:
-        num = 1
+
+    def _last_number() -> int:
+        last = (
+            model_class.query
+            .filter(model_class.code.like(f"{full_prefix}%"))
+            .order_by(model_class.id.desc())
+            .first()
+        )
+        if last and last.code.startswith(full_prefix):
+            try:
+                return int(last.code.split("-")[1])
+            except (IndexError, ValueError):
+                return 0
+        return 0
+
+    num = sequence_allocator.next_value(model_class.__tablename__, prefix, seed=_last_number)
     return f"{prefix}-{num:03d}"
 
 
@@ -5,6 +5,8 @@ Reporting & Dashboard Models — F5 Advanced Reporting.
 Models:
     - ReportDefinition: Saved report configuration (preset / custom)
     - DashboardLayout: Per-user dashboard gadget arrangement
+    - ExecutionDailyRollup: Materialized execution counts per program/cycle/module/day
+    - DefectDailyRollup: Materialized defect counts per program/module/day
 """
 
 from datetime import datetime, timezone
@@ -144,3 +146,79 @@ class DashboardLayout(db.Model):
 
     def __repr__(self):
         return f"<DashboardLayout {self.id}: user={self.user_id} program={self.program_id}>"
+
+
+# ═════════════════════════════════════════════════════════════════════════════
+# MATERIALIZED ROLLUPS — maintained by app.services.report_rollups
+# ═════════════════════════════════════════════════════════════════════════════
+
+
+class ExecutionDailyRollup(db.Model):
+    """Execution counts per program / cycle / module / UTC day / result.
+
+    Derived from test_executions; never edit directly (see
+    app.services.report_rollups for the incremental hook and rebuild).
+    """
+
+    __tablename__ = "report_execution_daily"
+    __table_args__ = (
+        db.UniqueConstraint(
+            "program_id", "cycle_id", "module", "day", "result",
+            name="uq_report_execution_daily_bucket",
+        ),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    program_id = db.Column(
+        db.Integer, db.ForeignKey("programs.id", ondelete="CASCADE"),
+        nullable=False, index=True,
+    )
+    cycle_id = db.Column(
+        db.Integer, db.ForeignKey("test_cycles.id", ondelete="CASCADE"),
+        nullable=False, index=True,
+    )
+    module = db.Column(db.String(50), nullable=False, default="", comment="TestCase.module")
+    day = db.Column(
+        db.String(10), nullable=False, default="",
+        comment="YYYY-MM-DD (UTC) of executed_at; '' → no executed_at",
+    )
+    result = db.Column(db.String(20), nullable=False, default="")
+    executions = db.Column(db.Integer, nullable=False, default=0)
+    first_attempts = db.Column(db.Integer, nullable=False, default=0, comment="attempt_number = 1")
+    retests = db.Column(db.Integer, nullable=False, default=0, comment="attempt_number > 1")
+
+    def __repr__(self):
+        return f"<ExecutionDailyRollup p={self.program_id} c={self.cycle_id} {self.day} {self.result}={self.executions}>"
+
+
+class DefectDailyRollup(db.Model):
+    """Defect counts per program / module / UTC reported day / severity / status / priority.
+
+    Derived from defects; never edit directly (see app.services.report_rollups).
+    """
+
+    __tablename__ = "report_defect_daily"
+    __table_args__ = (
+        db.UniqueConstraint(
+            "program_id", "module", "day", "severity", "status", "priority",
+            name="uq_report_defect_daily_bucket",
+        ),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    program_id = db.Column(
+        db.Integer, db.ForeignKey("programs.id", ondelete="CASCADE"),
+        nullable=False, index=True,
+    )
+    module = db.Column(db.String(50), nullable=False, default="")
+    day = db.Column(
+        db.String(10), nullable=False, default="",
+        comment="YYYY-MM-DD (UTC) of reported_at",
+    )
+    severity = db.Column(db.String(20), nullable=False, default="")
+    status = db.Column(db.String(30), nullable=False, default="")
+    priority = db.Column(db.String(20), nullable=False, default="")
+    defects = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<DefectDailyRollup p={self.program_id} {self.day} {self.status}={self.defects}>"
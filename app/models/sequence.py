@@ -0,0 +1,28 @@
+"""
+Code Sequences — per-(scope, prefix) counters behind entity code generation.
+
+One row per counter holding the last number handed out. Written only by
+app.services.sequence_allocator; seeded lazily from the existing rows the
+first time a counter is used.
+"""
+
+from app.models import db
+
+
+class CodeSequence(db.Model):
+    """Last allocated number of one code counter."""
+
+    __tablename__ = "code_sequences"
+
+    scope = db.Column(
+        db.String(100), primary_key=True,
+        comment="Counter namespace, e.g. cutover_plan:12 or test_cases:3",
+    )
+    prefix = db.Column(
+        db.String(50), primary_key=True,
+        comment="Code prefix within the scope, e.g. INC, L3, WS-SD",
+    )
+    value = db.Column(db.BigInteger, nullable=False, default=0, comment="Last allocated number")
+
+    def __repr__(self):
+        return f"<CodeSequence {self.scope}/{self.prefix}={self.value}>"
@@ -6,6 +6,7 @@ focused on HTTP parsing/response responsibilities.
 
 import logging
 
+from app.ai.keyword_index import KeywordIndex
 from app.models import db
 from app.models.ai import AIEmbedding, KBVersion
 
@@ -96,9 +97,13 @@ def activate_kb_version(version_id: int) -> tuple[dict, int]:
 
     old_active = KBVersion.query.filter(KBVersion.status == "active", KBVersion.id != kb_version.id).first()
     if old_active:
-        AIEmbedding.query.filter_by(kb_version=old_active.version, is_active=True).update({"is_active": False})
+        outgoing = AIEmbedding.query.filter_by(kb_version=old_active.version, is_active=True)
+        KeywordIndex.remove_matching(outgoing)
+        outgoing.update({"is_active": False})
 
-    AIEmbedding.query.filter_by(kb_version=kb_version.version).update({"is_active": True})
+    incoming = AIEmbedding.query.filter_by(kb_version=kb_version.version)
+    incoming.update({"is_active": True})
+    KeywordIndex.ensure_indexed(incoming)
     kb_version.activate()
     db.session.commit()
     logger.info("KB version activated id=%s version=%s", kb_version.id, kb_version.version)
@@ -121,7 +126,9 @@ def archive_kb_version(version_id: int) -> tuple[dict, int]:
     if kb_version.status == "active":
         return {"error": "Cannot archive the active version. Activate another version first."}, 400
 
-    AIEmbedding.query.filter_by(kb_version=kb_version.version).update({"is_active": False})
+    archived = AIEmbedding.query.filter_by(kb_version=kb_version.version)
+    KeywordIndex.remove_matching(archived)
+    archived.update({"is_active": False})
     kb_version.archive()
     db.session.commit()
     logger.info("KB version archived id=%s version=%s", kb_version.id, kb_version.version)
@@ -5,20 +5,31 @@ Provides a thin cache wrapper with:
   - Permission cache (5 min TTL)
   - Role lookup cache (5 min TTL)
   - Manual invalidation helpers
+  - Short-lived cross-worker locks (SET NX EX)
+  - Non-expiring counters (INCR / MGET) for version stamps
+  - Permission generations (global / per tenant / per user) whose bumps
+    are broadcast over pub/sub, so every worker evicts at once
 
 Uses Redis in production (via REDIS_URL), falls back to
-a simple in-memory dict for development/testing.
+a simple in-memory dict for development/testing; without Redis, pub/sub
+messages are delivered to this process's subscribers only.
 """
 
 import json
 import logging
+import os
+import threading
 import time
+import uuid
 
 logger = logging.getLogger(__name__)
 
 # ── In-memory fallback ───────────────────────────────────────────────────
 
 _memory_store: dict = {}  # key → (value_json, expire_ts)
+_memory_lock = threading.Lock()  # makes SET NX atomic across threads
+_MEMORY_PURGE_INTERVAL = 60  # seconds between sweeps of expired entries
+_next_purge = 0.0
 
 
 class _MemoryBackend:
@@ -35,8 +46,40 @@ class _MemoryBackend:
         return val
 
     def setex(self, key, ttl_seconds, value):
+        self._purge_expired()
         _memory_store[key] = (value, time.time() + ttl_seconds)
 
+    def set(self, key, value, nx=False, ex=None):
+        """Subset of redis SET: NX + EX (seconds)."""
+        self._purge_expired()
+        with _memory_lock:
+            if nx and self.get(key) is not None:
+                return None
+            _memory_store[key] = (value, time.time() + ex if ex else None)
+            return True
+
+    def mget(self, keys):
+        return [self.get(k) for k in keys]
+
+    @staticmethod
+    def _purge_expired():
+        """Drop expired entries now and then (keys never read again would otherwise stay)."""
+        global _next_purge
+        now = time.time()
+        if now < _next_purge:
+            return
+        _next_purge = now + _MEMORY_PURGE_INTERVAL
+        with _memory_lock:
+            for key, (_, expires) in list(_memory_store.items()):
+                if expires and now > expires:
+                    _memory_store.pop(key, None)
+
+    def incr(self, key):
+        with _memory_lock:
+            value = int(self.get(key) or 0) + 1
+            _memory_store[key] = (str(value), None)
+            return value
+
     def delete(self, *keys):
         for k in keys:
             _memory_store.pop(k, None)
@@ -66,7 +109,6 @@ def _get_backend():
     if _backend is not None:
         return _backend
 
-    import os
     redis_url = os.getenv("REDIS_URL")
     if redis_url and not redis_url.startswith("memory://"):
         try:
@@ -106,60 +148,54 @@ def _flag_key(tenant_id, flag_key):
 # ── Public API ───────────────────────────────────────────────────────────
 
 
-def get_cached_permissions(tenant_id, user_id):
-    """Return cached permission codenames list, or None on miss."""
-    raw = _get_backend().get(_perm_key(tenant_id, user_id))
+def _get_stamped(key, tenant_id, user_id):
+    raw = _get_backend().get(key)
     if raw is None:
         return None
     try:
-        return json.loads(raw)
-    except (json.JSONDecodeError, TypeError):
+        entry = json.loads(raw)
+        stamp, value = entry["gen"], entry["value"]
+    except (json.JSONDecodeError, TypeError, KeyError):
+        return None
+    if tuple(stamp) != get_generations(permission_generation_keys(user_id, [tenant_id])):
         return None
+    return value
+
+
+def _set_stamped(key, ttl, tenant_id, user_id, value):
+    stamp = get_generations(permission_generation_keys(user_id, [tenant_id]))
+    _get_backend().setex(key, ttl, json.dumps({"gen": list(stamp), "value": value}))
+
+
+def get_cached_permissions(tenant_id, user_id):
+    """Return cached permission codenames list, or None on miss."""
+    return _get_stamped(_perm_key(tenant_id, user_id), tenant_id, user_id)
 
 
 def set_cached_permissions(tenant_id, user_id, permissions):
     """Cache a list of permission codenames."""
-    _get_backend().setex(
-        _perm_key(tenant_id, user_id),
-        PERMISSION_TTL,
-        json.dumps(permissions),
-    )
+    _set_stamped(_perm_key(tenant_id, user_id), PERMISSION_TTL, tenant_id, user_id, permissions)
 
 
 def get_cached_roles(tenant_id, user_id):
     """Return cached role names list, or None on miss."""
-    raw = _get_backend().get(_role_key(tenant_id, user_id))
-    if raw is None:
-        return None
-    try:
-        return json.loads(raw)
-    except (json.JSONDecodeError, TypeError):
-        return None
+    return _get_stamped(_role_key(tenant_id, user_id), tenant_id, user_id)
 
 
 def set_cached_roles(tenant_id, user_id, roles):
     """Cache a list of role names."""
-    _get_backend().setex(
-        _role_key(tenant_id, user_id),
-        ROLE_TTL,
-        json.dumps(roles),
-    )
+    _set_stamped(_role_key(tenant_id, user_id), ROLE_TTL, tenant_id, user_id, roles)
 
 
 def invalidate_user_cache(tenant_id, user_id):
-    """Remove all cached data for a specific user."""
-    be = _get_backend()
-    be.delete(_perm_key(tenant_id, user_id), _role_key(tenant_id, user_id))
+    """Invalidate all cached permission data of a user, in every worker."""
+    bump_permission_generations([permission_generation_key(user_id=user_id)])
 
 
 def invalidate_tenant_cache(tenant_id):
-    """Remove all cached data for a tenant (e.g. after role/permission change)."""
-    be = _get_backend()
-    for prefix in ("perm:", "roles:", "ff:"):
-        pattern = f"{prefix}{tenant_id}:*"
-        keys = be.keys(pattern)
-        if keys:
-            be.delete(*keys)
+    """Invalidate all cached data for a tenant (e.g. after role/permission change)."""
+    bump_permission_generations([permission_generation_key(tenant_id=tenant_id)])
+    delete_pattern(f"ff:{tenant_id}:*")
 
 
 def get_cached(key, ttl=DEFAULT_TTL, loader=None):
@@ -190,9 +226,222 @@ def delete_cached(key):
     _get_backend().delete(key)
 
 
+def delete_pattern(pattern):
+    """Delete all keys matching a 'prefix*' pattern. Returns the count."""
+    be = _get_backend()
+    if isinstance(be, _MemoryBackend):
+        keys = be.keys(pattern)
+    else:
+        keys = list(be.scan_iter(match=pattern, count=500))
+    if keys:
+        be.delete(*keys)
+    return len(keys)
+
+
+def incr_counter(key):
+    """Atomically increment a non-expiring integer counter; returns the new value."""
+    return int(_get_backend().incr(key))
+
+
+def set_counter(key, value, nx=False):
+    """Set a non-expiring counter; with *nx* only if it does not exist yet."""
+    _get_backend().set(key, str(value), nx=nx)
+
+
+def get_counters(keys):
+    """Return the raw values of several counters in one round trip (None = missing)."""
+    if not keys:
+        return []
+    return list(_get_backend().mget(keys))
+
+
+def is_shared_backend():
+    """True when the cache is Redis (shared by all workers), not the in-process fallback."""
+    return not isinstance(_get_backend(), _MemoryBackend)
+
+
+# ── Pub/sub ──────────────────────────────────────────────────────────────
+
+_subscribers: dict = {}  # channel → [handler, ...]
+_listeners: dict = {}  # channel → (pid, thread, connected Event)
+_subscribers_lock = threading.Lock()
+
+
+def _dispatch(channel, message):
+    for handler in list(_subscribers.get(channel, ())):
+        try:
+            handler(message)
+        except Exception:
+            logger.warning("Cache subscriber failed on %s", channel, exc_info=True)
+
+
+def _listen(channel, connected):
+    """Deliver Redis messages on *channel* to local subscribers, reconnecting forever."""
+    while True:
+        try:
+            pubsub = _get_backend().pubsub()
+            pubsub.subscribe(channel)
+            for msg in pubsub.listen():
+                if msg["type"] == "subscribe":
+                    connected.set()
+                    # Messages may have been missed while disconnected: resync
+                    _dispatch(channel, None)
+                elif msg["type"] == "message":
+                    _dispatch(channel, msg["data"])
+        except Exception:
+            logger.warning("Cache subscription to %s lost — retrying", channel, exc_info=True)
+        connected.clear()
+        time.sleep(1)
+
+
+def _ensure_listener(channel):
+    """Start (or restart after fork) the Redis listener of a channel; True if connected."""
+    with _subscribers_lock:
+        listener = _listeners.get(channel)
+        if listener is None or listener[0] != os.getpid() or not listener[1].is_alive():
+            connected = threading.Event()
+            thread = threading.Thread(
+                target=_listen, args=(channel, connected), name=f"cache-sub:{channel}", daemon=True,
+            )
+            thread.start()
+            listener = _listeners[channel] = (os.getpid(), thread, connected)
+    return listener[2].is_set()
+
+
+def subscribe(channel, handler):
+    """Call *handler(message)* for every message published on *channel*.
+
+    The handler receives None when messages may have been missed (the
+    Redis subscription was (re)established, or the cache was flushed) and
+    must then drop everything it derived from the channel.
+    """
+    with _subscribers_lock:
+        handlers = _subscribers.setdefault(channel, [])
+        if handler not in handlers:
+            handlers.append(handler)
+    if is_shared_backend():
+        _ensure_listener(channel)
+
+
+def publish(channel, message):
+    """Send *message* (a string) to the subscribers of *channel* in every worker.
+
+    On the in-process backend only this worker's subscribers receive it.
+    """
+    # Local subscribers first, so the publishing worker never waits for Redis
+    _dispatch(channel, message)
+    if is_shared_backend():
+        try:
+            _get_backend().publish(channel, message)
+        except Exception:
+            logger.warning("Cache publish on %s failed", channel, exc_info=True)
+
+
+def subscription_live(channel):
+    """True when messages published on *channel* by any worker reach this worker's subscribers.
+
+    Only a shared backend with a running listener qualifies: in-process
+    publishes reach the publishing worker alone.
+    """
+    if not _subscribers.get(channel) or not is_shared_backend():
+        return False
+    return _ensure_listener(channel)
+
+
+# ── Permission generations ───────────────────────────────────────────────
+
+PERMISSION_CHANNEL = "permgen:invalidate"
+_PERMISSION_GEN_GLOBAL = "permgen:global"
+
+
+def permission_generation_key(user_id=None, tenant_id=None):
+    """Generation counter of a user, a tenant, or (neither) of the system roles."""
+    if user_id is not None:
+        return f"permgen:user:{user_id}"
+    if tenant_id is not None:
+        return f"permgen:tenant:{tenant_id}"
+    return _PERMISSION_GEN_GLOBAL
+
+
+def permission_generation_keys(user_id, tenant_ids=()):
+    """Counters a user's cached permissions depend on: global, user, then tenants."""
+    tenants = sorted({t for t in tenant_ids if t is not None})
+    return [
+        _PERMISSION_GEN_GLOBAL,
+        permission_generation_key(user_id=user_id),
+        *(permission_generation_key(tenant_id=t) for t in tenants),
+    ]
+
+
+def get_generations(keys):
+    """Current values of several generation counters, as a comparable tuple."""
+    values = get_counters(keys)
+    missing = [k for k, v in zip(keys, values) if v is None]
+    if missing:
+        # Seed from the clock so a lost counter never repeats an old value
+        seed = time.time_ns() // 1000
+        for key in missing:
+            set_counter(key, seed, nx=True)
+        values = get_counters(keys)
+    return tuple(str(v) for v in values)
+
+
+def bump_permission_generations(keys):
+    """Invalidate everything stamped with *keys* and tell every worker to evict it."""
+    keys = sorted(set(keys))
+    if not keys:
+        return
+    for key in keys:
+        try:
+            incr_counter(key)
+        except Exception:
+            logger.warning("Permission generation bump failed for %s", key, exc_info=True)
+    publish(PERMISSION_CHANNEL, json.dumps(keys))
+
+
+# Compare-and-delete so a lock is only released by its owner
+_RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+def acquire_lock(name, ttl=30):
+    """Try to take a short-lived cross-worker lock (SET NX EX).
+
+    Returns an owner token, or None if the lock is held elsewhere. With the
+    in-memory backend the lock is process-local.
+    """
+    token = uuid.uuid4().hex
+    if _get_backend().set(f"lock:{name}", token, nx=True, ex=ttl):
+        return token
+    return None
+
+
+def is_locked(name):
+    """True while a lock taken with acquire_lock() is held."""
+    return _get_backend().get(f"lock:{name}") is not None
+
+
+def release_lock(name, token):
+    """Release a lock if *token* still owns it."""
+    be = _get_backend()
+    key = f"lock:{name}"
+    if isinstance(be, _MemoryBackend):
+        with _memory_lock:
+            if be.get(key) == token:
+                be.delete(key)
+        return
+    be.eval(_RELEASE_LOCK_SCRIPT, 1, key, token)
+
+
 def clear_all():
     """Flush entire cache (use sparingly — mainly for testing)."""
     _get_backend().flushdb()
+    for channel in list(_subscribers):
+        _dispatch(channel, None)
 
 
 def health_check():
@@ -52,6 +52,7 @@ from app.models.run_sustain import LessonLearned
 from app.models.testing import TestCycle, TestPlan
 from app.models.transport import TransportRequest, TransportWave
 from app.models.workstream import Committee
+from app.services import sequence_allocator
 from app.services.helpers.scoped_queries import get_scoped_or_none
 from app.services.signoff_service import approve_entity
 
@@ -167,10 +168,13 @@ def _actor_from_payload(data: dict | None) -> tuple[int | None, str | None]:
 
 
 def _next_program_code(model_class, prefix: str, program_id: int) -> str:
-    count = db.session.execute(
-        select(func.count(model_class.id)).where(model_class.program_id == program_id)
-    ).scalar() or 0
-    return f"{prefix}-{count + 1:03d}"
+    seq = sequence_allocator.next_value(
+        f"{model_class.__tablename__}:{program_id}", prefix,
+        seed=lambda: db.session.execute(
+            select(func.count(model_class.id)).where(model_class.program_id == program_id)
+        ).scalar(),
+    )
+    return f"{prefix}-{seq:03d}"
 
 
 def _require_scope(program_id: int | None, project_id: int | None, tenant_id: int | None = None) -> tuple[Program, Project]:
@@ -8,7 +8,8 @@ Generates sequential codes for:
   - Decisions:              DEC-{seq}                (e.g. DEC-001, DEC-015)
   - Scope Change Requests:  SCR-{seq}                (e.g. SCR-001, SCR-008)
 
-All codes are project-wide unique. Thread-safe via DB query + retry.
+All codes are project-wide unique. Numbers come from per-(scope, prefix)
+counters in sequence_allocator, seeded from the existing rows on first use.
 """
 
 from sqlalchemy import func
@@ -21,6 +22,7 @@ from app.models.explore import (
     ExploreWorkshop,
     ScopeChangeRequest,
 )
+from app.services import sequence_allocator
 
 # ── Workshop code: WS-{area}-{seq}{letter} ──────────────────────────────────
 
@@ -35,18 +37,23 @@ def generate_workshop_code(project_id: int, process_area: str, session_number: i
     """
     area = process_area.upper()[:5]
 
-    # Count existing workshops for this project+area
-    count = (
-        db.session.query(func.count(ExploreWorkshop.id))
-        .filter(
-            ExploreWorkshop.project_id == project_id,
-            ExploreWorkshop.process_area == area,
-            ExploreWorkshop.session_number == 1,  # count only first sessions
+    def _first_sessions():
+        return (
+            db.session.query(func.count(ExploreWorkshop.id))
+            .filter(
+                ExploreWorkshop.project_id == project_id,
+                ExploreWorkshop.process_area == area,
+                ExploreWorkshop.session_number == 1,  # count only first sessions
+            )
+            .scalar()
         )
-        .scalar()
-    ) or 0
 
-    seq = count + 1
+    # Only first sessions advance the area counter
+    scope, prefix = f"explore_workshops:{project_id}", f"WS-{area}"
+    if session_number > 1:
+        seq = sequence_allocator.current_value(scope, prefix, seed=_first_sessions) + 1
+    else:
+        seq = sequence_allocator.next_value(scope, prefix, seed=_first_sessions)
     code = f"WS-{area}-{seq:02d}"
 
     if session_number > 1:
@@ -59,17 +66,22 @@ def generate_workshop_code(project_id: int, process_area: str, session_number: i
 
 # ── Sequential codes: prefix + 3-digit seq ──────────────────────────────────
 
-def _generate_sequential_code(model_class, prefix: str, project_id: int) -> str:
-    """Generate next sequential code: {PREFIX}-{SEQ:03d}."""
+def _generate_sequential_code(model_class, prefix: str, project_id: int, *, counter: str | None = None) -> str:
+    """Generate next sequential code: {PREFIX}-{SEQ:03d}.
+
+    ``counter`` names the sequence when several prefixes share one
+    numbering (WRICEF types); it defaults to the prefix.
+    """
     # BacklogItem / ConfigItem use 'program_id' instead of 'project_id'
     id_col = getattr(model_class, "project_id", None) or getattr(model_class, "program_id")
-    count = (
-        db.session.query(func.count(model_class.id))
-        .filter(id_col == project_id)
-        .scalar()
-    ) or 0
-
-    seq = count + 1
+    seq = sequence_allocator.next_value(
+        f"{model_class.__tablename__}:{project_id}", counter or prefix,
+        seed=lambda: (
+            db.session.query(func.count(model_class.id))
+            .filter(id_col == project_id)
+            .scalar()
+        ),
+    )
     return f"{prefix}-{seq:03d}"
 
 
@@ -109,7 +121,7 @@ def generate_backlog_item_code(project_id: int, wricef_type: str = "enhancement"
     """Generate next WRICEF backlog item code: ENH-001, INT-002, RPT-003, ..."""
     from app.models.backlog import BacklogItem  # lazy import — avoid circular
     prefix = _WRICEF_PREFIX.get(wricef_type, "ENH")
-    return _generate_sequential_code(BacklogItem, prefix, project_id)
+    return _generate_sequential_code(BacklogItem, prefix, project_id, counter="WRICEF")
 
 
 def generate_config_item_code(project_id: int) -> str:
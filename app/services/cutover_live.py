@@ -0,0 +1,514 @@
+"""
+Cutover — incrementally maintained war-room snapshots and delta streams.
+
+get_cutover_live_status used to reload the plan, every runbook task, the
+critical-path tasks and the Go/No-Go items on each 30s poll. A
+LiveSnapshot instead keeps, per plan, the plan window and status, one
+summary row per task, the predecessor sets used for the blocked count and
+the Go/No-Go verdicts; rendering the war-room dict from it is pure Python.
+
+Maintenance:
+  - session hooks note which tasks / Go/No-Go items / plan rows of a plan
+    were written (start_task, complete_task, flag_issue, Go/No-Go updates
+    and any other write), and after commit bump a per-plan version counter
+    in cache_service
+  - a cached snapshot one version behind takes the noted ids and reloads
+    just those rows on its next read; dependency edits or a snapshot more
+    than one version behind (another worker wrote) reload the plan in full
+  - snapshots are only cached on a shared backend (Redis): per-process
+    counters never see another worker's commits, so without one every
+    read loads the plan
+
+poll() serves long-polling clients of the live-status endpoint: given the
+version the client last saw it waits at most CUTOVER_LIVE_WAIT_SECONDS for
+a change, woken in-process on commit and by re-rendering every
+CUTOVER_LIVE_POLL_SECONDS for other workers, then answers with a delta
+against that version (or the full status when this worker does not know
+it). Versions are digests of the rendered status, so every worker agrees
+on them. The wait is kept short so a sync gunicorn worker is not held for
+long.
+
+Usage:
+    from app.services import cutover_live
+    status = cutover_live.get_snapshot(tenant_id, program_id, plan_id).render()
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+from sqlalchemy import event, select
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.orm import Session
+
+from app.models import db
+from app.models.cutover import CutoverPlan, CutoverScopeItem, GoNoGoItem, RunbookTask, TaskDependency
+from app.services import cache_service
+
+logger = logging.getLogger(__name__)
+
+MAX_PLANS = int(os.getenv("CUTOVER_LIVE_PLANS", "32"))
+MAX_RENDERS = int(os.getenv("CUTOVER_LIVE_RENDERS", "128"))
+POLL_SECONDS = float(os.getenv("CUTOVER_LIVE_POLL_SECONDS", "2"))
+WAIT_SECONDS = float(os.getenv("CUTOVER_LIVE_WAIT_SECONDS", "10"))
+
+_VERSION_PREFIX = "cutlive:"
+_PENDING = "cutover_live.pending"
+_DONE_STATUSES = {"completed", "skipped"}
+
+_TASK_COLUMNS = (
+    RunbookTask.id, RunbookTask.code, RunbookTask.title, RunbookTask.status,
+    RunbookTask.workstream, RunbookTask.is_critical_path, RunbookTask.delay_minutes,
+    RunbookTask.issue_note, RunbookTask.planned_duration_min,
+)
+
+_snapshots: OrderedDict = OrderedDict()  # (plan_id, tenant_id) → LiveSnapshot
+_renders: OrderedDict = OrderedDict()  # (plan_id, tenant_id, version) → rendered status
+_lock = threading.Lock()
+_changed = threading.Condition()
+
+
+def _aware(value: datetime | None) -> datetime | None:
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+class LiveSnapshot:
+    """In-memory war-room state of one cutover plan."""
+
+    def __init__(self, plan_id: int, tenant_id: int):
+        self.plan_id = plan_id
+        self.tenant_id = tenant_id
+        self.version = None
+        self.plan: dict = {}
+        self.tasks: dict = {}  # task id → summary row
+        self.pred: dict = {}  # task id → predecessor task ids
+        self.verdicts: dict = {}  # GoNoGoItem id → verdict
+        self.stale_tasks: set = set()
+        self.stale_items: set = set()
+        self.stale_plan = False
+        self.lock = threading.RLock()
+
+    @classmethod
+    def load(cls, tenant_id: int, program_id: int, plan_id: int) -> "LiveSnapshot":
+        """Load a plan's snapshot; raises ValueError if the plan is not visible."""
+        snapshot = cls(plan_id, tenant_id)
+        if not snapshot._load_plan(program_id):
+            raise ValueError(f"CutoverPlan {plan_id} not found for tenant {tenant_id}")
+        rows = db.session.execute(snapshot._task_select()).all()
+        snapshot.tasks = {row.id: row._asdict() for row in rows}
+        snapshot.pred = {tid: set() for tid in snapshot.tasks}
+        for predecessor_id, successor_id in db.session.execute(
+            select(TaskDependency.predecessor_id, TaskDependency.successor_id)
+            .where(TaskDependency.successor_id.in_(snapshot._task_select().with_only_columns(RunbookTask.id)))
+        ):
+            snapshot.pred[successor_id].add(predecessor_id)
+        snapshot.verdicts = dict(db.session.execute(
+            select(GoNoGoItem.id, GoNoGoItem.verdict).where(GoNoGoItem.cutover_plan_id == plan_id)
+        ).all())
+        return snapshot
+
+    def _task_select(self):
+        return (
+            select(*_TASK_COLUMNS)
+            .join(CutoverScopeItem, CutoverScopeItem.id == RunbookTask.scope_item_id)
+            .where(CutoverScopeItem.cutover_plan_id == self.plan_id, RunbookTask.tenant_id == self.tenant_id)
+        )
+
+    def _load_plan(self, program_id: int) -> bool:
+        plan = db.session.execute(
+            select(
+                CutoverPlan.status, CutoverPlan.actual_start,
+                CutoverPlan.planned_start, CutoverPlan.planned_end,
+            ).where(
+                CutoverPlan.id == self.plan_id,
+                CutoverPlan.program_id == program_id,
+                CutoverPlan.tenant_id == self.tenant_id,
+            )
+        ).one_or_none()
+        if plan is None:
+            return False
+        self.plan = {"program_id": program_id, **plan._asdict()}
+        return True
+
+    def refresh(self) -> None:
+        """Reload the rows noted as written since the snapshot was loaded."""
+        with self.lock:
+            if self.stale_plan:
+                if not self._load_plan(self.plan["program_id"]):
+                    raise ValueError(f"CutoverPlan {self.plan_id} not found for tenant {self.tenant_id}")
+                self.stale_plan = False
+            if self.stale_tasks:
+                ids = self.stale_tasks
+                rows = {row.id: row._asdict() for row in db.session.execute(
+                    self._task_select().where(RunbookTask.id.in_(ids))
+                )}
+                for tid in ids:
+                    if tid in rows:
+                        self.tasks[tid] = rows[tid]
+                        self.pred.setdefault(tid, set())
+                    else:
+                        self.tasks.pop(tid, None)
+                        self.pred.pop(tid, None)
+                self.stale_tasks = set()
+            if self.stale_items:
+                ids = self.stale_items
+                verdicts = dict(db.session.execute(
+                    select(GoNoGoItem.id, GoNoGoItem.verdict)
+                    .where(GoNoGoItem.id.in_(ids), GoNoGoItem.cutover_plan_id == self.plan_id)
+                ).all())
+                for item_id in ids:
+                    if item_id in verdicts:
+                        self.verdicts[item_id] = verdicts[item_id]
+                    else:
+                        self.verdicts.pop(item_id, None)
+                self.stale_items = set()
+
+    def _blocked_count(self) -> int:
+        """not_started tasks with at least one predecessor not completed/skipped."""
+        done = {tid for tid, row in self.tasks.items() if row["status"] in _DONE_STATUSES}
+        return sum(
+            1 for tid, row in self.tasks.items()
+            if row["status"] == "not_started" and self.pred.get(tid) and not self.pred[tid] <= done
+        )
+
+    def render(self, now: datetime | None = None) -> dict:
+        """War-room snapshot dict (same shape as get_cutover_live_status)."""
+        now = now or datetime.now(timezone.utc)
+        with self.lock:
+            plan = self.plan
+            actual_start = _aware(plan["actual_start"])
+            elapsed_minutes = int((now - actual_start).total_seconds() / 60) if actual_start else None
+
+            if plan["planned_start"] and plan["planned_end"]:
+                planned_total_minutes = int(
+                    (_aware(plan["planned_end"]) - _aware(plan["planned_start"])).total_seconds() / 60
+                )
+            else:
+                task_planned_total = sum((row["planned_duration_min"] or 0) for row in self.tasks.values())
+                planned_total_minutes = task_planned_total if task_planned_total > 0 else None
+
+            status_counts: dict[str, int] = {}
+            workstream_counts: dict[str, dict[str, int]] = {}
+            critical_path_tasks = []
+            total_delay_minutes = 0
+            for tid in sorted(self.tasks):
+                row = self.tasks[tid]
+                status_counts[row["status"]] = status_counts.get(row["status"], 0) + 1
+                ws = workstream_counts.setdefault(
+                    row["workstream"] or "unassigned", {"total": 0, "completed": 0, "in_progress": 0},
+                )
+                ws["total"] += 1
+                if row["status"] in ("completed", "in_progress"):
+                    ws[row["status"]] += 1
+                if row["is_critical_path"]:
+                    if row["delay_minutes"] and row["delay_minutes"] > 0:
+                        total_delay_minutes += row["delay_minutes"]
+                    critical_path_tasks.append({
+                        key: row[key] for key in ("id", "code", "title", "status", "delay_minutes", "issue_note")
+                    })
+
+            verdicts = list(self.verdicts.values())
+            return {
+                "plan_id": self.plan_id,
+                "plan_status": plan["status"],
+                "clock": {
+                    "started_at": plan["actual_start"].isoformat() if plan["actual_start"] else None,
+                    "elapsed_minutes": elapsed_minutes,
+                    "planned_total_minutes": planned_total_minutes,
+                    "estimated_completion": None,
+                    "is_behind_schedule": total_delay_minutes > 0,
+                    "total_delay_minutes": total_delay_minutes,
+                },
+                "go_no_go": {
+                    "passed": verdicts.count("go"),
+                    "pending": verdicts.count("pending"),
+                    "failed": verdicts.count("no_go"),
+                },
+                "tasks": {
+                    "total": len(self.tasks),
+                    "completed": status_counts.get("completed", 0),
+                    "in_progress": status_counts.get("in_progress", 0),
+                    "blocked": self._blocked_count(),
+                    "pending": status_counts.get("not_started", 0),
+                    "failed": status_counts.get("failed", 0),
+                },
+                "workstreams": workstream_counts,
+                "critical_path_tasks": critical_path_tasks,
+            }
+
+
+# ═════════════════════════════════════════════════════════════════════════════
+# CACHE
+# ═════════════════════════════════════════════════════════════════════════════
+
+
+def _version_key(plan_id: int) -> str:
+    return f"{_VERSION_PREFIX}{plan_id}"
+
+
+def _seed_value() -> int:
+    return time.time_ns() // 1000
+
+
+def _cacheable() -> bool:
+    """Snapshots may be reused only when the version counters are shared by all workers."""
+    return cache_service.is_shared_backend()
+
+
+def current_version(plan_id: int) -> int:
+    """The plan's live-status version; changes after every committed write."""
+    key = _version_key(plan_id)
+    value = cache_service.get_counters([key])[0]
+    if value is None:
+        cache_service.set_counter(key, _seed_value(), nx=True)
+        value = cache_service.get_counters([key])[0]
+    return int(value)
+
+
+def get_snapshot(tenant_id: int, program_id: int, plan_id: int) -> LiveSnapshot:
+    """Up-to-date snapshot of a plan. Raises ValueError if the plan is not visible."""
+    session = db.session
+    if session.autoflush and (session.new or session.dirty or session.deleted):
+        session.flush()
+    if plan_id in session.info.get(_PENDING, {}) or not _cacheable():
+        # Uncommitted writes: a private snapshot sees them, the shared one must not
+        return LiveSnapshot.load(tenant_id, program_id, plan_id)
+
+    version = current_version(plan_id)
+    key = (plan_id, tenant_id)
+    with _lock:
+        snapshot = _snapshots.get(key)
+        if snapshot is not None and snapshot.version == version:
+            _snapshots.move_to_end(key)
+        else:
+            snapshot = None
+    if snapshot is not None:
+        if snapshot.plan["program_id"] != program_id:
+            raise ValueError(f"CutoverPlan {plan_id} not found for tenant {tenant_id}")
+        snapshot.refresh()
+        return snapshot
+
+    snapshot = LiveSnapshot.load(tenant_id, program_id, plan_id)
+    snapshot.version = version
+    with _lock:
+        _snapshots[key] = snapshot
+        _snapshots.move_to_end(key)
+        while len(_snapshots) > MAX_PLANS:
+            _snapshots.popitem(last=False)
+    return snapshot
+
+
+def reset() -> None:
+    """Drop every cached snapshot and version (tests, maintenance)."""
+    with _lock:
+        _snapshots.clear()
+        _renders.clear()
+    cache_service.delete_pattern(f"{_VERSION_PREFIX}*")
+
+# ═════════════════════════════════════════════════════════════════════════════
+# LONG POLL
+# ═════════════════════════════════════════════════════════════════════════════
+
+
+def diff(old: dict, new: dict) -> dict:
+    """Changed keys of ``new`` against ``old``, recursing into nested dicts.
+
+    Removed keys map to None; lists and scalars are replaced whole.
+    """
+    changes = {}
+    for key, value in new.items():
+        before = old.get(key)
+        if isinstance(value, dict) and isinstance(before, dict):
+            nested = diff(before, value)
+            if nested:
+                changes[key] = nested
+        elif value != before or key not in old:
+            changes[key] = value
+    for key in old.keys() - new.keys():
+        changes[key] = None
+    return changes
+
+
+def version_of(status: dict) -> str:
+    """Content version of a rendered status — the same on every worker for the same state."""
+    return hashlib.sha1(json.dumps(status, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+
+def _render(tenant_id: int, program_id: int, plan_id: int) -> tuple[str, dict]:
+    status = get_snapshot(tenant_id, program_id, plan_id).render()
+    version = version_of(status)
+    key = (plan_id, tenant_id, version)
+    with _lock:
+        _renders[key] = status
+        _renders.move_to_end(key)
+        while len(_renders) > MAX_RENDERS:
+            _renders.popitem(last=False)
+    return version, status
+
+
+def poll(tenant_id: int, program_id: int, plan_id: int, since: str | None = None, *,
+         wait: float | None = None) -> dict:
+    """Long-poll one plan's war-room status.
+
+    Returns ``{"version", "snapshot"}`` when ``since`` is empty or unknown to
+    this worker, otherwise waits up to ``wait`` seconds (CUTOVER_LIVE_WAIT_SECONDS)
+    for the status to move past ``since`` and returns ``{"version", "delta"}``
+    — an empty delta if nothing changed in time.
+
+    Raises:
+        ValueError: If the plan is not visible (also when deleted mid-wait).
+    """
+    version, status = _render(tenant_id, program_id, plan_id)
+    deadline = time.monotonic() + (WAIT_SECONDS if wait is None else wait)
+    while version == since and (remaining := deadline - time.monotonic()) > 0:
+        db.session.close()  # hold no connection or stale transaction while waiting
+        with _changed:
+            _changed.wait(timeout=min(POLL_SECONDS, remaining))
+        version, status = _render(tenant_id, program_id, plan_id)
+    with _lock:
+        previous = _renders.get((plan_id, tenant_id, since)) if since else None
+    if previous is None:
+        return {"version": version, "snapshot": status}
+    return {"version": version, "delta": diff(previous, status)}
+
+
+# ═════════════════════════════════════════════════════════════════════════════
+# SESSION HOOKS
+# ═════════════════════════════════════════════════════════════════════════════
+
+
+def _pending(session) -> dict:
+    """{plan_id: {"tasks", "items", "plan", "reload"}} noted since the last commit."""
+    return session.info.setdefault(_PENDING, {})
+
+
+def _note(session, plan_id, kind, ident=None) -> None:
+    if plan_id is None:
+        return
+    entry = _pending(session).setdefault(
+        plan_id, {"tasks": set(), "items": set(), "plan": False, "reload": False},
+    )
+    if kind in ("tasks", "items"):
+        entry[kind].add(ident)
+    else:
+        entry[kind] = True
+
+
+def _plans_of_scope_items(session, scope_item_ids) -> dict:
+    if not scope_item_ids:
+        return {}
+    return dict(session.connection().execute(
+        select(CutoverScopeItem.id, CutoverScopeItem.cutover_plan_id)
+        .where(CutoverScopeItem.id.in_(scope_item_ids))
+    ).all())
+
+
+def _plans_of_tasks(session, task_ids) -> dict:
+    if not task_ids:
+        return {}
+    return dict(session.connection().execute(
+        select(RunbookTask.id, CutoverScopeItem.cutover_plan_id)
+        .join(CutoverScopeItem, CutoverScopeItem.id == RunbookTask.scope_item_id)
+        .where(RunbookTask.id.in_(task_ids))
+    ).all())
+
+
+def _before_flush(session, flush_context, instances):
+    """Note deleted/moved tasks and deleted dependencies while their rows still exist.
+
+    Both change predecessor sets, so the affected plans reload in full.
+    """
+    tasks = set()
+    for obj in session.deleted:
+        if isinstance(obj, RunbookTask):
+            tasks.add(obj.id)
+        elif isinstance(obj, TaskDependency):
+            tasks.add(obj.successor_id)
+        elif isinstance(obj, GoNoGoItem):
+            _note(session, obj.cutover_plan_id, "items", obj.id)
+        elif isinstance(obj, CutoverPlan):
+            _note(session, obj.id, "reload")
+    for obj in session.dirty:
+        if isinstance(obj, RunbookTask) and sa_inspect(obj).attrs.scope_item_id.history.deleted:
+            tasks.add(obj.id)
+    if not tasks:
+        return
+    with session.no_autoflush:
+        plans = _plans_of_tasks(session, tasks)
+    for plan_id in set(plans.values()):
+        _note(session, plan_id, "reload")
+
+
+def _after_flush(session, flush_context):
+    """Note new/changed tasks, Go/No-Go items, plans and dependencies."""
+    tasks, edges = [], set()
+    for obj in list(session.new) + [o for o in session.dirty if session.is_modified(o)]:
+        if isinstance(obj, RunbookTask):
+            tasks.append(obj)
+        elif isinstance(obj, TaskDependency):
+            edges.add(obj.successor_id)
+        elif isinstance(obj, GoNoGoItem):
+            _note(session, obj.cutover_plan_id, "items", obj.id)
+        elif isinstance(obj, CutoverPlan):
+            _note(session, obj.id, "plan")
+    if not tasks and not edges:
+        return
+    scope_plans = _plans_of_scope_items(session, {t.scope_item_id for t in tasks})
+    for task in tasks:
+        _note(session, scope_plans.get(task.scope_item_id), "tasks", task.id)
+    for plan_id in _plans_of_tasks(session, edges).values():
+        _note(session, plan_id, "reload")
+
+
+def _bump_versions(pending: dict) -> None:
+    for plan_id, entry in pending.items():
+        try:
+            version = cache_service.incr_counter(_version_key(plan_id))
+            if version == 1:
+                cache_service.set_counter(_version_key(plan_id), _seed_value())
+                version = None
+        except Exception:
+            logger.warning("Live-status version bump failed for plan %s", plan_id, exc_info=True)
+            version = None
+        with _lock:
+            for key in [k for k in _snapshots if k[0] == plan_id]:
+                snapshot = _snapshots[key]
+                if entry["reload"] or version is None or snapshot.version != version - 1:
+                    del _snapshots[key]
+                    continue
+                with snapshot.lock:
+                    snapshot.stale_tasks |= entry["tasks"]
+                    snapshot.stale_items |= entry["items"]
+                    snapshot.stale_plan = snapshot.stale_plan or entry["plan"]
+                    snapshot.version = version
+
+
+def _after_commit(session):
+    pending = session.info.pop(_PENDING, None)
+    if not pending:
+        return
+    if _cacheable():
+        _bump_versions(pending)
+    with _changed:
+        _changed.notify_all()
+
+
+def _after_rollback(session):
+    session.info.pop(_PENDING, None)
+
+
+def init_cutover_live():
+    """Register the session hooks (idempotent; called from create_app)."""
+    if event.contains(Session, "after_flush", _after_flush):
+        return
+    event.listen(Session, "before_flush", _before_flush)
+    event.listen(Session, "after_flush", _after_flush)
+    event.listen(Session, "after_commit", _after_commit)
+    event.listen(Session, "after_rollback", _after_rollback)
@@ -17,7 +17,7 @@ import logging
 from datetime import datetime, timezone
 
 from flask import g, has_request_context
-from sqlalchemy import func, select
+from sqlalchemy import func, select, update
 
 from app.models import db
 from app.models.cutover import (
@@ -39,6 +39,7 @@ from app.models.cutover import (
 )
 from app.models.auth import Tenant
 from app.models.program import Program
+from app.services import cutover_live, runbook_graph, sequence_allocator
 from app.services.helpers.project_owned_scope import (
     normalize_member_scope,
     normalize_project_scope,
@@ -53,10 +54,11 @@ logger = logging.getLogger(__name__)
 
 def generate_plan_code(program_id: int) -> str:
     """Generate next cutover plan code: CUT-001, CUT-002, ... (globally unique)."""
-    count = (
-        db.session.query(func.count(CutoverPlan.id)).scalar()
-    ) or 0
-    return f"CUT-{count + 1:03d}"
+    seq = sequence_allocator.next_value(
+        "cutover_plans", "CUT",
+        seed=lambda: db.session.query(func.count(CutoverPlan.id)).scalar(),
+    )
+    return f"CUT-{seq:03d}"
 
 
 def generate_task_code(cutover_plan_id: int, *, program_id: int | None = None) -> str:
@@ -83,27 +85,37 @@ def generate_task_code(cutover_plan_id: int, *, program_id: int | None = None) -
     else:
         prefix = plan.code
 
-    # Count all tasks across all scope items of this plan
-    count = (
-        db.session.query(func.count(RunbookTask.id))
-        .join(CutoverScopeItem, RunbookTask.scope_item_id == CutoverScopeItem.id)
-        .filter(CutoverScopeItem.cutover_plan_id == cutover_plan_id)
-        .scalar()
-    ) or 0
+    # Plan-wide counter, seeded from the tasks across all scope items of this plan
+    seq = sequence_allocator.next_value(
+        f"cutover_plan:{cutover_plan_id}", "T",
+        seed=lambda: (
+            db.session.query(func.count(RunbookTask.id))
+            .join(CutoverScopeItem, RunbookTask.scope_item_id == CutoverScopeItem.id)
+            .filter(CutoverScopeItem.cutover_plan_id == cutover_plan_id)
+            .scalar()
+        ),
+    )
 
-    return f"{prefix}-T{count + 1:03d}"
+    return f"{prefix}-T{seq:03d}"
 
 
 def generate_incident_code(cutover_plan_id: int) -> str:
     """
     Generate next incident code for a cutover plan: INC-001, INC-002, ...
     """
-    count = (
-        db.session.query(func.count(HypercareIncident.id))
-        .filter(HypercareIncident.cutover_plan_id == cutover_plan_id)
-        .scalar()
-    ) or 0
-    return f"INC-{count + 1:03d}"
+    return f"INC-{next_incident_number(cutover_plan_id):03d}"
+
+
+def next_incident_number(cutover_plan_id: int) -> int:
+    """Allocate the plan's next incident number (shared by cutover and hypercare)."""
+    return sequence_allocator.next_value(
+        f"cutover_plan:{cutover_plan_id}", "INC",
+        seed=lambda: (
+            db.session.query(func.count(HypercareIncident.id))
+            .filter(HypercareIncident.cutover_plan_id == cutover_plan_id)
+            .scalar()
+        ),
+    )
 
 
 # ── Lifecycle Transitions ────────────────────────────────────────────────────
@@ -1653,7 +1665,7 @@ def flag_issue(tenant_id: int, program_id: int, task_id: int, note: str) -> dict
 
 
 def get_cutover_live_status(tenant_id: int, program_id: int, plan_id: int) -> dict:
-    """Return a war-room snapshot of the cutover plan — designed for 30s polling.
+    """Return a war-room snapshot of the cutover plan.
 
     Returns a single dict suitable for the live-status dashboard containing:
     - clock: elapsed time, planned total, ETA, behind-schedule flag
@@ -1662,6 +1674,10 @@ def get_cutover_live_status(tenant_id: int, program_id: int, plan_id: int) -> di
     - workstreams: per-workstream task counts
     - critical_path_tasks: list of critical-path task summaries
 
+    Rendered from the plan's cutover_live snapshot, which is patched with
+    just the rows written since the last read — a poll with no intervening
+    writes runs no queries. Long-polling clients use poll_live_status instead.
+
     Args:
         tenant_id: Tenant scope for isolation.
         program_id: Program owning the plan.
@@ -1673,162 +1689,38 @@ def get_cutover_live_status(tenant_id: int, program_id: int, plan_id: int) -> di
     Raises:
         ValueError: If plan not found for this tenant/program.
     """
-    plan = db.session.execute(
-        select(CutoverPlan).where(
-            CutoverPlan.id == plan_id,
-            CutoverPlan.program_id == program_id,
-            CutoverPlan.tenant_id == tenant_id,
-        )
-    ).scalar_one_or_none()
-    if not plan:
-        raise ValueError(f"CutoverPlan {plan_id} not found for tenant {tenant_id}")
+    return cutover_live.get_snapshot(tenant_id, program_id, plan_id).render()
 
-    now = datetime.now(timezone.utc)
 
-    # ── Clock metrics ─────────────────────────────────────────────────────
-    elapsed_minutes: int | None = None
-    planned_total_minutes: int | None = None
-    estimated_completion: str | None = None
-    is_behind_schedule = False
-    total_delay_minutes = 0
-
-    if plan.actual_start:
-        actual_start = plan.actual_start
-        if actual_start.tzinfo is None:
-            actual_start = actual_start.replace(tzinfo=timezone.utc)
-        elapsed_minutes = int((now - actual_start).total_seconds() / 60)
-
-    # Sum delay_minutes of all completed critical-path tasks
-    delayed_tasks = db.session.execute(
-        select(RunbookTask).join(
-            CutoverScopeItem,
-            CutoverScopeItem.id == RunbookTask.scope_item_id,
-        ).where(
-            CutoverScopeItem.cutover_plan_id == plan_id,
-            RunbookTask.tenant_id == tenant_id,
-            RunbookTask.is_critical_path == True,  # noqa: E712
-            RunbookTask.delay_minutes > 0,
-        )
-    ).scalars().all()
-    total_delay_minutes = sum(t.delay_minutes for t in delayed_tasks if t.delay_minutes)
-    if total_delay_minutes > 0:
-        is_behind_schedule = True
-
-    # ── All tasks for this plan ───────────────────────────────────────────
-    all_tasks = db.session.execute(
-        select(RunbookTask).join(
-            CutoverScopeItem,
-            CutoverScopeItem.id == RunbookTask.scope_item_id,
-        ).where(
-            CutoverScopeItem.cutover_plan_id == plan_id,
-            RunbookTask.tenant_id == tenant_id,
-        )
-    ).scalars().all()
-
-    # Planned total for war-room clock:
-    # 1) Prefer explicit plan window (planned_start -> planned_end).
-    # 2) Fallback to sum of runbook task planned durations.
-    if plan.planned_start and plan.planned_end:
-        planned_start = plan.planned_start
-        planned_end = plan.planned_end
-        if planned_start.tzinfo is None:
-            planned_start = planned_start.replace(tzinfo=timezone.utc)
-        if planned_end.tzinfo is None:
-            planned_end = planned_end.replace(tzinfo=timezone.utc)
-        planned_total_minutes = int((planned_end - planned_start).total_seconds() / 60)
-    else:
-        task_planned_total = sum((t.planned_duration_min or 0) for t in all_tasks)
-        planned_total_minutes = task_planned_total if task_planned_total > 0 else None
+def poll_live_status(tenant_id: int, program_id: int, plan_id: int, since: str | None) -> dict:
+    """Long-poll the war-room snapshot: wait briefly for a change past ``since``.
 
-    status_counts: dict[str, int] = {}
-    workstream_counts: dict[str, dict[str, int]] = {}
-    critical_path_tasks = []
-
-    for t in all_tasks:
-        # Status tally
-        status_counts[t.status] = status_counts.get(t.status, 0) + 1
-
-        # Workstream tally
-        ws = t.workstream or "unassigned"
-        if ws not in workstream_counts:
-            workstream_counts[ws] = {"total": 0, "completed": 0, "in_progress": 0}
-        workstream_counts[ws]["total"] += 1
-        if t.status == "completed":
-            workstream_counts[ws]["completed"] += 1
-        elif t.status == "in_progress":
-            workstream_counts[ws]["in_progress"] += 1
-
-        # Critical path summary
-        if t.is_critical_path:
-            critical_path_tasks.append({
-                "id": t.id,
-                "code": t.code,
-                "title": t.title,
-                "status": t.status,
-                "delay_minutes": t.delay_minutes,
-                "issue_note": t.issue_note,
-            })
-
-    # blocked = in not_started but has an incomplete predecessor
-    blocked_count = _count_blocked_tasks(all_tasks)
-
-    # ── Go/No-Go summary ─────────────────────────────────────────────────
-    gng_items = db.session.execute(
-        select(GoNoGoItem).where(
-            GoNoGoItem.cutover_plan_id == plan_id,
-        )
-    ).scalars().all()
-    gng_passed = sum(1 for g in gng_items if g.verdict == "go")
-    gng_failed = sum(1 for g in gng_items if g.verdict == "no_go")
-    gng_pending = sum(1 for g in gng_items if g.verdict == "pending")
+    Returns:
+        {"version": str, "snapshot": dict} or {"version": str, "delta": dict}
+        (see cutover_live.poll).
 
-    return {
-        "plan_id": plan_id,
-        "plan_status": plan.status,
-        "clock": {
-            "started_at": plan.actual_start.isoformat() if plan.actual_start else None,
-            "elapsed_minutes": elapsed_minutes,
-            "planned_total_minutes": planned_total_minutes,
-            "estimated_completion": estimated_completion,
-            "is_behind_schedule": is_behind_schedule,
-            "total_delay_minutes": total_delay_minutes,
-        },
-        "go_no_go": {
-            "passed": gng_passed,
-            "pending": gng_pending,
-            "failed": gng_failed,
-        },
-        "tasks": {
-            "total": len(all_tasks),
-            "completed": status_counts.get("completed", 0),
-            "in_progress": status_counts.get("in_progress", 0),
-            "blocked": blocked_count,
-            "pending": status_counts.get("not_started", 0),
-            "failed": status_counts.get("failed", 0),
-        },
-        "workstreams": workstream_counts,
-        "critical_path_tasks": critical_path_tasks,
-    }
+    Raises:
+        ValueError: If plan not found for this tenant/program.
+    """
+    return cutover_live.poll(tenant_id, program_id, plan_id, since)
 
 
 def calculate_critical_path(tenant_id: int, program_id: int, plan_id: int) -> list[int]:
-    """Calculate critical-path task IDs for a cutover plan using DFS topological sort.
+    """Calculate critical-path task IDs for a cutover plan.
 
-    The critical path is defined as the longest chain of dependent tasks by
-    planned_duration_min. Tasks on the critical path have is_critical_path=True
-    set on them (side-effect — persisted to DB).
+    The critical path is the longest chain of dependent tasks by duration
+    (see runbook_graph.task_weight: planned minutes, actual minutes once
+    completed, 0 when skipped). Tasks on the critical path have
+    is_critical_path=True set on them (side-effect — persisted to DB); only
+    flags that change are written.
 
-    IMPORTANT: Cycle detection is mandatory. If a circular dependency exists
-    (e.g. Task A → B → A), this function raises ValueError to prevent infinite
-    recursion. Cycles indicate data integrity issues and must be resolved manually.
+    The plan's graph is served by runbook_graph, which keeps longest-path
+    state per plan and patches it on every task/dependency commit, so a
+    repeated call costs a version check plus an O(path) walk.
 
-    Algorithm:
-        1. Build adjacency list (successor graph) for all tasks in plan.
-        2. DFS with visited + in_stack sets (standard cycle detection).
-        3. Compute longest-path weights based on planned_duration_min.
-        4. Walk backward from the sink (max-weight node) to find the path.
-        5. Set is_critical_path=True on critical path tasks, False on others.
-        6. Commit.
+    IMPORTANT: Cycle detection is mandatory. If a circular dependency exists
+    (e.g. Task A → B → A), this function raises ValueError. Cycles indicate
+    data integrity issues and must be resolved manually.
 
     Args:
         tenant_id: Tenant scope for isolation.
@@ -1851,109 +1743,27 @@ def calculate_critical_path(tenant_id: int, program_id: int, plan_id: int) -> li
     if not plan:
         raise ValueError(f"CutoverPlan {plan_id} not found for tenant {tenant_id}")
 
-    # Load all tasks for this plan
-    all_tasks = db.session.execute(
-        select(RunbookTask).join(
+    graph = runbook_graph.get_graph(plan_id, tenant_id)
+    critical_path = graph.critical_path()
+    if not critical_path:
+        return []
+
+    critical_set = set(critical_path)
+    flagged = set(db.session.execute(
+        select(RunbookTask.id).join(
             CutoverScopeItem,
             CutoverScopeItem.id == RunbookTask.scope_item_id,
         ).where(
             CutoverScopeItem.cutover_plan_id == plan_id,
             RunbookTask.tenant_id == tenant_id,
+            RunbookTask.is_critical_path.is_(True),
         )
-    ).scalars().all()
-
-    if not all_tasks:
-        return []
-
-    task_ids = {t.id for t in all_tasks}
-    task_map = {t.id: t for t in all_tasks}
-
-    # Load all dependencies for these tasks
-    deps = db.session.execute(
-        select(TaskDependency).where(
-            TaskDependency.predecessor_id.in_(task_ids),
-            TaskDependency.successor_id.in_(task_ids),
-        )
-    ).scalars().all()
-
-    # Build successor adjacency list: predecessor_id → [successor_id, ...]
-    successors_of: dict[int, list[int]] = {tid: [] for tid in task_ids}
-    predecessors_of: dict[int, list[int]] = {tid: [] for tid in task_ids}
-    for dep in deps:
-        successors_of[dep.predecessor_id].append(dep.successor_id)
-        predecessors_of[dep.successor_id].append(dep.predecessor_id)
-
-    # ── Step 1: Cycle detection via DFS with in-stack tracking ───────────
-    visited: set[int] = set()
-    in_stack: set[int] = set()
-
-    def _dfs_cycle_check(node: int) -> None:
-        """DFS cycle detection — raises ValueError on cycle."""
-        visited.add(node)
-        in_stack.add(node)
-        for neighbor in successors_of.get(node, []):
-            if neighbor not in visited:
-                _dfs_cycle_check(neighbor)
-            elif neighbor in in_stack:
-                raise ValueError(
-                    f"Circular dependency detected in RunbookTask graph: "
-                    f"task {node} → task {neighbor} forms a cycle. "
-                    "Resolve the circular dependency before calculating the critical path."
-                )
-        in_stack.discard(node)
-
-    for tid in task_ids:
-        if tid not in visited:
-            _dfs_cycle_check(tid)
-
-    # ── Step 2: Compute longest path (critical path) ──────────────────────
-    # Weight of each task = planned_duration_min (or 1 if None)
-    def weight(tid: int) -> int:
-        return task_map[tid].planned_duration_min or 1
-
-    # Topological sort (Kahn's algorithm)
-    in_degree = {tid: len(predecessors_of[tid]) for tid in task_ids}
-    queue = [tid for tid in task_ids if in_degree[tid] == 0]
-    topo_order = []
-    while queue:
-        node = queue.pop(0)
-        topo_order.append(node)
-        for succ in successors_of[node]:
-            in_degree[succ] -= 1
-            if in_degree[succ] == 0:
-                queue.append(succ)
-
-    # Longest path DP
-    dist: dict[int, int] = {tid: weight(tid) for tid in task_ids}
-    prev: dict[int, int | None] = {tid: None for tid in task_ids}
-
-    for node in topo_order:
-        for succ in successors_of[node]:
-            candidate = dist[node] + weight(succ)
-            if candidate > dist[succ]:
-                dist[succ] = candidate
-                prev[succ] = node
-
-    # Find sink (no successors) with maximum distance
-    sinks = [tid for tid in task_ids if not successors_of[tid]]
-    if not sinks:
-        sinks = list(task_ids)
-
-    end_node = max(sinks, key=lambda tid: dist[tid])
-
-    # Walk backward to reconstruct path
-    critical_path: list[int] = []
-    current: int | None = end_node
-    while current is not None:
-        critical_path.append(current)
-        current = prev[current]
-    critical_path.reverse()
-
-    critical_set = set(critical_path)
-
-    # ── Step 3: Update is_critical_path flags ─────────────────────────────
-    for task in all_tasks:
-        task.is_critical_path = task.id in critical_set
+    ).scalars())
+    for ids, value in ((critical_set - flagged, True), (flagged - critical_set, False)):
+        if ids:
+            db.session.execute(
+                update(RunbookTask).where(RunbookTask.id.in_(ids)).values(is_critical_path=value)
+            )
 
     db.session.commit()
     logger.info(
@@ -1967,6 +1777,33 @@ def calculate_critical_path(tenant_id: int, program_id: int, plan_id: int) -> li
     return critical_path
 
 
+def get_critical_path_schedule(tenant_id: int, program_id: int, plan_id: int) -> dict:
+    """Per-task earliest/latest start and finish plus slack for a cutover plan.
+
+    Offsets are minutes from plan start. Read-only; served from the same
+    runbook graph as calculate_critical_path.
+
+    Raises:
+        ValueError: If plan not found, or if circular dependency detected.
+    """
+    plan = db.session.execute(
+        select(CutoverPlan).where(
+            CutoverPlan.id == plan_id,
+            CutoverPlan.program_id == program_id,
+            CutoverPlan.tenant_id == tenant_id,
+        )
+    ).scalar_one_or_none()
+    if not plan:
+        raise ValueError(f"CutoverPlan {plan_id} not found for tenant {tenant_id}")
+
+    graph = runbook_graph.get_graph(plan_id, tenant_id)
+    schedule = graph.schedule()
+    return {
+        "makespan_min": graph.makespan,
+        "tasks": [{"task_id": tid, **schedule[tid]} for tid in sorted(schedule)],
+    }
+
+
 # ── Internal helpers (war room) ──────────────────────────────────────────────
 
 
@@ -2002,28 +1839,3 @@ def _get_task_for_tenant(tenant_id: int, program_id: int, task_id: int) -> "Runb
             f"RunbookTask {task_id} not found for tenant {tenant_id} program {program_id}"
         )
     return task
-
-
-def _count_blocked_tasks(all_tasks: list["RunbookTask"]) -> int:
-    """Count tasks that are not_started but have at least one non-completed predecessor.
-
-    A task is 'blocked' if it is in not_started status AND has predecessor tasks
-    that are not in {completed, skipped} status. Tasks with zero predecessors are
-    always unblocked.
-
-    Args:
-        all_tasks: Pre-loaded list of RunbookTask instances for the plan.
-
-    Returns:
-        Count of blocked tasks.
-    """
-    completed_ids = {t.id for t in all_tasks if t.status in {"completed", "skipped"}}
-    blocked = 0
-    for task in all_tasks:
-        if task.status != "not_started":
-            continue
-        # Use already-loaded predecessors relationship (dynamic)
-        pred_ids = [d.predecessor_id for d in task.predecessors]
-        if pred_ids and not all(pid in completed_ids for pid in pred_ids):
-            blocked += 1
-    return blocked
@@ -20,9 +20,19 @@ from app.models.testing import (
     TestCase, TestExecution, TestCycle, TestPlan,
     Defect,
 )
+from app.services import result_cache
+from app.services.testing.execution_history import iter_history_chunks
 
 logger = logging.getLogger(__name__)
 
+# Tables the gadgets read; writes to any of them invalidate cached gadgets
+GADGET_TAGS = (
+    AuditLog, BacklogItem, ExploreRequirement, Risk,
+    TestCase, TestExecution, TestCycle, TestPlan, Defect,
+)
+
+FLAKY_WINDOW = 10  # recent executions per TC for the flaky gadget
+
 
 # ═════════════════════════════════════════════════════════════════════════════
 # GADGET REGISTRY
@@ -42,6 +52,7 @@ class DashboardEngine:
         return decorator
 
     @classmethod
+    @result_cache.cached("gadget", scope="program_id", tags=GADGET_TAGS)
     def compute(cls, gadget_type: str, program_id: int, **kwargs) -> dict:
         """Compute data for a gadget."""
         entry = cls._GADGETS.get(gadget_type)
@@ -248,38 +259,35 @@ def _sla_compliance(pid, **kw):
 # 8 ── Top Flaky Tests ───────────────────────────────────────────────────
 @DashboardEngine.register("top_flaky", "Top Flaky Tests", "2x1")
 def _top_flaky(pid, **kw):
-    # TCs with mixed pass/fail results in recent executions
-    sub = (
-        db.session.query(
-            TestExecution.test_case_id,
-            func.count(case((TestExecution.result == "pass", 1))).label("passes"),
-            func.count(case((TestExecution.result == "fail", 1))).label("fails"),
-            func.count(TestExecution.id).label("total"),
-        )
-        .join(TestCase)
-        .filter(TestCase.program_id == pid)
-        .group_by(TestExecution.test_case_id)
-        .having(
-            func.count(case((TestExecution.result == "pass", 1))) > 0,
-        )
-        .having(
-            func.count(case((TestExecution.result == "fail", 1))) > 0,
-        )
-        .subquery()
-    )
-    rows = (
-        db.session.query(TestCase.code, TestCase.title, sub.c.passes, sub.c.fails, sub.c.total)
-        .join(sub, TestCase.id == sub.c.test_case_id)
-        .order_by(sub.c.fails.desc())
-        .limit(10)
-        .all()
-    )
-    data = [{"code": r[0], "title": r[1], "passes": r[2], "fails": r[3], "total": r[4]}
-            for r in rows]
+    # TCs with mixed pass/fail results in their recent executions, most
+    # oscillating first (same windowed history as FlakyTestDetector)
+    scored = []
+    for chunk in iter_history_chunks(pid, window=FLAKY_WINDOW):
+        for tc_id, results, (score, _) in zip(
+            chunk.test_case_ids, chunk.results, chunk.oscillations(), strict=True,
+        ):
+            passes = results.count("pass")
+            fails = results.count("fail")
+            if passes and fails:
+                scored.append((score, fails, passes, len(results), tc_id))
+    scored.sort(key=lambda r: (r[0], r[1]), reverse=True)
+    top = scored[:10]
+
+    names = {}
+    if top:
+        names = {
+            r.id: r for r in db.session.query(TestCase.id, TestCase.code, TestCase.title)
+            .filter(TestCase.id.in_([t[4] for t in top]))
+        }
+    data = [
+        {"code": names[tc_id].code, "title": names[tc_id].title, "passes": passes,
+         "fails": fails, "total": total, "flakiness_score": round(score, 1)}
+        for score, fails, passes, total, tc_id in top if tc_id in names
+    ]
     return {
         "title": "Top Flaky Tests",
         "type": "table",
-        "data": {"columns": ["code", "title", "passes", "fails", "total"], "rows": data},
+        "data": {"columns": ["code", "title", "passes", "fails", "total", "flakiness_score"], "rows": data},
     }
 
 
@@ -0,0 +1,181 @@
+"""
+Stale-while-revalidate serving for heavy cockpit dashboards.
+
+Release readiness, go/no-go, cycle risk and the hypercare war room are
+expensive to compute and polled by many users at once. ``serve()`` keeps
+the last computed payload per (endpoint, scope) in cache_service:
+
+  - fresh (younger than the endpoint's budget, and no relevant write since
+    it was computed) → returned as is
+  - stale → returned immediately, while exactly one background worker
+    (cross-worker lock) recomputes it and swaps in the new value
+  - missing, or older than the stale limit → computed inline
+
+Budgets are (fresh seconds, max stale seconds) per endpoint, overridable
+through DASHBOARD_FRESHNESS. Responses carry ``computed_at`` plus Age /
+X-Computed-At / X-Data-Stale headers via ``apply_headers()``.
+
+Set DASHBOARD_SWR_ENABLED = False to compute every request inline (tests).
+
+Without a shared cache backend (REDIS_URL unset) the swr: entries and the
+refresh lock live in each worker process: every worker computes its own
+copy and runs its own refresh, and writes only end freshness early once
+result_cache is active (it is disabled there, see result_cache.is_enabled),
+so entries are bounded by the time budgets alone.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from flask import current_app, has_app_context
+
+from app.services import cache_service, result_cache
+
+logger = logging.getLogger(__name__)
+
+# endpoint → (fresh_seconds, max_stale_seconds)
+DEFAULT_BUDGETS = {
+    "release_readiness": (60, 900),
+    "go_no_go": (60, 900),
+    "cycle_risk": (60, 900),
+    "war_room": (15, 300),
+}
+
+_KEY_PREFIX = "swr:"
+_REFRESH_WORKERS = 2
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def parse_budgets(raw: str | None) -> dict:
+    """Parse "name=fresh:stale,name=fresh" into {name: (fresh, stale)}."""
+    budgets = {}
+    for item in (raw or "").split(","):
+        name, _, spec = item.strip().partition("=")
+        if not name or not spec:
+            continue
+        fresh, _, stale = spec.partition(":")
+        try:
+            fresh_s = int(fresh)
+            budgets[name] = (fresh_s, int(stale) if stale else DEFAULT_BUDGETS.get(name, (0, 900))[1])
+        except ValueError:
+            logger.warning("Ignoring invalid DASHBOARD_FRESHNESS entry %r", item)
+    return budgets
+
+
+def budget_for(name: str) -> tuple[int, int]:
+    """(fresh, max_stale) seconds for an endpoint, config overrides first."""
+    raw = current_app.config.get("DASHBOARD_FRESHNESS") if has_app_context() else None
+    overrides = raw if isinstance(raw, dict) else parse_budgets(raw)
+    return overrides.get(name) or DEFAULT_BUDGETS.get(name, (60, 900))
+
+
+def _enabled() -> bool:
+    return not has_app_context() or current_app.config.get("DASHBOARD_SWR_ENABLED", True)
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=_REFRESH_WORKERS, thread_name_prefix="dashboard-refresh",
+            )
+        return _executor
+
+
+def _submit(fn, *args):
+    """Run a refresh job off the request thread."""
+    _get_executor().submit(fn, *args)
+
+
+def _store(key: str, payload, token: str | None, max_age: int) -> dict:
+    entry = {"data": payload, "computed_at": time.time(), "v": token}
+    try:
+        cache_service.set_cached(key, entry, ttl=max_age)
+    except (TypeError, ValueError):
+        logger.warning("Dashboard payload for %s is not JSON-serialisable; not cached", key)
+    return entry
+
+
+def _meta(entry: dict, state: str) -> dict:
+    return {
+        "computed_at": datetime.fromtimestamp(entry["computed_at"], tz=timezone.utc).isoformat(),
+        "age": max(0, int(time.time() - entry["computed_at"])),
+        "state": state,
+    }
+
+
+def _refresh(app, key, compute, token_fn, max_age, lock_token):
+    """Background job: recompute, swap in the new entry, release the lock."""
+    try:
+        with app.app_context():
+            token = token_fn() if token_fn else None
+            _store(key, compute(), token, max_age)
+    except Exception:
+        logger.exception("Dashboard refresh failed for %s", key)
+    finally:
+        cache_service.release_lock(key, lock_token)
+
+
+def serve(name: str, scope, compute, *, program_id=None, tags=None) -> tuple:
+    """Return (payload, meta) for a dashboard, serving stale while refreshing.
+
+    Args:
+        name: Endpoint name; selects the freshness budget.
+        scope: Hashable identity of the payload (ids it is computed for).
+        compute: Zero-argument callable producing the payload. Exceptions
+            from an inline computation propagate to the caller.
+        program_id, tags: Optional result_cache dependency tags; a write to
+            one of these tables for the program makes the entry stale early.
+
+    meta = {"computed_at": iso str, "age": seconds, "state": "fresh"|"stale"|"miss"}.
+    """
+    if not _enabled():
+        payload = compute()
+        return payload, _meta({"computed_at": time.time()}, "miss")
+
+    fresh_for, stale_for = budget_for(name)
+    max_age = fresh_for + stale_for
+    key = f"{_KEY_PREFIX}{name}:{':'.join(str(p) for p in scope)}"
+
+    def token_fn():
+        if program_id is None or not tags or not result_cache.is_enabled():
+            return None
+        return result_cache.version_token("program", program_id, tags)
+
+    token = token_fn()
+    entry = cache_service.get_cached(key)
+    if isinstance(entry, dict) and "data" in entry:
+        age = time.time() - entry["computed_at"]
+        if age < fresh_for and entry.get("v") == token:
+            return entry["data"], _meta(entry, "fresh")
+        if age < max_age:
+            lock_token = cache_service.acquire_lock(key, ttl=max(30, fresh_for))
+            if lock_token:
+                _submit(_refresh, current_app._get_current_object(), key, compute, token_fn,
+                        max_age, lock_token)
+            return entry["data"], _meta(entry, "stale")
+
+    entry = _store(key, compute(), token, max_age)
+    return entry["data"], _meta(entry, "miss")
+
+
+def apply_headers(response, meta: dict):
+    """Add computed_at and staleness headers to a Flask response."""
+    response.headers["X-Computed-At"] = meta["computed_at"]
+    response.headers["Age"] = str(meta["age"])
+    response.headers["X-Data-Stale"] = "true" if meta["state"] == "stale" else "false"
+    response.headers["X-Cache-Status"] = meta["state"]
+    return response
+
+
+def with_computed_at(payload, meta: dict):
+    """Copy of a dict payload with ``computed_at`` (other payloads unchanged)."""
+    if isinstance(payload, dict):
+        return {**payload, "computed_at": meta["computed_at"]}
+    return payload
@@ -61,6 +61,8 @@ from app.services.open_item_lifecycle import (
     reassign_open_item,
     transition_open_item,
 )
+from app.services import process_closure, sequence_allocator
+from app.services.process_hierarchy import ProcessHierarchy
 from app.services.requirement_lifecycle import (
     BlockedByOpenItemsError,
     TransitionError,
@@ -73,6 +75,7 @@ from app.services.requirement_lifecycle import (
 from app.services.cloud_alm import bulk_sync_to_alm
 from app.services import change_management_service
 from app.services.permission import PermissionDenied
+from app.services.helpers.pagination import paginate
 from app.services.helpers.scoped_queries import get_scoped_or_none
 from app.services.signoff import get_consolidated_view, override_l3_fit, signoff_l3
 from app.models.audit import write_audit
@@ -169,6 +172,18 @@ def _attach_canonical_scope_change_reference(payload: dict, scr_id: str) -> dict
     return payload
 
 
+def _keyset_listing(query, sort_col, id_col, sort_dir, *, cursor, per_page, count=None):
+    """Keyset page of a listing ordered by (sort_col, id) in ``sort_dir``.
+
+    Returns (items, meta); raises ValueError on a malformed cursor.
+    """
+    if sort_dir == "desc":
+        order = (sort_col.desc(), id_col.desc())
+    else:
+        order = (sort_col.asc(), id_col.asc())
+    return paginate(query, order, cursor=cursor, limit=per_page, count=count, max_limit=500)
+
+
 def list_requirements_service():
     """List requirements with filters, grouping, pagination."""
     project_id = (
@@ -241,20 +256,26 @@ def list_requirements_service():
 
     page = request.args.get("page", 1, type=int)
     per_page = request.args.get("per_page", 50, type=int)
-    paginated = q.paginate(page=page, per_page=per_page, error_out=False)
+    if "cursor" in request.args:
+        try:
+            rows, page_meta = _keyset_listing(
+                q, sort_col, ExploreRequirement.id, sort_dir,
+                cursor=request.args.get("cursor"), per_page=per_page, count=request.args.get("count"),
+            )
+        except ValueError as exc:
+            return api_error(E.VALIDATION_INVALID, str(exc))
+    else:
+        paginated = q.paginate(page=page, per_page=per_page, error_out=False)
+        rows = paginated.items
+        page_meta = {"total": paginated.total, "page": paginated.page, "pages": paginated.pages}
 
     items = []
-    for req in paginated.items:
+    for req in rows:
         payload = req.to_dict()
         payload["available_transitions"] = get_available_transitions(req)
         items.append(payload)
 
-    return jsonify({
-        "items": items,
-        "total": paginated.total,
-        "page": paginated.page,
-        "pages": paginated.pages,
-    })
+    return jsonify({"items": items, **page_meta})
 
 
 def create_requirement_flat_service():
@@ -964,9 +985,20 @@ def list_workshops_service():
 
     page = request.args.get("page", 1, type=int)
     per_page = request.args.get("per_page", 50, type=int)
-    paginated = query.paginate(page=page, per_page=per_page, error_out=False)
+    if "cursor" in request.args:
+        try:
+            workshops, page_meta = _keyset_listing(
+                query, sort_col, ExploreWorkshop.id, sort_dir,
+                cursor=request.args.get("cursor"), per_page=per_page, count=request.args.get("count"),
+            )
+        except ValueError as exc:
+            return api_error(E.VALIDATION_INVALID, str(exc))
+    else:
+        paginated = query.paginate(page=page, per_page=per_page, error_out=False)
+        workshops = paginated.items
+        page_meta = {"total": paginated.total, "page": paginated.page, "pages": paginated.pages}
 
-    workshop_ids = [ws.id for ws in paginated.items]
+    workshop_ids = [ws.id for ws in workshops]
     step_counts = {}
     if workshop_ids:
         for workshop_id, total, fit_count, gap_count, partial_count, pending_count in db.session.query(
@@ -1051,7 +1083,7 @@ def list_workshops_service():
             }
 
     items = []
-    for ws in paginated.items:
+    for ws in workshops:
         item = ws.to_dict()
         item.update(step_counts.get(ws.id, {
             "steps_total": 0,
@@ -1066,13 +1098,7 @@ def list_workshops_service():
         item.update(scope_item_map.get(ws.id, {}))
         items.append(item)
 
-    return jsonify({
-        "items": items,
-        "total": paginated.total,
-        "page": paginated.page,
-        "pages": paginated.pages,
-        "per_page": per_page,
-    })
+    return jsonify({"items": items, **page_meta, "per_page": per_page})
 
 
 def get_workshop_service(ws_id):
@@ -1900,41 +1926,24 @@ def list_process_levels_service():
     if not project_id:
         return api_error(E.VALIDATION_REQUIRED, "project_id is required")
 
-    base_query = ProcessLevel.query.filter_by(project_id=project_id)
-    unfiltered_total = base_query.count()
+    # One query for the whole project; every mode below is served from memory.
+    hierarchy = ProcessHierarchy.load(project_id)
+    unfiltered_total = len(hierarchy)
 
     level = request.args.get("level", type=int)
     parent_id = request.args.get("parent_id")
     max_depth = request.args.get("max_depth", type=int)
-    query = base_query
-    if level:
-        query = query.filter_by(level=level)
-
     scope_status = request.args.get("scope_status")
-    if scope_status:
-        query = query.filter_by(scope_status=scope_status)
-
     fit_status = request.args.get("fit_status")
-    if fit_status:
-        query = query.filter_by(fit_status=fit_status)
-
     process_area = request.args.get("process_area")
-    if process_area:
-        query = query.filter_by(process_area_code=process_area)
-
     wave_filter = request.args.get("wave", type=int)
-    if wave_filter:
-        query = query.filter_by(wave=wave_filter)
-
     search_query = (request.args.get("q") or request.args.get("search") or "").strip()
-    if search_query:
-        pattern = f"%{search_query}%"
-        query = query.filter(or_(
-            ProcessLevel.name.ilike(pattern),
-            ProcessLevel.code.ilike(pattern),
-            ProcessLevel.scope_item_code.ilike(pattern),
-            ProcessLevel.process_area_code.ilike(pattern),
-        ))
+
+    # Keyset paging for flat/children modes on very large catalogs
+    cursor = request.args.get("cursor") or None
+    limit = request.args.get("limit", type=int)
+    if limit is not None and limit < 1:
+        return api_error(E.VALIDATION_INVALID, "limit must be a positive integer")
 
     flat = request.args.get("flat", "false").lower() == "true" or request.args.get("mode") == "flat"
     include_stats = request.args.get("include_stats", "false").lower() == "true"
@@ -1943,7 +1952,7 @@ def list_process_levels_service():
     if level:
         flat = True
 
-    all_project_items = base_query.order_by(ProcessLevel.level, ProcessLevel.sort_order).all()
+    all_project_items = hierarchy.nodes
 
     def _build_meta(items):
         l4_items = [item for item in items if item.level == 4]
@@ -1969,83 +1978,86 @@ def list_process_levels_service():
         }
 
     meta = _build_meta(all_project_items)
-    child_counts = {}
-    for item in all_project_items:
-        if item.parent_id:
-            child_counts[item.parent_id] = child_counts.get(item.parent_id, 0) + 1
+
+    def node_matches(node):
+        if search_query:
+            ql = search_query.lower()
+            haystacks = [(node.name or "").lower(), (node.code or "").lower(), (node.scope_item_code or "").lower(), (node.process_area_code or "").lower()]
+            if not any(ql in hay for hay in haystacks):
+                return False
+        if scope_status and node.scope_status != scope_status:
+            return False
+        if fit_status and node.fit_status != fit_status:
+            return False
+        if process_area and node.process_area_code != process_area:
+            return False
+        if wave_filter and node.wave != wave_filter:
+            return False
+        return True
+
+    def matches_with_level(node):
+        return (not level or node.level == level) and node_matches(node)
+
+    def _paged(items, mode):
+        try:
+            page, next_cursor = ProcessHierarchy.page(items, cursor, limit)
+        except ValueError:
+            return None, api_error(E.VALIDATION_INVALID, "Invalid cursor")
+        extra = {"next_cursor": next_cursor} if (cursor or limit) else {}
+        return page, {"total": len(items), "unfiltered_total": unfiltered_total, "mode": mode, **extra, **meta}
 
     def _serialize_shallow(node, *, loaded=False, children=None):
         data = node.to_dict()
         if include_stats or max_depth or parent_id:
-            data["fit_summary"] = get_fit_summary(node)
-        data["has_children"] = child_counts.get(node.id, 0) > 0
+            data["fit_summary"] = hierarchy.fit_summary(node.id)
+        data["has_children"] = hierarchy.has_children(node.id)
         data["children_loaded"] = loaded
         data["children"] = children or []
         return data
 
     if flat:
-        items = query.order_by(ProcessLevel.level, ProcessLevel.sort_order).all()
+        items, envelope = _paged(hierarchy.flat(matches_with_level), "flat")
+        if items is None:
+            return envelope
         result = []
         for pl in items:
             data = pl.to_dict()
             if include_stats:
-                data["fit_summary"] = get_fit_summary(pl)
+                data["fit_summary"] = hierarchy.fit_summary(pl.id)
             result.append(data)
-        return jsonify({"items": result, "total": len(result), "unfiltered_total": unfiltered_total, "mode": "flat", **meta})
+        return jsonify({"items": result, **envelope})
 
     if parent_id:
-        items = query.filter(ProcessLevel.parent_id == parent_id).order_by(ProcessLevel.sort_order).all()
+        items, envelope = _paged(hierarchy.children_view(parent_id, matches_with_level), "children")
+        if items is None:
+            return envelope
         result = [_serialize_shallow(item, loaded=False) for item in items]
-        return jsonify({"items": result, "total": len(result), "unfiltered_total": unfiltered_total, "mode": "children", **meta})
-
-    all_items = all_project_items
-    children_map = {}
-    for pl in all_items:
-        children_map.setdefault(pl.parent_id, []).append(pl)
+        return jsonify({"items": result, **envelope})
 
-    def node_matches(node):
-        if search_query:
-            ql = search_query.lower()
-            haystacks = [(node.name or "").lower(), (node.code or "").lower(), (node.scope_item_code or "").lower(), (node.process_area_code or "").lower()]
-            if not any(ql in hay for hay in haystacks):
-                return False
-        if scope_status and node.scope_status != scope_status:
-            return False
-        if fit_status and node.fit_status != fit_status:
-            return False
-        if process_area and node.process_area_code != process_area:
-            return False
-        if wave_filter and node.wave != wave_filter:
-            return False
-        return True
+    has_filters = any([search_query, scope_status, fit_status, process_area, wave_filter])
 
     def build_tree(node, depth=1):
         data = node.to_dict()
         if include_stats:
-            data["fit_summary"] = get_fit_summary(node)
-        kids = children_map.get(node.id, [])
+            data["fit_summary"] = hierarchy.fit_summary(node.id)
+        kids = hierarchy.children_of(node.id)
         can_descend = not max_depth or depth < max_depth
         filtered_children = [child for child in (build_tree(c, depth + 1) for c in kids) if child] if can_descend else []
         if level and node.level != level and not filtered_children:
             return None
-        if node_matches(node) or filtered_children or (not any([search_query, scope_status, fit_status, process_area, wave_filter])):
+        if node_matches(node) or filtered_children or not has_filters:
             data["has_children"] = bool(kids)
             data["children_loaded"] = can_descend and bool(kids)
             data["children"] = filtered_children
             return data
         return None
 
-    roots = children_map.get(None, [])
-    tree = [root for root in (build_tree(r) for r in roots) if root]
+    tree = [root for root in (build_tree(r) for r in hierarchy.roots) if root]
 
-    def flatten(nodes, acc=None):
-        acc = acc or []
-        for node in nodes:
-            acc.append(node)
-            flatten(node.get("children") or [], acc)
-        return acc
+    def count_nodes(nodes):
+        return sum(1 + count_nodes(node.get("children") or []) for node in nodes)
 
-    return jsonify({"items": tree, "total": len(flatten(tree)), "unfiltered_total": unfiltered_total, "mode": "tree", **meta})
+    return jsonify({"items": tree, "total": count_nodes(tree), "unfiltered_total": unfiltered_total, "mode": "tree", **meta})
 
 
 def import_process_template_service():
@@ -2118,6 +2130,15 @@ def import_process_template_service():
     return jsonify({"imported": created, "by_level": by_level, "skipped_existing": skipped}), 201
 
 
+def _next_process_level_code(project_id, lvl):
+    """Next generated ProcessLevel code for a level: L3-001, L3-002, ..."""
+    seq = sequence_allocator.next_value(
+        f"process_levels:{project_id}", f"L{lvl}",
+        seed=lambda: ProcessLevel.query.filter_by(project_id=project_id, level=lvl).count(),
+    )
+    return f"L{lvl}-{seq:03d}"
+
+
 def bulk_create_process_levels_service():
     data = request.get_json(silent=True) or {}
     project_id = data.get("project_id") or data.get("program_id")
@@ -2161,8 +2182,7 @@ def bulk_create_process_levels_service():
 
         code = (item.get("code") or "").strip()
         if not code:
-            count = ProcessLevel.query.filter_by(project_id=project_id, level=lvl).count() + len([c for c in created if c["level"] == lvl])
-            code = f"L{lvl}-{count + 1:03d}"
+            code = _next_process_level_code(project_id, lvl)
         if code in code_map:
             errors.append({"row": orig_idx + 1, "error": f"Code '{code}' already exists"})
             continue
@@ -2257,8 +2277,7 @@ def create_process_level_service():
 
     code = (data.get("code") or "").strip()
     if not code:
-        count = ProcessLevel.query.filter_by(project_id=project_id, level=lvl).count()
-        code = f"L{lvl}-{count + 1:03d}"
+        code = _next_process_level_code(project_id, lvl)
     if ProcessLevel.query.filter_by(project_id=project_id, code=code).first():
         return api_error(E.CONFLICT_DUPLICATE, f"Code '{code}' already exists")
 
@@ -2392,16 +2411,35 @@ def get_scope_matrix_service():
             ProcessLevel.process_area_code.ilike(pattern),
         ))
 
-    l3_nodes = query.order_by(ProcessLevel.process_area_code, ProcessLevel.sort_order).all()
     fit_status = request.args.get("fit_status")
     if fit_status:
-        l3_nodes = [l3 for l3 in l3_nodes if (l3.consolidated_fit_decision or l3.system_suggested_fit or l3.fit_status or "pending") == fit_status]
+        effective_fit = func.coalesce(
+            func.nullif(ProcessLevel.consolidated_fit_decision, ""),
+            func.nullif(ProcessLevel.system_suggested_fit, ""),
+            func.nullif(ProcessLevel.fit_status, ""),
+            "pending",
+        )
+        query = query.filter(effective_fit == fit_status)
+
+    # Filtering and paging run in SQL: only the requested page of L3 rows is loaded
+    order = (ProcessLevel.process_area_code, ProcessLevel.sort_order, ProcessLevel.id)
+    cursor = request.args.get("cursor")
+    try:
+        paged_nodes, page_meta = paginate(
+            query, order, cursor=cursor, limit=per_page, offset=(page - 1) * per_page,
+            count=request.args.get("count"), max_limit=200,
+        )
+    except ValueError as exc:
+        return api_error(E.VALIDATION_INVALID, str(exc))
+    if cursor is None:
+        total = page_meta["total"]
+        page_meta["page"] = page
+        page_meta["pages"] = None if total is None else ((total - 1) // per_page) + 1 if total else 0
+    page_meta["per_page"] = per_page
 
-    total = len(l3_nodes)
-    paged_nodes = l3_nodes[(page - 1) * per_page:(page - 1) * per_page + per_page]
     l3_ids = [l3.id for l3 in paged_nodes]
     if not l3_ids:
-        return jsonify({"items": [], "total": total, "page": page, "pages": 0 if total == 0 else ((total - 1) // per_page) + 1, "per_page": per_page})
+        return jsonify({"items": [], **page_meta})
 
     workshop_status_rows = db.session.query(
         WorkshopScopeItem.process_level_id,
@@ -2421,25 +2459,8 @@ def get_scope_matrix_service():
     requirement_counts = {scope_item_id: int(count or 0) for scope_item_id, count in db.session.query(ExploreRequirement.scope_item_id, func.count(ExploreRequirement.id)).filter(ExploreRequirement.project_id == project_id, ExploreRequirement.scope_item_id.in_(l3_ids)).group_by(ExploreRequirement.scope_item_id).all()}
     open_item_counts = {process_level_id: int(count or 0) for process_level_id, count in db.session.query(ExploreOpenItem.process_level_id, func.count(ExploreOpenItem.id)).filter(ExploreOpenItem.project_id == project_id, ExploreOpenItem.process_level_id.in_(l3_ids)).group_by(ExploreOpenItem.process_level_id).all()}
 
-    fit_rows = db.session.query(
-        ProcessLevel.parent_id,
-        func.count(ProcessLevel.id),
-        func.sum(case((ProcessLevel.fit_status == "fit", 1), else_=0)),
-        func.sum(case((ProcessLevel.fit_status == "gap", 1), else_=0)),
-        func.sum(case((ProcessLevel.fit_status == "partial_fit", 1), else_=0)),
-    ).filter(
-        ProcessLevel.project_id == project_id,
-        ProcessLevel.level == 4,
-        ProcessLevel.scope_status == "in_scope",
-        ProcessLevel.parent_id.in_(l3_ids),
-    ).group_by(ProcessLevel.parent_id).all()
-    fit_summary_map = {}
-    for parent_id, total_count, fit_count, gap_count, partial_count in fit_rows:
-        total_count = int(total_count or 0)
-        fit_count = int(fit_count or 0)
-        gap_count = int(gap_count or 0)
-        partial_count = int(partial_count or 0)
-        fit_summary_map[parent_id] = {"fit": fit_count, "gap": gap_count, "partial_fit": partial_count, "pending": max(total_count - fit_count - gap_count - partial_count, 0), "total": total_count}
+    # L4 fit buckets under each L3, aggregated through the closure table
+    fit_summary_map = process_closure.subtree_fit_counts(l3_ids, level=4)
 
     items = []
     for l3 in paged_nodes:
@@ -2454,7 +2475,7 @@ def get_scope_matrix_service():
         data["effective_fit_status"] = l3.consolidated_fit_decision or l3.system_suggested_fit or l3.fit_status or "pending"
         data["area"] = l3.process_area_code
         items.append(data)
-    return jsonify({"items": items, "total": total, "page": page, "pages": ((total - 1) // per_page) + 1 if total else 0, "per_page": per_page})
+    return jsonify({"items": items, **page_meta})
 
 
 def seed_from_catalog_service(l3_id):
@@ -2680,6 +2701,10 @@ def run_fit_propagation_service():
     if not project_id:
         return api_error(E.VALIDATION_REQUIRED, "project_id is required")
     try:
+        if data.get("verify") or request.args.get("verify", type=int):
+            # Verification mode: full recalculation compared with stored values
+            result = recalculate_project_hierarchy(project_id, verify=True)
+            return jsonify({"status": "ok" if result["consistent"] else "drift", **result})
         recalculate_project_hierarchy(project_id)
         db.session.commit()
         return jsonify({"status": "ok", "message": "Fit propagation completed"})
@@ -3054,6 +3079,9 @@ def list_open_items_service(filters: dict):
 
     Returns:
         Open items paginated payload.
+
+    Raises:
+        ValueError: ``filters["cursor"]`` is malformed.
     """
     q = ExploreOpenItem.query.filter_by(project_id=filters["project_id"])
     for key in ["status", "priority", "category", "process_area", "workshop_id"]:
@@ -3075,13 +3103,21 @@ def list_open_items_service(filters: dict):
     q = q.order_by(sort_col.desc() if sort_dir == "desc" else sort_col.asc())
     page = filters.get("page", 1)
     per_page = filters.get("per_page", 50)
-    paginated = q.paginate(page=page, per_page=per_page, error_out=False)
+    if filters.get("cursor") is not None:
+        rows, page_meta = _keyset_listing(
+            q, sort_col, ExploreOpenItem.id, sort_dir,
+            cursor=filters["cursor"], per_page=per_page, count=filters.get("count"),
+        )
+    else:
+        paginated = q.paginate(page=page, per_page=per_page, error_out=False)
+        rows = paginated.items
+        page_meta = {"total": paginated.total, "page": paginated.page, "pages": paginated.pages}
     items = []
-    for oi in paginated.items:
+    for oi in rows:
         d = oi.to_dict()
         d["available_transitions"] = get_available_oi_transitions(oi)
         items.append(d)
-    return {"items": items, "total": paginated.total, "page": paginated.page, "pages": paginated.pages}
+    return {"items": items, **page_meta}
 
 
 def create_open_item_flat_service(data: dict):
@@ -291,8 +291,9 @@ def generate_fitgap_excel(
     Returns:
         bytes: Raw .xlsx file content ready to stream to the client.
     """
-    from app.models.explore import ExploreRequirement, ProcessLevel, ExploreWorkshop
+    from app.models.explore import ExploreRequirement, ExploreWorkshop
     from app.models.backlog import BacklogItem, ConfigItem
+    from app.services import process_closure
 
     # ── Query requirements ────────────────────────────────────────────────────
     q = ExploreRequirement.query.filter(
@@ -341,29 +342,15 @@ def generate_fitgap_excel(
             ci_q = ci_q.filter(ConfigItem.tenant_id == tenant_id)
         config_items = ci_q.order_by(ConfigItem.code).all()
 
-    # ── Build process-level cache for Tab 2 ──────────────────────────────────
-    pl_cache: dict[int, ProcessLevel] = {}
-    for r in reqs:
-        if r.process_level_id and r.process_level_id not in pl_cache:
-            pl = db.session.get(ProcessLevel, r.process_level_id)
-            if pl:
-                pl_cache[r.process_level_id] = pl
+    # ── Ancestor chains for Tab 2 (one closure-table query) ──────────────────
+    chains = process_closure.ancestor_chains(r.process_level_id for r in reqs)
 
-    def _pl_ancestors(pl_id: int | None) -> dict[int, str]:
+    def _pl_ancestors(pl_id: str | None) -> dict[int, str]:
         """Return {level: name} for all ancestors of given ProcessLevel id."""
-        result: dict[int, str] = {}
-        visited: set[int] = set()
-        current_id = pl_id
-        while current_id and current_id not in visited:
-            pl = pl_cache.get(current_id) or db.session.get(ProcessLevel, current_id)
-            if not pl:
-                break
-            pl_cache[current_id] = pl
-            visited.add(current_id)
-            level = getattr(pl, "level", 0)
-            result[level] = f"{pl.code} {pl.name}".strip()
-            current_id = pl.parent_id
-        return result
+        return {
+            getattr(pl, "level", 0): f"{pl.code} {pl.name}".strip()
+            for pl in chains.get(pl_id, [])
+        }
 
     # ── Build ProcessLevel→L3 group for Tab 2 ────────────────────────────────
     # Group requirements by their L3 process node
@@ -16,6 +16,12 @@ Key Rules:
   - Propagation only on final session of multi-session workshops (GAP-10)
   - Business can override system suggestion at L3 (GAP-11)
 
+Propagation is incremental: a change to an L4 fit_status (or an explicit
+mark_dirty) records the affected L3 in a per-transaction dirty set, and one
+batched pass just before commit recomputes those L3s and their L2 parents
+from preloaded child counts. recalculate_project_hierarchy() remains the
+full recalculation, and with verify=True reports drift without writing.
+
 Usage:
     from app.services.fit_propagation import (
         propagate_fit_from_step,
@@ -25,9 +31,12 @@ Usage:
     )
 """
 
+import logging
 from datetime import datetime, timezone
 
-from sqlalchemy import func
+from sqlalchemy import event, func, select
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.orm import Session
 
 from app.models import db
 from app.models.explore import (
@@ -39,6 +48,11 @@ from app.models.explore import (
 )
 from app.services.helpers.scoped_queries import get_scoped_or_none
 
+logger = logging.getLogger(__name__)
+
+_DIRTY_KEY = "fit_propagation_dirty"
+_HOLD_KEY = "fit_propagation_hold"
+
 
 # ── L4 Propagation ──────────────────────────────────────────────────────────
 
@@ -84,19 +98,15 @@ def propagate_fit_from_step(
 
     if not is_final_session:
         # GAP-10: interim sessions don't propagate upward
+        _held(db.session).add(l4.id)
         return result
 
-    # Find L3 parent and recalculate; use l4.program_id for scope
+    # Queue the L3 parent (and through it the L2); recomputed once at commit
     l3 = get_scoped_or_none(ProcessLevel, l4.parent_id, project_id=l4.project_id) if l4.parent_id else None
     if l3 and l3.level == 3:
-        recalculate_l3_consolidated(l3)
+        mark_dirty(l3.id)
         result["l3_recalculated"] = True
-
-        # Find L2 parent and recalculate readiness in the same project scope.
-        l2 = get_scoped_or_none(ProcessLevel, l3.parent_id, project_id=l3.project_id) if l3.parent_id else None
-        if l2 and l2.level == 2:
-            recalculate_l2_readiness(l2)
-            result["l2_recalculated"] = True
+        result["l2_recalculated"] = bool(l3.parent_id)
 
     return result
 
@@ -124,20 +134,24 @@ def calculate_system_suggested_fit(l3: ProcessLevel) -> str | None:
         .all()
     )
 
-    if not children:
-        return None
-
-    statuses = [c.fit_status for c in children if c.fit_status]
+    counts: dict = {}
+    for child in children:
+        counts[child.fit_status] = counts.get(child.fit_status, 0) + 1
+    return suggest_fit(counts)
 
-    if not statuses:
-        return None  # no assessed children
 
-    unique = set(statuses)
+def suggest_fit(counts: dict) -> str | None:
+    """System-suggested fit from {L4 fit_status: count} of in-scope children."""
+    total = sum(counts.values())
+    assessed = sum(n for status, n in counts.items() if status)
+    if not total or not assessed:
+        return None  # no children / no assessed children
 
     # Some children not yet assessed → partial_fit
-    if len(statuses) < len(children):
+    if assessed < total:
         return "partial_fit"
 
+    unique = {status for status, n in counts.items() if status and n}
     if unique == {"fit"}:
         return "fit"
     elif unique == {"gap"}:
@@ -151,12 +165,18 @@ def recalculate_l3_consolidated(l3: ProcessLevel) -> None:
     Recalculate L3 system_suggested_fit. If no business override exists,
     also update consolidated_fit_decision.
     """
-    suggested = calculate_system_suggested_fit(l3)
-    l3.system_suggested_fit = suggested
+    _apply_l3(l3, calculate_system_suggested_fit(l3))
 
+
+def _l3_values(l3: ProcessLevel, suggested: str | None) -> dict:
     # If not overridden, auto-set consolidated
-    if not l3.consolidated_decision_override:
-        l3.consolidated_fit_decision = suggested
+    consolidated = l3.consolidated_fit_decision if l3.consolidated_decision_override else suggested
+    return {"system_suggested_fit": suggested, "consolidated_fit_decision": consolidated}
+
+
+def _apply_l3(l3: ProcessLevel, suggested: str | None) -> None:
+    for field, value in _l3_values(l3, suggested).items():
+        setattr(l3, field, value)
 
 
 # ── L2 Readiness ────────────────────────────────────────────────────────────
@@ -177,48 +197,211 @@ def recalculate_l2_readiness(l2: ProcessLevel) -> None:
         .filter_by(project_id=l2.project_id, parent_id=l2.id, level=3, scope_status="in_scope")
         .all()
     )
-    total = len(in_scope_l3)
-    if total == 0:
-        l2.readiness_pct = 0
-        return
-
     assessed = sum(1 for l3 in in_scope_l3 if l3.consolidated_fit_decision is not None)
-    l2.readiness_pct = round(assessed / total * 100, 2)
+    _apply_l2(l2, len(in_scope_l3), assessed)
+
+
+def _l2_values(l2: ProcessLevel, total: int, assessed: int) -> dict:
+    if total == 0:
+        return {"readiness_pct": 0, "confirmation_status": l2.confirmation_status}
 
+    readiness_pct = round(assessed / total * 100, 2)
+    status = l2.confirmation_status
     # Auto-update confirmation_status (don't downgrade already confirmed)
-    if l2.confirmation_status not in ("confirmed", "confirmed_with_risks"):
-        l2.confirmation_status = "ready" if l2.readiness_pct >= 100 else "not_ready"
+    if status not in ("confirmed", "confirmed_with_risks"):
+        status = "ready" if readiness_pct >= 100 else "not_ready"
+    return {"readiness_pct": readiness_pct, "confirmation_status": status}
+
+
+def _apply_l2(l2: ProcessLevel, total: int, assessed: int) -> None:
+    for field, value in _l2_values(l2, total, assessed).items():
+        setattr(l2, field, value)
+
+
+# ── Batched Recalculation ───────────────────────────────────────────────────
+
+def _l4_fit_counts(l3_nodes) -> dict:
+    """{l3_id: {fit_status: count}} of in-scope, same-project L4 children."""
+    projects = {l3.id: l3.project_id for l3 in l3_nodes}
+    counts = {l3_id: {} for l3_id in projects}
+    if not projects:
+        return counts
+    rows = db.session.execute(
+        select(ProcessLevel.parent_id, ProcessLevel.project_id, ProcessLevel.fit_status, func.count(ProcessLevel.id))
+        .where(
+            ProcessLevel.parent_id.in_(list(projects)),
+            ProcessLevel.level == 4,
+            ProcessLevel.scope_status == "in_scope",
+        )
+        .group_by(ProcessLevel.parent_id, ProcessLevel.project_id, ProcessLevel.fit_status)
+    )
+    for parent_id, child_project_id, status, n in rows:
+        if child_project_id == projects[parent_id]:
+            counts[parent_id][status] = counts[parent_id].get(status, 0) + int(n)
+    return counts
+
+
+def _l3_assessment_counts(l2_nodes, decisions: dict) -> dict:
+    """{l2_id: (in_scope_l3, assessed_l3)}; *decisions* overrides stored L3 values."""
+    projects = {l2.id: l2.project_id for l2 in l2_nodes}
+    counts = {l2_id: [0, 0] for l2_id in projects}
+    if not projects:
+        return {}
+    rows = db.session.execute(
+        select(ProcessLevel.id, ProcessLevel.parent_id, ProcessLevel.project_id,
+               ProcessLevel.consolidated_fit_decision)
+        .where(
+            ProcessLevel.parent_id.in_(list(projects)),
+            ProcessLevel.level == 3,
+            ProcessLevel.scope_status == "in_scope",
+        )
+    )
+    for l3_id, parent_id, child_project_id, decision in rows:
+        if child_project_id != projects[parent_id]:
+            continue
+        counts[parent_id][0] += 1
+        if decisions.get(l3_id, decision) is not None:
+            counts[parent_id][1] += 1
+    return {l2_id: tuple(c) for l2_id, c in counts.items()}
+
+
+def _same(stored, expected) -> bool:
+    if stored is None or expected is None:
+        return stored is expected
+    if isinstance(expected, (int, float)):
+        return float(stored) == float(expected)
+    return stored == expected
+
+
+def _recalculate(l3_nodes, l2_nodes, *, write: bool = True) -> list:
+    """Recompute L3s then L2s from preloaded counts (two count queries).
+
+    Only fields whose value actually changes are assigned. Returns those
+    fields as drift entries; with write=False nothing is modified.
+    """
+    drift = []
+
+    def _sync(node, values):
+        for field, expected in values.items():
+            stored = getattr(node, field)
+            if _same(stored, expected):
+                continue
+            drift.append({"id": node.id, "level": node.level, "field": field,
+                          "stored": stored, "expected": expected})
+            if write:
+                setattr(node, field, expected)
+
+    decisions = {}
+    l4_counts = _l4_fit_counts(l3_nodes)
+    for l3 in l3_nodes:
+        values = _l3_values(l3, suggest_fit(l4_counts[l3.id]))
+        decisions[l3.id] = values["consolidated_fit_decision"]
+        _sync(l3, values)
 
+    l3_counts = _l3_assessment_counts(l2_nodes, decisions)
+    for l2 in l2_nodes:
+        _sync(l2, _l2_values(l2, *l3_counts[l2.id]))
+    return drift
 
-# ── Bulk Recalculation ──────────────────────────────────────────────────────
 
-def recalculate_project_hierarchy(project_id: int) -> dict:
+def recalculate_project_hierarchy(project_id: int, *, verify: bool = False) -> dict:
     """
     Full recalculation of all L3 and L2 levels for a project.
     Useful after bulk data import or corrections.
 
+    With verify=True nothing is written; the result lists the nodes whose
+    stored values differ from a full recalculation (incremental drift).
+
     Returns:
-        dict with counts: l3_count, l2_count
+        dict with counts: l3_count, l2_count (+ drift when verifying)
     """
-    # Recalculate all L3 consolidated fit
-    l3_nodes = (
-        ProcessLevel.query
-        .filter_by(project_id=project_id, level=3, scope_status="in_scope")
-        .all()
-    )
-    for l3 in l3_nodes:
-        recalculate_l3_consolidated(l3)
+    with db.session.no_autoflush:
+        l3_nodes = (
+            ProcessLevel.query
+            .filter_by(project_id=project_id, level=3, scope_status="in_scope")
+            .all()
+        )
+        l2_nodes = (
+            ProcessLevel.query
+            .filter_by(project_id=project_id, level=2)
+            .all()
+        )
+        drift = _recalculate(l3_nodes, l2_nodes, write=not verify)
+
+    result = {"l3_count": len(l3_nodes), "l2_count": len(l2_nodes)}
+    if verify:
+        result["consistent"] = not drift
+        result["drift"] = drift
+    return result
 
-    # Recalculate all L2 readiness
-    l2_nodes = (
-        ProcessLevel.query
-        .filter_by(project_id=project_id, level=2)
-        .all()
-    )
-    for l2 in l2_nodes:
-        recalculate_l2_readiness(l2)
 
-    return {"l3_count": len(l3_nodes), "l2_count": len(l2_nodes)}
+# ── Incremental Propagation (dirty set) ─────────────────────────────────────
+
+def _dirty(session) -> set:
+    return session.info.setdefault(_DIRTY_KEY, set())
+
+
+def _held(session) -> set:
+    return session.info.setdefault(_HOLD_KEY, set())
+
+
+def mark_dirty(*l3_ids, session=None) -> None:
+    """Queue L3 nodes (and so their L2 parents) for the pre-commit pass."""
+    _dirty(session or db.session).update(i for i in l3_ids if i)
+
+
+def _before_flush(session, flush_context, instances):
+    """Record the L3 parents of L4s whose fit inputs changed in this flush."""
+    held = session.info.get(_HOLD_KEY, ())
+    dirty = None
+    for obj in list(session.dirty) + list(session.deleted):
+        if not isinstance(obj, ProcessLevel) or obj.level != 4 or obj.id in held:
+            continue
+        state = sa_inspect(obj)
+        if not state.persistent:
+            continue
+        if obj not in session.deleted and not any(
+            state.attrs[f].history.has_changes() for f in ("fit_status", "scope_status", "parent_id")
+        ):
+            continue
+        dirty = dirty or _dirty(session)
+        parents = state.attrs.parent_id.history
+        dirty.update(p for p in (*parents.deleted, *parents.unchanged, *parents.added) if p)
+
+
+def _before_commit(session):
+    """One batched recomputation of every dirty L3 and its L2 parent."""
+    if _DIRTY_KEY not in session.info and not session.dirty and not session.deleted:
+        return
+    session.flush()
+    dirty = session.info.pop(_DIRTY_KEY, None)
+    if not dirty:
+        return
+    with session.no_autoflush:
+        l3_nodes = session.query(ProcessLevel).filter(
+            ProcessLevel.id.in_(dirty), ProcessLevel.level == 3,
+        ).all()
+        l2_ids = {l3.parent_id for l3 in l3_nodes if l3.parent_id}
+        l2_nodes = session.query(ProcessLevel).filter(
+            ProcessLevel.id.in_(l2_ids), ProcessLevel.level == 2,
+        ).all() if l2_ids else []
+        _recalculate(l3_nodes, l2_nodes)
+    logger.debug("Fit propagation recomputed %d L3 / %d L2 node(s)", len(l3_nodes), len(l2_nodes))
+
+
+def _end_of_transaction(session, *args):
+    session.info.pop(_DIRTY_KEY, None)
+    session.info.pop(_HOLD_KEY, None)
+
+
+def init_fit_propagation():
+    """Register the session hooks (idempotent; called from create_app)."""
+    if event.contains(Session, "before_commit", _before_commit):
+        return
+    event.listen(Session, "before_flush", _before_flush)
+    event.listen(Session, "before_commit", _before_commit)
+    event.listen(Session, "after_commit", _end_of_transaction)
+    event.listen(Session, "after_rollback", _end_of_transaction)
 
 
 def get_fit_summary(process_level: ProcessLevel) -> dict:
@@ -226,6 +409,8 @@ def get_fit_summary(process_level: ProcessLevel) -> dict:
     Calculate fit/gap/partial/pending distribution for a parent node's children.
     Works for L1 (children=L2), L2 (children=L3), L3 (children=L4).
 
+    Issues one query; for many nodes use ProcessHierarchy.fit_summaries().
+
     Returns:
         {"fit": N, "gap": N, "partial_fit": N, "pending": N, "total": N, "pct": {...}}
     """
@@ -234,21 +419,25 @@ def get_fit_summary(process_level: ProcessLevel) -> dict:
         .filter_by(project_id=process_level.project_id, parent_id=process_level.id, scope_status="in_scope")
         .all()
     )
+    return summarize_fit(children)
+
+
+def fit_summary_status(child: ProcessLevel) -> str:
+    """Bucket a child node counts towards in its parent's fit summary."""
+    # For L2, use consolidated_fit_decision; for L4, use fit_status
+    if child.level == 3:
+        status = child.consolidated_fit_decision or child.system_suggested_fit
+    else:
+        status = child.fit_status
+    return status if status in ("fit", "gap", "partial_fit") else "pending"
+
 
+def summarize_fit(children) -> dict:
+    """Fit summary of an already-loaded list of in-scope children."""
     summary = {"fit": 0, "gap": 0, "partial_fit": 0, "pending": 0, "total": len(children)}
 
     for child in children:
-        # For L2, use consolidated_fit_decision; for L4, use fit_status
-        status = None
-        if child.level == 3:
-            status = child.consolidated_fit_decision or child.system_suggested_fit
-        else:
-            status = child.fit_status
-
-        if status in summary:
-            summary[status] += 1
-        else:
-            summary["pending"] += 1
+        summary[fit_summary_status(child)] += 1
 
     total = summary["total"]
     summary["pct"] = {
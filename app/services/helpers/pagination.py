@@ -0,0 +1,276 @@
+"""Keyset (cursor) pagination shared by list endpoints.
+
+OFFSET pagination re-reads and discards every row before the requested page
+and pairs each page with a COUNT(*), so page N costs O(N). Keyset pagination
+orders by a unique key — the listing's sort columns followed by the primary
+key — and resumes strictly after the last row served, so every page is one
+index range scan regardless of depth.
+
+Cursors are opaque to clients: a URL-safe base64 JSON blob carrying the sort
+key of the last row plus a signature of the ordering it was minted for, so a
+cursor replayed against a different sort is rejected instead of skipping rows.
+
+NULL sort values are always placed last (in both directions, on every
+dialect), which keeps the resume predicate well defined for nullable sort
+columns such as ``wave`` or ``due_date``.
+
+Usage:
+    items, meta = paginate(
+        query, (ExploreRequirement.created_at.desc(), ExploreRequirement.id.desc()),
+        cursor=request.args.get("cursor"), limit=request.args.get("limit"),
+    )
+    return jsonify({"items": [i.to_dict() for i in items], **meta})
+
+Total counts:
+    ``count="exact"`` runs COUNT(*); ``"estimate"`` reads the planner's row
+    estimate on PostgreSQL (exact elsewhere); ``"none"`` skips it. Keyset
+    requests count on the first page only unless asked explicitly — clients
+    keep the first page's total while scrolling.
+"""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import hashlib
+import json
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+
+from sqlalchemy import and_, false, or_
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.elements import UnaryExpression
+
+from app.models import db
+
+_DEFAULT_LIMIT = 50
+_MAX_LIMIT = 1000
+COUNT_MODES = ("exact", "estimate", "none")
+
+
+class CursorError(ValueError):
+    """Raised when a pagination cursor is malformed or minted for another ordering."""
+
+
+# ── Cursor encoding ─────────────────────────────────────────────────────
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {"$dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"$d": value.isoformat()}
+    if isinstance(value, Decimal):
+        return {"$dec": str(value)}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict):
+        if "$dt" in value:
+            return datetime.fromisoformat(value["$dt"])
+        if "$d" in value:
+            return date.fromisoformat(value["$d"])
+        if "$dec" in value:
+            return Decimal(value["$dec"])
+        raise CursorError("Invalid cursor")
+    return value
+
+
+def encode_cursor(values, *, signature: str = "") -> str:
+    """Return an opaque cursor for a row's sort key ``values``."""
+    payload = json.dumps({"k": [_encode_value(v) for v in values], "s": signature}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, *, signature: str = "") -> list:
+    """Inverse of encode_cursor. Raises CursorError on a malformed or foreign cursor."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        values = [_decode_value(v) for v in payload["k"]]
+        minted_for = payload.get("s", "")
+    except (binascii.Error, ValueError, TypeError, KeyError) as exc:
+        raise CursorError("Invalid cursor") from exc
+    if minted_for != signature:
+        raise CursorError("Cursor does not match the requested sort order")
+    return values
+
+
+# ── Ordering ────────────────────────────────────────────────────────────
+
+
+def _split_order(order) -> list:
+    """[(column, descending)] from order_by-style expressions."""
+    spec = []
+    for expr in order:
+        if hasattr(expr, "__clause_element__"):
+            expr = expr.__clause_element__()
+        if isinstance(expr, UnaryExpression) and expr.modifier in (operators.desc_op, operators.asc_op):
+            spec.append((expr.element, expr.modifier is operators.desc_op))
+        else:
+            spec.append((expr, False))
+    return spec
+
+
+def _nullable(column) -> bool:
+    return getattr(column, "nullable", True) and not getattr(column, "primary_key", False)
+
+
+def _signature(spec) -> str:
+    text = ",".join(f"{column}:{'d' if desc else 'a'}" for column, desc in spec)
+    return hashlib.sha1(text.encode()).hexdigest()[:12]
+
+
+def _order_by(spec) -> list:
+    clauses = []
+    for column, desc in spec:
+        clause = column.desc() if desc else column.asc()
+        clauses.append(clause.nulls_last() if _nullable(column) else clause)
+    return clauses
+
+
+def _after(spec, values):
+    """Predicate selecting rows strictly after ``values`` in ``spec`` order."""
+    branches = []
+    prefix = []
+    for (column, desc), value in zip(spec, values):
+        if value is None:
+            # NULLs sort last: only further NULLs can follow on this column
+            prefix.append(column.is_(None))
+            continue
+        branches.append(and_(*prefix, column < value if desc else column > value))
+        if _nullable(column):
+            branches.append(and_(*prefix, column.is_(None)))
+        prefix.append(column == value)
+    return or_(*branches) if branches else false()
+
+
+# ── Counting ────────────────────────────────────────────────────────────
+
+
+def _estimate(query) -> int | None:
+    bind = db.session.get_bind()
+    if bind.dialect.name != "postgresql":
+        return None
+    compiled = query.order_by(None).statement.compile(dialect=bind.dialect)
+    plan = db.session.connection().exec_driver_sql(
+        f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params,
+    ).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def count_rows(query, mode: str = "exact") -> int | None:
+    """Total rows of ``query`` under a COUNT_MODES mode (None for ``"none"``)."""
+    if mode == "none":
+        return None
+    if mode == "estimate":
+        estimate = _estimate(query)
+        if estimate is not None:
+            return estimate
+    return query.order_by(None).count()
+
+
+# ── Pages ───────────────────────────────────────────────────────────────
+
+
+@dataclass
+class KeysetPage:
+    items: list
+    next_cursor: str | None
+    total: int | None
+
+    @property
+    def meta(self) -> dict:
+        return {"total": self.total, "next_cursor": self.next_cursor, "has_more": self.next_cursor is not None}
+
+
+def _clamp_limit(limit, default_limit: int, max_limit: int, *, floor: int = 1) -> int:
+    try:
+        return max(min(int(limit if limit not in (None, "") else default_limit), max_limit), floor)
+    except (TypeError, ValueError):
+        return default_limit
+
+
+def keyset_paginate(
+    query,
+    order,
+    *,
+    cursor: str | None = None,
+    limit=None,
+    count: str | None = None,
+    default_limit: int = _DEFAULT_LIMIT,
+    max_limit: int = _MAX_LIMIT,
+    key=None,
+) -> KeysetPage:
+    """Return the page of ``query`` after ``cursor`` in ``order``.
+
+    ``order`` lists order_by-style expressions (``col`` or ``col.desc()``)
+    whose last entry must be unique, normally the primary key. ``key``
+    extracts the sort values from a result row; by default each column's
+    ``key`` attribute is read from the row.
+    """
+    spec = _split_order(order)
+    signature = _signature(spec)
+    limit = _clamp_limit(limit, default_limit, max_limit)
+    if count is None:
+        count = "none" if cursor else "exact"
+    if count not in COUNT_MODES:
+        raise ValueError(f"count must be one of: {', '.join(COUNT_MODES)}")
+
+    total = count_rows(query, count)
+    page_query = query.order_by(None).order_by(*_order_by(spec))
+    if cursor:
+        values = decode_cursor(cursor, signature=signature)
+        if len(values) != len(spec):
+            raise CursorError("Invalid cursor")
+        page_query = page_query.filter(_after(spec, values))
+
+    rows = page_query.limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = None
+    if has_more:
+        last = rows[-1]
+        values = key(last) if key else [getattr(last, column.key) for column, _desc in spec]
+        next_cursor = encode_cursor(values, signature=signature)
+    return KeysetPage(rows, next_cursor, total)
+
+
+def paginate(
+    query,
+    order,
+    *,
+    cursor: str | None = None,
+    limit=None,
+    offset=None,
+    count: str | None = None,
+    default_limit: int = _DEFAULT_LIMIT,
+    max_limit: int = _MAX_LIMIT,
+) -> tuple[list, dict]:
+    """Offset or keyset page of ``query`` plus its response metadata.
+
+    A ``cursor`` argument (an empty string requests the first page) selects
+    keyset mode and yields ``{"total", "next_cursor", "has_more"}``; without
+    one the classic limit/offset page and ``{"total"}`` is returned.
+    """
+    if cursor is not None:
+        page = keyset_paginate(
+            query, order, cursor=cursor or None, limit=limit, count=count,
+            default_limit=default_limit, max_limit=max_limit,
+        )
+        return page.items, page.meta
+
+    if count is not None and count not in COUNT_MODES:
+        raise ValueError(f"count must be one of: {', '.join(COUNT_MODES)}")
+    limit = _clamp_limit(limit, default_limit, max_limit, floor=0)
+    try:
+        offset = max(int(offset if offset not in (None, "") else 0), 0)
+    except (TypeError, ValueError):
+        offset = 0
+    total = count_rows(query, count or "exact")
+    items = query.order_by(None).order_by(*order).limit(limit).offset(offset).all()
+    return items, {"total": total}
@@ -4,6 +4,8 @@ from __future__ import annotations
 
 from datetime import datetime
 
+from app.services.helpers.pagination import paginate
+
 
 _DEFAULT_QUERY_LIMIT = 200
 _MAX_QUERY_LIMIT = 1000
@@ -62,24 +64,29 @@ def parse_optional_int(value, *, field_name: str) -> int | None:
 
 def paginate_query(
     query,
+    order,
     *,
     limit=None,
     offset=None,
+    cursor=None,
+    count=None,
     default_limit: int = _DEFAULT_QUERY_LIMIT,
     max_limit: int = _MAX_QUERY_LIMIT,
 ):
-    """Apply offset pagination without depending on Flask request globals."""
-    total = query.count()
-    try:
-        limit = min(int(limit if limit is not None else default_limit), max_limit)
-    except (TypeError, ValueError):
-        limit = default_limit
-    try:
-        offset = max(int(offset if offset is not None else 0), 0)
-    except (TypeError, ValueError):
-        offset = 0
-    items = query.limit(limit).offset(offset).all()
-    return items, total
+    """Apply offset or keyset pagination without depending on Flask request globals.
+
+    Returns ``(items, meta)``; see ``app.services.helpers.pagination.paginate``.
+    """
+    return paginate(
+        query,
+        order,
+        cursor=cursor,
+        limit=limit,
+        offset=offset,
+        count=count,
+        default_limit=default_limit,
+        max_limit=max_limit,
+    )
 
 
 def auto_code(model, prefix: str, program_id: int) -> str:
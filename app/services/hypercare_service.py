@@ -41,7 +41,8 @@ from app.models.cutover import (
     ESCALATION_LEVEL_ORDER,
 )
 from app.models.run_sustain import HypercareExitCriteria
-from app.services import change_management_service
+from app.services import change_management_service, sequence_allocator
+from app.services.cutover_service import next_incident_number
 
 logger = logging.getLogger(__name__)
 
@@ -72,6 +73,19 @@ _SLA_DEFAULTS: dict[str, tuple[int, int]] = {
 # ═════════════════════════════════════════════════════════════════════════════
 
 
+# Tables read by get_war_room_dashboard (dashboard_refresh dependency tags)
+WAR_ROOM_TAGS = (CutoverPlan, HypercareIncident, HypercareSLA, EscalationEvent, HypercareExitCriteria)
+
+
+def get_plan_program_id(tenant_id: int, plan_id: int) -> int | None:
+    """Program of a tenant's plan, or None if the plan is not visible."""
+    stmt = select(CutoverPlan.program_id).where(
+        CutoverPlan.id == plan_id,
+        CutoverPlan.tenant_id == tenant_id,
+    )
+    return db.session.execute(stmt).scalar_one_or_none()
+
+
 def _get_plan(tenant_id: int, plan_id: int) -> CutoverPlan | None:
     """Return plan if it belongs to the given tenant, else None.
 
@@ -114,29 +128,27 @@ def _get_sla_targets(plan_id: int, severity: str) -> tuple[int, int]:
 def _next_incident_code(plan_id: int) -> str:
     """Generate next sequential incident code for the plan: INC-001, INC-002 ...
 
-    NOTE: count+1 is not race-safe under concurrent requests.  A UNIQUE constraint
-    on (cutover_plan_id, code) is required as a safety net (tracked: sprint-B backlog).
+    Drawn from the plan's INC counter shared with cutover_service, so
+    concurrent requests never receive the same code.
     """
-    count = db.session.execute(
-        select(func.count(HypercareIncident.id)).where(
-            HypercareIncident.cutover_plan_id == plan_id,
-        )
-    ).scalar()
-    return f"INC-{(count + 1):03d}"
+    return f"INC-{next_incident_number(plan_id):03d}"
 
 
 def _next_cr_number(program_id: int) -> str:
     """Generate next sequential CR number for the program: CR-001, CR-002 ...
 
-    NOTE: count+1 is not race-safe under concurrent requests.  A UNIQUE constraint
-    on (program_id, cr_number) is required as a safety net (tracked: sprint-B backlog).
+    Drawn from the program's CR counter (sequence_allocator), so concurrent
+    requests never receive the same number.
     """
-    count = db.session.execute(
-        select(func.count(PostGoliveChangeRequest.id)).where(
-            PostGoliveChangeRequest.program_id == program_id,
-        )
-    ).scalar()
-    return f"CR-{(count + 1):03d}"
+    seq = sequence_allocator.next_value(
+        f"program:{program_id}", "CR",
+        seed=lambda: db.session.execute(
+            select(func.count(PostGoliveChangeRequest.id)).where(
+                PostGoliveChangeRequest.program_id == program_id,
+            )
+        ).scalar(),
+    )
+    return f"CR-{seq:03d}"
 
 
 def _evaluate_sla_breaches(incident: HypercareIncident, now: datetime) -> bool:
@@ -2253,12 +2265,15 @@ def _next_war_room_code(plan_id: int) -> str:
     Returns:
         Next sequential code string.
     """
-    count = db.session.execute(
-        select(func.count(HypercareWarRoom.id)).where(
-            HypercareWarRoom.cutover_plan_id == plan_id,
-        )
-    ).scalar()
-    return f"WR-{(count + 1):03d}"
+    seq = sequence_allocator.next_value(
+        f"cutover_plan:{plan_id}", "WR",
+        seed=lambda: db.session.execute(
+            select(func.count(HypercareWarRoom.id)).where(
+                HypercareWarRoom.cutover_plan_id == plan_id,
+            )
+        ).scalar(),
+    )
+    return f"WR-{seq:03d}"
 
 
 def create_war_room(tenant_id: int, plan_id: int, data: dict) -> dict:
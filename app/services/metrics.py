@@ -24,6 +24,7 @@ from app.models.explore import (
     ProcessLevel,
     ProcessStep,
 )
+from app.services import result_cache
 from app.services.governance_rules import GovernanceRules
 
 
@@ -426,6 +427,15 @@ class ExploreMetrics:
     """Explore module metrics — all KPIs in a single call."""
 
     @staticmethod
+    @result_cache.cached(
+        "explore.program_health",
+        scope="project_id",
+        tags={
+            "project": (ExploreWorkshop, ExploreOpenItem, ExploreRequirement, ProcessLevel, ProcessStep),
+            # compute_testing_metrics filters on program_id == project_id
+            "program": ("test_cases", "test_plans", "test_cycles", "test_executions", "defects"),
+        },
+    )
     def program_health(project_id: int) -> dict:
         """Program-level Explore health report.
 
@@ -505,13 +515,18 @@ class ExploreMetrics:
 # S2-03 (F-05) — Requirement Coverage Reporting
 #
 # Audit A1: Uses ExploreRequirement (B-01 canonical) — not legacy Requirement.
-# Audit A2: Cache invalidation on ExploreRequirement writes is a TODO for
-#   Phase 3 performance pass; correctness is the priority here.
+# Audit A2: Results are cached per project and filter set; writes to
+#   ExploreRequirement / TestCase invalidate them (app.services.result_cache).
 # Audit A3: status='cancelled' requirements are excluded from the denominator
 #   to avoid skewing coverage percentages with inactive items.
 # ══════════════════════════════════════════════════════════════════════════════
 
 
+@result_cache.cached(
+    "explore.requirement_coverage_matrix",
+    scope="project_id",
+    tags=(ExploreRequirement, "test_cases"),
+)
 def get_requirement_coverage_matrix(
     project_id: int,
     tenant_id: int | None,
@@ -8,14 +8,40 @@ Evaluation is deterministic and deny-by-default:
   - request scope must be valid (project requires program, program requires tenant)
   - only role assignments matching the requested scope are considered
   - permission granted only if at least one matching role grants the codename
+
+Every check reads an immutable PermissionSnapshot — matched role names and
+granted codenames for one (user, tenant, program, project) — so has_*()
+is a set lookup. Snapshots are looked up in order:
+  - memoized on ``g`` for the rest of the request
+  - a bounded in-process LRU
+  - the shared cache (cache_service), so other workers skip the queries
+and compiled from the database only when all three miss.
+
+Cached snapshots are stamped with cache_service's permission generations
+(global, per tenant of each matched role, per user). Session hooks bump
+them when UserRole, Role, RolePermission, Permission or a user's tenant
+change; every bump is broadcast on PERMISSION_CHANNEL and each worker
+evicts the LRU entries indexed under the bumped counters, so invalidation
+never scans the cache. While the broadcast is not known to be delivered
+(no Redis, or its subscription down), LRU hits re-check their stamp instead.
+Time-bound assignments also expire the snapshot at their next
+starts_at / ends_at.
 """
 
+import json
 import logging
 import threading
 import time
+from collections import OrderedDict
+from dataclasses import dataclass
 from datetime import datetime, timezone
 from typing import Optional
 
+from flask import g, has_app_context, has_request_context, request
+from sqlalchemy import event, select
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.orm import Session
+
 from app.models import db
 from app.models.auth import (
     Permission,
@@ -25,19 +51,57 @@ from app.models.auth import (
     User,
     UserRole,
 )
+from app.services import cache_service
 
 logger = logging.getLogger(__name__)
 
 CACHE_TTL = 300  # 5 minutes
+MAX_CACHED_SNAPSHOTS = 10_000
 
 # Cache key: (user_id, tenant_id, program_id, project_id)
-_permission_cache: dict[tuple[int, int | None, int | None, int | None], tuple[float, set[str]]] = {}
+ScopeKey = tuple[int, int | None, int | None, int | None]
+
+# LRU: key → (stamp_keys, stamp, expires_at, snapshot)
+_permission_cache: OrderedDict[ScopeKey, tuple] = OrderedDict()
+# generation key → cache keys stamped with it (global is implied: clear all)
+_by_generation: dict[str, set[ScopeKey]] = {}
+_evictions = 0  # bumped on every broadcast, so a compile that raced one is not cached
 _cache_lock = threading.Lock()
 
+_SHARED_PREFIX = "permsnap:"
+_PENDING = "permission_gen_pending"
+_G_ATTR = "_permission_snapshots"
+
 SUPERUSER_ROLES = {"platform_admin", "tenant_admin"}
 PROJECT_BYPASS_ROLES = {"platform_admin", "tenant_admin", "program_manager"}
 
 
+@dataclass(frozen=True)
+class PermissionSnapshot:
+    """Compiled RBAC decision data for one (user, tenant, program, project)."""
+
+    user_id: int
+    tenant_id: int | None
+    program_id: int | None
+    project_id: int | None
+    roles: frozenset[str]
+    permissions: frozenset[str]
+    role_tenants: frozenset[int] = frozenset()
+
+    @property
+    def is_superuser(self) -> bool:
+        return not self.roles.isdisjoint(SUPERUSER_ROLES)
+
+    def allows(self, codename: str) -> bool:
+        return self.is_superuser or codename in self.permissions
+
+    def allows_any(self, codenames) -> bool:
+        return self.is_superuser or not self.permissions.isdisjoint(codenames)
+
+    def allows_all(self, codenames) -> bool:
+        return self.is_superuser or self.permissions.issuperset(codenames)
+
+
 def _validate_scope(
     tenant_id: int | None = None,
     program_id: int | None = None,
@@ -54,37 +118,164 @@ def _cache_key(
     tenant_id: int | None = None,
     program_id: int | None = None,
     project_id: int | None = None,
-) -> tuple[int, int | None, int | None, int | None]:
+) -> ScopeKey:
     return (user_id, tenant_id, program_id, project_id)
 
 
-def _get_cached(key: tuple[int, int | None, int | None, int | None]) -> Optional[set[str]]:
+# ── Cache tiers ──────────────────────────────────────────────────────────
+
+
+def _stamp_keys(user_id: int, role_tenants) -> list[str]:
+    return cache_service.permission_generation_keys(user_id, role_tenants)
+
+
+def _request_memo() -> dict | None:
+    if not has_request_context():
+        return None
+    current = request._get_current_object()
+    memo = getattr(g, _G_ATTR, None)
+    if memo is None or memo[0] is not current:
+        memo = (current, {})
+        setattr(g, _G_ATTR, memo)
+    return memo[1]
+
+
+def _clear_request_memo() -> None:
+    if has_app_context():
+        g.pop(_G_ATTR, None)
+
+
+def _evict_locked(key: ScopeKey) -> None:
+    entry = _permission_cache.pop(key, None)
+    if entry is None:
+        return
+    for gen_key in entry[0]:
+        keys = _by_generation.get(gen_key)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del _by_generation[gen_key]
+
+
+def _clear_local() -> None:
+    with _cache_lock:
+        _permission_cache.clear()
+        _by_generation.clear()
+
+
+def _on_invalidate(message) -> None:
+    """PERMISSION_CHANNEL subscriber: evict the entries stamped with the bumped counters."""
+    global _evictions
+    try:
+        gen_keys = json.loads(message) if message is not None else None
+    except (json.JSONDecodeError, TypeError):
+        gen_keys = None
+    with _cache_lock:
+        _evictions += 1
+        if gen_keys is None or cache_service.permission_generation_key() in gen_keys:
+            _permission_cache.clear()
+            _by_generation.clear()
+            return
+        for gen_key in gen_keys:
+            for key in list(_by_generation.get(gen_key, ())):
+                _evict_locked(key)
+
+
+def _get_cached(key: ScopeKey) -> Optional[tuple]:
+    """(expires_at, snapshot) from the LRU, or None when missing or stale."""
     with _cache_lock:
         entry = _permission_cache.get(key)
         if entry is None:
             return None
-        cached_at, perms = entry
-        if time.time() - cached_at > CACHE_TTL:
-            del _permission_cache[key]
-            return None
-        return perms
+        _permission_cache.move_to_end(key)
+    stamp_keys, stamp, expires_at, snapshot = entry
+    if time.time() >= expires_at or (
+        not cache_service.subscription_live(cache_service.PERMISSION_CHANNEL)
+        and cache_service.get_generations(stamp_keys) != stamp
+    ):
+        with _cache_lock:
+            if _permission_cache.get(key) is entry:
+                _evict_locked(key)
+        return None
+    return expires_at, snapshot
 
 
-def _set_cached(key: tuple[int, int | None, int | None, int | None], perms: set[str]) -> None:
+def _set_cached(
+    key: ScopeKey, stamp: tuple, expires_at: float | None, snapshot: PermissionSnapshot, epoch: int,
+) -> None:
+    stamp_keys = _stamp_keys(key[0], snapshot.role_tenants)
+    deadline = time.time() + CACHE_TTL
+    if expires_at is not None:
+        deadline = min(deadline, expires_at)
     with _cache_lock:
-        _permission_cache[key] = (time.time(), perms)
+        if _evictions != epoch:
+            # An invalidation arrived while this snapshot was being built
+            return
+        _evict_locked(key)
+        _permission_cache[key] = (stamp_keys, stamp, deadline, snapshot)
+        for gen_key in stamp_keys[1:]:
+            _by_generation.setdefault(gen_key, set()).add(key)
+        while len(_permission_cache) > MAX_CACHED_SNAPSHOTS:
+            _evict_locked(next(iter(_permission_cache)))
+
+
+def _shared_key(key: ScopeKey) -> str:
+    user_id, tenant_id, program_id, project_id = key
+    return f"{_SHARED_PREFIX}{tenant_id}:{user_id}:{program_id}:{project_id}"
+
+
+def _get_shared(key: ScopeKey) -> Optional[tuple]:
+    try:
+        raw = cache_service.get_cached(_shared_key(key))
+    except Exception:
+        logger.debug("Shared permission cache read failed", exc_info=True)
+        return None
+    if not raw:
+        return None
+    try:
+        snapshot = PermissionSnapshot(
+            *key,
+            roles=frozenset(raw["roles"]),
+            permissions=frozenset(raw["perms"]),
+            role_tenants=frozenset(raw["tenants"]),
+        )
+        stamp, expires_at = tuple(raw["stamp"]), raw["expires"]
+    except (KeyError, TypeError):
+        return None
+    if expires_at is not None and time.time() >= expires_at:
+        return None
+    if cache_service.get_generations(_stamp_keys(key[0], snapshot.role_tenants)) != stamp:
+        return None
+    return stamp, expires_at, snapshot
+
+
+def _set_shared(key: ScopeKey, stamp: tuple, expires_at: float | None, snapshot: PermissionSnapshot) -> None:
+    ttl = CACHE_TTL
+    if expires_at is not None:
+        ttl = max(1, min(ttl, int(expires_at - time.time()) + 1))
+    try:
+        cache_service.set_cached(_shared_key(key), {
+            "stamp": list(stamp),
+            "expires": expires_at,
+            "roles": sorted(snapshot.roles),
+            "perms": sorted(snapshot.permissions),
+            "tenants": sorted(snapshot.role_tenants),
+        }, ttl=ttl)
+    except Exception:
+        logger.debug("Shared permission cache write failed", exc_info=True)
 
 
 def invalidate_cache(user_id: int) -> None:
-    with _cache_lock:
-        keys = [k for k in _permission_cache if k[0] == user_id]
-        for k in keys:
-            _permission_cache.pop(k, None)
+    """Drop every snapshot of a user, in this worker and all others."""
+    cache_service.bump_permission_generations([cache_service.permission_generation_key(user_id=user_id)])
+    _clear_request_memo()
 
 
 def invalidate_all_cache() -> None:
-    with _cache_lock:
-        _permission_cache.clear()
+    cache_service.bump_permission_generations([cache_service.permission_generation_key()])
+    # Also covers a process that never subscribed (scripts, no create_app)
+    _clear_local()
+    _clear_request_memo()
 
 
 def _assignment_matches_scope(
@@ -129,18 +320,25 @@ def _matching_role_rows(
     tenant_id: int | None = None,
     program_id: int | None = None,
     project_id: int | None = None,
-) -> list[tuple[int, str]]:
+) -> tuple[list[tuple[int, str, int | None]], datetime | None]:
+    """Role assignments matching the scope, and when that set next changes.
+
+    Returns (rows, boundary): rows are (role_id, role_name, role_tenant_id);
+    boundary is the earliest future starts_at / ends_at of the user's
+    assignments, or None.
+    """
     _validate_scope(tenant_id, program_id, project_id)
 
     user = db.session.get(User, user_id)
     if user is None:
-        return []
+        return [], None
     resolved_tenant = tenant_id if tenant_id is not None else user.tenant_id
 
     rows = (
         db.session.query(
             Role.id,
             Role.name,
+            Role.tenant_id,
             UserRole.tenant_id,
             UserRole.program_id,
             UserRole.project_id,
@@ -153,17 +351,23 @@ def _matching_role_rows(
         .all()
     )
 
-    result: list[tuple[int, str]] = []
+    result: list[tuple[int, str, int | None]] = []
+    boundary = None
     now = datetime.now(timezone.utc)
     for (
-        role_id, role_name, ur_tenant_id, ur_program_id, ur_project_id,
+        role_id, role_name, role_tenant_id, ur_tenant_id, ur_program_id, ur_project_id,
         ur_starts_at, ur_ends_at, ur_is_active,
     ) in rows:
         if ur_is_active is False:
             continue
-        if ur_starts_at and now < ur_starts_at.replace(tzinfo=timezone.utc):
+        starts_at = ur_starts_at.replace(tzinfo=timezone.utc) if ur_starts_at else None
+        ends_at = ur_ends_at.replace(tzinfo=timezone.utc) if ur_ends_at else None
+        for moment in (starts_at, ends_at):
+            if moment is not None and moment > now and (boundary is None or moment < boundary):
+                boundary = moment
+        if starts_at and now < starts_at:
             continue
-        if ur_ends_at and now > ur_ends_at.replace(tzinfo=timezone.utc):
+        if ends_at and now > ends_at:
             continue
         # Legacy rows without explicit tenant inherit user's tenant.
         effective_tenant_id = ur_tenant_id if ur_tenant_id is not None else user.tenant_id
@@ -175,8 +379,71 @@ def _matching_role_rows(
             requested_program_id=program_id,
             requested_project_id=project_id,
         ):
-            result.append((role_id, role_name))
-    return result
+            result.append((role_id, role_name, role_tenant_id))
+    return result, boundary
+
+
+def _compile_snapshot(key: ScopeKey) -> tuple[tuple, float | None, PermissionSnapshot]:
+    user_id = key[0]
+    # Read the user/global counters first: a write committed while we query
+    # bumps them past this stamp, so the result is never served as current.
+    base_stamp = cache_service.get_generations(_stamp_keys(user_id, ()))
+    role_rows, boundary = _matching_role_rows(*key)
+    role_ids = sorted({rid for rid, _, _ in role_rows})
+    perms = frozenset()
+    if role_ids:
+        rows = (
+            db.session.query(Permission.codename)
+            .join(RolePermission, RolePermission.permission_id == Permission.id)
+            .filter(RolePermission.role_id.in_(role_ids))
+            .distinct()
+            .all()
+        )
+        perms = frozenset(r[0] for r in rows)
+
+    role_tenants = frozenset(t for _, _, t in role_rows if t is not None)
+    snapshot = PermissionSnapshot(
+        *key,
+        roles=frozenset(name for _, name, _ in role_rows),
+        permissions=perms,
+        role_tenants=role_tenants,
+    )
+    stamp = base_stamp + cache_service.get_generations(_stamp_keys(user_id, role_tenants)[2:])
+    return stamp, boundary.timestamp() if boundary else None, snapshot
+
+
+def get_permission_snapshot(
+    user_id: int,
+    tenant_id: int | None = None,
+    program_id: int | None = None,
+    project_id: int | None = None,
+) -> PermissionSnapshot:
+    """Compiled roles and permissions of a user for one scope (cached)."""
+    _validate_scope(tenant_id, program_id, project_id)
+    key = _cache_key(user_id, tenant_id, program_id, project_id)
+
+    memo = _request_memo()
+    if memo is not None and key in memo:
+        expires_at, snapshot = memo[key]
+        if expires_at is None or time.time() < expires_at:
+            return snapshot
+
+    cached = _get_cached(key)
+    if cached is None:
+        epoch = _evictions
+        shared = _get_shared(key)
+        if shared is None:
+            shared = _compile_snapshot(key)
+            _set_shared(key, *shared)
+        _set_cached(key, *shared, epoch)
+        _, expires_at, snapshot = shared
+    else:
+        expires_at, snapshot = cached
+
+    if memo is not None:
+        # A time-bound assignment can end mid-request; the memo honours it too
+        memo[key] = (expires_at, snapshot)
+    return snapshot
 
 
 def get_user_role_names(
@@ -185,8 +452,7 @@ def get_user_role_names(
     program_id: int | None = None,
     project_id: int | None = None,
 ) -> list[str]:
-    rows = _matching_role_rows(user_id, tenant_id, program_id, project_id)
-    return sorted({name for _, name in rows})
+    return sorted(get_permission_snapshot(user_id, tenant_id, program_id, project_id).roles)
 
 
 def get_user_permissions(
@@ -195,27 +461,7 @@ def get_user_permissions(
     program_id: int | None = None,
     project_id: int | None = None,
 ) -> set[str]:
-    key = _cache_key(user_id, tenant_id, program_id, project_id)
-    cached = _get_cached(key)
-    if cached is not None:
-        return cached
-
-    role_rows = _matching_role_rows(user_id, tenant_id, program_id, project_id)
-    role_ids = sorted({rid for rid, _ in role_rows})
-    if not role_ids:
-        _set_cached(key, set())
-        return set()
-
-    rows = (
-        db.session.query(Permission.codename)
-        .join(RolePermission, RolePermission.permission_id == Permission.id)
-        .filter(RolePermission.role_id.in_(role_ids))
-        .distinct()
-        .all()
-    )
-    perms = {r[0] for r in rows}
-    _set_cached(key, perms)
-    return perms
+    return set(get_permission_snapshot(user_id, tenant_id, program_id, project_id).permissions)
 
 
 def has_permission(
@@ -225,11 +471,7 @@ def has_permission(
     program_id: int | None = None,
     project_id: int | None = None,
 ) -> bool:
-    role_names = get_user_role_names(user_id, tenant_id, program_id, project_id)
-    if any(r in SUPERUSER_ROLES for r in role_names):
-        return True
-    perms = get_user_permissions(user_id, tenant_id, program_id, project_id)
-    return codename in perms
+    return get_permission_snapshot(user_id, tenant_id, program_id, project_id).allows(codename)
 
 
 def has_any_permission(
@@ -239,11 +481,7 @@ def has_any_permission(
     program_id: int | None = None,
     project_id: int | None = None,
 ) -> bool:
-    role_names = get_user_role_names(user_id, tenant_id, program_id, project_id)
-    if any(r in SUPERUSER_ROLES for r in role_names):
-        return True
-    perms = get_user_permissions(user_id, tenant_id, program_id, project_id)
-    return bool(perms & set(codenames))
+    return get_permission_snapshot(user_id, tenant_id, program_id, project_id).allows_any(codenames)
 
 
 def has_all_permissions(
@@ -253,11 +491,7 @@ def has_all_permissions(
     program_id: int | None = None,
     project_id: int | None = None,
 ) -> bool:
-    role_names = get_user_role_names(user_id, tenant_id, program_id, project_id)
-    if any(r in SUPERUSER_ROLES for r in role_names):
-        return True
-    perms = get_user_permissions(user_id, tenant_id, program_id, project_id)
-    return set(codenames).issubset(perms)
+    return get_permission_snapshot(user_id, tenant_id, program_id, project_id).allows_all(codenames)
 
 
 def evaluate_permission(
@@ -268,17 +502,16 @@ def evaluate_permission(
     program_id: int | None = None,
     project_id: int | None = None,
 ) -> dict:
-    _validate_scope(tenant_id, program_id, project_id)
-    role_names = get_user_role_names(user_id, tenant_id, program_id, project_id)
-    if any(r in SUPERUSER_ROLES for r in role_names):
+    snapshot = get_permission_snapshot(user_id, tenant_id, program_id, project_id)
+    role_names = sorted(snapshot.roles)
+    if snapshot.is_superuser:
         return {
             "allowed": True,
             "decision": "allow_superuser",
             "roles": role_names,
             "permission": codename,
         }
-    perms = get_user_permissions(user_id, tenant_id, program_id, project_id)
-    allowed = codename in perms
+    allowed = codename in snapshot.permissions
     return {
         "allowed": allowed,
         "decision": "allow_role_grant" if allowed else "deny_by_default",
@@ -379,3 +612,84 @@ def expire_temporary_assignments(now: datetime | None = None) -> dict:
     if expired:
         db.session.commit()
     return {"expired_assignments": expired}
+
+
+# ═════════════════════════════════════════════════════════════════════════════
+# SESSION HOOKS
+# ═════════════════════════════════════════════════════════════════════════════
+
+
+def _role_tenants(session, role_ids) -> dict:
+    if not role_ids:
+        return {}
+    return dict(session.connection().execute(
+        select(Role.id, Role.tenant_id).where(Role.id.in_(role_ids))
+    ).all())
+
+
+def _tenant_or_global(tenant_id) -> str:
+    return cache_service.permission_generation_key(tenant_id=tenant_id)
+
+
+def _user_gen_key(user_id) -> str:
+    return cache_service.permission_generation_key(user_id=user_id)
+
+
+def _after_flush(session, flush_context):
+    """Note the generation counters a flush of RBAC rows invalidates."""
+    keys, role_ids = set(), set()
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, UserRole):
+            keys.add(_user_gen_key(obj.user_id))
+            for old in sa_inspect(obj).attrs.user_id.history.deleted:
+                keys.add(_user_gen_key(old))
+        elif isinstance(obj, User):
+            if obj in session.dirty and not sa_inspect(obj).attrs.tenant_id.history.has_changes():
+                continue
+            keys.add(_user_gen_key(obj.id))
+        elif isinstance(obj, Role):
+            keys.add(_tenant_or_global(obj.tenant_id))
+            for old in sa_inspect(obj).attrs.tenant_id.history.deleted:
+                keys.add(_tenant_or_global(old))
+        elif isinstance(obj, RolePermission):
+            role_ids.add(obj.role_id)
+            role_ids.update(sa_inspect(obj).attrs.role_id.history.deleted)
+        elif isinstance(obj, Permission):
+            keys.add(cache_service.permission_generation_key())
+    role_ids.discard(None)
+    if role_ids:
+        tenants = _role_tenants(session, role_ids)
+        # A role gone with its grants is covered by its own Role delete
+        keys.update(_tenant_or_global(tenants[rid]) for rid in role_ids if rid in tenants)
+    if not keys:
+        return
+    session.info.setdefault(_PENDING, set()).update(keys)
+    # Bump now as well, so the writing session never reads its own stale snapshot
+    cache_service.bump_permission_generations(keys)
+    _clear_request_memo()
+
+
+def _after_commit(session):
+    keys = session.info.pop(_PENDING, None)
+    if keys:
+        # Supersede anything another worker cached while the transaction was open
+        cache_service.bump_permission_generations(keys)
+        _clear_request_memo()
+
+
+def _after_rollback(session):
+    keys = session.info.pop(_PENDING, None)
+    if keys:
+        # Snapshots compiled from the rolled-back rows must not outlive them
+        cache_service.bump_permission_generations(keys)
+        _clear_request_memo()
+
+
+def init_permission_snapshots():
+    """Subscribe to invalidations and register the session hooks (idempotent; called from create_app)."""
+    cache_service.subscribe(cache_service.PERMISSION_CHANNEL, _on_invalidate)
+    if event.contains(Session, "after_flush", _after_flush):
+        return
+    event.listen(Session, "after_flush", _after_flush)
+    event.listen(Session, "after_commit", _after_commit)
+    event.listen(Session, "after_rollback", _after_rollback)
@@ -0,0 +1,301 @@
+"""
+Explore Phase — ProcessLevel closure table.
+
+ProcessLevelClosure holds one row per (ancestor, descendant) pair of the
+L1–L4 hierarchy with its depth, so ancestor chains and subtree aggregates
+are single indexed queries instead of parent_id walks.
+
+The table is maintained from the ORM unit of work (after_flush), inside
+the same transaction as the ProcessLevel write:
+  - create: self pair + the parent's ancestor pairs, level by level
+  - move (parent_id change): pairs linking the subtree to its old
+    ancestors are dropped and re-created under the new parent
+  - delete: every pair that mentions the node
+
+Writes that bypass the session are not seen; ``check()`` compares the
+table with process_levels.parent_id and ``rebuild()`` re-derives it (both
+exposed as ``flask process-closure``).
+
+Usage:
+    from app.services import process_closure
+    chains = process_closure.ancestor_chains(pl_ids)
+    counts = process_closure.subtree_fit_counts(l3_ids)
+"""
+
+import logging
+from collections import defaultdict
+
+from sqlalchemy import and_, case, delete, event, func, insert, not_, select
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.orm import Session
+
+from app.models import db
+from app.models.explore.process import ProcessLevel, ProcessLevelClosure
+
+logger = logging.getLogger(__name__)
+
+_closure = ProcessLevelClosure.__table__
+
+
+# ═════════════════════════════════════════════════════════════════════════════
+# INCREMENTAL MAINTENANCE (session hooks)
+# ═════════════════════════════════════════════════════════════════════════════
+
+
+def _parent_changed(obj) -> bool:
+    return sa_inspect(obj).attrs.parent_id.history.has_changes()
+
+
+def _after_flush(session, flush_context):
+    created = [o for o in session.new if isinstance(o, ProcessLevel)]
+    moved = [
+        o for o in session.dirty
+        if isinstance(o, ProcessLevel) and o not in session.deleted and _parent_changed(o)
+    ]
+    removed = [o.id for o in session.deleted if isinstance(o, ProcessLevel)]
+    if not (created or moved or removed):
+        return
+
+    conn = session.connection()
+    if removed:
+        conn.execute(delete(_closure).where(
+            (_closure.c.ancestor_id.in_(removed)) | (_closure.c.descendant_id.in_(removed))
+        ))
+    if created:
+        _insert_nodes(conn, created)
+    for node in sorted(moved, key=lambda n: n.level or 0):
+        _move_subtree(conn, node)
+
+
+def _insert_nodes(conn, nodes):
+    """Add closure rows for newly inserted nodes, parents before children."""
+    pending = {n.id: n for n in nodes}
+    while pending:
+        # A node is ready once its parent is not itself waiting in this batch
+        ready = [n for n in pending.values() if n.parent_id not in pending]
+        if not ready:  # cycle among new rows; break it rather than loop forever
+            ready = list(pending.values())
+        parent_ids = {n.parent_id for n in ready if n.parent_id}
+        ancestors = defaultdict(list)
+        if parent_ids:
+            for ancestor_id, descendant_id, depth in conn.execute(
+                select(_closure.c.ancestor_id, _closure.c.descendant_id, _closure.c.depth)
+                .where(_closure.c.descendant_id.in_(parent_ids))
+            ):
+                ancestors[descendant_id].append((ancestor_id, depth))
+        rows = []
+        for node in ready:
+            rows.append({"ancestor_id": node.id, "descendant_id": node.id, "depth": 0,
+                         "project_id": node.project_id})
+            for ancestor_id, depth in ancestors.get(node.parent_id, ()):
+                rows.append({"ancestor_id": ancestor_id, "descendant_id": node.id,
+                             "depth": depth + 1, "project_id": node.project_id})
+            del pending[node.id]
+        conn.execute(insert(_closure), rows)
+
+
+def _move_subtree(conn, node):
+    """Re-hang the subtree rooted at *node* under its (new) parent."""
+    subtree = conn.execute(
+        select(_closure.c.descendant_id, _closure.c.depth).where(_closure.c.ancestor_id == node.id)
+    ).all()
+    if not subtree:  # node predates the closure table; give it its own rows
+        subtree = [(node.id, 0)]
+        conn.execute(insert(_closure), [{"ancestor_id": node.id, "descendant_id": node.id,
+                                         "depth": 0, "project_id": node.project_id}])
+    subtree_ids = [d for d, _ in subtree]
+    conn.execute(delete(_closure).where(
+        _closure.c.descendant_id.in_(subtree_ids),
+        not_(_closure.c.ancestor_id.in_(subtree_ids)),
+    ))
+    if not node.parent_id:
+        return
+    new_ancestors = conn.execute(
+        select(_closure.c.ancestor_id, _closure.c.depth).where(_closure.c.descendant_id == node.parent_id)
+    ).all()
+    rows = [
+        {"ancestor_id": a, "descendant_id": d, "depth": da + dd + 1, "project_id": node.project_id}
+        for a, da in new_ancestors
+        for d, dd in subtree
+    ]
+    if rows:
+        conn.execute(insert(_closure), rows)
+
+
+def init_process_closure():
+    """Register the session hook (idempotent; called from create_app)."""
+    if not event.contains(Session, "after_flush", _after_flush):
+        event.listen(Session, "after_flush", _after_flush)
+
+
+# ═════════════════════════════════════════════════════════════════════════════
+# QUERY HELPERS
+# ═════════════════════════════════════════════════════════════════════════════
+
+
+def ancestor_chains(node_ids, *, include_self: bool = True) -> dict:
+    """{node_id: [ProcessLevel, ...] root first} for many nodes in one query."""
+    node_ids = [n for n in set(node_ids) if n]
+    if not node_ids:
+        return {}
+    min_depth = 0 if include_self else 1
+    rows = (
+        db.session.query(ProcessLevelClosure.descendant_id, ProcessLevelClosure.depth, ProcessLevel)
+        .join(ProcessLevel, ProcessLevel.id == ProcessLevelClosure.ancestor_id)
+        .filter(
+            ProcessLevelClosure.descendant_id.in_(node_ids),
+            ProcessLevelClosure.depth >= min_depth,
+        )
+        .order_by(ProcessLevelClosure.descendant_id, ProcessLevelClosure.depth.desc())
+        .all()
+    )
+    chains = {node_id: [] for node_id in node_ids}
+    for descendant_id, _depth, ancestor in rows:
+        chains[descendant_id].append(ancestor)
+    return chains
+
+
+def ancestors(node_id, *, include_self: bool = False) -> list:
+    """Ancestors of one node, root first."""
+    return ancestor_chains([node_id], include_self=include_self).get(node_id, [])
+
+
+def nearest_ancestor_at_level(node_ids, level: int, *, include_self: bool = True) -> dict:
+    """{node_id: id of its closest ancestor at *level*} (missing → no such ancestor)."""
+    node_ids = [n for n in set(node_ids) if n]
+    if not node_ids:
+        return {}
+    rows = (
+        db.session.query(ProcessLevelClosure.descendant_id, ProcessLevelClosure.ancestor_id)
+        .join(ProcessLevel, ProcessLevel.id == ProcessLevelClosure.ancestor_id)
+        .filter(
+            ProcessLevelClosure.descendant_id.in_(node_ids),
+            ProcessLevelClosure.depth >= (0 if include_self else 1),
+            ProcessLevel.level == level,
+        )
+        .order_by(ProcessLevelClosure.descendant_id, ProcessLevelClosure.depth.desc())
+        .all()
+    )
+    # Rows come farthest-first per node, so the last write wins with the nearest
+    return {descendant_id: ancestor_id for descendant_id, ancestor_id in rows}
+
+
+def descendant_ids(node_id, *, include_self: bool = False, level: int | None = None) -> list:
+    """Ids of every node below *node_id*, optionally only at one level."""
+    q = (
+        db.session.query(ProcessLevelClosure.descendant_id)
+        .filter(
+            ProcessLevelClosure.ancestor_id == node_id,
+            ProcessLevelClosure.depth >= (0 if include_self else 1),
+        )
+    )
+    if level is not None:
+        q = q.join(ProcessLevel, ProcessLevel.id == ProcessLevelClosure.descendant_id).filter(
+            ProcessLevel.level == level,
+        )
+    return [row[0] for row in q.all()]
+
+
+def subtree_fit_counts(node_ids, *, level: int = 4, in_scope_only: bool = True) -> dict:
+    """Fit buckets of the *level* descendants of each node, in one GROUP BY.
+
+    Returns:
+        {node_id: {"fit": N, "gap": N, "partial_fit": N, "pending": N, "total": N}}
+    """
+    node_ids = [n for n in set(node_ids) if n]
+    if not node_ids:
+        return {}
+    filters = [
+        ProcessLevelClosure.ancestor_id.in_(node_ids),
+        ProcessLevelClosure.depth >= 1,
+        ProcessLevel.level == level,
+    ]
+    if in_scope_only:
+        filters.append(ProcessLevel.scope_status == "in_scope")
+    rows = (
+        db.session.query(
+            ProcessLevelClosure.ancestor_id,
+            func.count(ProcessLevel.id),
+            func.sum(case((ProcessLevel.fit_status == "fit", 1), else_=0)),
+            func.sum(case((ProcessLevel.fit_status == "gap", 1), else_=0)),
+            func.sum(case((ProcessLevel.fit_status == "partial_fit", 1), else_=0)),
+        )
+        .join(ProcessLevel, ProcessLevel.id == ProcessLevelClosure.descendant_id)
+        .filter(and_(*filters))
+        .group_by(ProcessLevelClosure.ancestor_id)
+        .all()
+    )
+    counts = {}
+    for ancestor_id, total, fit, gap, partial in rows:
+        total, fit, gap, partial = int(total or 0), int(fit or 0), int(gap or 0), int(partial or 0)
+        counts[ancestor_id] = {
+            "fit": fit, "gap": gap, "partial_fit": partial,
+            "pending": max(total - fit - gap - partial, 0), "total": total,
+        }
+    return counts
+
+
+# ═════════════════════════════════════════════════════════════════════════════
+# REBUILD / CONSISTENCY CHECK
+# ═════════════════════════════════════════════════════════════════════════════
+
+
+def _derive(conn, project_id=None) -> dict:
+    """{(ancestor_id, descendant_id): (depth, project_id)} from parent_id links."""
+    stmt = select(ProcessLevel.id, ProcessLevel.parent_id, ProcessLevel.project_id)
+    if project_id is not None:
+        stmt = stmt.where(ProcessLevel.project_id == project_id)
+    nodes = {node_id: (parent_id, proj) for node_id, parent_id, proj in conn.execute(stmt)}
+    pairs = {}
+    for node_id, (_, proj) in nodes.items():
+        current, depth, seen = node_id, 0, set()
+        while current in nodes and current not in seen:
+            seen.add(current)
+            pairs[(current, node_id)] = (depth, proj)
+            current, depth = nodes[current][0], depth + 1
+    return pairs
+
+
+def _stored(conn, project_id=None) -> dict:
+    stmt = select(_closure.c.ancestor_id, _closure.c.descendant_id, _closure.c.depth, _closure.c.project_id)
+    if project_id is not None:
+        stmt = stmt.where(_closure.c.project_id == project_id)
+    return {(a, d): (depth, proj) for a, d, depth, proj in conn.execute(stmt)}
+
+
+def rebuild(project_id: int | None = None) -> int:
+    """Re-derive the closure of one project (or all). The caller commits."""
+    conn = db.session.connection()
+    pairs = _derive(conn, project_id)
+    stmt = delete(_closure)
+    if project_id is not None:
+        stmt = stmt.where(_closure.c.project_id == project_id)
+    conn.execute(stmt)
+    rows = [
+        {"ancestor_id": a, "descendant_id": d, "depth": depth, "project_id": proj}
+        for (a, d), (depth, proj) in pairs.items()
+    ]
+    if rows:
+        conn.execute(insert(_closure), rows)
+    logger.info("ProcessLevel closure rebuilt project=%s rows=%d", project_id or "all", len(rows))
+    return len(rows)
+
+
+def check(project_id: int | None = None, sample_size: int = 10) -> dict:
+    """Compare the closure table with parent_id links without modifying anything."""
+    conn = db.session.connection()
+    expected, stored = _derive(conn, project_id), _stored(conn, project_id)
+    missing = [k for k in expected if k not in stored]
+    stale = [k for k in stored if k not in expected]
+    mismatched = [k for k in expected if k in stored and expected[k] != stored[k]]
+    return {
+        "consistent": not (missing or stale or mismatched),
+        "pairs": len(expected),
+        "missing": len(missing),
+        "stale": len(stale),
+        "mismatched": len(mismatched),
+        "samples": [
+            {"ancestor_id": a, "descendant_id": d}
+            for a, d in (mismatched + missing + stale)[:sample_size]
+        ],
+    }
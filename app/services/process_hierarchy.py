@@ -0,0 +1,118 @@
+"""
+Explore Phase — In-memory ProcessLevel hierarchy.
+
+Loads a project's L1–L4 ProcessLevel rows with a single query and answers
+the read-side questions of the hierarchy API from memory:
+  - children per node and has-children flags
+  - fit summaries for every node, built in one pass over the rows
+    (same rules as fit_propagation.get_fit_summary, no query per node)
+  - filtered flat, children and tree views
+  - keyset pages over flat/children views for very large catalogs
+
+Usage:
+    from app.services.process_hierarchy import ProcessHierarchy
+    hierarchy = ProcessHierarchy.load(project_id)
+    summary = hierarchy.fit_summary(node_id)
+"""
+
+from bisect import bisect_right
+
+from app.models.explore import ProcessLevel
+from app.services.fit_propagation import summarize_fit
+from app.services.helpers import pagination
+
+# Cursors share the opaque format of app.services.helpers.pagination
+_CURSOR_SIGNATURE = "process-hierarchy"
+
+
+def node_key(node: ProcessLevel) -> tuple:
+    """Stable ordering key of a node: (level, sort_order, id)."""
+    return (node.level, node.sort_order or 0, node.id)
+
+
+def encode_cursor(node: ProcessLevel) -> str:
+    return pagination.encode_cursor(node_key(node), signature=_CURSOR_SIGNATURE)
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """Inverse of encode_cursor. Raises ValueError on a malformed cursor."""
+    level, sort_order, node_id = pagination.decode_cursor(cursor, signature=_CURSOR_SIGNATURE)
+    return (int(level), int(sort_order), str(node_id))
+
+
+class ProcessHierarchy:
+    """All ProcessLevel rows of one project, indexed for tree queries."""
+
+    def __init__(self, nodes):
+        self.nodes = sorted(nodes, key=node_key)
+        self.by_id = {node.id: node for node in self.nodes}
+        self.children: dict = {}
+        for node in self.nodes:
+            self.children.setdefault(node.parent_id, []).append(node)
+        self._fit_summaries = None
+
+    @classmethod
+    def load(cls, project_id: int) -> "ProcessHierarchy":
+        """Load every ProcessLevel of a project in one query."""
+        rows = (
+            ProcessLevel.query
+            .filter_by(project_id=project_id)
+            .order_by(ProcessLevel.level, ProcessLevel.sort_order, ProcessLevel.id)
+            .all()
+        )
+        return cls(rows)
+
+    def __len__(self):
+        return len(self.nodes)
+
+    @property
+    def roots(self) -> list:
+        return self.children.get(None, [])
+
+    def children_of(self, parent_id) -> list:
+        return self.children.get(parent_id, [])
+
+    def has_children(self, node_id) -> bool:
+        return bool(self.children.get(node_id))
+
+    # ── Fit summaries ───────────────────────────────────────────────────
+
+    def fit_summaries(self) -> dict:
+        """{node_id: fit summary} for every node, from one pass over the rows."""
+        if self._fit_summaries is None:
+            in_scope = {}
+            for node in self.nodes:
+                if node.parent_id is not None and node.scope_status == "in_scope":
+                    in_scope.setdefault(node.parent_id, []).append(node)
+            self._fit_summaries = {
+                node.id: summarize_fit(in_scope.get(node.id, [])) for node in self.nodes
+            }
+        return self._fit_summaries
+
+    def fit_summary(self, node_id) -> dict:
+        return self.fit_summaries()[node_id]
+
+    # ── Views ───────────────────────────────────────────────────────────
+
+    def flat(self, predicate=None) -> list:
+        """Nodes ordered by (level, sort_order), optionally filtered."""
+        return [n for n in self.nodes if predicate is None or predicate(n)]
+
+    def children_view(self, parent_id, predicate=None) -> list:
+        return [n for n in self.children_of(parent_id) if predicate is None or predicate(n)]
+
+    @staticmethod
+    def page(nodes: list, cursor: str | None, limit: int | None) -> tuple:
+        """Keyset page of an ordered node list.
+
+        Returns (page, next_cursor); next_cursor is None on the last page.
+        Raises ValueError on a malformed cursor.
+        """
+        start = 0
+        if cursor:
+            start = bisect_right([node_key(n) for n in nodes], decode_cursor(cursor))
+        if not limit:
+            return nodes[start:], None
+        chunk = nodes[start:start + limit]
+        has_more = start + limit < len(nodes)
+        return chunk, (encode_cursor(chunk[-1]) if has_more and chunk else None)
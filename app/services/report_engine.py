@@ -4,6 +4,10 @@ F5 — Report Engine.
 Executes report definitions against the database and returns structured data
 suitable for rendering as tables, charts, and KPI cards.
 
+Aggregate presets (trends, distributions, per-cycle rates, KPIs) read the
+materialized daily rollups maintained by app.services.report_rollups;
+row-level presets (tables, coverage, traceability) query the raw tables.
+
 Preset report library:
   - 8 coverage reports
   - 10 execution reports
@@ -21,14 +25,23 @@ from sqlalchemy import func, case, and_, or_
 
 from app.models import db
 from app.models.explore.requirement import ExploreRequirement
+from app.models.reporting import DefectDailyRollup, ExecutionDailyRollup
 from app.models.testing import (
     TestCase, TestExecution, TestCycle, TestPlan, TestSuite,
     TestCaseSuiteLink,
     Defect,
 )
+from app.services import result_cache
 
 logger = logging.getLogger(__name__)
 
+# Tables the presets read; writes to any of them invalidate cached reports
+REPORT_TAGS = (
+    ExploreRequirement, ExecutionDailyRollup, DefectDailyRollup,
+    TestCase, TestExecution, TestCycle, TestPlan, TestSuite, TestCaseSuiteLink,
+    Defect,
+)
+
 
 def _canonical_requirement_query(program_id: int):
     """Return canonical explore requirements for reporting."""
@@ -41,6 +54,48 @@ def _canonical_requirement_query(program_id: int):
     )
 
 
+def _day_labels(days: int) -> list[str]:
+    """UTC days from *days* ago through today, oldest first (YYYY-MM-DD)."""
+    today = datetime.now(timezone.utc).date()
+    return [(today - timedelta(days=i)).isoformat() for i in range(days, -1, -1)]
+
+
+def _execution_rollup(pid):
+    return db.session.query(ExecutionDailyRollup).filter(ExecutionDailyRollup.program_id == pid)
+
+
+def _cycle_result_counts(pid) -> dict:
+    """{cycle_id: {result: executions}} from the execution rollup."""
+    rows = (
+        db.session.query(
+            ExecutionDailyRollup.cycle_id,
+            ExecutionDailyRollup.result,
+            func.sum(ExecutionDailyRollup.executions),
+        )
+        .filter(ExecutionDailyRollup.program_id == pid)
+        .group_by(ExecutionDailyRollup.cycle_id, ExecutionDailyRollup.result)
+        .all()
+    )
+    counts = defaultdict(dict)
+    for cycle_id, result, n in rows:
+        counts[cycle_id][result] = int(n)
+    return counts
+
+
+def _defect_counts_by(pid, *columns, order_desc=False, limit=None):
+    count = func.sum(DefectDailyRollup.defects)
+    q = (
+        db.session.query(*columns, count)
+        .filter(DefectDailyRollup.program_id == pid)
+        .group_by(*columns)
+    )
+    if order_desc:
+        q = q.order_by(count.desc())
+    if limit:
+        q = q.limit(limit)
+    return [(*r[:-1], int(r[-1])) for r in q.all()]
+
+
 # ═════════════════════════════════════════════════════════════════════════════
 # REPORT ENGINE
 # ═════════════════════════════════════════════════════════════════════════════
@@ -60,6 +115,7 @@ class ReportEngine:
         return decorator
 
     @classmethod
+    @result_cache.cached("report", scope="program_id", tags=REPORT_TAGS)
     def run(cls, report_key: str, program_id: int, **kwargs) -> dict:
         """Execute a preset report and return structured data.
 
@@ -343,34 +399,30 @@ def _gap_analysis(pid, **kw):
 
 @ReportEngine.register("pass_fail_trend")
 def _pass_fail_trend(pid, **kw):
-    days = kw.get("days", 30)
-    now = datetime.now(timezone.utc)
-    data = []
-    for i in range(days, -1, -1):
-        dt = now - timedelta(days=i)
-        day_start = dt.replace(hour=0, minute=0, second=0, microsecond=0)
-        day_end = day_start + timedelta(days=1)
-        q = (
-            db.session.query(
-                TestExecution.result,
-                func.count(TestExecution.id),
-            )
-            .join(TestCase)
-            .filter(
-                TestCase.program_id == pid,
-                TestExecution.executed_at >= day_start,
-                TestExecution.executed_at < day_end,
-            )
-            .group_by(TestExecution.result)
-            .all()
+    labels = _day_labels(kw.get("days", 30))
+    rows = (
+        db.session.query(
+            ExecutionDailyRollup.day,
+            ExecutionDailyRollup.result,
+            func.sum(ExecutionDailyRollup.executions),
         )
-        counts = dict(q)
-        data.append({
-            "date": day_start.strftime("%Y-%m-%d"),
-            "pass": counts.get("pass", 0),
-            "fail": counts.get("fail", 0),
-            "blocked": counts.get("blocked", 0),
-        })
+        .filter(
+            ExecutionDailyRollup.program_id == pid,
+            ExecutionDailyRollup.day >= labels[0],
+            ExecutionDailyRollup.day <= labels[-1],
+        )
+        .group_by(ExecutionDailyRollup.day, ExecutionDailyRollup.result)
+        .all()
+    )
+    counts = defaultdict(dict)
+    for day, result, n in rows:
+        counts[day][result] = int(n)
+    data = [{
+        "date": day,
+        "pass": counts[day].get("pass", 0),
+        "fail": counts[day].get("fail", 0),
+        "blocked": counts[day].get("blocked", 0),
+    } for day in labels]
     return {
         "title": "Pass/Fail Trend",
         "chart_type": "line",
@@ -392,10 +444,11 @@ def _pass_rate_by_cycle(pid, **kw):
         .filter(TestPlan.program_id == pid)
         .all()
     )
+    counts = _cycle_result_counts(pid)
     data = []
     for c in cycles:
-        total = c.executions.count()
-        passed = c.executions.filter_by(result="pass").count()
+        total = sum(counts[c.id].values())
+        passed = counts[c.id].get("pass", 0)
         data.append({
             "cycle": c.name,
             "total": total,
@@ -419,17 +472,16 @@ def _cycle_comparison(pid, **kw):
         .filter(TestPlan.program_id == pid)
         .all()
     )
+    counts = _cycle_result_counts(pid)
     data = []
     for c in cycles:
-        total = c.executions.count()
-        passed = c.executions.filter_by(result="pass").count()
-        failed = c.executions.filter_by(result="fail").count()
+        by_result = counts[c.id]
         data.append({
             "cycle": c.name,
-            "total": total,
-            "pass": passed,
-            "fail": failed,
-            "blocked": c.executions.filter_by(result="blocked").count(),
+            "total": sum(by_result.values()),
+            "pass": by_result.get("pass", 0),
+            "fail": by_result.get("fail", 0),
+            "blocked": by_result.get("blocked", 0),
         })
     return {
         "title": "Cycle Comparison",
@@ -524,18 +576,11 @@ def _blocked_tests(pid, **kw):
 
 @ReportEngine.register("retest_rate")
 def _retest_rate(pid, **kw):
-    total_exec = (
-        TestExecution.query
-        .join(TestCase)
-        .filter(TestCase.program_id == pid)
-        .count()
-    )
-    retests = (
-        TestExecution.query
-        .join(TestCase)
-        .filter(TestCase.program_id == pid, TestExecution.attempt_number > 1)
-        .count()
-    )
+    total_exec, retests = _execution_rollup(pid).with_entities(
+        func.coalesce(func.sum(ExecutionDailyRollup.executions), 0),
+        func.coalesce(func.sum(ExecutionDailyRollup.retests), 0),
+    ).one()
+    total_exec, retests = int(total_exec), int(retests)
     pct = round(retests / total_exec * 100, 1) if total_exec else 0
     return {
         "title": "Retest Rate",
@@ -547,24 +592,15 @@ def _retest_rate(pid, **kw):
 
 @ReportEngine.register("daily_execution")
 def _daily_execution(pid, **kw):
-    days = kw.get("days", 30)
-    now = datetime.now(timezone.utc)
-    data = []
-    for i in range(days, -1, -1):
-        dt = now - timedelta(days=i)
-        day_start = dt.replace(hour=0, minute=0, second=0, microsecond=0)
-        day_end = day_start + timedelta(days=1)
-        count = (
-            TestExecution.query
-            .join(TestCase)
-            .filter(
-                TestCase.program_id == pid,
-                TestExecution.executed_at >= day_start,
-                TestExecution.executed_at < day_end,
-            )
-            .count()
-        )
-        data.append({"date": day_start.strftime("%Y-%m-%d"), "count": count})
+    labels = _day_labels(kw.get("days", 30))
+    counts = dict(
+        _execution_rollup(pid)
+        .filter(ExecutionDailyRollup.day >= labels[0], ExecutionDailyRollup.day <= labels[-1])
+        .with_entities(ExecutionDailyRollup.day, func.sum(ExecutionDailyRollup.executions))
+        .group_by(ExecutionDailyRollup.day)
+        .all()
+    )
+    data = [{"date": day, "count": int(counts.get(day, 0))} for day in labels]
     return {
         "title": "Daily Execution Count",
         "chart_type": "line",
@@ -577,16 +613,12 @@ def _daily_execution(pid, **kw):
 @ReportEngine.register("execution_status_dist")
 def _execution_status_dist(pid, **kw):
     rows = (
-        db.session.query(
-            TestExecution.result,
-            func.count(TestExecution.id),
-        )
-        .join(TestCase)
-        .filter(TestCase.program_id == pid)
-        .group_by(TestExecution.result)
+        _execution_rollup(pid)
+        .with_entities(ExecutionDailyRollup.result, func.sum(ExecutionDailyRollup.executions))
+        .group_by(ExecutionDailyRollup.result)
         .all()
     )
-    data = [{"status": r[0] or "not_run", "count": r[1]} for r in rows]
+    data = [{"status": r[0] or "not_run", "count": int(r[1])} for r in rows]
     return {
         "title": "Execution Status Distribution",
         "chart_type": "donut",
@@ -598,13 +630,13 @@ def _execution_status_dist(pid, **kw):
 
 @ReportEngine.register("first_pass_yield")
 def _first_pass_yield(pid, **kw):
-    first_attempts = (
-        TestExecution.query
-        .join(TestCase)
-        .filter(TestCase.program_id == pid, TestExecution.attempt_number == 1)
-    )
-    total = first_attempts.count()
-    passed = first_attempts.filter(TestExecution.result == "pass").count()
+    total, passed = _execution_rollup(pid).with_entities(
+        func.coalesce(func.sum(ExecutionDailyRollup.first_attempts), 0),
+        func.coalesce(func.sum(case(
+            (ExecutionDailyRollup.result == "pass", ExecutionDailyRollup.first_attempts), else_=0,
+        )), 0),
+    ).one()
+    total, passed = int(total), int(passed)
     pct = round(passed / total * 100, 1) if total else 0
     return {
         "title": "First Pass Yield",
@@ -618,12 +650,7 @@ def _first_pass_yield(pid, **kw):
 
 @ReportEngine.register("defect_severity_dist")
 def _defect_severity_dist(pid, **kw):
-    rows = (
-        db.session.query(Defect.severity, func.count(Defect.id))
-        .filter(Defect.program_id == pid)
-        .group_by(Defect.severity)
-        .all()
-    )
+    rows = _defect_counts_by(pid, DefectDailyRollup.severity)
     data = [{"severity": r[0] or "N/A", "count": r[1]} for r in rows]
     return {
         "title": "Defect Severity Distribution",
@@ -636,12 +663,7 @@ def _defect_severity_dist(pid, **kw):
 
 @ReportEngine.register("defect_status_dist")
 def _defect_status_dist(pid, **kw):
-    rows = (
-        db.session.query(Defect.status, func.count(Defect.id))
-        .filter(Defect.program_id == pid)
-        .group_by(Defect.status)
-        .all()
-    )
+    rows = _defect_counts_by(pid, DefectDailyRollup.status)
     data = [{"status": r[0] or "N/A", "count": r[1]} for r in rows]
     return {
         "title": "Defect Status Distribution",
@@ -684,22 +706,37 @@ def _defect_aging(pid, **kw):
 
 @ReportEngine.register("defect_trend")
 def _defect_trend(pid, **kw):
-    days = kw.get("days", 30)
-    now = datetime.now(timezone.utc)
+    labels = _day_labels(kw.get("days", 30))
+    open_statuses = {"open", "in_progress", "reopened"}
+    closed_statuses = {"closed", "resolved", "rejected"}
+    rows = (
+        db.session.query(
+            DefectDailyRollup.day,
+            DefectDailyRollup.status,
+            func.sum(DefectDailyRollup.defects),
+        )
+        .filter(
+            DefectDailyRollup.program_id == pid,
+            DefectDailyRollup.day != "",
+            DefectDailyRollup.day <= labels[-1],
+            DefectDailyRollup.status.in_(open_statuses | closed_statuses),
+        )
+        .group_by(DefectDailyRollup.day, DefectDailyRollup.status)
+        .order_by(DefectDailyRollup.day)
+        .all()
+    )
+    # Cumulative by reported day, split by the defect's current status
     data = []
-    for i in range(days, -1, -1):
-        dt = now - timedelta(days=i)
-        opened = Defect.query.filter(
-            Defect.program_id == pid,
-            func.date(Defect.reported_at) <= dt.date(),
-            Defect.status.in_(["open", "in_progress", "reopened"]),
-        ).count()
-        closed = Defect.query.filter(
-            Defect.program_id == pid,
-            func.date(Defect.reported_at) <= dt.date(),
-            Defect.status.in_(["closed", "resolved", "rejected"]),
-        ).count()
-        data.append({"date": dt.strftime("%Y-%m-%d"), "open": opened, "closed": closed})
+    opened = closed = idx = 0
+    for day in labels:
+        while idx < len(rows) and rows[idx][0] <= day:
+            _, status, n = rows[idx]
+            if status in open_statuses:
+                opened += int(n)
+            else:
+                closed += int(n)
+            idx += 1
+        data.append({"date": day, "open": opened, "closed": closed})
     return {
         "title": "Defect Open/Close Trend",
         "chart_type": "line",
@@ -714,13 +751,7 @@ def _defect_trend(pid, **kw):
 
 @ReportEngine.register("defect_by_module")
 def _defect_by_module(pid, **kw):
-    rows = (
-        db.session.query(Defect.module, func.count(Defect.id))
-        .filter(Defect.program_id == pid)
-        .group_by(Defect.module)
-        .order_by(func.count(Defect.id).desc())
-        .all()
-    )
+    rows = _defect_counts_by(pid, DefectDailyRollup.module, order_desc=True)
     data = [{"module": r[0] or "N/A", "count": r[1]} for r in rows]
     return {
         "title": "Defects by Module",
@@ -733,12 +764,7 @@ def _defect_by_module(pid, **kw):
 
 @ReportEngine.register("defect_by_priority")
 def _defect_by_priority(pid, **kw):
-    rows = (
-        db.session.query(Defect.priority, func.count(Defect.id))
-        .filter(Defect.program_id == pid)
-        .group_by(Defect.priority)
-        .all()
-    )
+    rows = _defect_counts_by(pid, DefectDailyRollup.priority)
     data = [{"priority": r[0] or "N/A", "count": r[1]} for r in rows]
     return {
         "title": "Defects by Priority",
@@ -751,10 +777,9 @@ def _defect_by_priority(pid, **kw):
 
 @ReportEngine.register("defect_reopen_rate")
 def _defect_reopen_rate(pid, **kw):
-    total = Defect.query.filter_by(program_id=pid).count()
-    reopened = Defect.query.filter(
-        Defect.program_id == pid, Defect.status == "reopened"
-    ).count()
+    by_status = dict(_defect_counts_by(pid, DefectDailyRollup.status))
+    total = sum(by_status.values())
+    reopened = by_status.get("reopened", 0)
     pct = round(reopened / total * 100, 1) if total else 0
     return {
         "title": "Reopen Rate",
@@ -856,19 +881,10 @@ def _defect_injection_phase(pid, **kw):
 
 @ReportEngine.register("top_defect_areas")
 def _top_defect_areas(pid, **kw):
-    rows = (
-        db.session.query(
-            Defect.module,
-            Defect.severity,
-            func.count(Defect.id).label("cnt"),
-        )
-        .filter(Defect.program_id == pid)
-        .group_by(Defect.module, Defect.severity)
-        .order_by(func.count(Defect.id).desc())
-        .limit(20)
-        .all()
+    rows = _defect_counts_by(
+        pid, DefectDailyRollup.module, DefectDailyRollup.severity, order_desc=True, limit=20,
     )
-    data = [{"module": r.module or "N/A", "severity": r.severity or "?", "count": r.cnt} for r in rows]
+    data = [{"module": r[0] or "N/A", "severity": r[1] or "?", "count": r[2]} for r in rows]
     return {
         "title": "Top Defect Areas",
         "chart_type": "table",
@@ -1128,8 +1144,13 @@ def _go_nogo_scorecard(pid, **kw):
     executed = TestCase.query.filter(TestCase.program_id == pid, TestCase.id.in_(sub)).count()
     cov_pct = round(executed / tc_total * 100, 1) if tc_total else 0
 
-    total_exec = TestExecution.query.join(TestCase).filter(TestCase.program_id == pid).count()
-    passed = TestExecution.query.join(TestCase).filter(TestCase.program_id == pid, TestExecution.result == "pass").count()
+    total_exec, passed = _execution_rollup(pid).with_entities(
+        func.coalesce(func.sum(ExecutionDailyRollup.executions), 0),
+        func.coalesce(func.sum(case(
+            (ExecutionDailyRollup.result == "pass", ExecutionDailyRollup.executions), else_=0,
+        )), 0),
+    ).one()
+    total_exec, passed = int(total_exec), int(passed)
     pass_pct = round(passed / total_exec * 100, 1) if total_exec else 0
 
     open_s1 = Defect.query.filter(
@@ -1154,11 +1175,12 @@ def _go_nogo_scorecard(pid, **kw):
 @ReportEngine.register("cycle_burndown")
 def _cycle_burndown(pid, **kw):
     plans = TestPlan.query.filter_by(program_id=pid).all()
+    counts = _cycle_result_counts(pid)
     data = []
     for p in plans:
         for c in p.cycles:
-            total = c.executions.count()
-            remaining = c.executions.filter(TestExecution.result == "not_run").count()
+            total = sum(counts[c.id].values())
+            remaining = counts[c.id].get("not_run", 0)
             data.append({"cycle": c.name, "total": total, "remaining": remaining,
                          "completed": total - remaining})
     return {
@@ -1176,14 +1198,15 @@ def _cycle_burndown(pid, **kw):
 @ReportEngine.register("plan_progress")
 def _plan_progress(pid, **kw):
     plans = TestPlan.query.filter_by(program_id=pid).all()
+    counts = _cycle_result_counts(pid)
     data = []
     for p in plans:
         total_exec = 0
         completed = 0
         for c in p.cycles:
-            t = c.executions.count()
+            t = sum(counts[c.id].values())
             total_exec += t
-            completed += t - c.executions.filter(TestExecution.result == "not_run").count()
+            completed += t - counts[c.id].get("not_run", 0)
         pct = round(completed / total_exec * 100, 1) if total_exec else 0
         data.append({"plan": p.name, "status": p.status, "total": total_exec,
                      "completed": completed, "progress_pct": pct})
@@ -0,0 +1,424 @@
+"""
+F5 — Materialized report rollups.
+
+ExecutionDailyRollup and DefectDailyRollup hold per-day counts per program,
+cycle and module, so the aggregate ReportEngine presets read a few hundred
+pre-aggregated rows instead of grouping test_executions / defects once per
+bucket.
+
+The rollups are maintained incrementally from the ORM unit of work:
+  - before_flush records the bucket every dirty or deleted row is leaving
+    (looked up while the database still holds the old values)
+  - after_flush records the bucket every new or dirty row is entering and
+    applies the +/- deltas as upserts inside the same transaction
+  - moving a TestCase to another module or program moves just that test
+    case's executions from the old bucket to the new one
+
+Writes that bypass the unit of work (bulk UPDATE/DELETE, raw SQL, database
+cascades) are not seen. ``check()`` compares the rollups with the raw tables
+and ``rebuild()`` re-derives them; both are exposed as
+``flask report-rollups``.
+"""
+
+import logging
+from collections import defaultdict
+from datetime import timezone
+
+from sqlalchemy import and_, delete, event, insert, select, update
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from app.models import db
+from app.models.reporting import DefectDailyRollup, ExecutionDailyRollup
+from app.models.testing import Defect, TestCase, TestExecution
+from app.services import result_cache
+
+logger = logging.getLogger(__name__)
+
+EXECUTION_KEY = ("program_id", "cycle_id", "module", "day", "result")
+EXECUTION_MEASURES = ("executions", "first_attempts", "retests")
+DEFECT_KEY = ("program_id", "module", "day", "severity", "status", "priority")
+DEFECT_MEASURES = ("defects",)
+
+# Source attributes that decide a row's bucket
+_EXECUTION_ATTRS = ("test_case_id", "cycle_id", "executed_at", "result", "attempt_number")
+_DEFECT_ATTRS = ("program_id", "module", "reported_at", "severity", "status", "priority")
+_TEST_CASE_ATTRS = ("program_id", "module")
+
+_PENDING = "report_rollups.pending"
+
+
+def day_of(value) -> str:
+    """UTC calendar day of a timestamp as YYYY-MM-DD ('' for None; naive = UTC)."""
+    if value is None:
+        return ""
+    if getattr(value, "tzinfo", None) is not None:
+        value = value.astimezone(timezone.utc)
+    return value.strftime("%Y-%m-%d")
+
+
+def _execution_bucket(program_id, cycle_id, module, executed_at, result, attempt_number):
+    key = (program_id, cycle_id, module or "", day_of(executed_at), result or "")
+    first = 1 if attempt_number == 1 else 0
+    retest = 1 if attempt_number is not None and attempt_number > 1 else 0
+    return key, (1, first, retest)
+
+
+def _defect_bucket(program_id, module, reported_at, severity, status, priority):
+    key = (program_id, module or "", day_of(reported_at), severity or "", status or "", priority or "")
+    return key, (1,)
+
+
+# ═════════════════════════════════════════════════════════════════════════════
+# INCREMENTAL MAINTENANCE (session hooks)
+# ═════════════════════════════════════════════════════════════════════════════
+
+
+class _Pending:
+    """Work carried from before_flush to after_flush of one flush."""
+
+    __slots__ = ("old_executions", "old_defects", "dirty", "moved", "seen_executions")
+
+    def __init__(self):
+        self.old_executions: list[dict] = []
+        self.old_defects: list[dict] = []
+        self.dirty: list = []
+        self.moved: dict[int, dict] = {}         # test case id → old program_id/module
+        self.seen_executions: set[int] = set()   # executions already diffed row by row
+
+
+def _old_values(obj, attrs) -> dict:
+    state = sa_inspect(obj)
+    values = {}
+    for name in attrs:
+        hist = state.attrs[name].history
+        if hist.deleted:
+            values[name] = hist.deleted[0]
+        elif hist.added:
+            values[name] = None  # loaded old value was NULL (active_history)
+        else:
+            values[name] = getattr(obj, name)  # unchanged; loads if expired
+    return values
+
+
+def _current_values(obj, attrs) -> dict:
+    return {name: getattr(obj, name) for name in attrs}
+
+
+def _changed(obj, attrs) -> bool:
+    state = sa_inspect(obj)
+    return any(state.attrs[name].history.has_changes() for name in attrs)
+
+
+def _before_flush(session, flush_context, instances):
+    pending = None
+
+    def _pending():
+        nonlocal pending
+        if pending is None:
+            pending = session.info.setdefault(_PENDING, _Pending())
+        return pending
+
+    for obj in session.deleted:
+        if isinstance(obj, TestExecution):
+            _pending().old_executions.append(_current_values(obj, _EXECUTION_ATTRS))
+            _pending().seen_executions.add(obj.id)
+        elif isinstance(obj, Defect):
+            _pending().old_defects.append(_current_values(obj, _DEFECT_ATTRS))
+
+    for obj in session.dirty:
+        if isinstance(obj, TestExecution) and _changed(obj, _EXECUTION_ATTRS):
+            _pending().old_executions.append(_old_values(obj, _EXECUTION_ATTRS))
+            _pending().seen_executions.add(obj.id)
+            _pending().dirty.append(obj)
+        elif isinstance(obj, Defect) and _changed(obj, _DEFECT_ATTRS):
+            _pending().old_defects.append(_old_values(obj, _DEFECT_ATTRS))
+            _pending().dirty.append(obj)
+        elif isinstance(obj, TestCase) and _changed(obj, _TEST_CASE_ATTRS):
+            _pending().moved.setdefault(obj.id, _old_values(obj, _TEST_CASE_ATTRS))
+
+    if pending is not None and pending.old_executions:
+        # Resolve program/module now: the test case may be deleted in this flush
+        _resolve_test_cases(session.connection(), pending.old_executions)
+
+
+def _after_flush(session, flush_context):
+    pending = session.info.pop(_PENDING, None) or _Pending()
+
+    new_executions, new_defects = [], []
+    for obj in list(session.new) + pending.dirty:
+        if isinstance(obj, TestExecution):
+            new_executions.append(_current_values(obj, _EXECUTION_ATTRS))
+            pending.seen_executions.add(obj.id)
+        elif isinstance(obj, Defect):
+            new_defects.append(_current_values(obj, _DEFECT_ATTRS))
+
+    if not (new_executions or new_defects or pending.old_executions
+            or pending.old_defects or pending.moved):
+        return
+
+    conn = session.connection()
+    _resolve_test_cases(conn, new_executions)
+
+    execution_deltas = defaultdict(lambda: [0, 0, 0])
+    for sign, rows in ((-1, pending.old_executions), (1, new_executions)):
+        for row in rows:
+            if row.get("program_id") is None or row["cycle_id"] is None:
+                continue
+            key, vec = _execution_bucket(
+                row["program_id"], row["cycle_id"], row["module"],
+                row["executed_at"], row["result"], row["attempt_number"],
+            )
+            acc = execution_deltas[key]
+            for i, v in enumerate(vec):
+                acc[i] += sign * v
+    if pending.moved:
+        _move_test_cases(conn, pending.moved, pending.seen_executions, execution_deltas)
+
+    defect_deltas = defaultdict(lambda: [0])
+    for sign, rows in ((-1, pending.old_defects), (1, new_defects)):
+        for row in rows:
+            if row["program_id"] is None:
+                continue
+            key, vec = _defect_bucket(*(row[name] for name in _DEFECT_ATTRS))
+            defect_deltas[key][0] += sign * vec[0]
+
+    _apply_deltas(conn, ExecutionDailyRollup, EXECUTION_KEY, EXECUTION_MEASURES, execution_deltas)
+    _apply_deltas(conn, DefectDailyRollup, DEFECT_KEY, DEFECT_MEASURES, defect_deltas)
+
+
+def _after_rollback(session):
+    session.info.pop(_PENDING, None)
+
+
+def _resolve_test_cases(conn, rows: list[dict]):
+    """Fill program_id/module on execution value dicts from their test case."""
+    ids = {row["test_case_id"] for row in rows if row["test_case_id"] is not None}
+    if not ids:
+        return
+    found = {
+        tc_id: (program_id, module)
+        for tc_id, program_id, module in conn.execute(
+            select(TestCase.id, TestCase.program_id, TestCase.module).where(TestCase.id.in_(ids))
+        )
+    }
+    for row in rows:
+        row["program_id"], row["module"] = found.get(row["test_case_id"], (None, None))
+
+
+def _move_test_cases(conn, moved: dict, skip: set, deltas):
+    """Move the executions of re-homed test cases from their old bucket to the new one.
+
+    *moved* maps test case id → its program_id/module before the flush;
+    executions in *skip* were inserted, updated or deleted in the same flush
+    and already carry their own delta.
+    """
+    current = {
+        tc_id: (program_id, module)
+        for tc_id, program_id, module in conn.execute(
+            select(TestCase.id, TestCase.program_id, TestCase.module).where(TestCase.id.in_(moved))
+        )
+    }
+    rows = conn.execute(
+        select(
+            TestExecution.id, TestExecution.test_case_id, TestExecution.cycle_id,
+            TestExecution.executed_at, TestExecution.result, TestExecution.attempt_number,
+        ).where(TestExecution.test_case_id.in_(moved))
+    )
+    for ex_id, tc_id, cycle_id, executed_at, result, attempt_number in rows:
+        if ex_id in skip or cycle_id is None:
+            continue
+        old = moved[tc_id]
+        homes = ((-1, old["program_id"], old["module"]), (1, *current.get(tc_id, (None, None))))
+        for sign, program_id, module in homes:
+            if program_id is None:
+                continue
+            key, vec = _execution_bucket(program_id, cycle_id, module, executed_at, result, attempt_number)
+            acc = deltas[key]
+            for i, v in enumerate(vec):
+                acc[i] += sign * v
+
+
+def _apply_deltas(conn, model, key_cols, measure_cols, deltas):
+    """Add *deltas* to the rollup rows of *model*, creating buckets as needed."""
+    rows = [
+        dict(zip(key_cols, key, strict=True)) | dict(zip(measure_cols, vec, strict=True))
+        for key, vec in deltas.items()
+        if any(vec)
+    ]
+    if not rows:
+        return
+    table = model.__table__
+    dialect = conn.dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        dialect_insert = pg_insert if dialect == "postgresql" else sqlite_insert
+        stmt = dialect_insert(table).values(rows)
+        conn.execute(stmt.on_conflict_do_update(
+            index_elements=list(key_cols),
+            set_={c: table.c[c] + stmt.excluded[c] for c in measure_cols},
+        ))
+    else:
+        for row in rows:
+            result = conn.execute(
+                update(table)
+                .where(and_(*(table.c[c] == row[c] for c in key_cols)))
+                .values({c: table.c[c] + row[c] for c in measure_cols})
+            )
+            if result.rowcount == 0:
+                conn.execute(insert(table).values(row))
+
+    # Buckets that emptied out are dropped rather than kept at zero
+    program_ids = {row["program_id"] for row in rows}
+    conn.execute(
+        delete(table).where(table.c.program_id.in_(program_ids), table.c[measure_cols[0]] <= 0)
+    )
+
+
+def init_report_rollups():
+    """Register the session hooks (idempotent; called from create_app)."""
+    if event.contains(Session, "after_flush", _after_flush):
+        return
+    event.listen(Session, "before_flush", _before_flush)
+    event.listen(Session, "after_flush", _after_flush)
+    event.listen(Session, "after_rollback", _after_rollback)
+    # active_history: setting an expired attribute loads the old value first,
+    # so before_flush always knows which bucket a row is leaving.
+    for model, attrs in ((TestExecution, _EXECUTION_ATTRS), (Defect, _DEFECT_ATTRS),
+                         (TestCase, _TEST_CASE_ATTRS)):
+        for name in attrs:
+            event.listen(getattr(model, name), "set", _noop_set, active_history=True)
+
+
+def _noop_set(target, value, oldvalue, initiator):
+    return value
+
+
+# ═════════════════════════════════════════════════════════════════════════════
+# REBUILD / CONSISTENCY CHECK
+# ═════════════════════════════════════════════════════════════════════════════
+
+
+def _derive_executions(conn, program_ids=None) -> dict:
+    stmt = (
+        select(
+            TestCase.program_id, TestExecution.cycle_id, TestCase.module,
+            TestExecution.executed_at, TestExecution.result, TestExecution.attempt_number,
+        )
+        .join(TestCase, TestCase.id == TestExecution.test_case_id)
+    )
+    if program_ids is not None:
+        stmt = stmt.where(TestCase.program_id.in_(program_ids))
+    buckets = defaultdict(lambda: [0, 0, 0])
+    for row in conn.execute(stmt.execution_options(yield_per=5000)):
+        key, vec = _execution_bucket(*row)
+        acc = buckets[key]
+        for i, v in enumerate(vec):
+            acc[i] += v
+    return buckets
+
+
+def _derive_defects(conn, program_ids=None) -> dict:
+    stmt = select(*(getattr(Defect, name) for name in _DEFECT_ATTRS))
+    if program_ids is not None:
+        stmt = stmt.where(Defect.program_id.in_(program_ids))
+    buckets = defaultdict(lambda: [0])
+    for row in conn.execute(stmt.execution_options(yield_per=5000)):
+        key, _ = _defect_bucket(*row)
+        buckets[key][0] += 1
+    return buckets
+
+
+def _stored(conn, model, key_cols, measure_cols, program_ids=None) -> dict:
+    table = model.__table__
+    stmt = select(*(table.c[c] for c in key_cols + measure_cols))
+    if program_ids is not None:
+        stmt = stmt.where(table.c.program_id.in_(program_ids))
+    n = len(key_cols)
+    return {tuple(row[:n]): list(row[n:]) for row in conn.execute(stmt)}
+
+
+def _replace(conn, model, key_cols, measure_cols, buckets, program_ids=None) -> int:
+    table = model.__table__
+    stmt = delete(table)
+    if program_ids is not None:
+        stmt = stmt.where(table.c.program_id.in_(program_ids))
+    conn.execute(stmt)
+    rows = [
+        dict(zip(key_cols, key, strict=True)) | dict(zip(measure_cols, vec, strict=True))
+        for key, vec in buckets.items()
+    ]
+    if rows:
+        conn.execute(insert(table), rows)
+    return len(rows)
+
+
+def _rebuild_executions(conn, program_ids=None) -> int:
+    buckets = _derive_executions(conn, program_ids)
+    return _replace(conn, ExecutionDailyRollup, EXECUTION_KEY, EXECUTION_MEASURES, buckets, program_ids)
+
+
+def rebuild(program_id: int | None = None) -> dict:
+    """Re-derive the rollups of one program (or all) from the raw tables.
+
+    Runs in the caller's transaction; the caller commits.
+    """
+    conn = db.session.connection()
+    program_ids = [program_id] if program_id is not None else None
+    result = {
+        "execution_buckets": _rebuild_executions(conn, program_ids),
+        "defect_buckets": _replace(
+            conn, DefectDailyRollup, DEFECT_KEY, DEFECT_MEASURES,
+            _derive_defects(conn, program_ids), program_ids,
+        ),
+    }
+    # Rebuild writes through the connection, which the result cache cannot see
+    result_cache.invalidate(
+        ExecutionDailyRollup.__tablename__, DefectDailyRollup.__tablename__, program_id=program_id,
+    )
+    logger.info("Report rollups rebuilt program=%s %s", program_id or "all", result)
+    return result
+
+
+def _diff(expected: dict, stored: dict, key_cols, sample_size: int) -> dict:
+    missing = [k for k in expected if k not in stored]
+    stale = [k for k in stored if k not in expected]
+    mismatched = [k for k in expected if k in stored and list(expected[k]) != list(stored[k])]
+    samples = [
+        {"bucket": dict(zip(key_cols, k, strict=True)),
+         "expected": list(expected.get(k, [])), "stored": list(stored.get(k, []))}
+        for k in (mismatched + missing + stale)[:sample_size]
+    ]
+    return {
+        "buckets": len(expected),
+        "missing": len(missing),
+        "stale": len(stale),
+        "mismatched": len(mismatched),
+        "samples": samples,
+    }
+
+
+def check(program_id: int | None = None, sample_size: int = 10) -> dict:
+    """Compare the rollups with the raw tables without modifying anything.
+
+    Returns:
+        {"consistent": bool, "executions": {...}, "defects": {...}} where each
+        section counts missing / stale / mismatched buckets with samples.
+    """
+    conn = db.session.connection()
+    program_ids = [program_id] if program_id is not None else None
+    executions = _diff(
+        _derive_executions(conn, program_ids),
+        _stored(conn, ExecutionDailyRollup, EXECUTION_KEY, EXECUTION_MEASURES, program_ids),
+        EXECUTION_KEY, sample_size,
+    )
+    defects = _diff(
+        _derive_defects(conn, program_ids),
+        _stored(conn, DefectDailyRollup, DEFECT_KEY, DEFECT_MEASURES, program_ids),
+        DEFECT_KEY, sample_size,
+    )
+    consistent = all(
+        section[k] == 0 for section in (executions, defects) for k in ("missing", "stale", "mismatched")
+    )
+    return {"consistent": consistent, "executions": executions, "defects": defects}
@@ -0,0 +1,351 @@
+"""
+Result cache for dashboards and reports.
+
+Caches the payload of an expensive read (ReportEngine.run,
+DashboardEngine.compute, compute_dashboard, ExploreMetrics.program_health)
+in cache_service, keyed by (function, program/project, params).
+
+Every cached function declares the tables it reads. Each (scope, table)
+pair has a version counter, and each table also has a global counter for
+writes whose scope is unknown. A cached entry stores the versions it was
+computed at and is only served while they are unchanged, so invalidation
+is a counter bump and nothing is ever scanned or deleted.
+
+Versions are bumped from the ORM unit of work:
+  - before_flush notes the scope a dirty or deleted row is leaving
+  - after_flush notes the scope every new or dirty row is entering and
+    bumps the keys touched by that flush, so the writing session never
+    reads its own stale data
+  - after_commit / after_rollback bump every key of the transaction once
+    more, superseding anything another worker cached while it was open
+  - bulk ORM UPDATE/DELETE statements bump the table's global version
+
+The cache is only active on a shared backend (Redis): with the in-process
+fallback each worker would hold its own counters and never see another
+worker's writes, so every call goes straight to the database.
+
+Writes that bypass the session (Core on a raw connection, SQL scripts)
+are only picked up when the entry expires, or by calling invalidate().
+"""
+
+import functools
+import hashlib
+import inspect
+import json
+import logging
+import os
+import time
+
+from sqlalchemy import event, select
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.orm import Session
+
+from app.services import cache_service
+
+logger = logging.getLogger(__name__)
+
+RESULT_TTL = int(os.getenv("RESULT_CACHE_TTL", "300"))
+ENABLED = os.getenv("RESULT_CACHE_ENABLED", "true").lower() in {"1", "true", "yes"}
+
+_ENTRY_PREFIX = "rc:"
+_VERSION_PREFIX = "rcv:"
+_GLOBAL = "*"
+_PENDING = "result_cache.pending"
+_FLUSH = "result_cache.flush"
+
+# Scope columns read from a written row, in cache-scope terms
+_SCOPE_COLUMNS = (("program", "program_id"), ("project", "project_id"))
+
+
+# ═════════════════════════════════════════════════════════════════════════════
+# VERSIONS
+# ═════════════════════════════════════════════════════════════════════════════
+
+
+def is_enabled() -> bool:
+    """True when results may be cached: enabled and the version counters are shared."""
+    return ENABLED and cache_service.is_shared_backend()
+
+
+def _version_key(kind: str, scope_id, table: str) -> str:
+    if kind == _GLOBAL:
+        return f"{_VERSION_PREFIX}{_GLOBAL}:{table}"
+    return f"{_VERSION_PREFIX}{kind}:{scope_id}:{table}"
+
+
+def _seed_value() -> int:
+    # A counter that was lost (flush, eviction) restarts from the clock, not
+    # from 0, so entries stamped before the loss can never match again.
+    return time.time_ns() // 1000
+
+
+def _version_token(scope_id, tags) -> str:
+    keys = []
+    for kind, table in tags:
+        keys.append(_version_key(kind, scope_id, table))
+        keys.append(_version_key(_GLOBAL, None, table))
+    values = cache_service.get_counters(keys)
+    for i, value in enumerate(values):
+        if value is None:
+            cache_service.set_counter(keys[i], _seed_value(), nx=True)
+            values[i] = cache_service.get_counters([keys[i]])[0]
+    return ".".join(str(v) for v in values)
+
+
+def version_token(kind: str, scope_id, tags) -> str:
+    """Current versions of *tags* (models or table names) for one scope."""
+    return _version_token(scope_id, [(kind, table) for table in _table_names(tags)])
+
+
+def _bump(keys) -> None:
+    for key in keys:
+        try:
+            if cache_service.incr_counter(key) == 1:
+                # Was missing: never restart a lost counter from a small value
+                cache_service.set_counter(key, _seed_value())
+        except Exception:
+            logger.warning("Result cache version bump failed for %s", key, exc_info=True)
+
+
+def invalidate(*tables, program_id=None, project_id=None) -> None:
+    """Bump the versions of *tables* for one scope, or globally if none is given.
+
+    For writes the session hooks cannot see (raw connections, scripts).
+    """
+    if program_id is None and project_id is None:
+        _bump([_version_key(_GLOBAL, None, t) for t in tables])
+        return
+    keys = []
+    if program_id is not None:
+        keys += [_version_key("program", program_id, t) for t in tables]
+    if project_id is not None:
+        keys += [_version_key("project", project_id, t) for t in tables]
+    _bump(keys)
+
+
+def reset() -> None:
+    """Drop every cached result and version (tests, maintenance)."""
+    cache_service.delete_pattern(f"{_ENTRY_PREFIX}*")
+    cache_service.delete_pattern(f"{_VERSION_PREFIX}*")
+
+
+# ═════════════════════════════════════════════════════════════════════════════
+# CACHED CALLS
+# ═════════════════════════════════════════════════════════════════════════════
+
+
+def _table_names(tags) -> list[str]:
+    return sorted({tag if isinstance(tag, str) else tag.__table__.name for tag in tags})
+
+
+def _params_digest(params: dict) -> str:
+    raw = json.dumps(params, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()[:24]
+
+
+def _cacheable(value) -> bool:
+    if not isinstance(value, dict) or "error" in value:
+        return False
+    try:
+        # Only cache what survives the JSON round trip unchanged (no tuples,
+        # int dict keys or datetimes), so a hit is identical to a miss.
+        return json.loads(json.dumps(value)) == value
+    except (TypeError, ValueError):
+        return False
+
+
+def cached(name: str, *, scope: str, tags, ttl: int | None = None):
+    """Decorator: cache a function's dict result per scope and arguments.
+
+    Args:
+        name: Stable cache namespace for the function.
+        scope: Name of the argument holding the scope id; "program_id" or
+            "project_id".
+        tags: Models (or table names) the result is derived from. A dict
+            {"program": (...), "project": (...)} is for readers that filter
+            some tables by the other column with the same id.
+        ttl: Upper bound on staleness for time-dependent fields.
+
+    Error payloads ({"error": ...}) and values that do not round-trip
+    through JSON are returned but not cached. The undecorated function is
+    available as ``fn.uncached``.
+    """
+    kind = {"program_id": "program", "project_id": "project"}[scope]
+    if not isinstance(tags, dict):
+        tags = {kind: tags}
+    tags = [(k, table) for k, models in sorted(tags.items()) for table in _table_names(models)]
+    ttl = RESULT_TTL if ttl is None else ttl
+
+    def decorator(fn):
+        signature = inspect.signature(fn)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not is_enabled():
+                return fn(*args, **kwargs)
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            params = {
+                k: v for k, v in bound.arguments.items()
+                if k not in ("cls", "self", scope)
+            }
+            scope_id = bound.arguments.get(scope)
+            if scope_id is None:
+                return fn(*args, **kwargs)
+
+            key = f"{_ENTRY_PREFIX}{name}:{kind}:{scope_id}:{_params_digest(params)}"
+            try:
+                token = _version_token(scope_id, tags)
+                entry = cache_service.get_cached(key)
+            except Exception:
+                logger.warning("Result cache unavailable for %s", name, exc_info=True)
+                return fn(*args, **kwargs)
+            if isinstance(entry, dict) and entry.get("v") == token:
+                return entry["data"]
+
+            value = fn(*args, **kwargs)
+            if _cacheable(value):
+                try:
+                    cache_service.set_cached(key, {"v": token, "data": value}, ttl=ttl)
+                except Exception:
+                    logger.debug("Result cache store failed for %s", name, exc_info=True)
+            return value
+
+        wrapper.uncached = fn
+        return wrapper
+
+    return decorator
+
+
+# ═════════════════════════════════════════════════════════════════════════════
+# INVALIDATION (session hooks)
+# ═════════════════════════════════════════════════════════════════════════════
+
+
+def _parents() -> dict:
+    """Tables without scope columns → (fk attribute, parent model) carrying them."""
+    from app.models.cutover import CutoverPlan, HypercareIncident, HypercareSLA
+    from app.models.run_sustain import HypercareExitCriteria
+    from app.models.testing import TestCase, TestCycle, TestExecution, TestPlan, TestStep
+
+    return {
+        TestExecution: ("test_case_id", TestCase),
+        TestStep: ("test_case_id", TestCase),
+        TestCycle: ("plan_id", TestPlan),
+        HypercareIncident: ("cutover_plan_id", CutoverPlan),
+        HypercareSLA: ("cutover_plan_id", CutoverPlan),
+        HypercareExitCriteria: ("cutover_plan_id", CutoverPlan),
+    }
+
+
+def _tables_of(obj) -> list[str]:
+    return [t.name for t in sa_inspect(obj).mapper.tables]
+
+
+def _collect(session, objs, pending: set) -> None:
+    """Add the (kind, scope_id, table) version keys touched by *objs*."""
+    parents = _parents()
+    by_parent: dict = {}
+    for obj in objs:
+        tables = _tables_of(obj)
+        scoped = False
+        for kind, column in _SCOPE_COLUMNS:
+            scope_id = getattr(obj, column, None) if hasattr(type(obj), column) else None
+            if scope_id is not None:
+                scoped = True
+                pending.update(_version_key(kind, scope_id, t) for t in tables)
+        if scoped:
+            continue
+        via = parents.get(type(obj))
+        fk = getattr(obj, via[0], None) if via else None
+        if fk is None:
+            pending.update(_version_key(_GLOBAL, None, t) for t in tables)
+        else:
+            by_parent.setdefault(via[1], {}).setdefault(fk, set()).update(tables)
+
+    if not by_parent:
+        return
+    conn = session.connection()
+    for parent, tables_by_id in by_parent.items():
+        rows = conn.execute(
+            select(parent.id, parent.program_id, parent.project_id)
+            .where(parent.id.in_(list(tables_by_id)))
+        )
+        seen = set()
+        for parent_id, program_id, project_id in rows:
+            seen.add(parent_id)
+            for table in tables_by_id[parent_id]:
+                if program_id is not None:
+                    pending.add(_version_key("program", program_id, table))
+                if project_id is not None:
+                    pending.add(_version_key("project", project_id, table))
+        for parent_id in set(tables_by_id) - seen:
+            pending.update(_version_key(_GLOBAL, None, t) for t in tables_by_id[parent_id])
+
+
+def _pending(session) -> set:
+    """Version keys touched by the whole transaction (bumped again at its end)."""
+    return session.info.setdefault(_PENDING, set())
+
+
+def _flushing(session) -> set:
+    """Version keys touched by the flush in progress."""
+    return session.info.setdefault(_FLUSH, set())
+
+
+def _before_flush(session, flush_context, instances):
+    if not is_enabled():
+        return
+    leaving = list(session.deleted) + [o for o in session.dirty if session.is_modified(o)]
+    if leaving:
+        # Old values: the scope a row moves away from must be bumped as well
+        pending = _flushing(session)
+        for obj in leaving:
+            state = sa_inspect(obj)
+            for kind, column in _SCOPE_COLUMNS:
+                if column in state.attrs and state.attrs[column].history.deleted:
+                    old = state.attrs[column].history.deleted[0]
+                    if old is not None:
+                        pending.update(_version_key(kind, old, t) for t in _tables_of(obj))
+        _collect(session, leaving, pending)
+
+
+def _after_flush(session, flush_context):
+    if not is_enabled():
+        return
+    entering = list(session.new) + [o for o in session.dirty if session.is_modified(o)]
+    touched = session.info.pop(_FLUSH, None) or set()
+    _collect(session, entering, touched)
+    if touched:
+        # Only this flush's keys; earlier flushes of the transaction were bumped already
+        _bump(sorted(touched))
+        _pending(session).update(touched)
+
+
+def _end_of_transaction(session):
+    session.info.pop(_FLUSH, None)
+    pending = session.info.pop(_PENDING, None)
+    if pending:
+        _bump(sorted(pending))
+
+
+def _do_orm_execute(orm_execute_state):
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete) or not is_enabled():
+        return
+    table = getattr(orm_execute_state.statement, "table", None)
+    name = getattr(table, "name", None)
+    if name:
+        key = _version_key(_GLOBAL, None, name)
+        _pending(orm_execute_state.session).add(key)
+        _bump([key])
+
+
+def init_result_cache():
+    """Register the session hooks (idempotent; called from create_app)."""
+    if event.contains(Session, "after_flush", _after_flush):
+        return
+    event.listen(Session, "before_flush", _before_flush)
+    event.listen(Session, "after_flush", _after_flush)
+    event.listen(Session, "after_commit", _end_of_transaction)
+    event.listen(Session, "after_rollback", _end_of_transaction)
+    event.listen(Session, "do_orm_execute", _do_orm_execute)
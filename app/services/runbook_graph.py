@@ -0,0 +1,563 @@
+"""
+Cutover — in-memory runbook graph and critical-path engine.
+
+Holds one plan's RunbookTask durations and TaskDependency edges as
+adjacency sets kept in topological order, together with two longest-path
+values per task:
+  - head: earliest finish (longest chain ending at the task, inclusive)
+  - tail: longest chain starting at the task, inclusive
+From those the makespan, critical path and slack/float of every task are
+direct reads, with no traversal of the whole plan.
+
+Edits are applied incrementally and every traversal is iterative:
+  - a duration/status change re-propagates heads downstream and tails
+    upstream, stopping wherever a value does not change
+  - a new edge that contradicts the current order re-sorts only the window
+    between its endpoints (Pearce–Kelly), which is also where a cycle
+    would be found
+  - removed edges and tasks propagate the same way
+
+Graphs are cached per plan (RUNBOOK_GRAPHS per process). Session hooks
+record task and dependency writes per plan; after commit a per-plan
+version counter in cache_service is bumped and, if no other writer bumped
+it in between, the cached graph is patched in place. Otherwise it is
+dropped and the next read rebuilds it with two queries. A cached graph is
+also rebuilt after RUNBOOK_GRAPH_TTL seconds, for writes the hooks cannot
+see. Caching needs a shared backend (Redis): per-process counters never
+see another worker's commits, so without one every read loads the plan.
+
+Usage:
+    from app.services import runbook_graph
+    graph = runbook_graph.get_graph(plan_id, tenant_id)
+    path = graph.critical_path()
+    floats = graph.schedule()
+"""
+
+import heapq
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+
+from sqlalchemy import event, select
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.orm import Session
+
+from app.models import db
+from app.models.cutover import CutoverScopeItem, RunbookTask, TaskDependency
+from app.services import cache_service
+
+logger = logging.getLogger(__name__)
+
+MAX_PLANS = int(os.getenv("RUNBOOK_GRAPHS", "16"))
+TTL_SECONDS = int(os.getenv("RUNBOOK_GRAPH_TTL", "300"))
+
+_VERSION_PREFIX = "rbg:"
+_PENDING = "runbook_graph.pending"
+_WEIGHT_FIELDS = ("planned_duration_min", "status", "actual_duration_min")
+
+_graphs: OrderedDict = OrderedDict()  # (plan_id, tenant_id) → RunbookGraph
+_lock = threading.Lock()
+
+
+def task_weight(planned_duration_min, status, actual_duration_min) -> int:
+    """Minutes a task contributes to the longest path.
+
+    Planned duration (1 when unset); a completed task counts its recorded
+    actual duration and a skipped task counts nothing, so the war-room
+    critical path follows what really happened.
+    """
+    if status == "skipped":
+        return 0
+    if status == "completed" and actual_duration_min is not None:
+        return max(int(actual_duration_min), 0)
+    return planned_duration_min or 1
+
+
+def _cycle_error(predecessor_id, successor_id) -> ValueError:
+    return ValueError(
+        f"Circular dependency detected in RunbookTask graph: "
+        f"task {predecessor_id} → task {successor_id} forms a cycle. "
+        "Resolve the circular dependency before calculating the critical path."
+    )
+
+
+class RunbookGraph:
+    """Tasks and dependencies of one cutover plan with longest-path state."""
+
+    def __init__(self, plan_id: int, tenant_id: int | None = None):
+        self.plan_id = plan_id
+        self.tenant_id = tenant_id
+        self.version = None
+        self.built_at = time.monotonic()
+        self.weight: dict = {}
+        self.succ: dict = {}
+        self.pred: dict = {}
+        self.pos: dict = {}
+        self.head: dict = {}
+        self.tail: dict = {}
+        self._next_pos = 0
+        self._makespan = None
+        self.lock = threading.RLock()
+
+    @classmethod
+    def load(cls, plan_id: int, tenant_id: int | None = None) -> "RunbookGraph":
+        """Build the graph of a plan from one task and one dependency query."""
+        task_ids = (
+            select(RunbookTask.id)
+            .join(CutoverScopeItem, CutoverScopeItem.id == RunbookTask.scope_item_id)
+            .where(CutoverScopeItem.cutover_plan_id == plan_id)
+        )
+        if tenant_id is not None:
+            task_ids = task_ids.where(RunbookTask.tenant_id == tenant_id)
+        tasks = db.session.execute(
+            task_ids.add_columns(
+                RunbookTask.planned_duration_min, RunbookTask.status, RunbookTask.actual_duration_min,
+            )
+        ).all()
+        edges = db.session.execute(
+            select(TaskDependency.predecessor_id, TaskDependency.successor_id)
+            .where(TaskDependency.predecessor_id.in_(task_ids))
+        ).all()
+
+        graph = cls(plan_id, tenant_id)
+        graph._build(
+            {row.id: task_weight(row.planned_duration_min, row.status, row.actual_duration_min) for row in tasks},
+            edges,
+        )
+        return graph
+
+    def __len__(self):
+        return len(self.weight)
+
+    # ── Full build ──────────────────────────────────────────────────────
+
+    def _build(self, weights: dict, edges) -> None:
+        self.weight = dict(weights)
+        self.succ = {tid: set() for tid in weights}
+        self.pred = {tid: set() for tid in weights}
+        for predecessor_id, successor_id in edges:
+            if predecessor_id in weights and successor_id in weights:
+                self.succ[predecessor_id].add(successor_id)
+                self.pred[successor_id].add(predecessor_id)
+
+        order = self._topological_order()
+        self.pos = {tid: i for i, tid in enumerate(order)}
+        self._next_pos = len(order)
+        self.head = {}
+        for tid in order:
+            self.head[tid] = self._head_of(tid)
+        self.tail = {}
+        for tid in reversed(order):
+            self.tail[tid] = self._tail_of(tid)
+        self._makespan = None
+
+    def _topological_order(self) -> list:
+        """Kahn's algorithm; raises ValueError naming an edge of a cycle."""
+        in_degree = {tid: len(preds) for tid, preds in self.pred.items()}
+        queue = deque(sorted(tid for tid, degree in in_degree.items() if degree == 0))
+        order = []
+        while queue:
+            node = queue.popleft()
+            order.append(node)
+            for succ in sorted(self.succ[node]):
+                in_degree[succ] -= 1
+                if in_degree[succ] == 0:
+                    queue.append(succ)
+        if len(order) < len(self.weight):
+            remaining = set(self.weight) - set(order)
+            # Every leftover node keeps a leftover predecessor: walking them
+            # back must revisit a node, and that node sits on a cycle.
+            node, seen = min(remaining), set()
+            while node not in seen:
+                seen.add(node)
+                node = min(p for p in self.pred[node] if p in remaining)
+            raise _cycle_error(min(p for p in self.pred[node] if p in remaining), node)
+        return order
+
+    def _head_of(self, tid) -> int:
+        return self.weight[tid] + max((self.head[p] for p in self.pred[tid]), default=0)
+
+    def _tail_of(self, tid) -> int:
+        return self.weight[tid] + max((self.tail[s] for s in self.succ[tid]), default=0)
+
+    # ── Incremental updates ─────────────────────────────────────────────
+
+    def _propagate(self, heads=(), tails=()) -> None:
+        """Recompute heads downstream / tails upstream until values settle."""
+        self._makespan = None
+        heap = [(self.pos[t], t) for t in set(heads) if t in self.weight]
+        heapq.heapify(heap)
+        queued = {t for _pos, t in heap}
+        while heap:
+            _pos, tid = heapq.heappop(heap)
+            queued.discard(tid)
+            value = self._head_of(tid)
+            if self.head.get(tid) == value:
+                continue
+            self.head[tid] = value
+            for succ in self.succ[tid]:
+                if succ not in queued:
+                    queued.add(succ)
+                    heapq.heappush(heap, (self.pos[succ], succ))
+
+        heap = [(-self.pos[t], t) for t in set(tails) if t in self.weight]
+        heapq.heapify(heap)
+        queued = {t for _pos, t in heap}
+        while heap:
+            _pos, tid = heapq.heappop(heap)
+            queued.discard(tid)
+            value = self._tail_of(tid)
+            if self.tail.get(tid) == value:
+                continue
+            self.tail[tid] = value
+            for pred in self.pred[tid]:
+                if pred not in queued:
+                    queued.add(pred)
+                    heapq.heappush(heap, (-self.pos[pred], pred))
+
+    def set_task(self, task_id: int, weight: int) -> None:
+        """Add a task or change its weight."""
+        if task_id not in self.weight:
+            self.weight[task_id] = weight
+            self.succ[task_id] = set()
+            self.pred[task_id] = set()
+            self.pos[task_id] = self._next_pos
+            self._next_pos += 1
+        elif self.weight[task_id] == weight:
+            return
+        else:
+            self.weight[task_id] = weight
+        self._propagate(heads=[task_id], tails=[task_id])
+
+    def remove_task(self, task_id: int) -> None:
+        if task_id not in self.weight:
+            return
+        preds = self.pred.pop(task_id)
+        succs = self.succ.pop(task_id)
+        for pred in preds:
+            self.succ[pred].discard(task_id)
+        for succ in succs:
+            self.pred[succ].discard(task_id)
+        for table in (self.weight, self.pos, self.head, self.tail):
+            table.pop(task_id, None)
+        self._propagate(heads=succs, tails=preds)
+
+    def add_edge(self, predecessor_id: int, successor_id: int) -> None:
+        """Add predecessor → successor; raises ValueError if it closes a cycle."""
+        if predecessor_id not in self.weight or successor_id not in self.weight:
+            return
+        if successor_id in self.succ[predecessor_id]:
+            return
+        if predecessor_id == successor_id:
+            raise _cycle_error(predecessor_id, successor_id)
+        if self.pos[predecessor_id] > self.pos[successor_id]:
+            self._reorder(predecessor_id, successor_id)
+        self.succ[predecessor_id].add(successor_id)
+        self.pred[successor_id].add(predecessor_id)
+        self._propagate(heads=[successor_id], tails=[predecessor_id])
+
+    def remove_edge(self, predecessor_id: int, successor_id: int) -> None:
+        if successor_id not in self.succ.get(predecessor_id, ()):
+            return
+        self.succ[predecessor_id].discard(successor_id)
+        self.pred[successor_id].discard(predecessor_id)
+        self._propagate(heads=[successor_id], tails=[predecessor_id])
+
+    def _reorder(self, predecessor_id: int, successor_id: int) -> None:
+        """Pearce–Kelly: repair the order for a new edge that points backwards."""
+        lower, upper = self.pos[successor_id], self.pos[predecessor_id]
+        forward, stack = set(), [successor_id]
+        while stack:
+            node = stack.pop()
+            if node == predecessor_id:
+                raise _cycle_error(predecessor_id, successor_id)
+            if node in forward:
+                continue
+            forward.add(node)
+            stack.extend(s for s in self.succ[node] if self.pos[s] <= upper and s not in forward)
+        backward, stack = set(), [predecessor_id]
+        while stack:
+            node = stack.pop()
+            if node in backward:
+                continue
+            backward.add(node)
+            stack.extend(p for p in self.pred[node] if self.pos[p] >= lower and p not in backward)
+
+        slots = sorted(self.pos[n] for n in forward | backward)
+        moved = sorted(backward, key=self.pos.__getitem__) + sorted(forward, key=self.pos.__getitem__)
+        for slot, node in zip(slots, moved):
+            self.pos[node] = slot
+
+    def apply(self, ops) -> None:
+        """Replay the write log recorded by the session hooks."""
+        with self.lock:
+            for op in ops:
+                kind = op[0]
+                if kind == "task":
+                    _kind, task_id, tenant_id, weight = op
+                    if self.tenant_id is not None and tenant_id != self.tenant_id:
+                        self.remove_task(task_id)
+                    else:
+                        self.set_task(task_id, weight)
+                elif kind == "drop_task":
+                    self.remove_task(op[1])
+                elif kind == "edge":
+                    self.add_edge(op[1], op[2])
+                elif kind == "drop_edge":
+                    self.remove_edge(op[1], op[2])
+
+    # ── Reads ───────────────────────────────────────────────────────────
+
+    @property
+    def makespan(self) -> int:
+        """Length in minutes of the longest chain of the plan."""
+        if self._makespan is None:
+            self._makespan = max(self.head.values(), default=0)
+        return self._makespan
+
+    def slack(self, task_id: int) -> int:
+        """Minutes the task can slip without moving the plan's finish."""
+        return self.makespan - (self.head[task_id] + self.tail[task_id] - self.weight[task_id])
+
+    def critical_path(self) -> list[int]:
+        """Task ids of one longest chain, start to end (lowest ids on ties)."""
+        with self.lock:
+            if not self.weight:
+                return []
+            span = self.makespan
+            current = min(t for t, preds in self.pred.items() if not preds and self.tail[t] == span)
+            path = [current]
+            while True:
+                remaining = self.tail[current] - self.weight[current]
+                following = [s for s in self.succ[current] if self.tail[s] == remaining]
+                if remaining <= 0 or not following:
+                    return path
+                current = min(following)
+                path.append(current)
+
+    def schedule(self) -> dict:
+        """{task_id: earliest/latest start and finish (minutes from plan start) and slack}."""
+        with self.lock:
+            span = self.makespan
+            result = {}
+            for tid, weight in self.weight.items():
+                latest_start = span - self.tail[tid]
+                slack = latest_start - (self.head[tid] - weight)
+                result[tid] = {
+                    "earliest_start": self.head[tid] - weight,
+                    "earliest_finish": self.head[tid],
+                    "latest_start": latest_start,
+                    "latest_finish": latest_start + weight,
+                    "slack": slack,
+                    "critical": slack == 0,
+                }
+            return result
+
+
+# ═════════════════════════════════════════════════════════════════════════════
+# CACHE
+# ═════════════════════════════════════════════════════════════════════════════
+
+
+def _version_key(plan_id: int) -> str:
+    return f"{_VERSION_PREFIX}{plan_id}"
+
+
+def _seed_value() -> int:
+    return time.time_ns() // 1000
+
+
+def _cacheable() -> bool:
+    """Graphs may be reused only when the version counters are shared by all workers."""
+    return cache_service.is_shared_backend()
+
+
+def _current_version(plan_id: int) -> int:
+    key = _version_key(plan_id)
+    value = cache_service.get_counters([key])[0]
+    if value is None:
+        cache_service.set_counter(key, _seed_value(), nx=True)
+        value = cache_service.get_counters([key])[0]
+    return int(value)  # counters come back as strings
+
+
+def get_graph(plan_id: int, tenant_id: int | None = None) -> RunbookGraph:
+    """Current graph of a plan, rebuilt when another writer changed it.
+
+    Raises ValueError when the plan's dependencies contain a cycle.
+    """
+    session = db.session
+    if session.autoflush and (session.new or session.dirty or session.deleted):
+        session.flush()
+    if plan_id in session.info.get(_PENDING, {}) or not _cacheable():
+        # Uncommitted runbook writes: a private graph sees them, the shared one must not
+        return RunbookGraph.load(plan_id, tenant_id)
+
+    version = _current_version(plan_id)
+    key = (plan_id, tenant_id)
+    with _lock:
+        graph = _graphs.get(key)
+        if (graph is not None and graph.version == version
+                and time.monotonic() - graph.built_at < TTL_SECONDS):
+            _graphs.move_to_end(key)
+            return graph
+
+    graph = RunbookGraph.load(plan_id, tenant_id)
+    graph.version = version
+    with _lock:
+        _graphs[key] = graph
+        _graphs.move_to_end(key)
+        while len(_graphs) > MAX_PLANS:
+            _graphs.popitem(last=False)
+    logger.debug("Runbook graph rebuilt for plan %s (%d tasks)", plan_id, len(graph))
+    return graph
+
+
+def reset() -> None:
+    """Drop every cached graph and version (tests, maintenance)."""
+    with _lock:
+        _graphs.clear()
+    cache_service.delete_pattern(f"{_VERSION_PREFIX}*")
+
+
+# ═════════════════════════════════════════════════════════════════════════════
+# SESSION HOOKS
+# ═════════════════════════════════════════════════════════════════════════════
+
+
+def _pending(session) -> dict:
+    """{plan_id: [op, ...]} — None for a plan whose graph must be rebuilt."""
+    return session.info.setdefault(_PENDING, {})
+
+
+def _record(session, plan_id, op) -> None:
+    if plan_id is None:
+        return
+    pending = _pending(session)
+    ops = pending.setdefault(plan_id, [])
+    if ops is not None and op is not None:
+        ops.append(op)
+    elif op is None:
+        pending[plan_id] = None
+
+
+def _plans_of_tasks(session, task_ids) -> dict:
+    if not task_ids:
+        return {}
+    return dict(session.connection().execute(
+        select(RunbookTask.id, CutoverScopeItem.cutover_plan_id)
+        .join(CutoverScopeItem, CutoverScopeItem.id == RunbookTask.scope_item_id)
+        .where(RunbookTask.id.in_(task_ids))
+    ).all())
+
+
+def _plans_of_scope_items(session, scope_item_ids) -> dict:
+    if not scope_item_ids:
+        return {}
+    return dict(session.connection().execute(
+        select(CutoverScopeItem.id, CutoverScopeItem.cutover_plan_id)
+        .where(CutoverScopeItem.id.in_(scope_item_ids))
+    ).all())
+
+
+def _old_value(obj, attr):
+    history = sa_inspect(obj).attrs[attr].history
+    if history.deleted:
+        return history.deleted[0]
+    return getattr(obj, attr)
+
+
+def _before_flush(session, flush_context, instances):
+    """Record deletions and edge/plan moves while the old rows still exist."""
+    tasks, edges = [], []
+    for obj in session.deleted:
+        if isinstance(obj, RunbookTask):
+            tasks.append(obj)
+        elif isinstance(obj, TaskDependency):
+            edges.append(obj)
+    for obj in session.dirty:
+        if isinstance(obj, TaskDependency) and session.is_modified(obj):
+            edges.append(obj)
+        elif isinstance(obj, RunbookTask) and sa_inspect(obj).attrs.scope_item_id.history.deleted:
+            tasks.append(obj)
+    if not tasks and not edges:
+        return
+
+    with session.no_autoflush:
+        plans = _plans_of_tasks(session, {_old_value(dep, "predecessor_id") for dep in edges} | {t.id for t in tasks})
+    for task in tasks:
+        _record(session, plans.get(task.id), ("drop_task", task.id))
+    for dep in edges:
+        old = (_old_value(dep, "predecessor_id"), _old_value(dep, "successor_id"))
+        _record(session, plans.get(old[0]), ("drop_edge", *old))
+
+
+def _after_flush(session, flush_context):
+    """Record new/changed tasks and new edges under their plan."""
+    tasks, edges = [], []
+    for obj in session.new:
+        if isinstance(obj, RunbookTask):
+            tasks.append(obj)
+        elif isinstance(obj, TaskDependency):
+            edges.append(obj)
+    for obj in session.dirty:
+        if isinstance(obj, TaskDependency) and session.is_modified(obj):
+            edges.append(obj)
+        elif isinstance(obj, RunbookTask):
+            state = sa_inspect(obj)
+            if any(state.attrs[f].history.has_changes() for f in _WEIGHT_FIELDS + ("scope_item_id", "tenant_id")):
+                tasks.append(obj)
+    if not tasks and not edges:
+        return
+
+    scope_plans = _plans_of_scope_items(session, {t.scope_item_id for t in tasks})
+    task_plans = _plans_of_tasks(session, {dep.predecessor_id for dep in edges})
+    for task in tasks:
+        weight = task_weight(task.planned_duration_min, task.status, task.actual_duration_min)
+        _record(session, scope_plans.get(task.scope_item_id), ("task", task.id, task.tenant_id, weight))
+    for dep in edges:
+        _record(session, task_plans.get(dep.predecessor_id), ("edge", dep.predecessor_id, dep.successor_id))
+
+
+def _after_commit(session):
+    pending = session.info.pop(_PENDING, None)
+    if not pending or not _cacheable():
+        return
+    for plan_id, ops in pending.items():
+        try:
+            version = cache_service.incr_counter(_version_key(plan_id))
+            if version == 1:
+                # Lost counter: restart from the clock and let readers rebuild
+                cache_service.set_counter(_version_key(plan_id), _seed_value())
+                version = None
+        except Exception:
+            logger.warning("Runbook graph version bump failed for plan %s", plan_id, exc_info=True)
+            version = None
+        with _lock:
+            for key in [k for k in _graphs if k[0] == plan_id]:
+                graph = _graphs[key]
+                if ops is None or version is None or graph.version != version - 1:
+                    del _graphs[key]
+                    continue
+                try:
+                    graph.apply(ops)
+                    graph.version = version
+                except ValueError:
+                    logger.warning("Runbook graph patch failed for plan %s", plan_id, exc_info=True)
+                    del _graphs[key]
+
+
+def _after_rollback(session):
+    session.info.pop(_PENDING, None)
+
+
+def init_runbook_graph():
+    """Register the session hooks (idempotent; called from create_app)."""
+    if event.contains(Session, "after_flush", _after_flush):
+        return
+    event.listen(Session, "before_flush", _before_flush)
+    event.listen(Session, "after_flush", _after_flush)
+    event.listen(Session, "after_commit", _after_commit)
+    event.listen(Session, "after_rollback", _after_rollback)
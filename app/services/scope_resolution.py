@@ -18,6 +18,7 @@ import logging
 from sqlalchemy import select
 
 from app.models import db
+from app.services import process_closure
 from app.services.helpers.scoped_queries import get_scoped_or_none
 
 logger = logging.getLogger(__name__)
@@ -136,17 +137,8 @@ def _ensure_l3(process_level_id: str, *, project_id: int | None = None) -> str |
     if pl.level == 3:
         return pl.id
 
-    # Walk up the tree until L3 found (handles L4 or deeper)
-    current = pl
-    visited = set()
-    while current and current.parent_id and current.id not in visited:
-        visited.add(current.id)
-        # FK nav: use current.project_id since ProcessLevel always has project_id
-        current = get_scoped_or_none(ProcessLevel, current.parent_id, project_id=current.project_id)
-        if current and current.level == 3:
-            return current.id
-
-    return None
+    # Nearest L3 ancestor (handles L4 or deeper) from the closure table
+    return process_closure.nearest_ancestor_at_level([pl.id], 3).get(pl.id)
 
 
 def _resolve_from_backlog_item(
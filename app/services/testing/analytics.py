@@ -1,5 +1,9 @@
 """Testing analytics and reporting service layer."""
 
+import csv
+import io
+import json
+import tempfile
 from collections import defaultdict
 from datetime import datetime, timedelta, timezone
 
@@ -26,11 +30,22 @@ from app.models.testing import (
     defect_status_filter_values,
 )
 from app.models.workstream import TeamMember
+from app.services import result_cache
+
+# Tables behind the cockpit dashboards (release readiness, go/no-go, cycle
+# risk); a write to any of them marks their served payload stale.
+COCKPIT_TAGS = (
+    ApprovalRecord, ApprovalWorkflow, Defect, ExploreRequirement, PerfTestResult,
+    TestCase, TestCycle, TestExecution, TestPlan, TestStepResult, UATSignOff,
+)
 
 # Canonical set of execution results that represent "not yet executed".
 # Used consistently across Python shaping helpers and SQL case expressions.
 _UNEXECUTED_RESULTS: frozenset = frozenset({None, "", "not_run", "deferred"})
 
+# Target size of each chunk written to a streamed export response.
+_STREAM_CHUNK_SIZE = 64 * 1024
+
 
 def _build_coverage_summary(total: int, covered: int) -> dict:
     """Return a normalised coverage dict from raw totals.
@@ -597,35 +612,6 @@ def _dashboard_cycle_rows(program_id, project_id=None):
     return query.all()
 
 
-def _traceability_test_case_rows(program_id, project_id=None):
-    """Return lightweight test-case rows for traceability matrix payloads."""
-    query = db.session.query(
-        TestCase.id,
-        TestCase.code,
-        TestCase.title,
-        TestCase.test_layer,
-        TestCase.status,
-        TestCase.explore_requirement_id,
-    ).filter(TestCase.program_id == program_id)
-    if project_id is not None:
-        query = query.filter(TestCase.project_id == project_id)
-    return query.all()
-
-
-def _traceability_defect_rows(program_id, project_id=None):
-    """Return lightweight defect rows for traceability matrix payloads."""
-    query = db.session.query(
-        Defect.id,
-        Defect.code,
-        Defect.severity,
-        Defect.status,
-        Defect.test_case_id,
-    ).filter(Defect.program_id == program_id)
-    if project_id is not None:
-        query = query.filter(Defect.project_id == project_id)
-    return query.all()
-
-
 def _pending_approval_rows(program_id, project_id=None, *, limit=None):
     """Return pending approval payload rows plus the total pending count."""
     query = (
@@ -1900,6 +1886,11 @@ def compute_retest_readiness_dashboard(program_id, project_id=None):
     }
 
 
+@result_cache.cached(
+    "testing.dashboard",
+    scope="program_id",
+    tags=(ExploreRequirement, TestCase, TestExecution, TestCycle, TestPlan, Defect),
+)
 def compute_dashboard(program_id, project_id=None):
     """Compute Test Hub KPI dashboard data via SQL aggregates."""
     requirement_ids_sq = _canonical_requirement_query(
@@ -2099,55 +2090,111 @@ def compute_go_no_go(program_id, project_id=None):
     }
 
 
-def compute_traceability_matrix(program_id, source="explore", project_id=None):
-    """Build requirement-to-test-case-to-defect traceability matrix."""
-    test_case_rows = _traceability_test_case_rows(program_id, project_id=project_id)
-    defect_rows = _traceability_defect_rows(program_id, project_id=project_id)
-    tracked_test_case_ids = {int(row.id) for row in test_case_rows if row.id is not None}
+# Requirements per keyset page when streaming the traceability matrix.
+TRACEABILITY_BATCH_SIZE = 500
 
-    defect_payloads_by_test_case = defaultdict(list)
-    total_defects = 0
-    for defect in defect_rows:
-        if not defect.test_case_id:
-            continue
-        test_case_id = int(defect.test_case_id)
-        if test_case_id not in tracked_test_case_ids:
-            continue
-        total_defects += 1
-        defect_payloads_by_test_case[test_case_id].append({
+# Flat column layout for CSV/XLSX matrix exports: one row per
+# requirement x test case x defect, blanks where a level has no children.
+TRACEABILITY_EXPORT_COLUMNS = (
+    "source", "requirement_id", "requirement_code", "requirement_title",
+    "requirement_priority", "requirement_status", "test_case_id", "test_case_code",
+    "test_case_title", "test_layer", "test_case_status", "defect_id", "defect_code",
+    "defect_severity", "defect_status",
+)
+
+
+def _traceability_requirement_pages(query, batch_size):
+    """Yield requirement rows page by page, keyed on ExploreRequirement.id."""
+    last_id = None
+    while True:
+        page_query = query
+        if last_id is not None:
+            page_query = page_query.filter(ExploreRequirement.id > last_id)
+        rows = page_query.order_by(ExploreRequirement.id).limit(batch_size).all()
+        if not rows:
+            return
+        yield rows
+        if len(rows) < batch_size:
+            return
+        last_id = rows[-1].id
+
+
+def _traceability_cases_for_requirements(requirement_ids, program_id, project_id=None):
+    """Return test-case payloads (with defects) keyed by explore requirement id."""
+    case_query = db.session.query(
+        TestCase.id,
+        TestCase.code,
+        TestCase.title,
+        TestCase.test_layer,
+        TestCase.status,
+        TestCase.explore_requirement_id,
+    ).filter(
+        TestCase.program_id == program_id,
+        TestCase.explore_requirement_id.in_(requirement_ids),
+    )
+    if project_id is not None:
+        case_query = case_query.filter(TestCase.project_id == project_id)
+    case_rows = case_query.order_by(TestCase.id).all()
+    if not case_rows:
+        return {}
+
+    defect_query = db.session.query(
+        Defect.id,
+        Defect.code,
+        Defect.severity,
+        Defect.status,
+        Defect.test_case_id,
+    ).filter(
+        Defect.program_id == program_id,
+        Defect.test_case_id.in_([row.id for row in case_rows]),
+    )
+    if project_id is not None:
+        defect_query = defect_query.filter(Defect.project_id == project_id)
+    defects_by_test_case = defaultdict(list)
+    for defect in defect_query.order_by(Defect.id).all():
+        defects_by_test_case[int(defect.test_case_id)].append({
             "id": defect.id,
             "code": defect.code,
             "severity": defect.severity,
             "status": defect.status,
         })
 
-    test_case_payloads_by_requirement = defaultdict(list)
-    requirement_case_stats = defaultdict(lambda: {"total_test_cases": 0, "total_defects": 0})
-    unlinked_test_case_count = 0
-    total_test_cases = 0
-    for row in test_case_rows:
-        total_test_cases += 1
-        linked_defects = defect_payloads_by_test_case.get(int(row.id), [])
-        test_case_payload = {
+    cases_by_requirement = defaultdict(list)
+    for row in case_rows:
+        cases_by_requirement[row.explore_requirement_id].append({
             "id": row.id,
             "code": row.code,
             "title": row.title,
             "test_layer": row.test_layer,
             "status": row.status,
-            "defects": linked_defects,
-        }
-        if row.explore_requirement_id:
-            test_case_payloads_by_requirement[row.explore_requirement_id].append(test_case_payload)
-            requirement_case_stats[row.explore_requirement_id]["total_test_cases"] += 1
-            requirement_case_stats[row.explore_requirement_id]["total_defects"] += len(linked_defects)
-        else:
-            unlinked_test_case_count += 1
+            "defects": defects_by_test_case.get(int(row.id), []),
+        })
+    return cases_by_requirement
+
 
-    matrix = []
-    requirements_with_tests = 0
+def _traceability_entry(source, requirement_payload, test_cases):
+    return {
+        "source": source,
+        "requirement": requirement_payload,
+        "test_cases": test_cases,
+        "total_test_cases": len(test_cases),
+        "total_defects": sum(len(tc["defects"]) for tc in test_cases),
+    }
+
+
+def iter_traceability_matrix(program_id, source="explore", project_id=None, *, batch_size=None):
+    """Yield traceability matrix entries one requirement at a time.
+
+    Requirements are read in keyset pages of ``batch_size`` (legacy rows
+    first, then explore rows, each ordered by id); test cases and defects
+    are fetched per page, so memory stays bounded by one page regardless
+    of program size. Entries have the same shape as
+    ``compute_traceability_matrix()["matrix"]`` items.
+    """
+    batch_size = batch_size or TRACEABILITY_BATCH_SIZE
 
     if source in ("legacy", "both"):
-        legacy_rows_query = db.session.query(
+        legacy_query = db.session.query(
             ExploreRequirement.id,
             ExploreRequirement.legacy_requirement_id,
             ExploreRequirement.code,
@@ -2159,29 +2206,22 @@ def compute_traceability_matrix(program_id, source="explore", project_id=None):
             ExploreRequirement.legacy_requirement_id.isnot(None),
         )
         if project_id is not None:
-            legacy_rows_query = legacy_rows_query.filter(ExploreRequirement.project_id == project_id)
-        legacy_rows = legacy_rows_query.all()
-        for requirement in legacy_rows:
-            linked = test_case_payloads_by_requirement.get(requirement.id, [])
-            linked_stats = requirement_case_stats.get(requirement.id, {"total_test_cases": 0, "total_defects": 0})
-            if linked_stats["total_test_cases"] > 0:
-                requirements_with_tests += 1
-            matrix.append({
-                "source": "legacy",
-                "requirement": {
+            legacy_query = legacy_query.filter(ExploreRequirement.project_id == project_id)
+        for page in _traceability_requirement_pages(legacy_query, batch_size):
+            cases = _traceability_cases_for_requirements(
+                [row.id for row in page], program_id, project_id=project_id,
+            )
+            for requirement in page:
+                yield _traceability_entry("legacy", {
                     "id": requirement.legacy_requirement_id,
                     "code": requirement.code,
                     "title": requirement.title,
                     "priority": requirement.priority,
                     "status": requirement.status,
-                },
-                "test_cases": linked,
-                "total_test_cases": linked_stats["total_test_cases"],
-                "total_defects": linked_stats["total_defects"],
-            })
+                }, cases.get(requirement.id, []))
 
     if source in ("explore", "both"):
-        explore_requirements = _canonical_requirement_query(
+        explore_query = _canonical_requirement_query(
             program_id,
             project_id=project_id,
         ).with_entities(
@@ -2194,15 +2234,13 @@ def compute_traceability_matrix(program_id, source="explore", project_id=None):
             ExploreRequirement.workshop_id,
             ExploreRequirement.impact,
             ExploreRequirement.business_criticality,
-        ).all()
-        for requirement in explore_requirements:
-            linked = test_case_payloads_by_requirement.get(requirement.id, [])
-            linked_stats = requirement_case_stats.get(requirement.id, {"total_test_cases": 0, "total_defects": 0})
-            if linked_stats["total_test_cases"] > 0:
-                requirements_with_tests += 1
-            matrix.append({
-                "source": "explore",
-                "requirement": {
+        )
+        for page in _traceability_requirement_pages(explore_query, batch_size):
+            cases = _traceability_cases_for_requirements(
+                [row.id for row in page], program_id, project_id=project_id,
+            )
+            for requirement in page:
+                yield _traceability_entry("explore", {
                     "id": requirement.id,
                     "code": requirement.code,
                     "title": requirement.title,
@@ -2212,27 +2250,138 @@ def compute_traceability_matrix(program_id, source="explore", project_id=None):
                     "workshop_id": requirement.workshop_id,
                     "impact": getattr(requirement, "impact", None),
                     "business_criticality": getattr(requirement, "business_criticality", None),
-                },
-                "test_cases": linked,
-                "total_test_cases": linked_stats["total_test_cases"],
-                "total_defects": linked_stats["total_defects"],
-            })
+                }, cases.get(requirement.id, []))
 
-    total_requirements = len(matrix)
 
+def traceability_matrix_summary(program_id, project_id=None, *, total_requirements, requirements_with_tests):
+    """Return the matrix summary block; test-case/defect totals come from SQL counts."""
+    case_query = db.session.query(
+        func.count(TestCase.id),
+        func.sum(case((TestCase.explore_requirement_id.is_(None), 1), else_=0)),
+    ).filter(TestCase.program_id == program_id)
+    defect_query = db.session.query(func.count(Defect.id)).join(
+        TestCase, TestCase.id == Defect.test_case_id,
+    ).filter(Defect.program_id == program_id, TestCase.program_id == program_id)
+    if project_id is not None:
+        case_query = case_query.filter(TestCase.project_id == project_id)
+        defect_query = defect_query.filter(
+            Defect.project_id == project_id, TestCase.project_id == project_id,
+        )
+    total_test_cases, unlinked_test_cases = case_query.one()
+
+    return {
+        "total_requirements": total_requirements,
+        "requirements_with_tests": requirements_with_tests,
+        "requirements_without_tests": total_requirements - requirements_with_tests,
+        "test_coverage_pct": round(requirements_with_tests / total_requirements * 100)
+        if total_requirements > 0 else 0,
+        "total_test_cases": total_test_cases or 0,
+        "unlinked_test_cases": unlinked_test_cases or 0,
+        "total_defects": defect_query.scalar() or 0,
+    }
+
+
+def compute_traceability_matrix(program_id, source="explore", project_id=None):
+    """Build requirement-to-test-case-to-defect traceability matrix."""
+    matrix = list(iter_traceability_matrix(program_id, source, project_id=project_id))
     return {
         "program_id": program_id,
         "project_id": project_id,
         "source": source,
         "matrix": matrix,
-        "summary": {
-            "total_requirements": total_requirements,
-            "requirements_with_tests": requirements_with_tests,
-            "requirements_without_tests": total_requirements - requirements_with_tests,
-            "test_coverage_pct": round(requirements_with_tests / total_requirements * 100)
-            if total_requirements > 0 else 0,
-            "total_test_cases": total_test_cases,
-            "unlinked_test_cases": unlinked_test_case_count,
-            "total_defects": total_defects,
-        },
+        "summary": traceability_matrix_summary(
+            program_id,
+            project_id=project_id,
+            total_requirements=len(matrix),
+            requirements_with_tests=sum(1 for entry in matrix if entry["total_test_cases"]),
+        ),
     }
+
+
+def traceability_export_rows(entry):
+    """Flatten one matrix entry into TRACEABILITY_EXPORT_COLUMNS tuples."""
+    requirement = entry["requirement"]
+    head = (
+        entry["source"], requirement["id"], requirement["code"], requirement["title"],
+        requirement["priority"], requirement["status"],
+    )
+    if not entry["test_cases"]:
+        yield head + (None,) * 9
+        return
+    for tc in entry["test_cases"]:
+        case = (tc["id"], tc["code"], tc["title"], tc["test_layer"], tc["status"])
+        if not tc["defects"]:
+            yield head + case + (None,) * 4
+            continue
+        for defect in tc["defects"]:
+            yield head + case + (defect["id"], defect["code"], defect["severity"], defect["status"])
+
+
+def stream_traceability_matrix(program_id, fmt, source="explore", project_id=None):
+    """Yield the traceability matrix as encoded chunks in ``fmt``.
+
+    ``ndjson`` emits one entry per line followed by a ``{"summary": ...}``
+    line; ``csv`` emits the flat export layout in ~64 KiB chunks; ``xlsx``
+    builds a write-only workbook (spooled to a temp file, as the zip
+    container is only complete once closed) and streams the file back.
+    """
+    entries = iter_traceability_matrix(program_id, source, project_id=project_id)
+    stats = {"total": 0, "with_tests": 0}
+
+    def _counted():
+        for entry in entries:
+            stats["total"] += 1
+            if entry["total_test_cases"]:
+                stats["with_tests"] += 1
+            yield entry
+
+    def _summary():
+        return traceability_matrix_summary(
+            program_id,
+            project_id=project_id,
+            total_requirements=stats["total"],
+            requirements_with_tests=stats["with_tests"],
+        )
+
+    if fmt == "ndjson":
+        for entry in _counted():
+            yield json.dumps(entry, default=str) + "\n"
+        yield json.dumps({
+            "program_id": program_id,
+            "project_id": project_id,
+            "source": source,
+            "summary": _summary(),
+        }) + "\n"
+        return
+
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(TRACEABILITY_EXPORT_COLUMNS)
+        for entry in _counted():
+            writer.writerows(traceability_export_rows(entry))
+            if buffer.tell() >= _STREAM_CHUNK_SIZE:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()
+        return
+
+    if fmt == "xlsx":
+        from openpyxl import Workbook
+
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet("Traceability")
+        sheet.append(TRACEABILITY_EXPORT_COLUMNS)
+        for entry in _counted():
+            for row in traceability_export_rows(entry):
+                sheet.append(row)
+        with tempfile.TemporaryFile() as spool:
+            workbook.save(spool)
+            spool.seek(0)
+            while chunk := spool.read(_STREAM_CHUNK_SIZE):
+                yield chunk
+        return
+
+    raise ValueError(f"Unsupported traceability export format: {fmt}")
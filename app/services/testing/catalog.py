@@ -20,6 +20,7 @@ from app.models.testing import (
     TestStep,
     TestSuite,
 )
+from app.services import sequence_allocator
 from app.services.helpers.testing_common import (
     ensure_same_testing_scope,
     paginate_query,
@@ -40,6 +41,18 @@ _CLONE_COPY_FIELDS = (
     "priority", "is_regression", "assigned_to", "assigned_to_id",
 )
 
+
+def reserve_test_case_numbers(program_id, count=1):
+    """Allocate program-wide test case numbers for TC-{SCOPE}-{NNNN} codes.
+
+    Bulk generators reserve one block for all the cases they create.
+    """
+    return sequence_allocator.reserve(
+        f"test_cases:{program_id}", "TC", count,
+        seed=lambda: TestCase.query.filter_by(program_id=program_id).count(),
+    )
+
+
 def list_test_cases(
     program_id,
     *,
@@ -53,6 +66,8 @@ def list_test_cases(
     search=None,
     limit=None,
     offset=None,
+    cursor=None,
+    count=None,
 ):
     """List test cases with pagination and bulk dependency counts."""
     query = TestCase.query.filter_by(program_id=program_id)
@@ -86,7 +101,14 @@ def list_test_cases(
             TestCase.description.ilike(term),
         ))
 
-    cases, total = paginate_query(query.order_by(TestCase.created_at.desc()), limit=limit, offset=offset)
+    cases, page_meta = paginate_query(
+        query,
+        (TestCase.created_at.desc(), TestCase.id.desc()),
+        limit=limit,
+        offset=offset,
+        cursor=cursor,
+        count=count,
+    )
     case_ids = [int(test_case.id) for test_case in cases]
 
     blocked_by_counts = defaultdict(int)
@@ -115,7 +137,7 @@ def list_test_cases(
         data["blocked_by_count"] = blocked_by_counts.get(int(test_case.id), 0)
         data["blocks_count"] = blocks_counts.get(int(test_case.id), 0)
         items.append(data)
-    return {"items": items, "total": total}
+    return {"items": items, **page_meta}
 
 
 def list_test_suites(
@@ -129,6 +151,8 @@ def list_test_suites(
     suite_type=None,
     limit=None,
     offset=None,
+    cursor=None,
+    count=None,
 ):
     """List test suites with project-aware filtering."""
     if suite_type:
@@ -151,8 +175,15 @@ def list_test_suites(
             TestSuite.tags.ilike(term),
         ))
 
-    suites, total = paginate_query(query.order_by(TestSuite.created_at.desc()), limit=limit, offset=offset)
-    return {"items": [suite.to_dict() for suite in suites], "total": total}
+    suites, page_meta = paginate_query(
+        query,
+        (TestSuite.created_at.desc(), TestSuite.id.desc()),
+        limit=limit,
+        offset=offset,
+        cursor=cursor,
+        count=count,
+    )
+    return {"items": [suite.to_dict() for suite in suites], **page_meta}
 
 
 def create_test_suite(program_id, data):
@@ -496,7 +527,7 @@ def clone_test_case(source, overrides=None):
         field_data["title"] = f"Copy of {source.title}"
 
     module = field_data.get("module") or "GEN"
-    field_data["code"] = f"TC-{module.upper()}-{TestCase.query.filter_by(program_id=source.program_id).count() + 1:04d}"
+    field_data["code"] = f"TC-{module.upper()}-{reserve_test_case_numbers(source.program_id)[0]:04d}"
     field_data["status"] = "draft"
     field_data["cloned_from_id"] = source.id
 
@@ -552,6 +583,7 @@ def generate_from_wricef(suite, wricef_ids=None, config_ids=None, scope_item_id=
     if not items:
         raise ValueError("No WRICEF/Config items found")
 
+    numbers = iter(reserve_test_case_numbers(suite.program_id, len(items)))
     created = []
     for item in items:
         is_backlog = isinstance(item, BacklogItem)
@@ -570,7 +602,7 @@ def generate_from_wricef(suite, wricef_ids=None, config_ids=None, scope_item_id=
 
         test_case = TestCase(
             program_id=suite.program_id,
-            code=f"TC-{code_prefix}-{TestCase.query.filter_by(program_id=suite.program_id).count() + 1:04d}",
+            code=f"TC-{code_prefix}-{next(numbers):04d}",
             title=title,
             description=f"Auto-generated from {'WRICEF' if is_backlog else 'Config'} item: {item.title}",
             test_layer="unit",
@@ -634,6 +666,7 @@ def generate_from_process(suite, scope_item_ids, test_level="sit", uat_category=
     if not l3_items:
         raise ValueError("No matching L3 process levels found")
 
+    numbers = iter(reserve_test_case_numbers(suite.program_id, len(l3_items)))
     created = []
     for l3 in l3_items:
         l4_children = ProcessLevel.query.filter_by(parent_id=l3.id, level=4).all()
@@ -649,7 +682,7 @@ def generate_from_process(suite, scope_item_ids, test_level="sit", uat_category=
         scope_code = l3.scope_item_code or l3.code or l3.name[:10]
         test_case = TestCase(
             program_id=suite.program_id,
-            code=f"TC-{scope_code}-{TestCase.query.filter_by(program_id=suite.program_id).count() + 1:04d}",
+            code=f"TC-{scope_code}-{next(numbers):04d}",
             title=f"E2E — {scope_code} — {l3.name}",
             description=f"Auto-generated from process: {l3.name}. Level: {test_level}. Category: {uat_category or 'N/A'}",
             test_layer=test_level,
@@ -0,0 +1,199 @@
+"""Set-based execution history for a program's test cases.
+
+One windowed query (ROW_NUMBER partitioned by test_case_id) returns the
+last N executions of every test case; rows are streamed in chunks of whole
+test cases, so analysing 20k test cases costs one round trip instead of
+one query per test case. Scores for a chunk are computed over a padded
+result matrix (NumPy when available, plain Python otherwise).
+
+Used by FlakyTestDetector, SuiteOptimizer and the flaky-test report and
+dashboard gadget.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from collections.abc import Iterator
+
+from sqlalchemy import func, select
+
+from app.models import db
+from app.models.testing import TestCase, TestCycle, TestExecution
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover — optional dependency
+    np = None
+
+DEFAULT_CHUNK_SIZE = 2000  # test cases per chunk
+
+# Result codes in the score matrix; PAD fills short histories
+_PASS, _FAIL, _OTHER, _PAD = 1, 0, -1, -2
+
+
+class HistoryChunk:
+    """Chronological result/environment sequences for a batch of test cases."""
+
+    __slots__ = ("test_case_ids", "results", "environments")
+
+    def __init__(self):
+        self.test_case_ids: list[int] = []
+        self.results: list[list[str]] = []
+        self.environments: list[list[str | None]] = []
+
+    def __len__(self):
+        return len(self.test_case_ids)
+
+    def append(self, test_case_id: int, newest_first: list[tuple[str, str | None]]):
+        self.test_case_ids.append(test_case_id)
+        self.results.append([r or "not_run" for r, _ in reversed(newest_first)])
+        self.environments.append([env for _, env in reversed(newest_first)])
+
+    def oscillations(self) -> list[tuple[float, int]]:
+        """(flakiness score %, pass↔fail transitions) per test case."""
+        if np is None or not self.results:
+            return [oscillation_score(r) for r in self.results]
+        codes, lengths = self._matrix()
+        effective = codes >= 0
+        flips = (codes[:, 1:] != codes[:, :-1]) & effective[:, 1:] & effective[:, :-1]
+        counts = flips.sum(axis=1)
+        steps = np.maximum(lengths - 1, 1)
+        scores = np.where(lengths >= 2, counts / steps * 100, 0.0)
+        return [(float(s), int(c)) for s, c in zip(scores, counts, strict=True)]
+
+    def pass_rates(self) -> list[float]:
+        """Share of executions in the window that passed, per test case."""
+        if np is None or not self.results:
+            return [pass_rate(r) for r in self.results]
+        codes, lengths = self._matrix()
+        passes = (codes == _PASS).sum(axis=1)
+        return [float(p / n) if n else 0.0 for p, n in zip(passes, lengths, strict=True)]
+
+    def _matrix(self):
+        width = max(len(r) for r in self.results)
+        codes = np.full((len(self.results), width), _PAD, dtype=np.int8)
+        for row, results in enumerate(self.results):
+            codes[row, :len(results)] = [_code(r) for r in results]
+        lengths = np.fromiter((len(r) for r in self.results), dtype=np.int32, count=len(self.results))
+        return codes, lengths
+
+
+def _code(result: str) -> int:
+    if result == "pass":
+        return _PASS
+    if result == "fail":
+        return _FAIL
+    return _OTHER
+
+
+def oscillation_score(results: list[str]) -> tuple[float, int]:
+    """Compute oscillation-based flakiness score for one chronological sequence."""
+    if len(results) < 2:
+        return 0.0, 0
+    oscillations = 0
+    for i in range(1, len(results)):
+        prev, curr = results[i - 1], results[i]
+        # Count pass↔fail transitions (ignore not_run/blocked/deferred)
+        effective = {"pass", "fail"}
+        if prev in effective and curr in effective and prev != curr:
+            oscillations += 1
+    score = (oscillations / (len(results) - 1)) * 100
+    return score, oscillations
+
+
+def pass_rate(results: list[str]) -> float:
+    return sum(1 for r in results if r == "pass") / len(results) if results else 0.0
+
+
+def environment_correlation(results: list[str], environments: list[str | None]) -> dict | None:
+    """Check if failures correlate with a specific environment."""
+    env_results = defaultdict(lambda: {"pass": 0, "fail": 0, "other": 0})
+    for result, env in zip(results, environments, strict=True):
+        env = env or "unknown"
+        if result in ("pass", "fail"):
+            env_results[env][result] += 1
+        else:
+            env_results[env]["other"] += 1
+
+    if len(env_results) < 2:
+        return None
+
+    # Find environment with highest fail ratio
+    worst = None
+    worst_ratio = 0
+    for env, counts in env_results.items():
+        total = counts["pass"] + counts["fail"]
+        if total == 0:
+            continue
+        fail_ratio = counts["fail"] / total
+        if fail_ratio > worst_ratio:
+            worst_ratio = fail_ratio
+            worst = env
+
+    if worst and worst_ratio > 0.5:
+        return {"environment": worst, "fail_ratio": round(worst_ratio, 2)}
+    return None
+
+
+def last_n_executions_query(program_id: int, window: int, test_case_ids=None):
+    """
+    SELECT the newest *window* executions per test case of a program.
+
+    Rows: (test_case_id, rn, result, environment), ordered by test case then
+    recency (rn = 1 is the newest).
+    """
+    ranked = (
+        select(
+            TestExecution.test_case_id,
+            TestExecution.result,
+            TestCycle.environment,
+            func.row_number().over(
+                partition_by=TestExecution.test_case_id,
+                order_by=(TestExecution.executed_at.desc().nulls_last(), TestExecution.id.desc()),
+            ).label("rn"),
+        )
+        .join(TestCase, TestCase.id == TestExecution.test_case_id)
+        .outerjoin(TestCycle, TestCycle.id == TestExecution.cycle_id)
+        .where(TestCase.program_id == program_id)
+    )
+    if test_case_ids is not None:
+        ranked = ranked.where(TestExecution.test_case_id.in_(list(test_case_ids)))
+    ranked = ranked.subquery()
+    return (
+        select(ranked.c.test_case_id, ranked.c.rn, ranked.c.result, ranked.c.environment)
+        .where(ranked.c.rn <= window)
+        .order_by(ranked.c.test_case_id, ranked.c.rn)
+    )
+
+
+def iter_history_chunks(
+    program_id: int,
+    *,
+    window: int,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    test_case_ids=None,
+) -> Iterator[HistoryChunk]:
+    """
+    Stream the last *window* executions of every test case in *program_id*.
+
+    Test cases without executions are not yielded. A test case's history is
+    never split across chunks.
+    """
+    stmt = last_n_executions_query(program_id, window, test_case_ids)
+    rows = db.session.execute(stmt.execution_options(yield_per=1000))
+
+    chunk = HistoryChunk()
+    current_id, current = None, []
+    for test_case_id, _rn, result, environment in rows:
+        if test_case_id != current_id:
+            if current:
+                chunk.append(current_id, current)
+                if len(chunk) >= chunk_size:
+                    yield chunk
+                    chunk = HistoryChunk()
+            current_id, current = test_case_id, []
+        current.append((result, environment))
+    if current:
+        chunk.append(current_id, current)
+    if len(chunk):
+        yield chunk
@@ -35,6 +35,8 @@ def list_defects(
     search=None,
     limit=None,
     offset=None,
+    cursor=None,
+    count=None,
 ):
     query = Defect.query.filter_by(program_id=program_id)
     if project_id is not None:
@@ -62,11 +64,28 @@ def list_defects(
             Defect.description.ilike(term),
         ))
 
-    defects, total = paginate_query(query.order_by(Defect.created_at.desc()), limit=limit, offset=offset)
-    return {"items": [defect.to_dict() for defect in defects], "total": total}
+    defects, page_meta = paginate_query(
+        query,
+        (Defect.created_at.desc(), Defect.id.desc()),
+        limit=limit,
+        offset=offset,
+        cursor=cursor,
+        count=count,
+    )
+    return {"items": [defect.to_dict() for defect in defects], **page_meta}
 
 
-def list_test_runs(cycle_id, *, run_type=None, status=None, result=None, limit=None, offset=None):
+def list_test_runs(
+    cycle_id,
+    *,
+    run_type=None,
+    status=None,
+    result=None,
+    limit=None,
+    offset=None,
+    cursor=None,
+    count=None,
+):
     query = TestRun.query.filter_by(cycle_id=cycle_id)
     if run_type:
         query = query.filter_by(run_type=run_type)
@@ -74,8 +93,15 @@ def list_test_runs(cycle_id, *, run_type=None, status=None, result=None, limit=N
         query = query.filter_by(status=status)
     if result:
         query = query.filter_by(result=result)
-    runs, total = paginate_query(query.order_by(TestRun.created_at.desc()), limit=limit, offset=offset)
-    return {"items": [run.to_dict() for run in runs], "total": total}
+    runs, page_meta = paginate_query(
+        query,
+        (TestRun.created_at.desc(), TestRun.id.desc()),
+        limit=limit,
+        offset=offset,
+        cursor=cursor,
+        count=count,
+    )
+    return {"items": [run.to_dict() for run in runs], **page_meta}
 
 
 def list_step_results(execution_id):
@@ -0,0 +1,328 @@
+"""
+Per-project traceability index.
+
+Holds the requirement → backlog/config item → FS → TS, → test case →
+defect, → interface and ↔ open item edges of one project as in-memory
+adjacency lists, built from one bulk query per entity type. Single and
+batch requirement traces, downstream chains and the matrix coverage
+summary are answered from the index instead of a query per hop.
+
+An index is reused while the result_cache versions of the tables it reads
+are unchanged for its project, so any ORM write to one of them (or a
+global bump for spec tables, which carry no project column) makes the next
+read rebuild it. Reuse is capped at TRACE_INDEX_TTL seconds for writes the
+session hooks cannot see, and only happens while result_cache is enabled
+(shared backend): per-process counters never see other workers' writes,
+so without Redis every call builds a fresh index. At most
+TRACE_INDEX_PROJECTS indexes are kept per process.
+
+Usage:
+    from app.services import trace_index
+    index = trace_index.get_index(project_id)
+    graph = index.trace_requirement(requirement_id)
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import or_, select
+
+from app.models import db
+from app.models.backlog import BacklogItem, ConfigItem, FunctionalSpec, TechnicalSpec
+from app.models.explore import ExploreOpenItem, ExploreRequirement, RequirementOpenItemLink
+from app.models.interface_factory import Interface
+from app.models.testing import Defect, TestCase
+from app.services import result_cache
+
+logger = logging.getLogger(__name__)
+
+MAX_PROJECTS = int(os.getenv("TRACE_INDEX_PROJECTS", "32"))
+TTL_SECONDS = int(os.getenv("TRACE_INDEX_TTL", "300"))
+
+TRACE_TAGS = (
+    ExploreRequirement, BacklogItem, ConfigItem, FunctionalSpec, TechnicalSpec,
+    TestCase, Defect, Interface, RequirementOpenItemLink, ExploreOpenItem,
+)
+
+_indexes: OrderedDict = OrderedDict()  # project_id → (version token, built at, TraceIndex)
+_lock = threading.Lock()
+
+
+def _rows(stmt) -> list:
+    return [row._asdict() for row in db.session.execute(stmt)]
+
+
+def _group(rows, key) -> dict:
+    grouped: dict = {}
+    for row in rows:
+        if row[key] is not None:
+            grouped.setdefault(row[key], []).append(row["id"])
+    return grouped
+
+
+class TraceIndex:
+    """Nodes and edges of one project's traceability graph."""
+
+    def __init__(self, project_id: int):
+        self.project_id = project_id
+
+    @classmethod
+    def build(cls, project_id: int) -> "TraceIndex":
+        """Load every traced entity of a project (one query per type)."""
+        self = cls(project_id)
+        reqs = _rows(
+            select(ExploreRequirement.id, ExploreRequirement.code, ExploreRequirement.title,
+                   ExploreRequirement.status, ExploreRequirement.priority, ExploreRequirement.type)
+            .where(ExploreRequirement.project_id == project_id)
+        )
+        backlog = _rows(
+            select(BacklogItem.id, BacklogItem.code, BacklogItem.title, BacklogItem.status,
+                   BacklogItem.wricef_type, BacklogItem.explore_requirement_id)
+            .where(BacklogItem.project_id == project_id).order_by(BacklogItem.id)
+        )
+        configs = _rows(
+            select(ConfigItem.id, ConfigItem.code, ConfigItem.title, ConfigItem.status,
+                   ConfigItem.explore_requirement_id)
+            .where(ConfigItem.project_id == project_id).order_by(ConfigItem.id)
+        )
+        specs = _rows(
+            select(FunctionalSpec.id, FunctionalSpec.title, FunctionalSpec.backlog_item_id,
+                   FunctionalSpec.config_item_id)
+            .where(or_(
+                FunctionalSpec.backlog_item_id.in_(select(BacklogItem.id).where(BacklogItem.project_id == project_id)),
+                FunctionalSpec.config_item_id.in_(select(ConfigItem.id).where(ConfigItem.project_id == project_id)),
+            ))
+            .order_by(FunctionalSpec.id)
+        )
+        tech_specs = _rows(
+            select(TechnicalSpec.id, TechnicalSpec.title, TechnicalSpec.functional_spec_id)
+            .where(TechnicalSpec.functional_spec_id.in_([fs["id"] for fs in specs]))
+            .order_by(TechnicalSpec.id)
+        ) if specs else []
+        test_cases = _rows(
+            select(TestCase.id, TestCase.code, TestCase.title, TestCase.status, TestCase.test_layer,
+                   TestCase.backlog_item_id, TestCase.explore_requirement_id)
+            .where(TestCase.project_id == project_id).order_by(TestCase.id)
+        )
+        defects = _rows(
+            select(Defect.id, Defect.code, Defect.title, Defect.status, Defect.severity,
+                   Defect.test_case_id, Defect.explore_requirement_id)
+            .where(Defect.project_id == project_id).order_by(Defect.id)
+        )
+        interfaces = _rows(
+            select(Interface.id, Interface.code, Interface.name, Interface.direction, Interface.backlog_item_id)
+            .where(Interface.project_id == project_id).order_by(Interface.id)
+        )
+        open_items = _rows(
+            select(ExploreOpenItem.id, ExploreOpenItem.code, ExploreOpenItem.title,
+                   ExploreOpenItem.status, ExploreOpenItem.priority, RequirementOpenItemLink.requirement_id)
+            .join(RequirementOpenItemLink, RequirementOpenItemLink.open_item_id == ExploreOpenItem.id)
+            .where(RequirementOpenItemLink.project_id == project_id, ExploreOpenItem.project_id == project_id)
+        )
+
+        self.requirements = {r["id"]: r for r in reqs}
+        self.backlog_items = {b["id"]: b for b in backlog}
+        self.config_items = {c["id"]: c for c in configs}
+        self.test_cases = {tc["id"]: tc for tc in test_cases}
+        self.defects = {d["id"]: d for d in defects}
+        self.interfaces = {i["id"]: i for i in interfaces}
+        self.technical_specs = {ts["id"]: ts for ts in tech_specs}
+        self.functional_specs = {fs["id"]: fs for fs in specs}
+
+        # Downstream edges (ids in ascending order)
+        self.req_backlog = _group(backlog, "explore_requirement_id")
+        self.req_config = _group(configs, "explore_requirement_id")
+        self.req_test_cases = _group(test_cases, "explore_requirement_id")
+        self.req_defects = _group(defects, "explore_requirement_id")
+        self.backlog_test_cases = _group(test_cases, "backlog_item_id")
+        self.backlog_interfaces = _group(interfaces, "backlog_item_id")
+        self.test_case_defects = _group(defects, "test_case_id")
+        # One FS per backlog/config item and one TS per FS (first wins, as uselist=False)
+        self.backlog_spec, self.config_spec, self.spec_tech = {}, {}, {}
+        for fs in specs:
+            if fs["backlog_item_id"] is not None:
+                self.backlog_spec.setdefault(fs["backlog_item_id"], fs["id"])
+            if fs["config_item_id"] is not None:
+                self.config_spec.setdefault(fs["config_item_id"], fs["id"])
+        for ts in tech_specs:
+            self.spec_tech.setdefault(ts["functional_spec_id"], ts["id"])
+        self.req_open_items: dict = {}
+        for oi in open_items:
+            self.req_open_items.setdefault(oi["requirement_id"], {}).setdefault(oi["id"], oi)
+        return self
+
+    # ── Traversal ───────────────────────────────────────────────────────
+
+    def test_case_ids(self, req_id) -> list:
+        """Test cases of a requirement: via its backlog items, then direct."""
+        ids = {}
+        for bi_id in self.req_backlog.get(req_id, ()):
+            ids.update(dict.fromkeys(self.backlog_test_cases.get(bi_id, ())))
+        ids.update(dict.fromkeys(self.req_test_cases.get(req_id, ())))
+        return list(ids)
+
+    def defect_ids(self, req_id, test_case_ids=None) -> list:
+        """Defects of a requirement: via its test cases, then direct."""
+        ids = {}
+        for tc_id in self.test_case_ids(req_id) if test_case_ids is None else test_case_ids:
+            ids.update(dict.fromkeys(self.test_case_defects.get(tc_id, ())))
+        ids.update(dict.fromkeys(self.req_defects.get(req_id, ())))
+        return list(ids)
+
+    def trace_requirement(self, req_id) -> dict | None:
+        """trace_explore_requirement payload, or None when not in this project."""
+        req = self.requirements.get(req_id)
+        if req is None:
+            return None
+        backlog = [self.backlog_items[i] for i in self.req_backlog.get(req_id, ())]
+        configs = [self.config_items[i] for i in self.req_config.get(req_id, ())]
+        tc_ids = self.test_case_ids(req_id)
+        defects = [self.defects[i] for i in self.defect_ids(req_id, tc_ids)]
+        open_items = list(self.req_open_items.get(req_id, {}).values())
+
+        depth = 1  # requirement itself
+        if backlog or configs:
+            depth = 2
+        if tc_ids:
+            depth = 3
+        if defects:
+            depth = 4
+
+        return {
+            "requirement": {k: req[k] for k in ("id", "code", "title", "status", "priority", "type")},
+            "backlog_items": [
+                {"id": b["id"], "code": b["code"], "title": b["title"],
+                 "status": b["status"], "type": b["wricef_type"]}
+                for b in backlog
+            ],
+            "config_items": [
+                {"id": c["id"], "code": c["code"], "title": c["title"], "status": c["status"]}
+                for c in configs
+            ],
+            "test_cases": [
+                {"id": tc["id"], "code": tc["code"], "title": tc["title"],
+                 "status": tc["status"], "result": None}
+                for tc in (self.test_cases[i] for i in tc_ids)
+            ],
+            "defects": [
+                {"id": d["id"], "code": d["code"], "title": d["title"],
+                 "status": d["status"], "severity": d["severity"]}
+                for d in defects
+            ],
+            "open_items": [
+                {"id": oi["id"], "code": oi["code"], "title": oi["title"],
+                 "status": oi["status"], "priority": oi["priority"]}
+                for oi in open_items
+            ],
+            "coverage": {
+                "backlog": len(backlog),
+                "config": len(configs),
+                "test": len(tc_ids),
+                "defect": len(defects),
+                "open_item": len(open_items),
+            },
+            "chain_depth": depth,
+        }
+
+    def _spec_chain(self, fs_id, chain) -> None:
+        if fs_id is None:
+            return
+        chain.append({"type": "functional_spec", "id": fs_id, "title": self.functional_specs[fs_id]["title"]})
+        ts_id = self.spec_tech.get(fs_id)
+        if ts_id is not None:
+            chain.append({"type": "technical_spec", "id": ts_id, "title": self.technical_specs[ts_id]["title"]})
+
+    def _defect_chain(self, tc_id, chain) -> None:
+        for d_id in self.test_case_defects.get(tc_id, ()):
+            d = self.defects[d_id]
+            chain.append({"type": "defect", "id": d_id, "title": d["title"],
+                          "code": d["code"], "severity": d["severity"], "status": d["status"]})
+
+    def downstream_chain(self, req_id) -> list:
+        """get_chain() downstream entries of a requirement, in traversal order."""
+        chain: list = []
+        for bi_id in self.req_backlog.get(req_id, ()):
+            bi = self.backlog_items[bi_id]
+            chain.append({"type": "backlog_item", "id": bi_id, "title": bi["title"],
+                          "wricef_type": bi["wricef_type"]})
+            self._spec_chain(self.backlog_spec.get(bi_id), chain)
+            for tc_id in self.backlog_test_cases.get(bi_id, ()):
+                tc = self.test_cases[tc_id]
+                chain.append({"type": "test_case", "id": tc_id, "title": tc["title"], "code": tc["code"],
+                              "test_layer": tc["test_layer"], "status": tc["status"]})
+                self._defect_chain(tc_id, chain)
+            for if_id in self.backlog_interfaces.get(bi_id, ()):
+                iface = self.interfaces[if_id]
+                chain.append({"type": "interface", "id": if_id, "title": iface["name"],
+                              "code": iface["code"], "direction": iface["direction"]})
+        for ci_id in self.req_config.get(req_id, ()):
+            chain.append({"type": "config_item", "id": ci_id, "title": self.config_items[ci_id]["title"]})
+            self._spec_chain(self.config_spec.get(ci_id), chain)
+        for tc_id in self.req_test_cases.get(req_id, ()):
+            tc = self.test_cases[tc_id]
+            chain.append({"type": "test_case", "id": tc_id, "title": tc["title"],
+                          "code": tc["code"], "test_layer": tc["test_layer"]})
+            self._defect_chain(tc_id, chain)
+        return chain
+
+    # ── Coverage ────────────────────────────────────────────────────────
+
+    def coverage_summary(self) -> dict:
+        """build_traceability_matrix_summary payload."""
+        direct = {tc["explore_requirement_id"] for tc in self.test_cases.values()
+                  if tc["explore_requirement_id"] is not None}
+        via_backlog = {
+            self.backlog_items[bi_id]["explore_requirement_id"]
+            for bi_id in self.backlog_test_cases
+            if bi_id in self.backlog_items and self.backlog_items[bi_id]["explore_requirement_id"] is not None
+        }
+        total = len(self.requirements)
+        with_tests = len(direct | via_backlog)
+        unlinked = sum(
+            1 for tc in self.test_cases.values()
+            if tc["explore_requirement_id"] is None
+            and not (tc["backlog_item_id"] in self.backlog_items
+                     and self.backlog_items[tc["backlog_item_id"]]["explore_requirement_id"] is not None)
+        )
+        return {
+            "total_requirements": total,
+            "requirements_with_tests": with_tests,
+            "requirements_without_tests": total - with_tests,
+            "unlinked_test_cases": unlinked,
+            "total_defects": len(self.defects),
+            "coverage_pct": round(with_tests / total * 100, 1) if total else 0.0,
+        }
+
+
+def get_index(project_id: int) -> TraceIndex:
+    """Current index of a project, rebuilt when one of its tables changed."""
+    session = db.session
+    if session.autoflush and (session.new or session.dirty or session.deleted):
+        session.flush()  # same visibility as a query with autoflush
+    if not result_cache.is_enabled():
+        return TraceIndex.build(project_id)
+    token = result_cache.version_token("project", project_id, TRACE_TAGS)
+    with _lock:
+        cached = _indexes.get(project_id)
+        if cached and cached[0] == token and time.monotonic() - cached[1] < TTL_SECONDS:
+            _indexes.move_to_end(project_id)
+            return cached[2]
+
+    built_at = time.monotonic()
+    index = TraceIndex.build(project_id)
+    with _lock:
+        _indexes[project_id] = (token, built_at, index)
+        _indexes.move_to_end(project_id)
+        while len(_indexes) > MAX_PROJECTS:
+            _indexes.popitem(last=False)
+    logger.debug("Trace index rebuilt for project %s", project_id)
+    return index
+
+
+def reset() -> None:
+    """Drop every cached index (tests, maintenance)."""
+    with _lock:
+        _indexes.clear()
@@ -12,7 +12,7 @@ The engine builds a chain dict showing upstream (parents) and downstream
 
 import logging
 
-from sqlalchemy import func, select, distinct
+from sqlalchemy import func, select
 
 from app.models import db
 from app.models.backlog import BacklogItem, ConfigItem, FunctionalSpec, TechnicalSpec
@@ -26,6 +26,7 @@ from app.models.requirement import Requirement
 from app.models.scenario import Scenario, Workshop
 from app.models.scope import Process, Analysis
 from app.models.testing import TestCase, Defect, TestExecution
+from app.services import process_closure, trace_index
 from app.services.helpers.scoped_queries import get_scoped_or_none
 
 logger = logging.getLogger(__name__)
@@ -533,6 +534,10 @@ def _trace_requirement_downstream(req, chain):
     project_id = getattr(req, "project_id", None)
     program_id = getattr(req, "program_id", None)
 
+    if project_id is not None:
+        chain.extend(trace_index.get_index(project_id).downstream_chain(canonical_req_id))
+        return
+
     backlog_items = _scoped_query(
         BacklogItem,
         project_id=project_id,
@@ -650,7 +655,7 @@ def _build_explore_upstream_inline(req, chain):
     Inlines the process-level walk to avoid a circular import with the
     traceability blueprint's private _walk_process_level_hierarchy helper.
     """
-    from app.models.explore import ExploreWorkshop, ProcessStep, ProcessLevel
+    from app.models.explore import ExploreWorkshop, ProcessStep
     project_id = getattr(req, "project_id", None)
 
     if req.workshop_id:
@@ -668,13 +673,11 @@ def _build_explore_upstream_inline(req, chain):
     elif req.process_level_id:
         start_level_id = req.process_level_id
 
-    # Walk up through ProcessLevel ancestors
-    visited: set = set()
-    current_id = start_level_id
-    while current_id and current_id not in visited:
-        visited.add(current_id)
-        pl = _scoped_get_or_none(ProcessLevel, current_id, project_id=project_id)
-        if not pl:
+    # ProcessLevel ancestors, nearest first (one closure-table query)
+    if not start_level_id:
+        return
+    for pl in reversed(process_closure.ancestors(start_level_id, include_self=True)):
+        if project_id is not None and pl.project_id != project_id:
             break
         chain.append({
             "type": f"process_l{pl.level}" if pl.level else "process_level",
@@ -682,7 +685,6 @@ def _build_explore_upstream_inline(req, chain):
             "title": pl.name,
             "code": pl.code,
         })
-        current_id = pl.parent_id
 
 
 def _trace_test_case_downstream(tc, chain):
@@ -871,12 +873,6 @@ def _program_interface_summary(program_id):
 #                           ↔ ExploreOpenItem (via RequirementOpenItemLink)
 # ══════════════════════════════════════════════════════════════════════════════
 
-from app.models.explore import (
-    ExploreOpenItem,
-    ExploreRequirement,
-    RequirementOpenItemLink,
-)
-
 
 def trace_explore_requirement(requirement_id: str, *, project_id: int | None = None) -> dict:
     """
@@ -903,136 +899,29 @@ def trace_explore_requirement(requirement_id: str, *, project_id: int | None = N
     )
     if not req:
         raise ValueError(f"Explore requirement not found: {requirement_id}")
-    active_project_id = req.project_id
-
-    # ── 1. Backlog items (WRICEF) ────────────────────────────────────────
-    backlog_items = BacklogItem.query.filter_by(
-        explore_requirement_id=requirement_id,
-        project_id=active_project_id,
-    ).all()
-
-    # ── 2. Config items ──────────────────────────────────────────────────
-    config_items = ConfigItem.query.filter_by(
-        explore_requirement_id=requirement_id,
-        project_id=active_project_id,
-    ).all()
-
-    # ── 3. Test cases (via backlog_item_id OR direct explore_req FK) ─────
-    backlog_ids = [b.id for b in backlog_items]
-
-    tc_via_backlog: list[TestCase] = []
-    if backlog_ids:
-        tc_via_backlog = TestCase.query.filter(
-            TestCase.backlog_item_id.in_(backlog_ids),
-            TestCase.project_id == active_project_id,
-        ).all()
-
-    tc_via_direct = TestCase.query.filter_by(
-        explore_requirement_id=requirement_id,
-        project_id=active_project_id,
-    ).all()
-
-    tc_map: dict[int, TestCase] = {}
-    for tc in tc_via_backlog + tc_via_direct:
-        tc_map[tc.id] = tc
-    test_cases = list(tc_map.values())
-
-    # ── 4. Defects (via test_case_id OR direct explore_req FK) ───────────
-    tc_ids = [tc.id for tc in test_cases]
-
-    d_via_tc: list[Defect] = []
-    if tc_ids:
-        d_via_tc = Defect.query.filter(
-            Defect.test_case_id.in_(tc_ids),
-            Defect.project_id == active_project_id,
-        ).all()
-
-    d_via_direct = Defect.query.filter_by(
-        explore_requirement_id=requirement_id,
-        project_id=active_project_id,
-    ).all()
-
-    d_map: dict[int, Defect] = {}
-    for d in d_via_tc + d_via_direct:
-        d_map[d.id] = d
-    defects = list(d_map.values())
-
-    # ── 5. Open items (M:N via RequirementOpenItemLink) ──────────────────
-    links = RequirementOpenItemLink.query.filter_by(
-        requirement_id=requirement_id,
-        project_id=active_project_id,
-    ).all()
-    oi_ids = [lnk.open_item_id for lnk in links]
-    open_items: list[ExploreOpenItem] = []
-    if oi_ids:
-        open_items = ExploreOpenItem.query.filter(
-            ExploreOpenItem.id.in_(oi_ids),
-            ExploreOpenItem.project_id == active_project_id,
-        ).all()
-
-    # ── 6. Coverage & depth ──────────────────────────────────────────────
-    coverage = {
-        "backlog": len(backlog_items),
-        "config": len(config_items),
-        "test": len(test_cases),
-        "defect": len(defects),
-        "open_item": len(open_items),
-    }
-
-    depth = 1  # requirement itself
-    if backlog_items or config_items:
-        depth = 2
-    if test_cases:
-        depth = 3
-    if defects:
-        depth = 4
-
-    return {
-        "requirement": {
-            "id": req.id,
-            "code": req.code,
-            "title": req.title,
-            "status": req.status,
-            "priority": req.priority,
-            "type": req.type,
-        },
-        "backlog_items": [
-            {"id": b.id, "code": getattr(b, "code", ""), "title": b.title,
-             "status": b.status, "type": getattr(b, "wricef_type", "")}
-            for b in backlog_items
-        ],
-        "config_items": [
-            {"id": c.id, "code": c.code, "title": c.title, "status": c.status}
-            for c in config_items
-        ],
-        "test_cases": [
-            {"id": tc.id, "code": getattr(tc, "code", ""), "title": tc.title,
-             "status": tc.status, "result": getattr(tc, "result", None)}
-            for tc in test_cases
-        ],
-        "defects": [
-            {"id": d.id, "code": getattr(d, "code", ""), "title": d.title,
-             "status": d.status, "severity": getattr(d, "severity", "")}
-            for d in defects
-        ],
-        "open_items": [
-            {"id": oi.id, "code": oi.code, "title": oi.title,
-             "status": oi.status, "priority": oi.priority}
-            for oi in open_items
-        ],
-        "coverage": coverage,
-        "chain_depth": depth,
-    }
+    # All hops are answered from the project's in-memory trace index
+    graph = trace_index.get_index(req.project_id).trace_requirement(req.id)
+    if graph is None:
+        raise ValueError(f"Explore requirement not found: {requirement_id}")
+    return graph
 
 
 def trace_explore_batch(requirement_ids: list[str], *, project_id: int | None = None) -> list[dict]:
-    """Trace multiple explore requirements in one call."""
+    """Trace multiple explore requirements in one call (one index per project)."""
+    if project_id is not None:
+        projects = {rid: project_id for rid in requirement_ids}
+    else:
+        projects = dict(db.session.execute(
+            select(ExploreRequirement.id, ExploreRequirement.project_id)
+            .where(ExploreRequirement.id.in_(list(requirement_ids)))
+        ).all())
     results = []
     for rid in requirement_ids:
-        try:
-            results.append(trace_explore_requirement(rid, project_id=project_id))
-        except ValueError:
-            results.append({"requirement_id": rid, "error": "not_found"})
+        graph = (
+            trace_index.get_index(projects[rid]).trace_requirement(rid)
+            if rid in projects else None
+        )
+        results.append(graph if graph is not None else {"requirement_id": rid, "error": "not_found"})
     return results
 
 
@@ -1137,8 +1026,6 @@ def build_lateral_links(
     Returns:
         Dict whose keys depend on entity_type (e.g. ``open_items``, ``interfaces``).
     """
-    from app.models import db
-
     lateral: dict = {}
 
     if entity_type == "requirement":
@@ -1458,8 +1345,8 @@ def build_traceability_matrix_summary(project_id: int) -> dict:
     """Compute the aggregated traceability coverage summary for a project.
 
     All counts are strictly scoped to ``project_id`` — no cross-project data
-    bleeds into the result.  Built from four bulk queries; no Python-level loops
-    over individual entities.
+    bleeds into the result.  Answered from the project's trace index (bulk
+    queries only when the index is rebuilt).
 
     Args:
         project_id: The project whose matrix summary is computed.
@@ -1474,82 +1361,7 @@ def build_traceability_matrix_summary(project_id: int) -> dict:
           "coverage_pct": float,
         }
     """
-    # 1. Total ExploreRequirements in project.
-    total_requirements: int = (
-        db.session.query(func.count(ExploreRequirement.id))
-        .filter(ExploreRequirement.project_id == project_id)
-        .scalar() or 0
-    )
-
-    # 2a. Requirement IDs covered via direct TestCase.explore_requirement_id FK.
-    direct_covered: set[str] = set(
-        db.session.execute(
-            select(distinct(TestCase.explore_requirement_id)).where(
-                TestCase.explore_requirement_id.isnot(None),
-                TestCase.project_id == project_id,
-            )
-        ).scalars().all()
-    )
-
-    # 2b. Requirement IDs covered via BacklogItem → TestCase join.
-    backlog_covered: set[str] = set(
-        db.session.execute(
-            select(distinct(BacklogItem.explore_requirement_id))
-            .join(TestCase, TestCase.backlog_item_id == BacklogItem.id)
-            .where(
-                BacklogItem.project_id == project_id,
-                TestCase.project_id == project_id,
-                BacklogItem.explore_requirement_id.isnot(None),
-            )
-        ).scalars().all()
-    )
-
-    requirements_with_tests = len(direct_covered | backlog_covered)
-
-    # 3. Unlinked test cases: TCs in project with no requirement chain.
-    linked_via_direct = select(TestCase.id).where(
-        TestCase.explore_requirement_id.isnot(None),
-        TestCase.project_id == project_id,
-    )
-    linked_via_backlog = (
-        select(TestCase.id)
-        .join(BacklogItem, TestCase.backlog_item_id == BacklogItem.id)
-        .where(
-            TestCase.project_id == project_id,
-            BacklogItem.explore_requirement_id.isnot(None),
-        )
-    )
-    unlinked_test_cases: int = (
-        db.session.query(func.count(TestCase.id))
-        .filter(
-            TestCase.project_id == project_id,
-            ~TestCase.id.in_(linked_via_direct),
-            ~TestCase.id.in_(linked_via_backlog),
-        )
-        .scalar() or 0
-    )
-
-    # 4. Total defects in project.
-    total_defects: int = (
-        db.session.query(func.count(Defect.id))
-        .filter(Defect.project_id == project_id)
-        .scalar() or 0
-    )
-
-    coverage_pct = (
-        round(requirements_with_tests / total_requirements * 100, 1)
-        if total_requirements
-        else 0.0
-    )
-
-    return {
-        "total_requirements": total_requirements,
-        "requirements_with_tests": requirements_with_tests,
-        "requirements_without_tests": total_requirements - requirements_with_tests,
-        "unlinked_test_cases": unlinked_test_cases,
-        "total_defects": total_defects,
-        "coverage_pct": coverage_pct,
-    }
+    return trace_index.get_index(project_id).coverage_summary()
 
 
 # ══════════════════════════════════════════════════════════════════════════════
@@ -1593,7 +1405,7 @@ def trace_upstream_from_defect(
     Raises:
         ValueError: Defect not found in project/tenant scope.
     """
-    from app.models.explore import ExploreRequirement, ProcessLevel
+    from app.models.explore import ExploreRequirement
 
     # 1. Defect — entry point, tenant-scoped
     defect = Defect.query.filter_by(
@@ -1702,23 +1514,16 @@ def trace_upstream_from_defect(
             # 5. Walk ProcessLevel hierarchy upward (L4 → L3 → L2 → L1)
             pl_id = req.process_level_id
             if pl_id:
-                chain: list[dict] = []
-                visited: set[int] = set()
-                current_pl: ProcessLevel | None = db.session.get(ProcessLevel, pl_id)
-                while current_pl and current_pl.id not in visited:
-                    visited.add(current_pl.id)
-                    chain.append({
-                        "level": current_pl.level,
-                        "id": current_pl.id,
-                        "code": current_pl.code,
-                        "name": current_pl.name,
-                        "fit_decision": getattr(current_pl, "fit_status", None),
-                    })
-                    current_pl = (
-                        db.session.get(ProcessLevel, current_pl.parent_id)
-                        if current_pl.parent_id
-                        else None
-                    )
+                chain = [
+                    {
+                        "level": pl.level,
+                        "id": pl.id,
+                        "code": pl.code,
+                        "name": pl.name,
+                        "fit_decision": getattr(pl, "fit_status", None),
+                    }
+                    for pl in process_closure.ancestors(pl_id, include_self=True)
+                ]
 
                 # Normalise to ascending level (L1 first)
                 result["process_chain"] = sorted(chain, key=lambda x: x["level"])
@@ -1745,11 +1550,11 @@ def trace_defects_by_process(
 ) -> list[dict]:
     """Return all defects linked (upstream) to a given ProcessLevel.
 
-    Traversal: ProcessLevel → child L4 ProcessLevels → ExploreRequirements
+    Traversal: ProcessLevel → subtree (closure table) → ExploreRequirements
                → TestCases → Defects.
 
-    Includes the node itself plus its direct children so that querying an
-    L3 node returns defects from all of its L4 children.
+    Includes the node itself plus every descendant, so querying an L2 or
+    L3 node returns defects from all L4 processes beneath it.
 
     Args:
         project_id: Tenant scope for the Defect query.
@@ -1760,16 +1565,9 @@ def trace_defects_by_process(
         [{"defect_id", "title", "severity", "status", "test_case_title"}]
     """
     from sqlalchemy import select
-    from app.models.explore import ExploreRequirement, ProcessLevel
+    from app.models.explore import ExploreRequirement
 
-    # Direct children of this level (covers both L3→L4 and querying an L4)
-    child_ids: list[int] = [
-        row[0]
-        for row in db.session.execute(
-            select(ProcessLevel.id).where(ProcessLevel.parent_id == process_level_id)
-        ).fetchall()
-    ]
-    all_level_ids = [process_level_id, *child_ids]
+    all_level_ids = process_closure.descendant_ids(process_level_id, include_self=True) or [process_level_id]
 
     # ExploreRequirements attached to these levels
     req_ids: list[str] = [
@@ -0,0 +1,106 @@
+"""ai_embedding_binary_storage
+
+Revision ID: b1p2q3r4m025
+Revises: a0o1p2q3l924
+Create Date: 2026-10-16
+
+Store RAG vectors as packed float32 blobs instead of JSON text.
+Adds ai_embeddings.embedding_blob / embedding_format, backfills existing
+rows in batches (JSON → little-endian float32) and clears embedding_json —
+except on PostgreSQL, where pgvector scores the JSON column and keeps it.
+Downgrade re-encodes the blobs as JSON.
+"""
+
+import json
+import struct
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "b1p2q3r4m025"
+down_revision = "a0o1p2q3l924"
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 500
+
+_embeddings = sa.table(
+    "ai_embeddings",
+    sa.column("id", sa.Integer),
+    sa.column("embedding_json", sa.Text),
+    sa.column("embedding_blob", sa.LargeBinary),
+    sa.column("embedding_format", sa.String),
+    sa.column("embedding_dim", sa.Integer),
+)
+
+
+def _batches(bind, where):
+    """Yield batches of rows by keyset on id so each batch is an indexed range scan."""
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(
+                _embeddings.c.id,
+                _embeddings.c.embedding_json,
+                _embeddings.c.embedding_blob,
+                _embeddings.c.embedding_format,
+            )
+            .where(where, _embeddings.c.id > last_id)
+            .order_by(_embeddings.c.id)
+            .limit(BATCH_SIZE)
+        ).fetchall()
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1].id
+
+
+def upgrade():
+    with op.batch_alter_table("ai_embeddings") as batch_op:
+        batch_op.add_column(sa.Column("embedding_blob", sa.LargeBinary(), nullable=True,
+                                      comment="Packed little-endian vector"))
+        batch_op.add_column(sa.Column("embedding_format", sa.String(length=10), nullable=True,
+                                      comment="float32 | float16 | int8"))
+
+    bind = op.get_bind()
+    keep_json = bind.dialect.name == "postgresql"
+    for rows in _batches(bind, _embeddings.c.embedding_json.isnot(None)):
+        for row in rows:
+            try:
+                vec = [float(v) for v in json.loads(row.embedding_json)]
+            except (TypeError, ValueError):
+                continue
+            bind.execute(
+                _embeddings.update()
+                .where(_embeddings.c.id == row.id)
+                .values(
+                    embedding_blob=struct.pack(f"<{len(vec)}f", *vec),
+                    embedding_format="float32",
+                    embedding_dim=len(vec),
+                    **({} if keep_json else {"embedding_json": None}),
+                )
+            )
+
+
+def downgrade():
+    bind = op.get_bind()
+    for rows in _batches(bind, _embeddings.c.embedding_blob.isnot(None)):
+        for row in rows:
+            blob = row.embedding_blob
+            if row.embedding_format == "float16":
+                vec = struct.unpack(f"<{len(blob) // 2}e", blob)
+            elif row.embedding_format == "int8":
+                (scale,) = struct.unpack_from("<f", blob)
+                vec = [v * scale for v in struct.unpack(f"<{len(blob) - 4}b", blob[4:])]
+            else:
+                vec = struct.unpack(f"<{len(blob) // 4}f", blob)
+            bind.execute(
+                _embeddings.update()
+                .where(_embeddings.c.id == row.id)
+                .values(embedding_json=json.dumps(list(vec)))
+            )
+
+    with op.batch_alter_table("ai_embeddings") as batch_op:
+        batch_op.drop_column("embedding_format")
+        batch_op.drop_column("embedding_blob")
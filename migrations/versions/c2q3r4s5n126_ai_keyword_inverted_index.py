@@ -0,0 +1,92 @@
+"""ai_keyword_inverted_index
+
+Revision ID: c2q3r4s5n126
+Revises: b1p2q3r4m025
+Create Date: 2026-10-16
+
+Persisted inverted index for the RAG keyword (BM25) leg.
+Creates ai_keyword_postings, adds ai_embeddings.token_count (doc length)
+and backfills postings for active chunks in keyset batches, using the
+same tokenizer as app.ai.keyword_index.
+"""
+
+import re
+from collections import Counter
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "c2q3r4s5n126"
+down_revision = "b1p2q3r4m025"
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 500
+MAX_TERM_LENGTH = 64
+
+_embeddings = sa.table(
+    "ai_embeddings",
+    sa.column("id", sa.Integer),
+    sa.column("program_id", sa.Integer),
+    sa.column("chunk_text", sa.Text),
+    sa.column("is_active", sa.Boolean),
+    sa.column("token_count", sa.Integer),
+)
+
+
+def upgrade():
+    postings = op.create_table(
+        "ai_keyword_postings",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("embedding_id", sa.Integer(), nullable=False),
+        sa.Column("program_id", sa.Integer(), nullable=True),
+        sa.Column("term", sa.String(length=64), nullable=False),
+        sa.Column("tf", sa.Integer(), nullable=False, comment="Term frequency within the chunk"),
+        sa.ForeignKeyConstraint(["embedding_id"], ["ai_embeddings.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["program_id"], ["programs.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_ai_keyword_postings_embedding_id", "ai_keyword_postings", ["embedding_id"])
+    op.create_index("ix_ai_keyword_posting_program_term", "ai_keyword_postings", ["program_id", "term"])
+
+    with op.batch_alter_table("ai_embeddings") as batch_op:
+        batch_op.add_column(sa.Column("token_count", sa.Integer(), nullable=True,
+                                      comment="Token count of chunk_text (BM25 doc length)"))
+        batch_op.create_index("ix_ai_embeddings_token_count", ["token_count"])
+
+    bind = op.get_bind()
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(_embeddings.c.id, _embeddings.c.program_id, _embeddings.c.chunk_text)
+            .where(_embeddings.c.is_active.is_(True), _embeddings.c.id > last_id)
+            .order_by(_embeddings.c.id)
+            .limit(BATCH_SIZE)
+        ).fetchall()
+        if not rows:
+            break
+        batch = []
+        for row in rows:
+            counts = Counter(t[:MAX_TERM_LENGTH] for t in re.findall(r"\b\w+\b", (row.chunk_text or "").lower()))
+            batch.extend(
+                {"embedding_id": row.id, "program_id": row.program_id, "term": term, "tf": tf}
+                for term, tf in counts.items()
+            )
+            bind.execute(
+                _embeddings.update()
+                .where(_embeddings.c.id == row.id)
+                .values(token_count=sum(counts.values()))
+            )
+        if batch:
+            bind.execute(postings.insert(), batch)
+        last_id = rows[-1].id
+
+
+def downgrade():
+    with op.batch_alter_table("ai_embeddings") as batch_op:
+        batch_op.drop_index("ix_ai_embeddings_token_count")
+        batch_op.drop_column("token_count")
+    op.drop_index("ix_ai_keyword_posting_program_term", table_name="ai_keyword_postings")
+    op.drop_index("ix_ai_keyword_postings_embedding_id", table_name="ai_keyword_postings")
+    op.drop_table("ai_keyword_postings")
@@ -0,0 +1,40 @@
+"""ai_task_durable_queue
+
+Revision ID: d3r4s5t6o227
+Revises: c2q3r4s5n126
+Create Date: 2026-10-16
+
+Durable AI task queue: priority lane, worker lease (claimed_by +
+heartbeat_at) and attempt counter on ai_tasks, plus a (status, priority,
+id) index for the claim query.
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "d3r4s5t6o227"
+down_revision = "c2q3r4s5n126"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("ai_tasks") as batch_op:
+        batch_op.add_column(sa.Column("priority", sa.Integer(), nullable=False, server_default="5",
+                                      comment="Lane: 0 high, 5 normal, 9 low — lower runs first"))
+        batch_op.add_column(sa.Column("claimed_by", sa.String(length=100), nullable=True,
+                                      comment="Worker id holding the lease"))
+        batch_op.add_column(sa.Column("heartbeat_at", sa.DateTime(), nullable=True,
+                                      comment="Lease renewal; stale → requeued"))
+        batch_op.add_column(sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"))
+        batch_op.create_index("ix_ai_task_queue", ["status", "priority", "id"], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table("ai_tasks") as batch_op:
+        batch_op.drop_index("ix_ai_task_queue")
+        batch_op.drop_column("attempts")
+        batch_op.drop_column("heartbeat_at")
+        batch_op.drop_column("claimed_by")
+        batch_op.drop_column("priority")
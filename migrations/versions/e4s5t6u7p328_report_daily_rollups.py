@@ -0,0 +1,176 @@
+"""report_daily_rollups
+
+Revision ID: e4s5t6u7p328
+Revises: d3r4s5t6o227
+Create Date: 2026-10-16
+
+Materialized daily rollups for the F5 report presets:
+report_execution_daily (program / cycle / module / day / result) and
+report_defect_daily (program / module / day / severity / status / priority).
+Kept current by app.services.report_rollups. The upgrade backfills both
+tables from existing executions and defects in keyset batches (same
+bucketing as report_rollups.day_of), so reports are correct right after
+upgrading; ``flask report-rollups`` can verify them.
+"""
+
+from collections import defaultdict
+from datetime import timezone
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "e4s5t6u7p328"
+down_revision = "d3r4s5t6o227"
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 5000
+
+_test_cases = sa.table(
+    "test_cases",
+    sa.column("id", sa.Integer),
+    sa.column("program_id", sa.Integer),
+    sa.column("module", sa.String),
+)
+_executions = sa.table(
+    "test_executions",
+    sa.column("id", sa.Integer),
+    sa.column("test_case_id", sa.Integer),
+    sa.column("cycle_id", sa.Integer),
+    sa.column("executed_at", sa.DateTime),
+    sa.column("result", sa.String),
+    sa.column("attempt_number", sa.Integer),
+)
+_defects = sa.table(
+    "defects",
+    sa.column("id", sa.Integer),
+    sa.column("program_id", sa.Integer),
+    sa.column("module", sa.String),
+    sa.column("reported_at", sa.DateTime),
+    sa.column("severity", sa.String),
+    sa.column("status", sa.String),
+    sa.column("priority", sa.String),
+)
+
+
+def _day(value):
+    if value is None:
+        return ""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return value.strftime("%Y-%m-%d")
+
+
+def _batches(bind, table, columns, *joins):
+    """Yield rows of *columns* in keyset batches over table.id."""
+    last_id = 0
+    source = table
+    for other, on in joins:
+        source = source.join(other, on)
+    while True:
+        rows = bind.execute(
+            sa.select(table.c.id, *columns).select_from(source)
+            .where(table.c.id > last_id)
+            .order_by(table.c.id)
+            .limit(BATCH_SIZE)
+        ).fetchall()
+        if not rows:
+            return
+        yield from rows
+        last_id = rows[-1].id
+
+
+def _backfill(bind, executions, defects):
+    buckets = defaultdict(lambda: [0, 0, 0])
+    rows = _batches(
+        bind, _executions,
+        (_test_cases.c.program_id, _test_cases.c.module, _executions.c.cycle_id,
+         _executions.c.executed_at, _executions.c.result, _executions.c.attempt_number),
+        (_test_cases, _test_cases.c.id == _executions.c.test_case_id),
+    )
+    for row in rows:
+        if row.program_id is None or row.cycle_id is None:
+            continue
+        acc = buckets[(row.program_id, row.cycle_id, row.module or "", _day(row.executed_at), row.result or "")]
+        acc[0] += 1
+        acc[1] += 1 if row.attempt_number == 1 else 0
+        acc[2] += 1 if row.attempt_number is not None and row.attempt_number > 1 else 0
+    if buckets:
+        bind.execute(executions.insert(), [
+            {"program_id": k[0], "cycle_id": k[1], "module": k[2], "day": k[3], "result": k[4],
+             "executions": v[0], "first_attempts": v[1], "retests": v[2]}
+            for k, v in buckets.items()
+        ])
+
+    counts = defaultdict(int)
+    rows = _batches(
+        bind, _defects,
+        (_defects.c.program_id, _defects.c.module, _defects.c.reported_at,
+         _defects.c.severity, _defects.c.status, _defects.c.priority),
+    )
+    for row in rows:
+        if row.program_id is None:
+            continue
+        counts[(row.program_id, row.module or "", _day(row.reported_at),
+                row.severity or "", row.status or "", row.priority or "")] += 1
+    if counts:
+        bind.execute(defects.insert(), [
+            {"program_id": k[0], "module": k[1], "day": k[2], "severity": k[3],
+             "status": k[4], "priority": k[5], "defects": n}
+            for k, n in counts.items()
+        ])
+
+
+def upgrade():
+    executions = op.create_table(
+        "report_execution_daily",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("program_id", sa.Integer(), nullable=False),
+        sa.Column("cycle_id", sa.Integer(), nullable=False),
+        sa.Column("module", sa.String(length=50), nullable=False, server_default="",
+                  comment="TestCase.module"),
+        sa.Column("day", sa.String(length=10), nullable=False, server_default="",
+                  comment="YYYY-MM-DD (UTC) of executed_at; '' → no executed_at"),
+        sa.Column("result", sa.String(length=20), nullable=False, server_default=""),
+        sa.Column("executions", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("first_attempts", sa.Integer(), nullable=False, server_default="0",
+                  comment="attempt_number = 1"),
+        sa.Column("retests", sa.Integer(), nullable=False, server_default="0",
+                  comment="attempt_number > 1"),
+        sa.ForeignKeyConstraint(["program_id"], ["programs.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["cycle_id"], ["test_cycles.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("program_id", "cycle_id", "module", "day", "result",
+                            name="uq_report_execution_daily_bucket"),
+    )
+    op.create_index("ix_report_execution_daily_program_id", "report_execution_daily", ["program_id"])
+    op.create_index("ix_report_execution_daily_cycle_id", "report_execution_daily", ["cycle_id"])
+
+    defects = op.create_table(
+        "report_defect_daily",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("program_id", sa.Integer(), nullable=False),
+        sa.Column("module", sa.String(length=50), nullable=False, server_default=""),
+        sa.Column("day", sa.String(length=10), nullable=False, server_default="",
+                  comment="YYYY-MM-DD (UTC) of reported_at"),
+        sa.Column("severity", sa.String(length=20), nullable=False, server_default=""),
+        sa.Column("status", sa.String(length=30), nullable=False, server_default=""),
+        sa.Column("priority", sa.String(length=20), nullable=False, server_default=""),
+        sa.Column("defects", sa.Integer(), nullable=False, server_default="0"),
+        sa.ForeignKeyConstraint(["program_id"], ["programs.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("program_id", "module", "day", "severity", "status", "priority",
+                            name="uq_report_defect_daily_bucket"),
+    )
+    op.create_index("ix_report_defect_daily_program_id", "report_defect_daily", ["program_id"])
+
+    _backfill(op.get_bind(), executions, defects)
+
+
+def downgrade():
+    op.drop_index("ix_report_defect_daily_program_id", table_name="report_defect_daily")
+    op.drop_table("report_defect_daily")
+    op.drop_index("ix_report_execution_daily_cycle_id", table_name="report_execution_daily")
+    op.drop_index("ix_report_execution_daily_program_id", table_name="report_execution_daily")
+    op.drop_table("report_execution_daily")
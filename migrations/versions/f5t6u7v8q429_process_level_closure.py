@@ -0,0 +1,60 @@
+"""process_level_closure
+
+Revision ID: f5t6u7v8q429
+Revises: e4s5t6u7p328
+Create Date: 2026-10-16
+
+Closure table for the ProcessLevel hierarchy: one row per
+(ancestor, descendant) pair with its depth, including the self pair.
+Backfilled from process_levels.parent_id with a recursive CTE; kept
+current by app.services.process_closure.
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "f5t6u7v8q429"
+down_revision = "e4s5t6u7p328"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "process_level_closure",
+        sa.Column("ancestor_id", sa.String(length=36), nullable=False),
+        sa.Column("descendant_id", sa.String(length=36), nullable=False),
+        sa.Column("depth", sa.Integer(), nullable=False, comment="0 = self, 1 = parent/child, ..."),
+        sa.Column("project_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["ancestor_id"], ["process_levels.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["descendant_id"], ["process_levels.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["project_id"], ["projects.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("ancestor_id", "descendant_id"),
+    )
+    op.create_index("idx_plc_descendant_depth", "process_level_closure", ["descendant_id", "depth"])
+    op.create_index("idx_plc_project_ancestor", "process_level_closure", ["project_id", "ancestor_id"])
+
+    op.execute(
+        """
+        INSERT INTO process_level_closure (ancestor_id, descendant_id, depth, project_id)
+        WITH RECURSIVE paths (ancestor_id, descendant_id, depth, project_id) AS (
+            SELECT id, id, 0, project_id FROM process_levels
+            UNION ALL
+            SELECT p.parent_id, paths.descendant_id, paths.depth + 1, paths.project_id
+            FROM paths
+            JOIN process_levels p ON p.id = paths.ancestor_id
+            JOIN process_levels pp ON pp.id = p.parent_id
+            WHERE paths.depth < 16
+        )
+        SELECT ancestor_id, descendant_id, MIN(depth), MIN(project_id)
+        FROM paths
+        GROUP BY ancestor_id, descendant_id
+        """
+    )
+
+
+def downgrade():
+    op.drop_index("idx_plc_project_ancestor", table_name="process_level_closure")
+    op.drop_index("idx_plc_descendant_depth", table_name="process_level_closure")
+    op.drop_table("process_level_closure")
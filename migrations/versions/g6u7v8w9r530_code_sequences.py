@@ -0,0 +1,35 @@
+"""code_sequences
+
+Revision ID: g6u7v8w9r530
+Revises: f5t6u7v8q429
+Create Date: 2026-10-16
+
+Per-(scope, prefix) counters for entity code generation
+(app.services.sequence_allocator). Rows are created on first use and
+seeded from the existing codes, so no backfill is needed.
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "g6u7v8w9r530"
+down_revision = "f5t6u7v8q429"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "code_sequences",
+        sa.Column("scope", sa.String(length=100), nullable=False,
+                  comment="Counter namespace, e.g. cutover_plan:12 or test_cases:3"),
+        sa.Column("prefix", sa.String(length=50), nullable=False,
+                  comment="Code prefix within the scope, e.g. INC, L3, WS-SD"),
+        sa.Column("value", sa.BigInteger(), nullable=False, comment="Last allocated number"),
+        sa.PrimaryKeyConstraint("scope", "prefix"),
+    )
+
+
+def downgrade():
+    op.drop_table("code_sequences")
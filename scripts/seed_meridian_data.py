@@ -23,6 +23,7 @@ sys.path.insert(0, ".")
 
 from app import create_app
 from app.models import db
+from app.services import process_closure
 
 TENANT_ID = int(os.getenv("MERIDIAN_TENANT_ID")) if os.getenv("MERIDIAN_TENANT_ID") else None
 PROGRAM_ID = int(os.getenv("MERIDIAN_PROGRAM_ID")) if os.getenv("MERIDIAN_PROGRAM_ID") else None
@@ -369,6 +370,9 @@ def ensure_process_hierarchy() -> None:
         )
         created_by_code[item["code"]] = _process_level_uuid(item["code"])
 
+    # Raw inserts bypass the ORM hooks; re-derive this project's closure rows
+    process_closure.rebuild(PROJECT_ID)
+
     for key, code in PL_CODE_MAP.items():
         row = fetch_one(
             "SELECT id FROM process_levels WHERE project_id = :project_id AND code = :code",
@@ -0,0 +1,144 @@
+"""
+Tests for the in-memory token budget ledger (app.ai.budget.BudgetLedger).
+
+Tests:
+    - Unbudgeted keys are negative-cached (one lookup per snapshot TTL)
+    - Usage is enforced in memory and written back as atomic increments
+    - Flushes commit on their own (caller rollbacks keep them); exiting workers flush
+    - Flushes add to concurrent writes from other workers instead of overwriting
+    - Period rollover resets the row once across workers (CAS on reset_at)
+    - Service mutations (reset/limit change) invalidate ledger snapshots
+    - LLMGateway routes budget checks/records through the ledger
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.ai import budget as budget_module
+from app.ai.budget import BudgetLedger, TokenBudgetService
+from app.ai.gateway import LLMGateway
+from app.models import db
+from app.models.ai import AITokenBudget
+
+
+@pytest.fixture()
+def svc():
+    return TokenBudgetService()
+
+
+def _row(budget_id):
+    return db.session.get(AITokenBudget, budget_id, populate_existing=True)
+
+
+class TestLedgerAccounting:
+    def test_unbudgeted_key_is_looked_up_once(self):
+        ledger = BudgetLedger(flush_interval=60, snapshot_ttl=60)
+        for _ in range(5):
+            assert ledger.check_budget(user="nobody")["allowed"] is True
+        assert ledger.get_stats()["lookups"] == 1
+
+    def test_usage_enforced_in_memory_until_flush(self, svc):
+        budget = svc.create_or_update(user="u_mem", token_limit=1000, cost_limit_usd=10.0)
+        ledger = BudgetLedger(flush_interval=60, snapshot_ttl=60)
+
+        ledger.record_usage(None, "u_mem", tokens=600, cost_usd=0.1)
+        assert ledger.check_budget(user="u_mem")["allowed"] is True
+        ledger.record_usage(None, "u_mem", tokens=600, cost_usd=0.1)
+
+        check = ledger.check_budget(user="u_mem")
+        assert check["allowed"] is False
+        assert check["budget"]["tokens_used"] == 1200
+        assert _row(budget.id).tokens_used == 0
+
+        assert ledger.flush() == 1
+        row = _row(budget.id)
+        assert (row.tokens_used, row.request_count) == (1200, 2)
+
+    def test_flush_is_an_increment_not_an_overwrite(self, svc):
+        budget = svc.create_or_update(program_id=None, user="u_inc", token_limit=10_000)
+        ledger = BudgetLedger(flush_interval=60, snapshot_ttl=60)
+        ledger.record_usage(None, "u_inc", tokens=100, cost_usd=0.01)
+
+        # Another worker flushed in the meantime
+        svc.record_usage(None, "u_inc", tokens=50, cost_usd=0.005)
+        ledger.flush()
+        assert _row(budget.id).tokens_used == 150
+
+    def test_flush_survives_caller_rollback(self, svc):
+        budget = svc.create_or_update(user="u_tx", token_limit=10_000)
+        ledger = BudgetLedger(flush_interval=60, snapshot_ttl=60)
+        ledger.record_usage(None, "u_tx", tokens=70, cost_usd=0.0)
+        ledger.flush()
+        db.session.rollback()
+        assert _row(budget.id).tokens_used == 70
+
+    def test_pending_usage_is_written_at_exit(self, svc):
+        budget = svc.create_or_update(user="u_exit", token_limit=10_000)
+        ledger = BudgetLedger(flush_interval=60, snapshot_ttl=60)
+        ledger.record_usage(None, "u_exit", tokens=40, cost_usd=0.0)
+        assert _row(budget.id).tokens_used == 0
+
+        budget_module._flush_at_exit()
+        assert _row(budget.id).tokens_used == 40
+
+    def test_interval_triggers_flush_on_record(self, svc):
+        budget = svc.create_or_update(user="u_auto", token_limit=10_000)
+        ledger = BudgetLedger(flush_interval=0, snapshot_ttl=60)
+        ledger.record_usage(None, "u_auto", tokens=10, cost_usd=0.0)
+        assert _row(budget.id).tokens_used == 10
+
+    def test_stale_snapshot_picks_up_other_workers(self, svc):
+        svc.create_or_update(user="u_ttl", token_limit=100)
+        ledger = BudgetLedger(flush_interval=60, snapshot_ttl=0)
+        assert ledger.check_budget(user="u_ttl")["allowed"] is True
+        svc.record_usage(None, "u_ttl", tokens=150, cost_usd=0.0)
+        assert ledger.check_budget(user="u_ttl")["allowed"] is False
+
+
+class TestLedgerPeriods:
+    def test_rollover_resets_row_once(self, svc):
+        budget = svc.create_or_update(user="u_roll", token_limit=1000)
+        svc.record_usage(None, "u_roll", tokens=900, cost_usd=0.0)
+        row = _row(budget.id)
+        row.reset_at = datetime.now(timezone.utc) - timedelta(minutes=1)
+        db.session.commit()
+
+        first, second = BudgetLedger(60, 60), BudgetLedger(60, 60)
+        assert first.check_budget(user="u_roll")["allowed"] is True
+        assert second.check_budget(user="u_roll")["allowed"] is True
+        first.record_usage(None, "u_roll", tokens=30, cost_usd=0.0)
+        second.record_usage(None, "u_roll", tokens=20, cost_usd=0.0)
+
+        first.flush()
+        second.flush()  # its reset CAS misses; only the increment applies
+        row = _row(budget.id)
+        assert row.tokens_used == 50
+        assert row.request_count == 2
+        assert row.reset_at.replace(tzinfo=timezone.utc) > datetime.now(timezone.utc)
+
+    def test_manual_reset_invalidates_snapshot(self, svc):
+        budget = svc.create_or_update(user="u_manual", token_limit=100)
+        ledger = BudgetLedger(flush_interval=60, snapshot_ttl=60)
+        ledger.record_usage(None, "u_manual", tokens=500, cost_usd=0.0)
+        assert ledger.check_budget(user="u_manual")["allowed"] is False
+
+        svc.reset_budget(budget.id)
+        assert ledger.check_budget(user="u_manual")["allowed"] is True
+        ledger.flush()
+        assert _row(budget.id).tokens_used == 0
+
+
+class TestGatewayLedger:
+    def test_chat_records_through_ledger(self, svc):
+        budget = svc.create_or_update(user="u_gw", token_limit=1_000_000)
+        gw = LLMGateway()
+        gw._budget_ledger.flush_interval = 60
+        for i in range(3):
+            gw.chat([{"role": "user", "content": f"ledger {i}"}], model="local-stub",
+                    purpose="test", user="u_gw", skip_cache=True)
+
+        assert _row(budget.id).tokens_used == 0
+        assert gw._budget_ledger.check_budget(user="u_gw")["budget"]["request_count"] == 3
+        gw._budget_ledger.flush()
+        assert _row(budget.id).request_count == 3
@@ -226,6 +226,7 @@ class TestRAGVersionedIndexing:
         assert old >= 1
 
     def test_search_filters_active_only(self, app, session):
+        from app.ai.keyword_index import KeywordIndex
         from app.ai.rag import RAGPipeline
         rag = RAGPipeline()
 
@@ -240,6 +241,8 @@ class TestRAGVersionedIndexing:
         )
         session.add_all([active, inactive])
         session.flush()
+        # Rows written outside the pipeline are indexed by their writer; search never writes
+        KeywordIndex.index_records([active, inactive])
 
         results = rag.search("payment processing", top_k=10)
         result_ids = {r["entity_id"] for r in results}
@@ -0,0 +1,156 @@
+"""
+Tests for the async provider API (app.ai.async_bridge + LLMGateway.achat/chat_many).
+
+Tests:
+    - AsyncBridge.run / gather: ordering, bounded concurrency, exceptions
+    - Default LLMProvider.achat/aembed delegate to the sync methods
+    - achat retries without blocking the loop, then raises LLMCallError
+    - chat() and chat_many() keep caching + usage logging on the caller
+    - embed_batches() fans out through aembed()
+"""
+
+import asyncio
+
+import pytest
+
+from app.ai import gateway as gateway_module
+from app.ai.async_bridge import get_async_bridge
+from app.ai.gateway import LLMCallError, LLMGateway, LLMProvider, LocalStubProvider
+from app.models.ai import AIUsageLog
+
+
+class _AsyncProvider(LLMProvider):
+    """Native-async fake: tracks peak concurrency, fails the first *fail_first* calls."""
+
+    def __init__(self, delay=0.05, fail_first=0):
+        self.delay = delay
+        self.fail_first = fail_first
+        self.calls = 0
+        self.active = 0
+        self.peak = 0
+
+    def chat(self, messages, model, **kwargs):
+        raise AssertionError("sync chat() must not be used")
+
+    def embed(self, texts, model):
+        raise AssertionError("sync embed() must not be used")
+
+    async def achat(self, messages, model, **kwargs):
+        self.calls += 1
+        if self.calls <= self.fail_first:
+            raise ConnectionError("upstream 503")
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(self.delay)
+        self.active -= 1
+        return {"content": f"re: {messages[-1]['content']}", "prompt_tokens": 3,
+                "completion_tokens": 2, "model": model}
+
+    async def aembed(self, texts, model):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(self.delay)
+        self.active -= 1
+        return [[float(len(t))] for t in texts]
+
+
+@pytest.fixture()
+def fast_backoff(monkeypatch):
+    """Record retry backoffs without actually waiting."""
+    delays = []
+    real_sleep = asyncio.sleep
+
+    async def _sleep(seconds, *args, **kwargs):
+        if seconds >= 1:
+            delays.append(seconds)
+            seconds = 0
+        return await real_sleep(seconds, *args, **kwargs)
+
+    monkeypatch.setattr(gateway_module.asyncio, "sleep", _sleep)
+    return delays
+
+
+def _gateway(provider):
+    gw = LLMGateway()
+    gw._providers["local"] = provider
+    gw._model_selector = None
+    gw._single_flight = None
+    return gw
+
+
+class TestAsyncBridge:
+    def test_run_and_ordered_gather(self):
+        bridge = get_async_bridge()
+
+        async def square(x):
+            await asyncio.sleep(0.01 * (5 - x))
+            return x * x
+
+        assert bridge.run(square(3)) == 9
+        assert bridge.gather([square(x) for x in range(5)]) == [0, 1, 4, 9, 16]
+
+    def test_gather_limit_and_exceptions(self):
+        provider = _AsyncProvider(delay=0.02)
+        msgs = [{"role": "user", "content": "x"}]
+        out = get_async_bridge().gather([provider.achat(msgs, "m") for _ in range(8)], limit=3)
+        assert provider.peak == 3 and len(out) == 8
+
+        async def boom():
+            raise ValueError("bad")
+
+        out = get_async_bridge().gather([boom(), asyncio.sleep(0, result="ok")])
+        assert isinstance(out[0], ValueError) and out[1] == "ok"
+
+    def test_default_provider_methods_use_sync_impl(self):
+        stub = LocalStubProvider()
+        msgs = [{"role": "user", "content": "hello"}]
+        assert get_async_bridge().run(stub.achat(msgs, "local-stub")) == stub.chat(msgs, "local-stub")
+        assert get_async_bridge().run(stub.aembed(["a"], "local-stub")) == stub.embed(["a"], "local-stub")
+
+
+class TestGatewayAsync:
+    MSGS = [{"role": "user", "content": "Classify REQ-1"}]
+
+    def test_achat_retries_without_blocking(self, fast_backoff):
+        provider = _AsyncProvider(fail_first=2)
+        gw = _gateway(provider)
+        result = get_async_bridge().run(gw.achat(self.MSGS, model="local-stub"))
+        assert result["content"] == "re: Classify REQ-1"
+        assert result["provider"] == "local" and result["cache_hit"] is False
+        assert fast_backoff == [1, 2]
+
+    def test_achat_raises_llm_call_error(self, fast_backoff):
+        gw = _gateway(_AsyncProvider(fail_first=10))
+        with pytest.raises(LLMCallError) as exc:
+            get_async_bridge().run(gw.achat(self.MSGS, model="local-stub", max_retries=2))
+        assert isinstance(exc.value.last_error, ConnectionError)
+        assert isinstance(exc.value, RuntimeError)
+
+    def test_chat_logs_failure(self, app, fast_backoff):
+        gw = _gateway(_AsyncProvider(fail_first=10))
+        with pytest.raises(RuntimeError):
+            gw.chat(self.MSGS, model="local-stub", purpose="triage", max_retries=1, skip_budget=True)
+        log = AIUsageLog.query.order_by(AIUsageLog.id.desc()).first()
+        assert log.success is False and "upstream 503" in log.error_message
+
+    def test_chat_many_runs_concurrently_and_caches(self, app):
+        provider = _AsyncProvider(delay=0.05)
+        gw = _gateway(provider)
+        requests = [{"messages": [{"role": "user", "content": f"q{i}"}], "model": "local-stub"}
+                    for i in range(6)]
+
+        results = gw.chat_many(requests, purpose="triage", skip_budget=True, limit=6)
+        assert [r["content"] for r in results] == [f"re: q{i}" for i in range(6)]
+        assert provider.peak > 1
+        assert AIUsageLog.query.filter_by(purpose="triage", cache_hit=False).count() == 6
+
+        again = gw.chat_many(requests[:2], purpose="triage", skip_budget=True)
+        assert all(r["cache_hit"] for r in again)
+        assert provider.calls == 6
+
+    def test_embed_batches_fans_out_via_aembed(self, app):
+        provider = _AsyncProvider(delay=0.05)
+        gw = _gateway(provider)
+        out = gw.embed_batches([["a"], ["bb"], ["ccc"]], model="local-stub", max_workers=3)
+        assert out == [[[1.0]], [[2.0]], [[3.0]]]
+        assert provider.peak == 3
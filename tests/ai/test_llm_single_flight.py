@@ -0,0 +1,183 @@
+"""
+Tests for single-flight request coalescing (app.ai.single_flight + LLMGateway.chat).
+
+Tests:
+    - Concurrent identical keys run the call once and share the result
+    - Leader exceptions propagate to followers
+    - Followers wait for a slow leader instead of timing out
+    - Distributed mode waits for another worker's cached answer
+    - LLMGateway.chat coalesces cacheable prompts, not uncacheable ones
+"""
+
+import threading
+import time
+
+import pytest
+
+from app.ai.gateway import LLMGateway, LLMProvider
+from app.ai.single_flight import SingleFlight
+from app.services import cache_service
+
+N_CALLERS = 5
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.005)
+
+
+def _run_concurrently(fn, n=N_CALLERS):
+    results, errors = [None] * n, [None] * n
+
+    def worker(i):
+        try:
+            results[i] = fn()
+        except Exception as e:
+            errors[i] = e
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(10)
+    return results, errors
+
+
+class TestSingleFlight:
+    def test_concurrent_calls_share_one_execution(self):
+        flight = SingleFlight(distributed=False)
+        calls = []
+
+        def work():
+            calls.append(1)
+            _wait_for(lambda: flight.get_stats()["coalesced"] == N_CALLERS - 1)
+            return {"content": "answer"}
+
+        results, errors = _run_concurrently(lambda: flight.do("k", work))
+        assert errors == [None] * N_CALLERS
+        assert len(calls) == 1
+        assert sorted(shared for _, shared in results) == [False] + [True] * (N_CALLERS - 1)
+        stats = flight.get_stats()
+        assert stats["leaders"] == 1 and stats["coalesced"] == N_CALLERS - 1
+        assert stats["in_flight"] == 0
+
+    def test_leader_error_propagates(self):
+        flight = SingleFlight(distributed=False)
+
+        def work():
+            _wait_for(lambda: flight.get_stats()["coalesced"] == N_CALLERS - 1)
+            raise ValueError("provider down")
+
+        _, errors = _run_concurrently(lambda: flight.do("k", work))
+        assert all(isinstance(e, ValueError) for e in errors)
+
+    def test_followers_outlast_the_remote_timeout(self):
+        flight = SingleFlight(distributed=False, timeout=0.01)
+
+        def work():
+            _wait_for(lambda: flight.get_stats()["coalesced"] == N_CALLERS - 1)
+            time.sleep(0.2)
+            return "slow answer"
+
+        results, errors = _run_concurrently(lambda: flight.do("k", work))
+        assert errors == [None] * N_CALLERS
+        assert {result for result, _ in results} == {"slow answer"}
+
+    def test_sequential_calls_are_not_coalesced(self):
+        flight = SingleFlight(distributed=False)
+        assert flight.do("k", lambda: 1) == (1, False)
+        assert flight.do("k", lambda: 2) == (2, False)
+
+    def test_distributed_waits_for_remote_leader(self):
+        flight = SingleFlight(distributed=True, timeout=5)
+        remote = cache_service.acquire_lock("ai:single_flight:k", ttl=5)
+        store = {}
+
+        def remote_leader():
+            time.sleep(0.2)
+            store["k"] = "remote answer"
+            cache_service.release_lock("ai:single_flight:k", remote)
+
+        threading.Thread(target=remote_leader).start()
+        result, shared = flight.do("k", lambda: "local answer", poll=lambda: store.get("k"))
+        assert (result, shared) == ("remote answer", True)
+        assert flight.get_stats()["remote_coalesced"] == 1
+
+    def test_distributed_falls_back_when_remote_lock_vanishes(self):
+        flight = SingleFlight(distributed=True, timeout=5)
+        token = cache_service.acquire_lock("ai:single_flight:k", ttl=5)
+        threading.Timer(0.1, cache_service.release_lock, ("ai:single_flight:k", token)).start()
+        assert flight.do("k", lambda: "local answer", poll=lambda: None) == ("local answer", False)
+
+
+class _SlowProvider(LLMProvider):
+    def __init__(self, gateway):
+        self.gateway = gateway
+        self.calls = 0
+
+    def chat(self, messages, model, **kwargs):
+        self.calls += 1
+        _wait_for(lambda: self.gateway._single_flight.get_stats()["coalesced"] == N_CALLERS - 1,
+                  timeout=0.5)
+        return {"content": "shared", "prompt_tokens": 10, "completion_tokens": 5, "model": model}
+
+    def embed(self, texts, model):
+        return []
+
+
+class _DictCache:
+    def __init__(self):
+        self.data = {}
+
+    @staticmethod
+    def compute_hash(messages, model):
+        return f"{model}:{messages[-1]['content']}"
+
+    def get(self, key, purpose="", use_negative=True):
+        return self.data.get(key)
+
+    def set(self, prompt_hash, response, **kwargs):
+        self.data[prompt_hash] = response
+
+    @staticmethod
+    def should_cache(purpose):
+        return purpose != "conversation"
+
+
+@pytest.fixture()
+def gateway(monkeypatch):
+    gw = LLMGateway()
+    gw._cache = _DictCache()
+    gw._budget_service = None
+    gw._model_selector = None
+    gw._single_flight = SingleFlight(distributed=False)
+    provider = _SlowProvider(gw)
+    gw._providers["local"] = provider
+    usage = []
+    monkeypatch.setattr(gw, "_log_usage", lambda **kw: usage.append(kw))
+    monkeypatch.setattr(gw, "_log_audit", lambda **kw: None)
+    return gw, provider, usage
+
+
+class TestGatewayCoalescing:
+    MESSAGES = [{"role": "user", "content": "Summarise open risks"}]
+
+    def test_identical_prompts_hit_provider_once(self, gateway):
+        gw, provider, usage = gateway
+        results, errors = _run_concurrently(
+            lambda: gw.chat(self.MESSAGES, model="local-stub", purpose="risk_assessment"))
+
+        assert errors == [None] * N_CALLERS
+        assert provider.calls == 1
+        assert {r["content"] for r in results} == {"shared"}
+        followers = [r for r in results if r.get("coalesced")]
+        assert len(followers) == N_CALLERS - 1
+        assert all(r["cost_usd"] == 0.0 for r in followers)
+        assert sorted(u["provider"] for u in usage) == ["coalesced"] * (N_CALLERS - 1) + ["local"]
+
+    def test_uncacheable_purpose_is_not_coalesced(self, gateway):
+        gw, provider, _ = gateway
+        _run_concurrently(lambda: gw.chat(self.MESSAGES, model="local-stub", purpose="conversation"))
+        assert provider.calls == N_CALLERS
+        assert gw._single_flight.get_stats()["leaders"] == 0
@@ -0,0 +1,113 @@
+"""
+Tests for bulk RAG indexing (RAGPipeline.batch_index).
+
+Tests:
+    - Unchanged entities skipped via the up-front hash prefetch
+    - Changed entities re-indexed (old chunks deactivated, postings replaced)
+    - Chunk texts packed into provider-sized concurrent embed calls
+    - Failed embed batches stored without vectors
+    - Progress and cancellation through AITask
+    - LLMGateway.embed_batches aggregation
+"""
+
+import threading
+
+from app.ai.gateway import LLMGateway
+from app.ai.rag import RAGPipeline
+from app.ai.task_runner import TaskRunner
+from app.ai.vector_index import VectorIndexRegistry
+from app.models import db
+from app.models.ai import AIEmbedding, AIKeywordPosting, AITask, AIUsageLog
+
+
+class _BatchGateway:
+    """Fake gateway recording embed_batches calls; 4-dim vectors keyed on text length."""
+
+    embedding_model = "fake-embed"
+
+    def __init__(self, fail_batches=()):
+        self.calls = []
+        self.fail_batches = set(fail_batches)
+        self._lock = threading.Lock()
+
+    def embed_batches(self, batches, **kwargs):
+        with self._lock:
+            self.calls.append([len(b) for b in batches])
+        return [
+            None if i in self.fail_batches else [[float(len(t)), 1.0, 0.0, 0.0] for t in texts]
+            for i, texts in enumerate(batches)
+        ]
+
+
+def _entities(n, title="Payment block"):
+    return [
+        {"entity_type": "requirement", "entity_id": i, "data": {"id": i, "title": f"{title} {i}"}}
+        for i in range(1, n + 1)
+    ]
+
+
+def _active(entity_id):
+    return AIEmbedding.query.filter_by(entity_type="requirement", entity_id=entity_id, is_active=True).all()
+
+
+class TestBatchIndex:
+    def test_indexes_all_entities_in_few_embed_calls(self, app):
+        gw = _BatchGateway()
+        rag = RAGPipeline(gateway=gw, vector_index=VectorIndexRegistry(backend="flat"))
+        total = rag.batch_index(_entities(7), commit_every=3, embed_batch_size=2)
+
+        assert total == 7
+        # 3 commit batches (3 + 3 + 1 entities), each split into 2-text provider calls
+        assert gw.calls == [[2, 1], [2, 1], [1]]
+        rec = _active(5)[0]
+        assert rec.has_embedding and rec.embedding_dim == 4 and rec.embedding_model == "fake-embed"
+        assert rec.token_count is not None
+        assert rec.id in rag.vector_index.get(None, "requirement")
+
+    def test_unchanged_entities_are_skipped(self, app):
+        rag = RAGPipeline(gateway=_BatchGateway())
+        rag.batch_index(_entities(4))
+        first_ids = {r.id for r in AIEmbedding.query.all()}
+
+        entities = _entities(4)
+        entities[1]["data"]["title"] = "Invoice split"
+        assert rag.batch_index(entities) == 1
+
+        old = [r for r in AIEmbedding.query.filter_by(entity_id=2).all() if r.id in first_ids][0]
+        assert old.is_active is False
+        assert AIKeywordPosting.query.filter_by(embedding_id=old.id).count() == 0
+        assert "Invoice" in _active(2)[0].chunk_text
+        assert AIEmbedding.query.filter_by(is_active=True).count() == 4
+
+    def test_failed_embed_batch_stores_chunks_without_vectors(self, app):
+        rag = RAGPipeline(gateway=_BatchGateway(fail_batches={1}))
+        rag.batch_index(_entities(4), embed_batch_size=2)
+        assert [_active(i)[0].has_embedding for i in range(1, 5)] == [True, True, False, False]
+
+    def test_matches_index_entity_results(self, app):
+        rag = RAGPipeline()
+        rag.batch_index(_entities(2), embed=False)
+        assert rag.index_entity("requirement", 1, {"id": 1, "title": "Payment block 1"}, embed=False) == []
+
+    def test_reports_progress_and_honours_cancel(self, app):
+        task = AITask(task_type="rag_batch_index", status="running")
+        db.session.add(task)
+        db.session.commit()
+
+        rag = RAGPipeline()
+        rag.batch_index(_entities(4), embed=False, commit_every=2, task_id=task.id)
+        assert db.session.get(AITask, task.id).progress_pct == 100
+
+        TaskRunner().cancel(task.id)
+        db.session.commit()
+        assert rag.batch_index(_entities(4, title="Goods receipt"), embed=False, task_id=task.id) == 0
+
+
+class TestGatewayEmbedBatches:
+    def test_returns_vectors_per_batch_and_logs_once(self, app):
+        gw = LLMGateway()
+        before = AIUsageLog.query.count()
+        out = gw.embed_batches([["a", "b"], ["c"], ["d", "e", "f"]], model="local-stub", max_workers=2)
+        assert [len(v) for v in out] == [2, 1, 3]
+        assert out[0] == gw.embed(["a", "b"], model="local-stub")[:2]
+        assert AIUsageLog.query.count() == before + 2  # one for embed_batches, one for embed
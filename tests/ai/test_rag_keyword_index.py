@@ -0,0 +1,131 @@
+"""
+Tests for the RAG keyword (BM25) inverted index.
+
+Tests:
+    - Postings + token_count written by RAGPipeline.index_entity
+    - Postings removed when chunks are deactivated / KB version archived
+    - Rows written outside the pipeline / re-activated are indexed on write, never on search
+    - BM25 ranking, filters and top-k early termination (also for docs just outside the top set)
+"""
+
+from app.ai.keyword_index import KeywordIndex, tokenize
+from app.ai.rag import RAGPipeline
+from app.models import db
+from app.models.ai import AIEmbedding, AIKeywordPosting
+
+
+def _postings_for(emb_id):
+    return {p.term: p.tf for p in AIKeywordPosting.query.filter_by(embedding_id=emb_id)}
+
+
+class TestKeywordIndexMaintenance:
+    def test_index_entity_writes_postings(self, app):
+        rag = RAGPipeline()
+        rec = rag.index_entity("requirement", 1, {"id": 1, "title": "Payment payment block"}, embed=False)[0]
+        postings = _postings_for(rec.id)
+        assert postings["payment"] == 2
+        assert rec.token_count == len(tokenize(rec.chunk_text))
+
+    def test_reindex_replaces_postings(self, app):
+        rag = RAGPipeline()
+        old = rag.index_entity("requirement", 1, {"id": 1, "title": "Payment block"}, embed=False)[0]
+        new = rag.index_entity("requirement", 1, {"id": 1, "title": "Invoice split"}, embed=False)[0]
+        assert _postings_for(old.id) == {}
+        assert db.session.get(AIEmbedding, old.id).token_count is None
+        assert "invoice" in _postings_for(new.id)
+
+    def test_unindexed_rows_are_caught_up_on_write_not_search(self, app):
+        emb = AIEmbedding(entity_type="risk", entity_id=9, chunk_text="vendor delay risk", is_active=True)
+        db.session.add(emb)
+        db.session.flush()
+
+        assert RAGPipeline().search("vendor", top_k=5) == []
+        assert emb.token_count is None
+
+        RAGPipeline().index_entity("risk", 10, {"id": 10, "title": "Budget overrun"}, embed=False)
+        assert emb.token_count == 3
+        assert [r["entity_id"] for r in RAGPipeline().search("vendor", top_k=5)] == [9]
+
+    def test_activate_kb_version_reindexes_its_rows(self, app):
+        from app.models.ai import KBVersion
+        from app.services.ai_kb_service import activate_kb_version
+
+        old = KBVersion(version="1.0.0", status="building")
+        new = KBVersion(version="2.0.0", status="building")
+        db.session.add_all([old, new])
+        db.session.commit()
+        rec = RAGPipeline().index_entity("risk", 4, {"id": 4, "title": "Rollback risk"}, embed=False)[0]
+        postings, token_count = _postings_for(rec.id), rec.token_count
+        activate_kb_version(old.id)
+        activate_kb_version(new.id)
+        assert _postings_for(rec.id) == {}
+
+        activate_kb_version(old.id)
+        assert _postings_for(rec.id) == postings
+        assert db.session.get(AIEmbedding, rec.id).token_count == token_count
+
+    def test_archive_kb_version_drops_postings(self, app):
+        from app.models.ai import KBVersion
+        from app.services.ai_kb_service import archive_kb_version
+
+        kb = KBVersion(version="9.9.9", status="building")
+        db.session.add(kb)
+        db.session.commit()
+        rec = RAGPipeline().index_entity("risk", 4, {"id": 4, "title": "Archived risk"},
+                                         embed=False, kb_version="9.9.9")[0]
+        archive_kb_version(kb.id)
+        assert _postings_for(rec.id) == {}
+
+
+class TestKeywordIndexSearch:
+    def _corpus(self):
+        rag = RAGPipeline()
+        rag.index_entity("requirement", 1, {"id": 1, "title": "Payment run", "module": "FI"}, embed=False)
+        rag.index_entity("requirement", 2, {"id": 2, "title": "Payment block release payment", "module": "FI"},
+                         embed=False)
+        rag.index_entity("defect", 3, {"id": 3, "title": "Goods receipt posting", "module": "MM"}, embed=False)
+
+    def test_bm25_ranks_and_normalises(self, app):
+        self._corpus()
+        scores = KeywordIndex.search("payment block", limit=10)
+        by_entity = {db.session.get(AIEmbedding, k).entity_id: v for k, v in scores.items()}
+        assert set(by_entity) == {1, 2}
+        assert by_entity[2] == 1.0
+        assert 0 < by_entity[1] < 1.0
+
+    def test_filters_restrict_postings(self, app):
+        self._corpus()
+        assert KeywordIndex.search("payment", module="MM", limit=10) == {}
+        scores = KeywordIndex.search("posting", entity_type="defect", limit=10)
+        assert len(scores) == 1
+
+    def test_early_termination_keeps_exact_top_k(self, app):
+        rag = RAGPipeline()
+        for i in range(1, 41):
+            words = ["rare"] if i % 10 == 0 else []
+            words += ["common"] * (1 + i % 3)
+            rag.index_entity("requirement", i, {"id": i, "title": " ".join(words)}, embed=False)
+
+        exhaustive = KeywordIndex.search("rare common", limit=1000)
+        expected = sorted(exhaustive, key=exhaustive.get, reverse=True)[:4]
+        top = KeywordIndex.search("rare common", limit=4)
+        assert sorted(top, key=top.get, reverse=True) == expected
+
+    def test_early_termination_rescores_docs_just_outside_top_k(self, app):
+        # After "rare", doc 1 leads and doc 3 trails it closely; "common" lifts doc 3 past it
+        texts = [
+            "rare rare rare other other other",
+            " ".join(["common"] * 5 + ["other"] * 20),
+            "rare rare common common common common common other",
+            " ".join(["common"] * 5),
+        ]
+        rows = [AIEmbedding(entity_type="risk", entity_id=i, chunk_text=text, is_active=True)
+                for i, text in enumerate(texts, start=1)]
+        db.session.add_all(rows)
+        db.session.flush()
+        KeywordIndex.index_records(rows)
+
+        exhaustive = KeywordIndex.search("rare common", limit=1000)
+        best = max(exhaustive, key=exhaustive.get)
+        assert db.session.get(AIEmbedding, best).entity_id == 3
+        assert list(KeywordIndex.search("rare common", limit=1)) == [best]
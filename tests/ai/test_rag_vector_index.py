@@ -0,0 +1,296 @@
+"""
+Tests for the RAG ANN vector index and binary embedding storage.
+
+Tests:
+    - Embedding codec round-trips (float32 / float16 / int8)
+    - FlatVectorIndex exact search, replace and remove
+    - IVFVectorIndex background training, probing, allowed-id and tag filtering
+    - VectorIndexRegistry versioned persistence round-trip; writes racing adds or failing stay dirty
+    - RAGPipeline incremental index maintenance + semantic search leg
+    - Catch-up re-scans ids just under the synced id for late commits
+    - PostgreSQL rows keep JSON vectors for pgvector alongside the blob
+"""
+
+import json
+import random
+
+import pytest
+
+from app.ai import rag as rag_module
+from app.ai.embedding_codec import embedding_vector, pack_embedding, unpack_embedding
+from app.ai.rag import RAGPipeline
+from app.ai.vector_index import FlatVectorIndex, IVFVectorIndex, VectorIndexRegistry
+from app.models import db
+from app.models.ai import AIEmbedding
+
+
+def _unit(dim, hot):
+    vec = [0.0] * dim
+    vec[hot] = 1.0
+    return vec
+
+
+class _KeywordGateway:
+    """Fake gateway: one-hot embedding on the first known keyword in the text."""
+
+    KEYWORDS = ["payment", "invoice", "vendor", "material"]
+    embedding_model = "fake-embed"
+
+    def embed(self, texts, **kwargs):
+        out = []
+        for text in texts:
+            lower = text.lower()
+            hot = next((i for i, k in enumerate(self.KEYWORDS) if k in lower), 3)
+            out.append(_unit(8, hot))
+        return out
+
+
+class TestEmbeddingCodec:
+    VEC = [0.5, -0.25, 0.125, 0.0, 1.0, -1.0]
+
+    def test_float32_lossless(self):
+        blob = pack_embedding(self.VEC, "float32")
+        assert len(blob) == 4 * len(self.VEC)
+        assert list(unpack_embedding(blob, "float32")) == self.VEC
+
+    def test_float16_and_int8_are_compact_and_close(self):
+        half = pack_embedding(self.VEC, "float16")
+        quant = pack_embedding(self.VEC, "int8")
+        assert len(half) == 2 * len(self.VEC)
+        assert len(quant) == 4 + len(self.VEC)
+        assert list(unpack_embedding(half, "float16")) == pytest.approx(self.VEC, abs=1e-3)
+        assert list(unpack_embedding(quant, "int8")) == pytest.approx(self.VEC, abs=1e-2)
+
+    def test_unknown_format_rejected(self):
+        with pytest.raises(ValueError):
+            pack_embedding(self.VEC, "bfloat16")
+
+    def test_embedding_vector_reads_blob_then_legacy_json(self):
+        blob_row = AIEmbedding(embedding_blob=pack_embedding(self.VEC), embedding_format="float32")
+        json_row = AIEmbedding(embedding_json=json.dumps(self.VEC))
+        empty_row = AIEmbedding()
+        assert list(embedding_vector(blob_row)) == self.VEC
+        assert embedding_vector(json_row) == self.VEC
+        assert embedding_vector(empty_row) is None
+        assert blob_row.has_embedding and json_row.has_embedding and not empty_row.has_embedding
+
+
+class TestFlatVectorIndex:
+    def test_search_returns_nearest_first(self):
+        index = FlatVectorIndex()
+        index.add([1, 2, 3], [_unit(4, 0), _unit(4, 1), [0.7, 0.7, 0, 0]])
+        hits = index.search(_unit(4, 0), k=2)
+        assert [h[0] for h in hits] == [1, 3]
+        assert hits[0][1] == pytest.approx(1.0)
+
+    def test_remove_and_replace(self):
+        index = FlatVectorIndex()
+        index.add([1, 2], [_unit(4, 0), _unit(4, 1)])
+        index.remove([1])
+        assert 1 not in index
+        assert [h[0] for h in index.search(_unit(4, 0), k=5)] == [2]
+
+        index.add([2], [_unit(4, 0)])
+        assert len(index) == 1
+        assert index.search(_unit(4, 0), k=1)[0][1] == pytest.approx(1.0)
+
+    def test_allowed_ids_filter_and_dim_mismatch(self):
+        index = FlatVectorIndex()
+        index.add([1, 2, 3], [_unit(4, 0), _unit(4, 0), [1.0, 0.0]])
+        assert len(index) == 2  # id 3 skipped: wrong dimension
+        assert [h[0] for h in index.search(_unit(4, 0), k=5, allowed_ids={2})] == [2]
+        assert index.search([1.0, 0.0], k=5) == []
+
+
+class TestIVFVectorIndex:
+    def _clustered(self, n, dim=16, seed=7):
+        rng = random.Random(seed)
+        vectors = []
+        for i in range(n):
+            vec = [rng.gauss(0, 0.05) for _ in range(dim)]
+            vec[i % dim] += 1.0
+            vectors.append(vec)
+        return vectors
+
+    def test_trains_and_finds_exact_match(self):
+        vectors = self._clustered(600)
+        index = IVFVectorIndex(nprobe=4, train_min=200)
+        index.add(list(range(1, 601)), vectors)
+        assert index.search(vectors[41], k=3)[0][0] == 42  # exact scan while training
+        assert index.wait_for_training(timeout=30)
+        hits = index.search(vectors[41], k=3)
+        assert hits[0][0] == 42
+        assert hits[0][1] == pytest.approx(1.0, abs=1e-5)
+
+    def test_incremental_add_after_training(self):
+        vectors = self._clustered(400)
+        index = IVFVectorIndex(nprobe=4, train_min=200)
+        index.add(list(range(1, 401)), vectors)
+        index.train()
+        index.add([999], [vectors[5]])
+        assert 999 in [h[0] for h in index.search(vectors[5], k=2)]
+
+    def test_filter_widens_when_probed_lists_are_empty(self):
+        vectors = self._clustered(400)
+        index = IVFVectorIndex(nprobe=1, train_min=200)
+        index.add(list(range(1, 401)), vectors)
+        # Ask for an id far from the query's cluster
+        allowed = set(range(2, 401, 2))
+        hits = index.search(vectors[0], k=len(allowed), allowed_ids=allowed)
+        assert {h[0] for h in hits} == allowed
+
+
+    def test_tag_filter_inside_probed_lists(self):
+        vectors = self._clustered(400)
+        index = IVFVectorIndex(nprobe=2, train_min=200)
+        index.add(list(range(1, 401)), vectors, tags=["FI" if i % 3 else "MM" for i in range(400)])
+        index.train()
+        hits = index.search(vectors[3], k=5, tag="MM")
+        assert hits and all((emb_id - 1) % 3 == 0 for emb_id, _ in hits)
+        assert index.search(vectors[3], k=5, tag="SD") == []
+
+
+class TestVectorIndexRegistry:
+    def test_persist_and_reload(self, tmp_path):
+        registry = VectorIndexRegistry(backend="flat", persist_dir=str(tmp_path))
+        registry.add(7, "requirement", [10, 11], [_unit(4, 0), _unit(4, 1)])
+        assert registry.flush(force=True) == 1
+
+        reloaded = VectorIndexRegistry(backend="flat", persist_dir=str(tmp_path))
+        index = reloaded.get(7, "requirement")
+        assert len(index) == 2
+        assert index.search(_unit(4, 1), k=1)[0][0] == 11
+
+    def test_reader_sees_one_version_and_old_versions_are_pruned(self, tmp_path):
+        registry = VectorIndexRegistry(backend="flat", persist_dir=str(tmp_path))
+        for round_ in range(3):
+            registry.add(7, "requirement", [20 + round_], [_unit(4, round_)], ["FI"])
+            registry.flush(force=True)
+        # Current + previous version only: 2 × (ids, vectors, tags)
+        assert len(list(tmp_path.glob("*.npy"))) == 6
+
+        index = VectorIndexRegistry(backend="flat", persist_dir=str(tmp_path)).get(7, "requirement")
+        assert {h[0] for h in index.search(_unit(4, 2), k=5, tag="FI")} == {20, 21, 22}
+
+    def test_add_during_write_stays_dirty(self, tmp_path, monkeypatch):
+        registry = VectorIndexRegistry(backend="flat", persist_dir=str(tmp_path))
+        registry.add(7, "requirement", [10], [_unit(4, 0)])
+        index = registry.get(7, "requirement")
+        snapshot = index.to_arrays
+
+        def to_arrays_racing_an_add():
+            arrays = snapshot()
+            registry.add(7, "requirement", [11], [_unit(4, 1)])
+            return arrays
+
+        monkeypatch.setattr(index, "to_arrays", to_arrays_racing_an_add)
+        assert registry.flush(force=True) == 1
+        monkeypatch.undo()
+        assert registry.flush(force=True) == 1
+        assert len(VectorIndexRegistry(backend="flat", persist_dir=str(tmp_path)).get(7, "requirement")) == 2
+
+    def test_failed_write_stays_dirty(self, tmp_path, monkeypatch):
+        registry = VectorIndexRegistry(backend="flat", persist_dir=str(tmp_path))
+        registry.add(7, "requirement", [10], [_unit(4, 0)])
+
+        def disk_full(key, index):
+            raise OSError("disk full")
+
+        monkeypatch.setattr(registry, "_write_partition", disk_full)
+        assert registry.flush(force=True) == 0
+        monkeypatch.undo()
+        assert registry.flush(force=True) == 1
+
+    def test_files_from_another_stamp_are_ignored(self, tmp_path):
+        registry = VectorIndexRegistry(backend="flat", persist_dir=str(tmp_path))
+        registry.sync_stamp("1.0.0")
+        registry.add(7, "requirement", [10], [_unit(4, 0)])
+        registry.flush(force=True)
+
+        reloaded = VectorIndexRegistry(backend="flat", persist_dir=str(tmp_path))
+        reloaded.sync_stamp("2.0.0")
+        assert len(reloaded.get(7, "requirement")) == 0
+
+    def test_unknown_backend_rejected(self):
+        with pytest.raises(ValueError):
+            VectorIndexRegistry(backend="annoy")
+
+
+class TestRAGPipelineVectorIndex:
+    def test_index_entity_updates_index(self, app):
+        registry = VectorIndexRegistry(backend="flat")
+        rag = RAGPipeline(gateway=_KeywordGateway(), vector_index=registry)
+
+        first = rag.index_entity("requirement", 1, {"id": 1, "title": "Payment run"}, program_id=None)
+        index = registry.get(None, "requirement")
+        assert first[0].id in index
+
+        second = rag.index_entity("requirement", 1, {"id": 1, "title": "Invoice check"}, program_id=None)
+        assert first[0].id not in index
+        assert second[0].id in index
+
+    def test_index_entity_stores_binary_vectors(self, app):
+        rag = RAGPipeline(gateway=_KeywordGateway(), vector_index=VectorIndexRegistry(backend="flat"))
+        rec = rag.index_entity("risk", 3, {"id": 3, "title": "Vendor delay"})[0]
+        assert rec.embedding_json is None
+        assert rec.embedding_format == "float32"
+        assert len(rec.embedding_blob) == 4 * rec.embedding_dim
+        assert list(embedding_vector(rec)) == _unit(8, 2)
+
+    def test_index_entity_keeps_json_vectors_on_postgresql(self, app, monkeypatch):
+        monkeypatch.setattr(rag_module, "_on_postgresql", lambda: True)
+        rag = RAGPipeline(gateway=_KeywordGateway(), vector_index=VectorIndexRegistry(backend="flat"))
+        rec = rag.index_entity("risk", 3, {"id": 3, "title": "Vendor delay"})[0]
+        assert rec.embedding_format == "float32"
+        assert json.loads(rec.embedding_json) == _unit(8, 2)
+
+    def test_search_uses_index_for_semantic_leg(self, app):
+        registry = VectorIndexRegistry(backend="ivf")
+        rag = RAGPipeline(gateway=_KeywordGateway(), vector_index=registry)
+        rag.index_entity("requirement", 1, {"id": 1, "title": "Payment run"})
+        rag.index_entity("requirement", 2, {"id": 2, "title": "Vendor master"})
+
+        results = rag.search("outgoing payment", top_k=2)
+        assert results[0]["entity_id"] == 1
+        assert results[0]["semantic_score"] == pytest.approx(1.0)
+
+    def test_search_catches_up_rows_missing_from_index(self, app):
+        registry = VectorIndexRegistry(backend="flat")
+        rag = RAGPipeline(gateway=_KeywordGateway(), vector_index=registry)
+        emb = AIEmbedding(
+            entity_type="defect", entity_id=5, chunk_text="material shortage",
+            embedding_json=json.dumps(_unit(8, 3)), is_active=True,
+        )
+        db.session.add(emb)
+        db.session.flush()
+
+        results = rag.search("material", top_k=1)
+        assert results[0]["entity_id"] == 5
+        assert emb.id in registry.get(None, "defect")
+
+    def test_search_catches_up_rows_committed_below_the_synced_id(self, app):
+        registry = VectorIndexRegistry(backend="flat")
+        rag = RAGPipeline(gateway=_KeywordGateway(), vector_index=registry)
+        late = AIEmbedding(
+            entity_type="defect", entity_id=6, chunk_text="material shortage",
+            embedding_json=json.dumps(_unit(8, 3)), is_active=True,
+        )
+        db.session.add(late)
+        db.session.flush()
+        # Another worker's higher id was synced before this row committed
+        registry.get(None, "defect").synced_id = late.id + 5
+
+        results = rag.search("material", top_k=1)
+        assert results[0]["entity_id"] == 6
+        assert late.id in registry.get(None, "defect")
+
+    def test_search_drops_hits_deactivated_elsewhere(self, app):
+        registry = VectorIndexRegistry(backend="flat")
+        rag = RAGPipeline(gateway=_KeywordGateway(), vector_index=registry)
+        rec = rag.index_entity("requirement", 1, {"id": 1, "title": "Payment run"})[0]
+        rag.index_entity("requirement", 2, {"id": 2, "title": "Vendor master"})
+        AIEmbedding.query.filter_by(id=rec.id).update({"is_active": False})
+        db.session.flush()
+
+        assert all(r["id"] != rec.id for r in rag.search("payment", top_k=2))
+        assert rec.id not in registry.get(None, "requirement")
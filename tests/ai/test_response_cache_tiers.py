@@ -0,0 +1,106 @@
+"""
+Tests for the tiered LLM response cache (app.ai.cache.ResponseCacheService).
+
+Tests:
+    - Memory tier is LRU and bounded by entries and bytes
+    - Oversized responses are not admitted to memory
+    - DB misses are negative-cached; set() and polling bypass it
+    - Shared tier serves hits to other workers before the DB
+    - Per-purpose hit/miss/eviction metrics
+"""
+
+import pytest
+
+from app.ai.cache import SHARED_KEY_PREFIX, ResponseCacheService
+from app.services import cache_service
+
+
+@pytest.fixture(autouse=True)
+def _clean_shared():
+    cache_service.clear_all()
+    yield
+    cache_service.clear_all()
+
+
+def _svc(**kwargs):
+    kwargs.setdefault("shared", False)
+    return ResponseCacheService(ttl_seconds=60, **kwargs)
+
+
+class TestMemoryTier:
+    def test_lru_keeps_recently_read(self):
+        svc = _svc(max_entries=3)
+        for key in ("a", "b", "c"):
+            svc.set(key, {"v": key}, "m", "triage")
+        svc.get("a", "triage")  # a becomes most recent
+        svc.set("d", {"v": "d"}, "m", "triage")
+        assert list(svc._memory) == ["c", "a", "d"]
+        assert svc.get_stats()["by_purpose"]["triage"]["evictions"] == 1
+
+    def test_byte_bound(self):
+        svc = _svc(max_bytes=2000)
+        for i in range(20):
+            svc.set(f"k{i}", {"text": "x" * 200}, "m", "spec")
+        stats = svc.get_stats()
+        assert stats["memory_bytes"] <= 2000
+        assert 0 < stats["memory_entries"] < 20
+        assert stats["evictions"] == 20 - stats["memory_entries"]
+
+    def test_oversized_response_skips_memory(self, app):
+        svc = _svc(max_bytes=800)
+        svc.set("big", {"text": "x" * 500}, "m", "spec")
+        assert "big" not in svc._memory
+        assert svc.get("big")["text"] == "x" * 500  # still served by the DB tier
+        assert svc.get_stats()["tier_hits"]["db"] == 1
+
+
+class TestNegativeCache:
+    def test_db_miss_is_remembered(self, app):
+        svc = _svc(negative_ttl=60)
+        other = _svc()
+        assert svc.get("cold") is None
+        other.set("cold", {"v": 1}, "m", "triage")  # another worker fills the DB
+
+        assert svc.get("cold") is None
+        assert svc.get_stats()["negative_hits"] == 1
+        assert svc.get("cold", use_negative=False) == {"v": 1}
+
+    def test_set_clears_negative_entry(self, app):
+        svc = _svc(negative_ttl=60)
+        assert svc.get("k") is None
+        svc.set("k", {"v": 2}, "m", "triage")
+        assert svc.get("k") == {"v": 2}
+
+
+class TestSharedTier:
+    def test_other_worker_hits_shared_before_db(self, app):
+        writer, reader = _svc(shared=True), _svc(shared=True)
+        writer.set("shared-key", {"v": "s"}, "m", "risk")
+        assert cache_service.get_cached(SHARED_KEY_PREFIX + "shared-key") is not None
+
+        assert reader.get("shared-key", "risk") == {"v": "s"}
+        assert reader.get_stats()["tier_hits"] == {"memory": 0, "shared": 1, "db": 0}
+        reader.get("shared-key", "risk")
+        assert reader.get_stats()["tier_hits"]["memory"] == 1
+
+    def test_invalidate_clears_shared(self, app):
+        svc = _svc(shared=True)
+        svc.set("x1", {"v": 1}, "m", "risk")
+        svc.set("x2", {"v": 2}, "m", "risk")
+        svc.invalidate()
+        assert cache_service.get_cached(SHARED_KEY_PREFIX + "x1") is None
+        assert svc.get("x2") is None
+
+
+class TestPurposeMetrics:
+    def test_hit_ratio_per_purpose(self, app):
+        svc = _svc()
+        svc.set("h", {"v": 1}, "m", "triage")
+        svc.get("h", "triage")
+        svc.get("h", "triage")
+        svc.get("nope", "triage")
+        svc.get("nope2", "spec")
+        by_purpose = svc.get_stats()["by_purpose"]
+        assert by_purpose["triage"]["hits"] == 2
+        assert by_purpose["triage"]["hit_rate_pct"] == pytest.approx(66.67)
+        assert by_purpose["spec"] == {"hits": 0, "misses": 1, "evictions": 0, "hit_rate_pct": 0.0}
@@ -0,0 +1,195 @@
+"""
+Tests for the durable AI task queue (app.ai.task_runner).
+
+Tests:
+    - Durable submit stays pending and is claimed in priority order
+    - Claims are compare-and-set and respect per-tenant limits
+    - Stale leases are requeued, or failed after max attempts
+    - process_pending() renews the lease while a job runs
+    - Cancellation interrupts a running task at update_progress()
+    - Local pool picks the best eligible job per lane and tenant
+    - The in-process queue is bounded
+"""
+
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.ai import task_runner as tr
+from app.ai.task_runner import (
+    TaskQueueFull,
+    TaskRunner,
+    _Job,
+    _WorkerPool,
+    claim_pending_tasks,
+    current_task_id,
+    reclaim_stale_tasks,
+)
+from app.models import db
+from app.models.ai import AITask
+
+
+@pytest.fixture()
+def handlers(monkeypatch):
+    """Isolated handler registry recording execution order."""
+    registry, ran = {}, []
+    monkeypatch.setattr(tr, "_TASK_HANDLERS", registry)
+
+    def _echo(data):
+        ran.append(data["n"])
+        return {"n": data["n"]}
+
+    registry["echo"] = _echo
+    return registry, ran
+
+
+def _submit(runner, n, priority="normal", tenant_id=None, task_type="echo"):
+    return runner.submit(task_type, {"n": n}, priority=priority, tenant_id=tenant_id)["id"]
+
+
+class TestDurableQueue:
+    def test_submit_is_pending_until_claimed(self, app, handlers):
+        runner = TaskRunner()
+        task_id = _submit(runner, 1)
+        assert runner.get_status(task_id)["status"] == "pending"
+
+        assert runner.process_pending() == 1
+        status = runner.get_status(task_id)
+        assert status["status"] == "completed"
+        assert status["result"] == {"n": 1}
+        assert status["attempts"] == 1
+
+    def test_priority_lanes_then_fifo(self, app, handlers):
+        _, ran = handlers
+        runner = TaskRunner()
+        _submit(runner, 1, "low")
+        _submit(runner, 2, "normal")
+        _submit(runner, 3, "high")
+        _submit(runner, 4, "normal")
+        runner.process_pending()
+        assert ran == [3, 2, 4, 1]
+
+    def test_claim_is_exclusive(self, app, handlers):
+        task_id = _submit(TaskRunner(), 1)
+        first = claim_pending_tasks(5)
+        assert [j.task_id for j in first] == [task_id]
+        assert claim_pending_tasks(5) == []
+        assert db.session.get(AITask, task_id).claimed_by == tr._worker_id()
+
+    def test_tenant_concurrency_limit(self, app, handlers, monkeypatch):
+        monkeypatch.setattr(tr, "AI_TASK_TENANT_CONCURRENCY", 1)
+        runner = TaskRunner()
+        _submit(runner, 1, tenant_id=7)
+        _submit(runner, 2, tenant_id=7)
+        _submit(runner, 3, tenant_id=8)
+        claimed = claim_pending_tasks(10)
+        assert sorted(j.input_data["n"] for j in claimed) == [1, 3]
+
+    def test_unregistered_type_is_not_claimed(self, app, handlers):
+        task_id = _submit(TaskRunner(), 1, task_type="external_only")
+        assert claim_pending_tasks(5) == []
+        assert db.session.get(AITask, task_id).status == "pending"
+
+
+class TestLeaseRecovery:
+    def _stale_running(self, task_type, attempts):
+        task = AITask(task_type=task_type, status="running", attempts=attempts, claimed_by="dead:1",
+                      heartbeat_at=datetime.now(timezone.utc) - timedelta(hours=1))
+        db.session.add(task)
+        db.session.commit()
+        return task.id
+
+    def test_stale_durable_task_is_requeued(self, app, handlers):
+        task_id = self._stale_running("echo", attempts=1)
+        assert reclaim_stale_tasks() == 1
+        task = db.session.get(AITask, task_id)
+        assert task.status == "pending" and task.claimed_by is None
+
+    def test_exhausted_or_in_process_task_fails(self, app, handlers):
+        exhausted = self._stale_running("echo", attempts=tr.AI_TASK_MAX_ATTEMPTS)
+        lost = self._stale_running("closure_only", attempts=1)
+        reclaim_stale_tasks()
+        assert db.session.get(AITask, exhausted).status == "failed"
+        assert "dead:1" in db.session.get(AITask, lost).error_message
+
+    def test_process_pending_renews_lease_while_running(self, app, handlers, monkeypatch):
+        registry, _ = handlers
+        beats = []
+        monkeypatch.setattr(tr, "AI_TASK_POLL_INTERVAL", 0.01)
+        monkeypatch.setattr(tr, "_renew_leases", lambda: beats.append(list(tr._running_tasks)))
+
+        def _slow(data):
+            deadline = time.monotonic() + 5
+            while not beats and time.monotonic() < deadline:
+                time.sleep(0.01)
+            return {}
+
+        registry["slow"] = _slow
+        task_id = _submit(TaskRunner(), 0, task_type="slow")
+        TaskRunner().process_pending()
+        assert beats and beats[0] == [task_id]
+        assert db.session.get(AITask, task_id).status == "completed"
+
+
+class TestCancellation:
+    def test_cancel_interrupts_at_progress_update(self, app, handlers):
+        registry, _ = handlers
+        reached = []
+
+        def _long(data):
+            runner = TaskRunner()
+            runner.update_progress(current_task_id(), 10)
+            runner.cancel(current_task_id())
+            runner.update_progress(current_task_id(), 50)
+            reached.append("after cancel")
+            return {}
+
+        registry["long"] = _long
+        task_id = _submit(TaskRunner(), 0, task_type="long")
+        TaskRunner().process_pending()
+        task = db.session.get(AITask, task_id)
+        assert task.status == "cancelled"
+        assert task.result_json is None
+        assert reached == []
+
+    def test_cancel_before_start_skips_job(self, app, handlers):
+        _, ran = handlers
+        task_id = _submit(TaskRunner(), 1)
+        job = claim_pending_tasks(1)[0]
+        TaskRunner().cancel(task_id)
+        tr._execute_job(job)
+        assert ran == []
+
+
+class TestWorkerPoolScheduling:
+    def test_take_prefers_lane_and_skips_saturated_tenant(self, app):
+        pool = _WorkerPool(app, workers=4, tenant_limit=1)
+        jobs = [
+            _Job(1, 7, 5, None, {}),
+            _Job(2, 7, 0, None, {}),
+            _Job(3, None, 9, None, {}),
+            _Job(4, 8, 5, None, {}),
+        ]
+        for seq, job in enumerate(jobs):
+            job.seq = seq
+            pool._queue.append(job)
+
+        order = [pool._take().task_id for _ in range(3)]
+        # Tenant 7 is saturated after job 2 starts, so job 1 waits
+        assert order == [2, 4, 3]
+        assert [j.task_id for j in pool._queue] == [1]
+
+    def test_in_process_queue_is_bounded(self, app, monkeypatch):
+        pool = _WorkerPool(app, workers=1, max_queued=1)
+        monkeypatch.setattr(pool, "_start_workers", lambda: None)
+        monkeypatch.setattr(tr, "_pool", pool)
+        runner = TaskRunner()
+        runner.submit("closure", {}, execute_fn=lambda data: {})
+
+        with pytest.raises(TaskQueueFull):
+            runner.submit("closure", {}, execute_fn=lambda data: {})
+        rejected = AITask.query.order_by(AITask.id.desc()).first()
+        assert rejected.status == "failed" and "full" in rejected.error_message
+        assert len(pool._queue) == 1
+        tr._running_tasks.clear()
@@ -0,0 +1,182 @@
+"""
+Tests for DAG workflow execution (app.ai.orchestrator).
+
+Tests:
+    - plan_workflow: explicit depends_on, legacy map_from chaining, cycle detection
+    - Independent steps run concurrently; mapping reads the dependency output
+    - iter_execute streams step results in completion order, then "done"
+    - Step outputs are memoised by input hash; refresh bypasses the memo
+    - Failures do not block siblings; timings report the critical path
+"""
+
+import threading
+import time
+
+import pytest
+
+from app.ai import orchestrator as orch_module
+from app.ai.orchestrator import AIOrchestrator, plan_workflow
+from app.services import cache_service
+
+
+class _Assistant:
+    """Fake assistant that records calls and tracks peak concurrency."""
+
+    def __init__(self, delays=None, fail=()):
+        self.delays = delays or {}
+        self.fail = set(fail)
+        self.calls = []
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def _run(self, name, **kwargs):
+        with self._lock:
+            self.calls.append((name, kwargs))
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            time.sleep(self.delays.get(name, 0.05))
+            if name in self.fail:
+                raise RuntimeError(f"{name} exploded")
+            return {"summary": f"{name}-out", "echo": kwargs.get("text") or kwargs.get("requirement_text")}
+        finally:
+            with self._lock:
+                self.active -= 1
+
+    def root(self, text=None, program_id=0):
+        return self._run("root", text=text)
+
+    def left(self, requirement_text=None, program_id=0):
+        return self._run("left", requirement_text=requirement_text)
+
+    def right(self, requirement_text=None, program_id=0):
+        return self._run("right", requirement_text=requirement_text)
+
+    def tail(self, requirement_text=None, program_id=0):
+        return self._run("tail", requirement_text=requirement_text)
+
+
+FAN_OUT = {
+    "name": "Fan out",
+    "description": "root → (left, right) → tail",
+    "steps": [
+        {"id": "root", "assistant": "fake", "method": "root", "input_key": "text"},
+        {"id": "left", "assistant": "fake", "method": "left", "input_key": "requirement_text",
+         "depends_on": ["root"], "map_from": {"requirement_text": "$.summary"}},
+        {"id": "right", "assistant": "fake", "method": "right", "input_key": "requirement_text",
+         "depends_on": ["root"], "map_from": {"requirement_text": "$.summary"}},
+        {"id": "tail", "assistant": "fake", "method": "tail", "input_key": "requirement_text",
+         "depends_on": ["left"], "map_from": {"requirement_text": "$.summary"}},
+    ],
+}
+
+
+@pytest.fixture()
+def fan_out(monkeypatch):
+    monkeypatch.setitem(orch_module.WORKFLOW_DEFINITIONS, "fan_out", FAN_OUT)
+    cache_service.clear_all()
+    yield
+    cache_service.clear_all()
+
+
+class TestPlanWorkflow:
+    def test_builtin_workflows_are_valid_dags(self):
+        for defn in orch_module.WORKFLOW_DEFINITIONS.values():
+            nodes = plan_workflow(defn)
+            assert len(nodes) == len(defn["steps"])
+        spec = plan_workflow(orch_module.WORKFLOW_DEFINITIONS["requirement_to_spec"])
+        assert [n["depends_on"] for n in spec[1:]] == [["requirement"]] * 3
+
+    def test_legacy_steps_chain_through_map_from(self):
+        nodes = plan_workflow({"steps": [
+            {"assistant": "a", "method": "m"},
+            {"assistant": "b", "method": "m", "map_from": {"x": "$.y"}},
+            {"assistant": "c", "method": "m"},
+        ]})
+        assert [(n["id"], n["depends_on"]) for n in nodes] == [
+            ("step1", []), ("step2", ["step1"]), ("step3", []),
+        ]
+
+    def test_cycles_and_unknown_deps_rejected(self):
+        with pytest.raises(ValueError, match="cycle"):
+            plan_workflow({"steps": [
+                {"id": "a", "assistant": "x", "method": "m", "depends_on": ["b"]},
+                {"id": "b", "assistant": "x", "method": "m", "depends_on": ["a"]},
+            ]})
+        with pytest.raises(ValueError, match="unknown"):
+            plan_workflow({"steps": [{"id": "a", "assistant": "x", "method": "m", "depends_on": ["z"]}]})
+
+
+class TestParallelExecution:
+    def test_independent_steps_overlap(self, app, fan_out):
+        fake = _Assistant(delays={"left": 0.2, "right": 0.2})
+        result = AIOrchestrator({"fake": fake}, step_cache_ttl=0).execute("fan_out", {"text": "REQ"})
+
+        assert result["status"] == "completed"
+        assert fake.peak == 2
+        timings = result["timings"]
+        assert timings["elapsed_ms"] < timings["sequential_ms"]
+        assert timings["critical_path_ms"] <= timings["elapsed_ms"] + 5
+        # Definition order is preserved; mapping reads each step's dependency
+        assert [s["id"] for s in result["step_results"]] == ["root", "left", "right", "tail"]
+        calls = dict(fake.calls)
+        assert calls["left"]["requirement_text"] == "root-out"
+        assert calls["tail"]["requirement_text"] == "left-out"
+        assert result["final_output"]["summary"] == "tail-out"
+
+    def test_max_parallel_one_runs_sequentially(self, app, fan_out):
+        fake = _Assistant()
+        AIOrchestrator({"fake": fake}, max_parallel=1, step_cache_ttl=0).execute("fan_out", {"text": "REQ"})
+        assert fake.peak == 1
+
+    def test_stream_yields_in_completion_order(self, app, fan_out):
+        fake = _Assistant(delays={"left": 0.25, "right": 0.01})
+        events = list(AIOrchestrator({"fake": fake}, step_cache_ttl=0).iter_execute("fan_out", {"text": "R"}))
+        order = [e["result"]["id"] for e in events if e["type"] == "step"]
+        assert order == ["root", "right", "left", "tail"]
+        assert events[-1]["type"] == "done"
+        assert all("latency_ms" in e["result"] for e in events[:-1])
+
+    def test_failed_step_does_not_block_siblings(self, app, fan_out):
+        fake = _Assistant(fail={"left"})
+        result = AIOrchestrator({"fake": fake}, step_cache_ttl=0).execute("fan_out", {"text": "REQ"})
+        status = {s["id"]: s["status"] for s in result["step_results"]}
+        assert status == {"root": "completed", "left": "failed", "right": "completed", "tail": "completed"}
+        assert result["status"] == "partial"
+        # tail falls back to the initial input when its dependency produced nothing
+        assert dict(fake.calls)["tail"]["requirement_text"] is None
+
+
+class TestStepMemo:
+    def test_rerun_hits_memo_and_refresh_bypasses(self, app, fan_out):
+        fake = _Assistant()
+        orch = AIOrchestrator({"fake": fake})
+        orch.execute("fan_out", {"text": "same"})
+        assert len(fake.calls) == 4
+
+        again = orch.execute("fan_out", {"text": "same"})
+        assert len(fake.calls) == 4
+        assert all(s["cached"] for s in again["step_results"])
+
+        orch.execute("fan_out", {"text": "same"}, use_cache=False)
+        assert len(fake.calls) == 8
+
+    def test_memo_is_keyed_by_step_input(self, app, fan_out):
+        fake = _Assistant()
+        orch = AIOrchestrator({"fake": fake})
+        orch.execute("fan_out", {"text": "one"})
+        orch.execute("fan_out", {"text": "two"})
+        # Only root sees new input; downstream steps get the same mapped text
+        assert [name for name, _ in fake.calls[4:]] == ["root"]
+
+
+class TestWorkflowStreamAPI:
+    def test_stream_endpoint_emits_sse(self, client):
+        res = client.post("/api/v1/ai/workflows/requirement_to_spec/execute",
+                          json={"input": {"text": "x"}, "stream": True})
+        assert res.status_code == 200
+        assert res.content_type.startswith("text/event-stream")
+        body = res.get_data(as_text=True)
+        assert body.count('"type": "step"') == 4
+        assert '"type": "done"' in body
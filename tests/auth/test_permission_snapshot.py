@@ -0,0 +1,171 @@
+"""Permission snapshots — cached, version-stamped RBAC decisions.
+
+Covers:
+  - Repeated checks for the same scope run no queries
+  - Committed role assignments, grants and revocations are seen without invalidate_cache()
+  - Time-bound assignments expire the snapshot at their boundary
+  - Broadcast invalidations evict just the affected entries; the LRU is bounded
+  - Without a shared backend, LRU hits re-check their generation stamps
+"""
+
+import json
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import event
+
+from app.models import db
+from app.models.auth import Permission, Role, RolePermission, Tenant, User, UserRole
+from app.services import cache_service, permission_service
+from app.services.permission_service import (
+    get_permission_snapshot,
+    has_all_permissions,
+    has_any_permission,
+    has_permission,
+)
+from app.utils.crypto import hash_password
+
+
+@contextmanager
+def _count_queries():
+    counter = {"n": 0}
+
+    def _before(*_args, **_kwargs):
+        counter["n"] += 1
+
+    event.listen(db.engine, "before_cursor_execute", _before)
+    try:
+        yield counter
+    finally:
+        event.remove(db.engine, "before_cursor_execute", _before)
+
+
+@pytest.fixture()
+def rbac():
+    tenant = Tenant(name="Snapshot Corp", slug="perm-snapshot")
+    db.session.add(tenant)
+    db.session.flush()
+    user = User(tenant_id=tenant.id, email="snap@test.local", password_hash=hash_password("Pass1234!"),
+                full_name="Snap User", status="active")
+    read = Permission(codename="requirements.read", category="requirements")
+    create = Permission(codename="requirements.create", category="requirements")
+    reader = Role(name="reader", display_name="Reader", tenant_id=tenant.id, level=10)
+    db.session.add_all([user, read, create, reader])
+    db.session.flush()
+    db.session.add(RolePermission(role_id=reader.id, permission_id=read.id))
+    db.session.add(UserRole(user_id=user.id, role_id=reader.id, tenant_id=tenant.id))
+    db.session.commit()
+    return {"tenant_id": tenant.id, "user_id": user.id, "role_id": reader.id,
+            "read_id": read.id, "create_id": create.id}
+
+
+class TestSnapshot:
+    def test_repeated_checks_run_no_queries(self, rbac):
+        uid, tid = rbac["user_id"], rbac["tenant_id"]
+        assert has_permission(uid, "requirements.read", tenant_id=tid) is True
+
+        with _count_queries() as q:
+            assert has_permission(uid, "requirements.read", tenant_id=tid) is True
+            assert has_any_permission(uid, ["requirements.create", "requirements.read"], tenant_id=tid) is True
+            assert has_all_permissions(uid, ["requirements.create", "requirements.read"], tenant_id=tid) is False
+        assert q["n"] == 0
+
+    def test_snapshot_is_immutable(self, rbac):
+        snapshot = get_permission_snapshot(rbac["user_id"], rbac["tenant_id"])
+        assert snapshot.roles == frozenset({"reader"})
+        assert permission_service.get_user_permissions(rbac["user_id"], rbac["tenant_id"]) is not snapshot.permissions
+
+    def test_shared_entry_serves_a_cold_worker(self, rbac):
+        has_permission(rbac["user_id"], "requirements.read", tenant_id=rbac["tenant_id"])
+        permission_service._clear_local()
+
+        with _count_queries() as q:
+            assert has_permission(rbac["user_id"], "requirements.read", tenant_id=rbac["tenant_id"]) is True
+        assert q["n"] == 0
+
+
+class TestInvalidation:
+    def test_role_grant_is_seen_after_commit(self, rbac):
+        uid, tid = rbac["user_id"], rbac["tenant_id"]
+        assert has_permission(uid, "requirements.create", tenant_id=tid) is False
+
+        db.session.add(RolePermission(role_id=rbac["role_id"], permission_id=rbac["create_id"]))
+        db.session.commit()
+        assert has_permission(uid, "requirements.create", tenant_id=tid) is True
+
+    def test_revoked_assignment_is_seen_after_commit(self, rbac):
+        uid, tid = rbac["user_id"], rbac["tenant_id"]
+        assert has_permission(uid, "requirements.read", tenant_id=tid) is True
+
+        UserRole.query.filter_by(user_id=uid).one().is_active = False
+        db.session.commit()
+        assert has_permission(uid, "requirements.read", tenant_id=tid) is False
+
+    def test_time_bound_assignment_expires_the_snapshot(self, rbac, monkeypatch):
+        uid, tid = rbac["user_id"], rbac["tenant_id"]
+        ends_at = datetime.now(timezone.utc) + timedelta(minutes=1)
+        UserRole.query.filter_by(user_id=uid).one().ends_at = ends_at.replace(tzinfo=None)
+        db.session.commit()
+        assert has_permission(uid, "requirements.read", tenant_id=tid) is True
+
+        later = ends_at + timedelta(seconds=1)
+        monkeypatch.setattr(permission_service.time, "time", later.timestamp)
+        monkeypatch.setattr(permission_service, "datetime", _frozen_datetime(later))
+        assert has_permission(uid, "requirements.read", tenant_id=tid) is False
+
+
+class TestBroadcast:
+    def test_message_from_another_worker_evicts_the_user(self, rbac):
+        uid, tid = rbac["user_id"], rbac["tenant_id"]
+        has_permission(uid, "requirements.read", tenant_id=tid)
+        has_permission(uid, "requirements.read")
+        assert len(permission_service._permission_cache) == 2
+
+        cache_service.publish(
+            cache_service.PERMISSION_CHANNEL,
+            json.dumps([cache_service.permission_generation_key(user_id=uid + 1)]),
+        )
+        assert len(permission_service._permission_cache) == 2
+
+        cache_service.publish(
+            cache_service.PERMISSION_CHANNEL,
+            json.dumps([cache_service.permission_generation_key(tenant_id=tid)]),
+        )
+        assert len(permission_service._permission_cache) == 0
+        assert permission_service._by_generation == {}
+
+    def test_memory_backend_rechecks_stamps(self, rbac):
+        uid, tid = rbac["user_id"], rbac["tenant_id"]
+        has_permission(uid, "requirements.read", tenant_id=tid)
+        assert cache_service.subscription_live(cache_service.PERMISSION_CHANNEL) is False
+
+        # A bump that was never broadcast here, as from another worker, seen by the next request
+        cache_service.incr_counter(cache_service.permission_generation_key(user_id=uid))
+        permission_service._clear_request_memo()
+        with _count_queries() as q:
+            assert has_permission(uid, "requirements.read", tenant_id=tid) is True
+        assert q["n"] > 0
+
+    def test_lru_is_bounded(self, rbac, monkeypatch):
+        monkeypatch.setattr(permission_service, "MAX_CACHED_SNAPSHOTS", 1)
+        has_permission(rbac["user_id"], "requirements.read", tenant_id=rbac["tenant_id"])
+        has_permission(rbac["user_id"], "requirements.read")
+        assert list(permission_service._permission_cache) == [(rbac["user_id"], None, None, None)]
+
+    def test_legacy_permission_cache_follows_generations(self, rbac):
+        uid, tid = rbac["user_id"], rbac["tenant_id"]
+        cache_service.set_cached_permissions(tid, uid, ["requirements.read"])
+        assert cache_service.get_cached_permissions(tid, uid) == ["requirements.read"]
+
+        permission_service.invalidate_cache(uid)
+        assert cache_service.get_cached_permissions(tid, uid) is None
+
+
+def _frozen_datetime(moment):
+    class _Frozen(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return moment
+
+    return _Frozen
@@ -14,8 +14,12 @@ import pytest
 
 import app as _app_module
 from app import create_app
+from app.ai.vector_index import reset_vector_index_registry
 from app.models import db as _db
+from app.services.cutover_live import reset as reset_cutover_live
 from app.services.permission_service import invalidate_all_cache
+from app.services.result_cache import reset as reset_result_cache
+from app.services.runbook_graph import reset as reset_runbook_graphs
 
 # E1 (low-priority): FK enforcement deferred — legacy project_id=program_id pattern
 # is widespread across explore/workshop/session test fixtures (247+ tests affected).
@@ -72,8 +76,15 @@ def session(app, _setup_db):
     """Per-test: open app context, rollback after test, recreate tables."""
     with app.app_context():
         # DB is recreated per test and ids are reused; clear RBAC cache to
-        # avoid stale permission decisions keyed by user_id.
+        # avoid stale permission decisions keyed by user_id, and drop the
+        # in-process RAG vector index keyed by embedding id, and cached
+        # dashboard/report results keyed by program/project id, and runbook
+        # graphs and live-status snapshots keyed by plan id.
         invalidate_all_cache()
+        reset_vector_index_registry()
+        reset_result_cache()
+        reset_runbook_graphs()
+        reset_cutover_live()
         _ensure_default_tenant()
         yield
         invalidate_all_cache()
@@ -0,0 +1,162 @@
+"""
+War-room live-status snapshots and long-polling (app.services.cutover_live).
+
+Covers:
+  - Repeated polls without writes run no queries
+  - A committed task write reloads just that row
+  - Snapshots are only cached on a shared backend
+  - diff() reports only changed keys
+  - Long-poll sends a snapshot, then a delta after a commit; an empty delta on timeout
+"""
+
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+from app.models import db
+from app.models.auth import Tenant
+from app.models.cutover import CutoverPlan, CutoverScopeItem, GoNoGoItem, RunbookTask, TaskDependency
+from app.models.program import Program
+from app.models.project import Project
+from app.services import cutover_live, cutover_service
+
+
+@contextmanager
+def _count_queries():
+    counter = {"n": 0}
+
+    def _before(*_args, **_kwargs):
+        counter["n"] += 1
+
+    event.listen(db.engine, "before_cursor_execute", _before)
+    try:
+        yield counter
+    finally:
+        event.remove(db.engine, "before_cursor_execute", _before)
+
+
+@pytest.fixture()
+def shared_cache(monkeypatch):
+    """Behave as on Redis: the in-process backend stands in for the shared one."""
+    monkeypatch.setattr(cutover_live, "_cacheable", lambda: True)
+
+
+@pytest.fixture()
+def plan():
+    """A → B (B blocked), C on the critical path; one pending Go/No-Go item."""
+    tenant = Tenant(name="Live Status Corp", slug="live-status")
+    db.session.add(tenant)
+    db.session.flush()
+    prog = Program(name="Live Go-Live", methodology="sap_activate", tenant_id=tenant.id)
+    db.session.add(prog)
+    db.session.flush()
+    db.session.add(Project(tenant_id=tenant.id, program_id=prog.id, code="DEFAULT",
+                           name="Default", is_default=True))
+    cutover = CutoverPlan(name="Wave 1", code="CUT-001", status="executing",
+                          tenant_id=tenant.id, program_id=prog.id)
+    db.session.add(cutover)
+    db.session.flush()
+    scope = CutoverScopeItem(name="Data Load", category="data_load",
+                             tenant_id=tenant.id, cutover_plan_id=cutover.id)
+    db.session.add(scope)
+    db.session.flush()
+    tasks = {
+        title: RunbookTask(tenant_id=tenant.id, scope_item_id=scope.id, title=title, status="not_started",
+                           planned_duration_min=30, workstream="data", is_critical_path=title == "C")
+        for title in ("A", "B", "C")
+    }
+    db.session.add_all(tasks.values())
+    db.session.flush()
+    db.session.add_all([
+        TaskDependency(predecessor_id=tasks["A"].id, successor_id=tasks["B"].id, tenant_id=tenant.id),
+        GoNoGoItem(tenant_id=tenant.id, cutover_plan_id=cutover.id, criterion="Data signed off"),
+    ])
+    db.session.commit()
+    return {
+        "tenant_id": tenant.id, "program_id": prog.id, "plan_id": cutover.id,
+        **{title: task.id for title, task in tasks.items()},
+    }
+
+
+def _status(plan):
+    return cutover_service.get_cutover_live_status(plan["tenant_id"], plan["program_id"], plan["plan_id"])
+
+
+@pytest.mark.usefixtures("shared_cache")
+class TestSnapshot:
+    def test_polls_are_served_from_the_snapshot(self, plan):
+        first = _status(plan)
+        assert first["tasks"] == {
+            "total": 3, "completed": 0, "in_progress": 0, "blocked": 1, "pending": 3, "failed": 0,
+        }
+        assert first["go_no_go"] == {"passed": 0, "pending": 1, "failed": 0}
+
+        with _count_queries() as q:
+            assert _status(plan) == first
+        assert q["n"] == 0
+
+    def test_commit_reloads_only_written_rows(self, plan):
+        _status(plan)
+        task = db.session.get(RunbookTask, plan["A"])
+        task.status = "completed"
+        db.session.commit()
+
+        with _count_queries() as q:
+            status = _status(plan)
+        assert q["n"] == 1
+        assert status["tasks"]["completed"] == 1
+        assert status["tasks"]["blocked"] == 0
+        assert status["workstreams"]["data"] == {"total": 3, "completed": 1, "in_progress": 0}
+
+    def test_unknown_plan_raises(self, plan):
+        with pytest.raises(ValueError, match="not found"):
+            cutover_service.get_cutover_live_status(plan["tenant_id"], plan["program_id"] + 99, plan["plan_id"])
+
+
+def test_per_process_backend_loads_every_read(plan):
+    _status(plan)
+    with _count_queries() as q:
+        _status(plan)
+    assert q["n"] > 0
+
+
+def test_diff_reports_changed_keys_only():
+    old = {"tasks": {"total": 3, "completed": 0}, "workstreams": {"data": {"total": 3}, "infra": {"total": 1}}}
+    new = {"tasks": {"total": 3, "completed": 1}, "workstreams": {"data": {"total": 3}}}
+    assert cutover_live.diff(old, new) == {"tasks": {"completed": 1}, "workstreams": {"infra": None}}
+
+
+class TestLongPoll:
+    def _get(self, client, plan, since, program_id=None):
+        return client.get(
+            f"/api/v1/cutover/plans/{plan['plan_id']}/live-status"
+            f"?program_id={program_id or plan['program_id']}&tenant_id={plan['tenant_id']}&since={since}"
+        )
+
+    def test_snapshot_then_delta(self, client, plan):
+        res = self._get(client, plan, "")
+        assert res.status_code == 200
+        first = res.get_json()
+        assert first["snapshot"]["tasks"]["total"] == 3
+
+        db.session.get(RunbookTask, plan["C"]).issue_note = "Load job failed"
+        db.session.commit()
+        res = self._get(client, plan, first["version"])
+        body = res.get_json()
+        assert body["version"] != first["version"]
+        assert "snapshot" not in body
+        assert body["delta"]["critical_path_tasks"][0]["issue_note"] == "Load job failed"
+        assert "tasks" not in body["delta"]
+
+    def test_no_change_returns_empty_delta(self, plan):
+        version = cutover_live.poll(plan["tenant_id"], plan["program_id"], plan["plan_id"])["version"]
+        result = cutover_live.poll(plan["tenant_id"], plan["program_id"], plan["plan_id"], version, wait=0.05)
+        assert result == {"version": version, "delta": {}}
+
+    def test_unknown_version_returns_snapshot(self, plan):
+        result = cutover_live.poll(plan["tenant_id"], plan["program_id"], plan["plan_id"], "stale", wait=0.05)
+        assert result["snapshot"] == _status(plan)
+
+    def test_unknown_plan_is_404(self, client, plan):
+        assert self._get(client, plan, "", program_id=plan["program_id"] + 99).status_code == 404
@@ -928,6 +928,27 @@ class TestProcessLevelAPI:
         resp = client.get(f"/api/v1/explore/process-levels?project_id={project_id}&level=3")
         assert resp.status_code == 200
 
+    def test_list_flat_stats_match_per_node_fit_summary(self, client, project_id, hierarchy):
+        from app.services.fit_propagation import get_fit_summary
+
+        resp = client.get(f"/api/v1/explore/process-levels?project_id={project_id}&mode=flat&include_stats=true")
+        assert resp.status_code == 200
+        by_id = {node.id: node for node in hierarchy}
+        for item in resp.get_json()["items"]:
+            assert item["fit_summary"] == get_fit_summary(by_id[item["id"]])
+
+    def test_list_flat_keyset_pages(self, client, project_id, hierarchy):
+        url = f"/api/v1/explore/process-levels?project_id={project_id}&mode=flat&limit=3"
+        first = client.get(url).get_json()
+        assert [item["level"] for item in first["items"]] == [1, 2, 3]
+        assert first["total"] == 4
+        second = client.get(f"{url}&cursor={first['next_cursor']}").get_json()
+        assert [item["level"] for item in second["items"]] == [4]
+        assert second["next_cursor"] is None
+
+        bad = client.get(f"{url}&cursor=not-a-cursor")
+        assert bad.status_code == 400
+
     def test_get_single(self, client, project_id, hierarchy):
         _, _, l3, _ = hierarchy
         resp = client.get(f"/api/v1/explore/process-levels/{l3.id}")
@@ -2019,6 +2040,58 @@ class TestFitPropagation:
         resp = client.get(f"/api/v1/explore/process-levels/l2-readiness?project_id={project_id}")
         assert resp.status_code == 200
 
+    def test_step_propagation_recomputes_ancestors_at_commit(self, project_id):
+        from app.services.fit_propagation import propagate_fit_from_step, recalculate_project_hierarchy
+        _, l2, l3, l4 = _make_hierarchy(project_id)
+        ws = _make_workshop(project_id)
+        step = _make_step(ws.id, l4.id, fit_decision="gap")
+        _db.session.commit()
+
+        result = propagate_fit_from_step(step, project_id=project_id)
+        assert result["l3_recalculated"] is True
+        _db.session.commit()
+
+        assert (l3.system_suggested_fit, l3.consolidated_fit_decision) == ("gap", "gap")
+        assert (float(l2.readiness_pct), l2.confirmation_status) == (100.0, "ready")
+        assert recalculate_project_hierarchy(project_id, verify=True)["consistent"] is True
+
+    def test_direct_l4_write_marks_only_its_ancestors(self, project_id):
+        _, _, l3, l4 = _make_hierarchy(project_id)
+        _, _, other_l3, _ = _make_hierarchy(project_id, suffix="B")
+        _db.session.commit()
+
+        l4.fit_status = "fit"
+        _db.session.commit()
+        assert l3.system_suggested_fit == "fit"
+        assert other_l3.system_suggested_fit is None
+
+    def test_interim_session_does_not_propagate(self, project_id):
+        from app.services.fit_propagation import propagate_fit_from_step
+        _, _, l3, l4 = _make_hierarchy(project_id)
+        ws = _make_workshop(project_id, session_number=1, total_sessions=2)
+        step = _make_step(ws.id, l4.id, fit_decision="fit")
+        _db.session.commit()
+
+        propagate_fit_from_step(step, project_id=project_id, is_final_session=False)
+        _db.session.commit()
+        assert l4.fit_status == "fit"
+        assert l3.system_suggested_fit is None
+
+    def test_verify_mode_reports_drift_without_writing(self, client, project_id):
+        from app.services.fit_propagation import recalculate_project_hierarchy
+        _, _, l3, _ = _make_hierarchy(project_id)
+        l3.system_suggested_fit = "fit"  # no L4 supports it
+        _db.session.commit()
+
+        report = recalculate_project_hierarchy(project_id, verify=True)
+        assert report["consistent"] is False
+        assert {"id": l3.id, "field": "system_suggested_fit"}.items() <= report["drift"][0].items()
+        assert l3.system_suggested_fit == "fit"
+
+        resp = client.post("/api/v1/explore/fit-propagation/propagate", json={"project_id": project_id})
+        assert resp.status_code == 200
+        assert recalculate_project_hierarchy(project_id, verify=True)["consistent"] is True
+
 
 class TestSignoff:
     """L3 sign-off business rules."""
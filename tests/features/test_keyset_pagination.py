@@ -0,0 +1,95 @@
+"""
+Keyset pagination layer (app.services.helpers.pagination).
+
+Covers:
+  - Cursor pages walk a listing exactly once, ties broken by id
+  - Total counted on the first page only; count=none skips it
+  - NULL sort values are paged last without skipping rows
+  - Malformed or foreign cursors are rejected with 400
+  - Offset responses keep their original shape
+"""
+
+import pytest
+
+from app.models import db
+from app.models.auth import Tenant
+from app.models.explore import ExploreRequirement
+from app.models.program import Program
+from app.services.helpers.pagination import CursorError, decode_cursor, encode_cursor
+
+
+def _walk(client, url):
+    """Follow next_cursor until exhausted; return (pages, ids)."""
+    pages, ids, cursor = [], [], ""
+    while True:
+        data = client.get(f"{url}&cursor={cursor}").get_json()
+        pages.append(data)
+        ids.extend(item["id"] for item in data["items"])
+        if not data["has_more"]:
+            return pages, ids
+        cursor = data["next_cursor"]
+
+
+@pytest.fixture()
+def risks(client, program):
+    pid = program["id"]
+    for n, (probability, impact) in enumerate([(5, 5), (2, 2), (2, 2), (2, 2), (1, 1)]):
+        res = client.post(f"/api/v1/programs/{pid}/risks", json={
+            "title": f"Risk {n}", "probability": probability, "impact": impact,
+        })
+        assert res.status_code == 201
+    return pid
+
+
+class TestCursor:
+    def test_round_trip_and_signature(self):
+        cursor = encode_cursor([3, "abc"], signature="s1")
+        assert decode_cursor(cursor, signature="s1") == [3, "abc"]
+        with pytest.raises(CursorError):
+            decode_cursor(cursor, signature="s2")
+        with pytest.raises(CursorError):
+            decode_cursor("not-a-cursor")
+
+
+class TestRiskListing:
+    def test_pages_cover_every_row_once(self, client, risks):
+        pages, ids = _walk(client, f"/api/v1/programs/{risks}/risks?limit=2")
+        offset_ids = [r["id"] for r in client.get(f"/api/v1/programs/{risks}/risks").get_json()["items"]]
+        assert ids == offset_ids
+        assert [len(p["items"]) for p in pages] == [2, 2, 1]
+        assert pages[0]["total"] == 5
+        assert pages[1]["total"] is None
+
+    def test_count_none_on_first_page(self, client, risks):
+        data = client.get(f"/api/v1/programs/{risks}/risks?cursor=&count=none&limit=2").get_json()
+        assert data["total"] is None and data["has_more"]
+
+    def test_offset_shape_unchanged(self, client, risks):
+        data = client.get(f"/api/v1/programs/{risks}/risks?limit=2&offset=4").get_json()
+        assert set(data) == {"items", "total"}
+        assert (len(data["items"]), data["total"]) == (1, 5)
+
+    def test_foreign_cursor_rejected(self, client, risks):
+        first = client.get(f"/api/v1/programs/{risks}/risks?cursor=&limit=2").get_json()
+        res = client.get(f"/api/v1/programs/{risks}/issues?cursor={first['next_cursor']}")
+        assert res.status_code == 400
+
+
+class TestNullableSort:
+    def test_null_waves_are_paged_last(self, client):
+        tenant = Tenant.query.filter_by(slug="test-default").first()
+        prog = Program(name="Keyset Program", methodology="agile", tenant_id=tenant.id)
+        db.session.add(prog)
+        db.session.flush()
+        for n, wave in enumerate([2, None, 1, None, 2, 1, None]):
+            db.session.add(ExploreRequirement(
+                project_id=prog.id, code=f"REQ-{n}", title=f"Req {n}", priority="P2",
+                type="functional", status="draft", created_by_id="usr-001", wave=wave,
+            ))
+        db.session.commit()
+
+        url = f"/api/v1/explore/requirements?project_id={prog.id}&sort_by=wave&sort_dir=desc&per_page=2"
+        pages, ids = _walk(client, url)
+        assert len(ids) == len(set(ids)) == 7
+        waves = [item["wave"] for page in pages for item in page["items"]]
+        assert waves == [2, 2, 1, 1, None, None, None]
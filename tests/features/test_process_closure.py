@@ -0,0 +1,103 @@
+"""
+ProcessLevel closure table (app.services.process_closure).
+
+Covers:
+  - Rows for a whole hierarchy added in one flush
+  - Moves re-hang the subtree; deletes drop every pair of the node
+  - check() detects drift and rebuild() repairs it
+  - Ancestor chains, nearest-L3 lookup and subtree fit aggregates
+"""
+
+import uuid
+
+import pytest
+
+from app.models import db
+from app.models.auth import Tenant
+from app.models.explore import ProcessLevel, ProcessLevelClosure
+from app.models.program import Program
+from app.services import process_closure
+
+
+@pytest.fixture()
+def project_id():
+    tenant = Tenant.query.filter_by(slug="test-default").first()
+    prog = Program(name="Closure Program", status="active", methodology="agile", tenant_id=tenant.id)
+    db.session.add(prog)
+    db.session.flush()
+    return prog.id
+
+
+def _node(project_id, level, parent=None, **kw):
+    return ProcessLevel(
+        id=str(uuid.uuid4()), project_id=project_id, parent_id=parent.id if parent else None,
+        level=level, code=kw.pop("code", f"L{level}-{uuid.uuid4().hex[:6]}"),
+        name=kw.pop("name", f"Level {level}"), scope_status=kw.pop("scope_status", "in_scope"), **kw,
+    )
+
+
+@pytest.fixture()
+def tree(project_id):
+    """Two L2 branches; L3 under the first with two L4 children — one flush."""
+    l1 = _node(project_id, 1)
+    l2a, l2b = _node(project_id, 2, l1), _node(project_id, 2, l1)
+    l3 = _node(project_id, 3, l2a)
+    l4a = _node(project_id, 4, l3, fit_status="fit")
+    l4b = _node(project_id, 4, l3, fit_status="gap")
+    # Children added first: the hook must still insert parents before children
+    db.session.add_all([l4b, l4a, l3, l2b, l2a, l1])
+    db.session.commit()
+    return {"l1": l1, "l2a": l2a, "l2b": l2b, "l3": l3, "l4a": l4a, "l4b": l4b}
+
+
+def _chain_ids(node_id):
+    return [pl.id for pl in process_closure.ancestors(node_id, include_self=True)]
+
+
+class TestMaintenance:
+    def test_single_flush_builds_consistent_closure(self, tree, project_id):
+        assert process_closure.check(project_id)["consistent"]
+        assert _chain_ids(tree["l4a"].id) == [tree[k].id for k in ("l1", "l2a", "l3", "l4a")]
+
+    def test_move_rehangs_subtree(self, tree, project_id):
+        tree["l3"].parent_id = tree["l2b"].id
+        db.session.commit()
+
+        assert process_closure.check(project_id)["consistent"]
+        assert _chain_ids(tree["l4b"].id) == [tree[k].id for k in ("l1", "l2b", "l3", "l4b")]
+        assert process_closure.descendant_ids(tree["l2a"].id) == []
+
+    def test_delete_drops_subtree_pairs(self, tree, project_id):
+        l3_id = tree["l3"].id
+        db.session.delete(tree["l3"])
+        db.session.commit()
+
+        assert process_closure.check(project_id)["consistent"]
+        assert ProcessLevelClosure.query.filter(
+            (ProcessLevelClosure.ancestor_id == l3_id) | (ProcessLevelClosure.descendant_id == l3_id)
+        ).count() == 0
+
+    def test_check_detects_drift_and_rebuild_repairs(self, tree, project_id):
+        ProcessLevelClosure.query.filter_by(descendant_id=tree["l4a"].id).delete()
+        db.session.commit()
+
+        report = process_closure.check(project_id)
+        assert (report["consistent"], report["missing"]) == (False, 4)
+        process_closure.rebuild(project_id)
+        db.session.commit()
+        assert process_closure.check(project_id)["consistent"]
+
+
+class TestQueries:
+    def test_nearest_ancestor_at_level(self, tree):
+        found = process_closure.nearest_ancestor_at_level(
+            [tree["l4a"].id, tree["l3"].id, tree["l2a"].id], 3,
+        )
+        assert found == {tree["l4a"].id: tree["l3"].id, tree["l3"].id: tree["l3"].id}
+
+    def test_subtree_fit_counts_cover_all_depths(self, tree):
+        counts = process_closure.subtree_fit_counts([tree["l1"].id, tree["l3"].id, tree["l2b"].id])
+        expected = {"fit": 1, "gap": 1, "partial_fit": 0, "pending": 0, "total": 2}
+        assert counts[tree["l1"].id] == expected
+        assert counts[tree["l3"].id] == expected
+        assert tree["l2b"].id not in counts
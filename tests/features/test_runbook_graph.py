@@ -0,0 +1,187 @@
+"""
+Incremental runbook graph (app.services.runbook_graph).
+
+Covers:
+  - Longest path, slack and cycle detection on the in-memory graph
+  - Committed task/dependency writes patch the cached graph in place
+  - Graphs are only cached on a shared backend, and for RUNBOOK_GRAPH_TTL
+  - Completed/skipped tasks weigh their actual duration / nothing
+  - Critical-path endpoint with include_schedule returns per-task slack
+"""
+
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+from app.models import db
+from app.models.auth import Tenant
+from app.models.cutover import CutoverPlan, CutoverScopeItem, RunbookTask, TaskDependency
+from app.models.program import Program
+from app.models.project import Project
+from app.services import cutover_service, runbook_graph
+from app.services.runbook_graph import RunbookGraph
+
+
+@contextmanager
+def _count_queries():
+    counter = {"n": 0}
+
+    def _before(*_args, **_kwargs):
+        counter["n"] += 1
+
+    event.listen(db.engine, "before_cursor_execute", _before)
+    try:
+        yield counter
+    finally:
+        event.remove(db.engine, "before_cursor_execute", _before)
+
+
+@pytest.fixture()
+def shared_cache(monkeypatch):
+    """Behave as on Redis: the in-process backend stands in for the shared one."""
+    monkeypatch.setattr(runbook_graph, "_cacheable", lambda: True)
+
+
+@pytest.fixture()
+def plan():
+    """A(60) → B(30) → C(90); D(100) in parallel."""
+    tenant = Tenant(name="Runbook Graph Corp", slug="runbook-graph")
+    db.session.add(tenant)
+    db.session.flush()
+    prog = Program(name="Graph Go-Live", methodology="sap_activate", tenant_id=tenant.id)
+    db.session.add(prog)
+    db.session.flush()
+    db.session.add(Project(tenant_id=tenant.id, program_id=prog.id, code="DEFAULT",
+                           name="Default", is_default=True))
+    cutover = CutoverPlan(name="Wave 1", code="CUT-001", status="ready",
+                          tenant_id=tenant.id, program_id=prog.id)
+    db.session.add(cutover)
+    db.session.flush()
+    scope = CutoverScopeItem(name="Data Load", category="data_load",
+                             tenant_id=tenant.id, cutover_plan_id=cutover.id)
+    db.session.add(scope)
+    db.session.flush()
+    tasks = {
+        title: RunbookTask(tenant_id=tenant.id, scope_item_id=scope.id, title=title,
+                           status="not_started", planned_duration_min=minutes)
+        for title, minutes in (("A", 60), ("B", 30), ("C", 90), ("D", 100))
+    }
+    db.session.add_all(tasks.values())
+    db.session.flush()
+    db.session.add_all([
+        TaskDependency(predecessor_id=tasks["A"].id, successor_id=tasks["B"].id, tenant_id=tenant.id),
+        TaskDependency(predecessor_id=tasks["B"].id, successor_id=tasks["C"].id, tenant_id=tenant.id),
+    ])
+    db.session.commit()
+    return {
+        "tenant_id": tenant.id, "program_id": prog.id, "plan_id": cutover.id,
+        **{title: task.id for title, task in tasks.items()},
+    }
+
+
+class TestGraph:
+    def test_longest_path_and_slack(self):
+        graph = RunbookGraph(1)
+        graph._build({1: 60, 2: 30, 3: 90, 4: 100}, [(1, 2), (2, 3)])
+        assert graph.critical_path() == [1, 2, 3]
+        assert graph.makespan == 180
+        assert graph.slack(4) == 80
+        assert graph.schedule()[3] == {
+            "earliest_start": 90, "earliest_finish": 180,
+            "latest_start": 90, "latest_finish": 180, "slack": 0, "critical": True,
+        }
+
+    def test_incremental_edits_match_rebuild(self):
+        graph = RunbookGraph(1)
+        graph._build({1: 60, 2: 30, 3: 90, 4: 100}, [(1, 2), (2, 3)])
+        graph.add_edge(4, 1)
+        graph.set_task(5, 10)
+        graph.add_edge(3, 5)
+        graph.remove_edge(1, 2)
+        graph.set_task(2, 200)
+
+        rebuilt = RunbookGraph(1)
+        rebuilt._build(dict(graph.weight), [(p, s) for p, succs in graph.succ.items() for s in succs])
+        assert (graph.head, graph.tail) == (rebuilt.head, rebuilt.tail)
+        assert graph.critical_path() == [2, 3, 5]
+
+    def test_backward_edge_closing_a_cycle_is_rejected(self):
+        graph = RunbookGraph(1)
+        graph._build({1: 1, 2: 1, 3: 1}, [(1, 2), (2, 3)])
+        with pytest.raises(ValueError, match="Circular dependency"):
+            graph.add_edge(3, 1)
+        assert graph.critical_path() == [1, 2, 3]
+
+
+@pytest.mark.usefixtures("shared_cache")
+class TestCachedGraph:
+    def test_commit_patches_cached_graph(self, plan):
+        graph = runbook_graph.get_graph(plan["plan_id"], plan["tenant_id"])
+        assert graph.critical_path() == [plan["A"], plan["B"], plan["C"]]
+
+        task = db.session.get(RunbookTask, plan["D"])
+        task.planned_duration_min = 240
+        db.session.commit()
+
+        with _count_queries() as q:
+            patched = runbook_graph.get_graph(plan["plan_id"], plan["tenant_id"])
+        assert q["n"] == 0
+        assert patched is graph
+        assert patched.critical_path() == [plan["D"]]
+
+        db.session.delete(db.session.get(TaskDependency, _dep_id(plan["A"], plan["B"])))
+        db.session.add(TaskDependency(predecessor_id=plan["C"], successor_id=plan["D"],
+                                      tenant_id=plan["tenant_id"]))
+        db.session.commit()
+        assert runbook_graph.get_graph(plan["plan_id"], plan["tenant_id"]).critical_path() == [
+            plan["B"], plan["C"], plan["D"],
+        ]
+
+    def test_completed_and_skipped_tasks_reweigh_the_path(self, plan):
+        db.session.get(RunbookTask, plan["A"]).status = "skipped"
+        task = db.session.get(RunbookTask, plan["C"])
+        task.status, task.actual_duration_min = "completed", 5
+        db.session.commit()
+
+        cp_ids = cutover_service.calculate_critical_path(
+            tenant_id=plan["tenant_id"], program_id=plan["program_id"], plan_id=plan["plan_id"],
+        )
+        assert cp_ids == [plan["D"]]
+        db.session.expire_all()
+        assert db.session.get(RunbookTask, plan["D"]).is_critical_path is True
+        assert db.session.get(RunbookTask, plan["B"]).is_critical_path is False
+
+
+    def test_graph_is_rebuilt_after_ttl(self, plan, monkeypatch):
+        graph = runbook_graph.get_graph(plan["plan_id"], plan["tenant_id"])
+        assert runbook_graph.get_graph(plan["plan_id"], plan["tenant_id"]) is graph
+
+        monkeypatch.setattr(runbook_graph, "TTL_SECONDS", 0)
+        assert runbook_graph.get_graph(plan["plan_id"], plan["tenant_id"]) is not graph
+
+
+def test_per_process_backend_loads_every_read(plan):
+    graph = runbook_graph.get_graph(plan["plan_id"], plan["tenant_id"])
+    assert runbook_graph.get_graph(plan["plan_id"], plan["tenant_id"]) is not graph
+    assert runbook_graph._graphs == {}
+
+
+class TestEndpoint:
+    def test_include_schedule(self, client, plan):
+        res = client.get(
+            f"/api/v1/cutover/plans/{plan['plan_id']}/critical-path"
+            f"?program_id={plan['program_id']}&tenant_id={plan['tenant_id']}&include_schedule=true"
+        )
+        assert res.status_code == 200
+        data = res.get_json()
+        assert data["critical_path_task_ids"] == [plan["A"], plan["B"], plan["C"]]
+        assert data["schedule"]["makespan_min"] == 180
+        slack = {row["task_id"]: row["slack"] for row in data["schedule"]["tasks"]}
+        assert slack == {plan["A"]: 0, plan["B"]: 0, plan["C"]: 0, plan["D"]: 80}
+
+
+def _dep_id(predecessor_id, successor_id):
+    return TaskDependency.query.filter_by(
+        predecessor_id=predecessor_id, successor_id=successor_id,
+    ).one().id
@@ -0,0 +1,69 @@
+"""
+Sequence allocator for entity codes (app.services.sequence_allocator).
+
+Covers:
+  - Counters seed from existing rows once, then advance without COUNT(*)
+  - Blocks are contiguous and never overlap single allocations
+  - Deleted rows do not free their code for reuse
+"""
+
+from app.models import db
+from app.models.auth import Tenant
+from app.models.cutover import CutoverPlan, HypercareIncident
+from app.models.program import Program
+from app.models.project import Project
+from app.services import cutover_service, sequence_allocator
+
+
+def _plan():
+    tenant = Tenant.query.filter_by(slug="test-default").first()
+    prog = Program(name="Sequence Program", methodology="agile", tenant_id=tenant.id)
+    db.session.add(prog)
+    db.session.flush()
+    db.session.add(Project(tenant_id=tenant.id, program_id=prog.id, code="DEFAULT",
+                           name="Default", is_default=True))
+    plan = CutoverPlan(name="Wave 1", code="CUT-001", tenant_id=tenant.id, program_id=prog.id)
+    db.session.add(plan)
+    db.session.flush()
+    return plan
+
+
+class TestAllocator:
+    def test_seed_runs_once(self):
+        calls = []
+
+        def seed():
+            calls.append(1)
+            return 7
+
+        assert sequence_allocator.next_value("scope:1", "X", seed=seed) == 8
+        assert sequence_allocator.next_value("scope:1", "X", seed=seed) == 9
+        assert sequence_allocator.next_value("scope:1", "Y", seed=seed) == 8
+        assert len(calls) == 2
+        assert sequence_allocator.current_value("scope:1", "X") == 9
+
+    def test_blocks_are_contiguous(self):
+        assert sequence_allocator.next_value("scope:2", "X") == 1
+        assert list(sequence_allocator.reserve("scope:2", "X", 3)) == [2, 3, 4]
+        assert sequence_allocator.next_value("scope:2", "X") == 5
+
+
+class TestGenerators:
+    def test_incident_codes_continue_after_existing_rows_and_deletes(self):
+        plan = _plan()
+        db.session.add(HypercareIncident(
+            tenant_id=plan.tenant_id, cutover_plan_id=plan.id, code="INC-001", title="Legacy",
+        ))
+        db.session.commit()
+
+        assert cutover_service.generate_incident_code(plan.id) == "INC-002"
+        HypercareIncident.query.filter_by(cutover_plan_id=plan.id).delete()
+        db.session.commit()
+        assert cutover_service.generate_incident_code(plan.id) == "INC-003"
+
+    def test_plan_and_task_codes(self):
+        plan = _plan()
+        db.session.commit()
+        assert cutover_service.generate_plan_code(plan.program_id) == "CUT-002"
+        assert cutover_service.generate_task_code(plan.id) == "CUT-001-T001"
+        assert cutover_service.generate_task_code(plan.id) == "CUT-001-T002"
@@ -0,0 +1,128 @@
+"""
+Per-project traceability index (app.services.trace_index).
+
+Covers:
+  - Requirement traces and downstream chains answered from the index
+  - Repeated batch traces issue no queries; a write rebuilds the index
+  - Indexes expire after TRACE_INDEX_TTL and are not reused without a shared backend
+  - Matrix coverage summary counts
+"""
+
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+from app.models import db
+from app.models.auth import Tenant
+from app.models.backlog import BacklogItem, FunctionalSpec
+from app.models.explore import ExploreRequirement
+from app.models.program import Program
+from app.models.testing import Defect, TestCase
+from app.services import result_cache, trace_index
+from app.services.traceability import (
+    build_traceability_matrix_summary,
+    get_chain,
+    trace_explore_batch,
+    trace_explore_requirement,
+)
+
+
+@contextmanager
+def _count_queries():
+    counter = {"n": 0}
+
+    def _before(*_args, **_kwargs):
+        counter["n"] += 1
+
+    event.listen(db.engine, "before_cursor_execute", _before)
+    try:
+        yield counter
+    finally:
+        event.remove(db.engine, "before_cursor_execute", _before)
+
+
+@pytest.fixture()
+def shared_cache(monkeypatch):
+    """Behave as on Redis: the in-process backend stands in for the shared one."""
+    monkeypatch.setattr(result_cache, "is_enabled", lambda: True)
+
+
+@pytest.fixture()
+def graph():
+    """REQ-1 → BI → FS, BI → TC-1 → DEF-1; REQ-2 → TC-2 (direct); TC-3 unlinked."""
+    tenant = Tenant.query.filter_by(slug="test-default").first()
+    prog = Program(name="Trace Index", methodology="agile", tenant_id=tenant.id)
+    db.session.add(prog)
+    db.session.flush()
+    pid = prog.id
+    scope = {"program_id": pid, "project_id": pid}
+
+    reqs = [
+        ExploreRequirement(project_id=pid, code=f"REQ-{n}", title=f"Req {n}", priority="P2",
+                           type="functional", status="draft", created_by_id="usr-001")
+        for n in (1, 2, 3)
+    ]
+    db.session.add_all(reqs)
+    db.session.flush()
+    bi = BacklogItem(code="WR-1", title="Enhancement", explore_requirement_id=reqs[0].id, **scope)
+    db.session.add(bi)
+    db.session.flush()
+    tc1 = TestCase(code="TC-1", title="Via backlog", backlog_item_id=bi.id, **scope)
+    tc2 = TestCase(code="TC-2", title="Direct", explore_requirement_id=reqs[1].id, **scope)
+    tc3 = TestCase(code="TC-3", title="Unlinked", **scope)
+    db.session.add_all([FunctionalSpec(title="FS-1", backlog_item_id=bi.id), tc1, tc2, tc3])
+    db.session.flush()
+    db.session.add(Defect(code="DEF-1", title="Broken", severity="S2", test_case_id=tc1.id, **scope))
+    db.session.commit()
+    return {"project_id": pid, "reqs": [r.id for r in reqs], "tc2": tc2.id}
+
+
+class TestTraceIndex:
+    def test_trace_follows_backlog_and_direct_edges(self, graph):
+        first = trace_explore_requirement(graph["reqs"][0], project_id=graph["project_id"])
+        assert [tc["code"] for tc in first["test_cases"]] == ["TC-1"]
+        assert [d["code"] for d in first["defects"]] == ["DEF-1"]
+        assert first["chain_depth"] == 4
+
+        chain = get_chain("explore_requirement", graph["reqs"][0], project_id=graph["project_id"])
+        assert [item["type"] for item in chain["downstream"]] == [
+            "backlog_item", "functional_spec", "test_case", "defect",
+        ]
+
+    def test_batch_is_served_from_index_until_a_write(self, graph, shared_cache):
+        pid = graph["project_id"]
+        trace_explore_batch(graph["reqs"], project_id=pid)
+
+        with _count_queries() as q:
+            results = trace_explore_batch(graph["reqs"] + ["missing"], project_id=pid)
+        assert q["n"] == 0
+        assert [r["coverage"]["test"] for r in results[:3]] == [1, 1, 0]
+        assert results[3] == {"requirement_id": "missing", "error": "not_found"}
+
+        db.session.add(Defect(code="DEF-2", title="New", severity="S3", test_case_id=graph["tc2"],
+                              program_id=pid, project_id=pid))
+        db.session.commit()
+        second = trace_explore_batch([graph["reqs"][1]], project_id=pid)
+        assert [d["code"] for d in second[0]["defects"]] == ["DEF-2"]
+
+    def test_index_expires_after_ttl(self, graph, shared_cache, monkeypatch):
+        first = trace_index.get_index(graph["project_id"])
+        assert trace_index.get_index(graph["project_id"]) is first
+
+        monkeypatch.setattr(trace_index, "TTL_SECONDS", 0)
+        assert trace_index.get_index(graph["project_id"]) is not first
+
+    def test_per_process_backend_builds_every_time(self, graph):
+        first = trace_index.get_index(graph["project_id"])
+        assert trace_index.get_index(graph["project_id"]) is not first
+
+    def test_matrix_summary(self, graph):
+        assert build_traceability_matrix_summary(graph["project_id"]) == {
+            "total_requirements": 3,
+            "requirements_with_tests": 2,
+            "requirements_without_tests": 1,
+            "unlinked_test_cases": 1,
+            "total_defects": 1,
+            "coverage_pct": 66.7,
+        }
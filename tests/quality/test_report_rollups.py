@@ -0,0 +1,188 @@
+"""
+Materialized report rollups (app.services.report_rollups).
+
+Covers:
+  - Execution/defect inserts, updates and deletes keep the rollups in step
+    with the raw tables (check() stays consistent)
+  - Updating an expired object still moves its bucket (active history)
+  - Moving a TestCase to another module moves only its executions
+  - Writes that bypass the ORM are detected by check() and repaired by rebuild()
+  - Aggregate presets issue a constant number of queries
+  - `flask report-rollups` check / rebuild
+"""
+
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import event, update
+
+from app.models import db
+from app.models.reporting import DefectDailyRollup, ExecutionDailyRollup
+from app.models.testing import Defect, TestCase, TestCycle, TestExecution, TestPlan
+from app.services import report_rollups
+from app.services.report_engine import ReportEngine
+
+
+@contextmanager
+def _count_queries():
+    counter = {"n": 0}
+
+    def _before(*_args, **_kwargs):
+        counter["n"] += 1
+
+    event.listen(db.engine, "before_cursor_execute", _before)
+    try:
+        yield counter
+    finally:
+        event.remove(db.engine, "before_cursor_execute", _before)
+
+
+def _seed(program_id, n_cycles=1):
+    plan = TestPlan(name="Rollup Plan", program_id=program_id, status="active")
+    db.session.add(plan)
+    db.session.flush()
+    cycles = [TestCycle(name=f"Cycle {i}", plan_id=plan.id, status="in_progress") for i in range(n_cycles)]
+    tc = TestCase(program_id=program_id, code="TC-RU-001", title="Rollup", module="FI")
+    db.session.add_all([*cycles, tc])
+    db.session.commit()
+    return tc, cycles
+
+
+def _execution_buckets(program_id):
+    return {
+        (r.cycle_id, r.module, r.day, r.result): (r.executions, r.first_attempts, r.retests)
+        for r in ExecutionDailyRollup.query.filter_by(program_id=program_id)
+    }
+
+
+def _today():
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d")
+
+
+class TestIncrementalMaintenance:
+    def test_execution_insert_update_delete(self, program):
+        tc, (cycle,) = _seed(program["id"])
+        now = datetime.now(timezone.utc)
+        first = TestExecution(test_case_id=tc.id, cycle_id=cycle.id, result="fail", executed_at=now)
+        retest = TestExecution(test_case_id=tc.id, cycle_id=cycle.id, result="pass",
+                               executed_at=now, attempt_number=2)
+        db.session.add_all([first, retest])
+        db.session.commit()
+        assert _execution_buckets(program["id"]) == {
+            (cycle.id, "FI", _today(), "fail"): (1, 1, 0),
+            (cycle.id, "FI", _today(), "pass"): (1, 0, 1),
+        }
+
+        first.result = "pass"  # expired after commit: old value is loaded on set
+        db.session.commit()
+        assert _execution_buckets(program["id"]) == {(cycle.id, "FI", _today(), "pass"): (2, 1, 1)}
+
+        db.session.delete(retest)
+        db.session.commit()
+        assert _execution_buckets(program["id"]) == {(cycle.id, "FI", _today(), "pass"): (1, 1, 0)}
+        assert report_rollups.check(program["id"])["consistent"] is True
+
+    def test_defect_status_change_moves_bucket(self, program):
+        defect = Defect(program_id=program["id"], code="DEF-RU-1", title="Rollup defect",
+                        severity="S2", priority="P2", status="open", module="MM")
+        db.session.add(defect)
+        db.session.commit()
+
+        defect.status = "closed"
+        db.session.commit()
+        rows = DefectDailyRollup.query.filter_by(program_id=program["id"]).all()
+        assert [(r.status, r.defects) for r in rows] == [("closed", 1)]
+
+        trend = ReportEngine.run("defect_trend", program["id"], days=3)
+        assert trend["data"][-1] == {"date": _today(), "open": 0, "closed": 1}
+        assert report_rollups.check(program["id"])["consistent"] is True
+
+    def test_test_case_module_change_moves_its_executions(self, program):
+        tc, (cycle,) = _seed(program["id"])
+        other = TestCase(program_id=program["id"], code="TC-RU-002", title="Stays", module="FI")
+        db.session.add(other)
+        db.session.flush()
+        db.session.add_all([
+            TestExecution(test_case_id=tc.id, cycle_id=cycle.id, result="pass"),
+            TestExecution(test_case_id=other.id, cycle_id=cycle.id, result="pass"),
+        ])
+        db.session.commit()
+
+        tc.module = "SD"
+        db.session.add(TestExecution(test_case_id=tc.id, cycle_id=cycle.id, result="fail"))
+        with _count_queries() as q:
+            db.session.flush()
+        db.session.commit()
+        assert _execution_buckets(program["id"]) == {
+            (cycle.id, "FI", "", "pass"): (1, 1, 0),
+            (cycle.id, "SD", "", "pass"): (1, 1, 0),
+            (cycle.id, "SD", "", "fail"): (1, 1, 0),
+        }
+        assert report_rollups.check(program["id"])["consistent"] is True
+        # Nothing proportional to the program: no full re-derive of its executions
+        assert q["n"] < 10
+
+    def test_cycle_delete_cascades(self, program):
+        tc, (keep, drop) = _seed(program["id"], n_cycles=2)
+        for cycle in (keep, drop):
+            db.session.add(TestExecution(test_case_id=tc.id, cycle_id=cycle.id, result="fail"))
+        db.session.commit()
+
+        db.session.delete(drop)
+        db.session.commit()
+        assert list(_execution_buckets(program["id"])) == [(keep.id, "FI", "", "fail")]
+        assert report_rollups.check(program["id"])["consistent"] is True
+
+
+class TestCheckAndRebuild:
+    def test_bulk_update_drift_is_detected_and_repaired(self, program):
+        tc, (cycle,) = _seed(program["id"])
+        db.session.add(TestExecution(test_case_id=tc.id, cycle_id=cycle.id, result="pass"))
+        db.session.commit()
+
+        db.session.execute(update(TestExecution).values(result="blocked"))  # bypasses the unit of work
+        db.session.commit()
+        report = report_rollups.check(program["id"])
+        assert report["consistent"] is False
+        assert (report["executions"]["missing"], report["executions"]["stale"]) == (1, 1)
+
+        assert report_rollups.rebuild(program["id"]) == {"execution_buckets": 1, "defect_buckets": 0}
+        db.session.commit()
+        assert report_rollups.check(program["id"])["consistent"] is True
+        assert ReportEngine.run("execution_status_dist", program["id"])["data"] == [
+            {"status": "blocked", "count": 1},
+        ]
+
+    def test_cli_check_and_rebuild(self, app, program):
+        tc, (cycle,) = _seed(program["id"])
+        db.session.add(TestExecution(test_case_id=tc.id, cycle_id=cycle.id, result="pass"))
+        db.session.commit()
+        db.session.execute(ExecutionDailyRollup.__table__.delete())
+        db.session.commit()
+
+        runner = app.test_cli_runner()
+        assert runner.invoke(args=["report-rollups"]).exit_code == 1
+        result = runner.invoke(args=["report-rollups", "--rebuild", "--program-id", str(program["id"])])
+        assert "Rebuilt 1 execution" in result.output
+        assert runner.invoke(args=["report-rollups"]).exit_code == 0
+
+
+class TestPresetsReadRollups:
+    def test_trend_query_count_is_constant(self, program):
+        tc, (cycle,) = _seed(program["id"])
+        now = datetime.now(timezone.utc)
+        for day in range(10):
+            db.session.add(TestExecution(test_case_id=tc.id, cycle_id=cycle.id, result="pass",
+                                         executed_at=now - timedelta(days=day)))
+        db.session.commit()
+
+        with _count_queries() as q:
+            trend = ReportEngine.run("pass_fail_trend", program["id"], days=30)
+        assert q["n"] == 1
+        assert sum(d["pass"] for d in trend["data"]) == 10
+        assert trend["data"][-1]["date"] == _today()
+
+        with _count_queries() as q:
+            by_cycle = ReportEngine.run("pass_rate_by_cycle", program["id"])
+        assert q["n"] == 2
+        assert by_cycle["data"] == [{"cycle": "Cycle 0", "total": 10, "pass": 10, "pass_rate": 100.0}]
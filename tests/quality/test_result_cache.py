@@ -0,0 +1,135 @@
+"""
+Dashboard/report result cache (app.services.result_cache).
+
+Covers:
+  - Repeated reads are served without touching the database
+  - Writes through the session invalidate only the written program
+  - Rows without scope columns (executions) resolve scope via their parent
+  - Bulk ORM updates bump the table's global version
+  - Error payloads are never cached
+  - Each flush bumps only the keys it touched
+  - Without a shared backend nothing is cached
+"""
+
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event, update
+
+from app.models import db
+from app.models.program import Program
+from app.models.project import Project
+from app.models.testing import Defect, TestCase, TestCycle, TestExecution, TestPlan
+from app.services import cache_service, result_cache
+from app.services.report_engine import ReportEngine
+from app.services.testing.analytics import compute_dashboard
+
+
+@contextmanager
+def _count_queries():
+    counter = {"n": 0}
+
+    def _before(*_args, **_kwargs):
+        counter["n"] += 1
+
+    event.listen(db.engine, "before_cursor_execute", _before)
+    try:
+        yield counter
+    finally:
+        event.remove(db.engine, "before_cursor_execute", _before)
+
+
+@pytest.fixture()
+def shared_cache(monkeypatch):
+    """Behave as on Redis: the in-process backend stands in for the shared one."""
+    monkeypatch.setattr(result_cache, "is_enabled", lambda: True)
+
+
+def _defect(program_id, code, status="open"):
+    db.session.add(Defect(program_id=program_id, code=code, title=code, severity="S2", status=status))
+    db.session.commit()
+
+
+@pytest.mark.usefixtures("shared_cache")
+class TestResultCache:
+    def test_repeat_read_is_served_from_cache(self, program):
+        _defect(program["id"], "DEF-RC-1")
+        first = ReportEngine.run("defect_status_dist", program["id"])
+
+        with _count_queries() as q:
+            second = ReportEngine.run("defect_status_dist", program["id"])
+        assert q["n"] == 0
+        assert second == first
+
+    def test_write_invalidates_only_its_program(self, program):
+        other = Program(name="Other RC Program", methodology="agile", tenant_id=program["tenant_id"])
+        db.session.add(other)
+        db.session.flush()
+        other_id = other.id
+        db.session.add(Project(tenant_id=other.tenant_id, program_id=other_id, code="DEFAULT",
+                               name="Default", is_default=True))
+        db.session.commit()
+        _defect(program["id"], "DEF-RC-1")
+        _defect(other_id, "DEF-RC-2")
+        before = ReportEngine.run("defect_status_dist", program["id"])
+        ReportEngine.run("defect_status_dist", other_id)
+
+        _defect(program["id"], "DEF-RC-3", status="closed")
+        after = ReportEngine.run("defect_status_dist", program["id"])
+        assert after != before
+        assert {d["status"]: d["count"] for d in after["data"]} == {"open": 1, "closed": 1}
+
+        with _count_queries() as q:
+            ReportEngine.run("defect_status_dist", other_id)
+        assert q["n"] == 0
+
+    def test_execution_write_resolves_program_via_test_case(self, program):
+        plan = TestPlan(name="RC Plan", program_id=program["id"], status="active")
+        db.session.add(plan)
+        db.session.flush()
+        cycle = TestCycle(name="RC Cycle", plan_id=plan.id, status="in_progress")
+        tc = TestCase(program_id=program["id"], code="TC-RC-001", title="RC", module="FI")
+        db.session.add_all([cycle, tc])
+        db.session.commit()
+        assert compute_dashboard(program["id"])["total_executions"] == 0
+
+        db.session.add(TestExecution(test_case_id=tc.id, cycle_id=cycle.id, result="pass"))
+        db.session.commit()
+        assert compute_dashboard(program["id"])["total_executions"] == 1
+
+    def test_bulk_update_bumps_global_version(self, program):
+        _defect(program["id"], "DEF-RC-1")
+        assert compute_dashboard(program["id"])["open_defects"] == 1
+
+        db.session.execute(update(Defect).values(status="closed"))  # bypasses the unit of work
+        db.session.commit()
+        assert compute_dashboard(program["id"])["open_defects"] == 0
+
+    def test_errors_are_not_cached(self, program):
+        assert "error" in ReportEngine.run("no_such_report", program["id"])
+        assert cache_service.delete_pattern("rc:report:*") == 0
+
+    def test_each_flush_bumps_only_its_keys(self, program, monkeypatch):
+        bumped = []
+        real_bump = result_cache._bump
+        monkeypatch.setattr(result_cache, "_bump", lambda keys: (bumped.append(list(keys)), real_bump(keys)))
+        db.session.add(Defect(program_id=program["id"], code="DEF-RC-1", title="a", severity="S2"))
+        db.session.flush()
+        db.session.add(TestCase(program_id=program["id"], code="TC-RC-9", title="b", module="FI"))
+        db.session.flush()
+
+        assert all("defects" in key for key in bumped[0])
+        assert all("test_cases" in key for key in bumped[1])
+        db.session.commit()
+        assert len(bumped) == 3 and set(bumped[2]) == set(bumped[0]) | set(bumped[1])
+
+
+def test_memory_backend_does_not_cache(program):
+    assert result_cache.is_enabled() is False
+    _defect(program["id"], "DEF-RC-1")
+    ReportEngine.run("defect_status_dist", program["id"])
+
+    with _count_queries() as q:
+        ReportEngine.run("defect_status_dist", program["id"])
+    assert q["n"] > 0
+    assert cache_service.delete_pattern("rc:*") == 0
@@ -25,6 +25,9 @@ Covers:
 
 pytest_plugins = ["tests.test_management.tm_epic7_fixtures"]
 
+import csv
+import io
+import json
 import pytest
 import uuid
 
@@ -1411,6 +1414,51 @@ class TestTraceabilityMatrix:
         assert data["summary"]["total_test_cases"] == 1
         assert data["summary"]["total_defects"] == 1
 
+    def test_ndjson_stream_matches_json_across_pages(self, client, monkeypatch):
+        from app.services.testing import analytics as testing_analytics_service
+
+        monkeypatch.setattr(testing_analytics_service, "TRACEABILITY_BATCH_SIZE", 2)
+        p = _create_program(client)
+        for n in range(3):
+            req = _create_explore_requirement(client, p["id"], code=f"REQ-STREAM-{n}")
+            tc = _create_case(client, p["id"], title=f"Stream Case {n}", explore_requirement_id=req["id"])
+            if n == 1:
+                _create_defect(client, p["id"], test_case_id=tc["id"])
+        _create_case(client, p["id"], title="Unlinked Stream Case")
+
+        url = f"/api/v1/programs/{p['id']}/testing/traceability-matrix"
+        expected = client.get(url).get_json()
+        res = client.get(f"{url}?format=ndjson")
+        assert res.status_code == 200
+        assert res.mimetype == "application/x-ndjson"
+        lines = [json.loads(line) for line in res.get_data(as_text=True).splitlines()]
+
+        key = lambda entry: entry["requirement"]["id"]  # noqa: E731
+        assert sorted(lines[:-1], key=key) == sorted(expected["matrix"], key=key)
+        assert lines[-1]["summary"] == expected["summary"]
+        assert lines[-1]["summary"]["unlinked_test_cases"] == 1
+
+    def test_csv_stream_flattens_rows(self, client):
+        p = _create_program(client)
+        req = _create_explore_requirement(client, p["id"], code="REQ-CSV-1")
+        tc = _create_case(client, p["id"], title="CSV Case", explore_requirement_id=req["id"])
+        _create_defect(client, p["id"], test_case_id=tc["id"], title="CSV Defect 1")
+        _create_defect(client, p["id"], test_case_id=tc["id"], title="CSV Defect 2")
+        _create_explore_requirement(client, p["id"], code="REQ-CSV-2")
+
+        res = client.get(f"/api/v1/programs/{p['id']}/testing/traceability-matrix?format=csv")
+        assert res.status_code == 200
+        assert res.mimetype == "text/csv"
+        rows = list(csv.DictReader(io.StringIO(res.get_data(as_text=True))))
+        assert sorted((r["requirement_code"], r["test_case_title"]) for r in rows) == [
+            ("REQ-CSV-1", "CSV Case"), ("REQ-CSV-1", "CSV Case"), ("REQ-CSV-2", ""),
+        ]
+
+    def test_unknown_stream_format_rejected(self, client):
+        p = _create_program(client)
+        res = client.get(f"/api/v1/programs/{p['id']}/testing/traceability-matrix?format=pdf")
+        assert res.status_code == 400
+
 
 # ═════════════════════════════════════════════════════════════════════════════
 # REGRESSION SETS
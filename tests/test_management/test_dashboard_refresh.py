@@ -0,0 +1,129 @@
+"""
+Stale-while-revalidate cockpit dashboards (app.services.dashboard_refresh).
+
+Covers:
+  - Fresh entries are served without recomputing
+  - Stale entries are served immediately and refreshed by exactly one job
+  - A write to a dependency table marks a fresh entry stale (shared backend only)
+  - A hypercare incident write marks the war room stale
+  - Budgets parse from DASHBOARD_FRESHNESS
+  - Cockpit endpoints carry computed_at and staleness headers
+"""
+
+import pytest
+
+from app.models import db
+from app.models.cutover import CutoverPlan, HypercareIncident
+from app.models.testing import Defect
+from app.services import cache_service, dashboard_refresh, hypercare_service, result_cache
+
+
+@pytest.fixture()
+def swr(app, monkeypatch):
+    """Enable SWR and capture background refresh jobs instead of threading them."""
+    jobs = []
+    monkeypatch.setitem(app.config, "DASHBOARD_SWR_ENABLED", True)
+    monkeypatch.setitem(app.config, "DASHBOARD_FRESHNESS", "")
+    monkeypatch.setattr(dashboard_refresh, "_submit", lambda fn, *args: jobs.append((fn, args)))
+    cache_service.delete_pattern("swr:*")
+    yield jobs
+    cache_service.delete_pattern("swr:*")
+
+
+@pytest.fixture()
+def shared_cache(monkeypatch):
+    """Behave as on Redis: the in-process backend stands in for the shared one."""
+    monkeypatch.setattr(result_cache, "is_enabled", lambda: True)
+
+
+def _counter():
+    calls = {"n": 0}
+
+    def compute():
+        calls["n"] += 1
+        return {"value": calls["n"]}
+
+    return calls, compute
+
+
+class TestServe:
+    def test_fresh_entry_is_not_recomputed(self, swr):
+        calls, compute = _counter()
+        first, meta = dashboard_refresh.serve("go_no_go", (1,), compute)
+        assert meta["state"] == "miss"
+        second, meta = dashboard_refresh.serve("go_no_go", (1,), compute)
+        assert (second, meta["state"], calls["n"]) == (first, "fresh", 1)
+        assert swr == []
+
+    def test_stale_entry_served_while_one_job_refreshes(self, app, swr):
+        app.config["DASHBOARD_FRESHNESS"] = "demo=0:600"
+        calls, compute = _counter()
+        dashboard_refresh.serve("demo", (1,), compute)
+
+        for _ in range(3):
+            payload, meta = dashboard_refresh.serve("demo", (1,), compute)
+            assert (payload, meta["state"]) == ({"value": 1}, "stale")
+        assert len(swr) == 1  # the lock admits a single refresh
+
+        fn, args = swr.pop()
+        fn(*args)
+        payload, _ = dashboard_refresh.serve("demo", (1,), compute)
+        assert payload == {"value": 2}
+        assert len(swr) == 1  # lock released → next stale read may refresh again
+
+    def test_dependency_write_marks_entry_stale(self, swr, shared_cache, program):
+        calls, compute = _counter()
+        kwargs = {"program_id": program["id"], "tags": (Defect,)}
+        dashboard_refresh.serve("go_no_go", (program["id"],), compute, **kwargs)
+
+        db.session.add(Defect(program_id=program["id"], code="DEF-SWR-1", title="x", severity="S1"))
+        db.session.commit()
+        payload, meta = dashboard_refresh.serve("go_no_go", (program["id"],), compute, **kwargs)
+        assert (payload, meta["state"]) == ({"value": 1}, "stale")
+        assert len(swr) == 1
+
+    def test_per_process_backend_ignores_version_tags(self, swr, program):
+        calls, compute = _counter()
+        kwargs = {"program_id": program["id"], "tags": (Defect,)}
+        dashboard_refresh.serve("go_no_go", (program["id"],), compute, **kwargs)
+
+        db.session.add(Defect(program_id=program["id"], code="DEF-SWR-1", title="x", severity="S1"))
+        db.session.commit()
+        _, meta = dashboard_refresh.serve("go_no_go", (program["id"],), compute, **kwargs)
+        assert meta["state"] == "fresh"  # bounded by the time budget alone
+
+    def test_incident_write_marks_war_room_stale(self, swr, shared_cache, program):
+        plan = CutoverPlan(program_id=program["id"], tenant_id=program["tenant_id"], name="SWR Cutover")
+        db.session.add(plan)
+        db.session.commit()
+        tenant_id, plan_id = plan.tenant_id, plan.id
+        calls, compute = _counter()
+        kwargs = {"program_id": hypercare_service.get_plan_program_id(tenant_id, plan_id),
+                  "tags": hypercare_service.WAR_ROOM_TAGS}
+        dashboard_refresh.serve("war_room", (tenant_id, plan_id), compute, **kwargs)
+
+        db.session.add(HypercareIncident(cutover_plan_id=plan_id, tenant_id=tenant_id,
+                                         title="Posting run fails", severity="P1"))
+        db.session.commit()
+        _, meta = dashboard_refresh.serve("war_room", (tenant_id, plan_id), compute, **kwargs)
+        assert meta["state"] == "stale"
+
+    def test_parse_budgets(self):
+        assert dashboard_refresh.parse_budgets("go_no_go=30:600, war_room=10,bad=x") == {
+            "go_no_go": (30, 600),
+            "war_room": (10, 300),
+        }
+
+
+class TestCockpitEndpoints:
+    def test_go_no_go_carries_staleness_headers(self, client, swr, program):
+        url = f"/api/v1/programs/{program['id']}/testing/dashboard/go-no-go"
+        first = client.get(url)
+        assert first.status_code == 200
+        assert first.headers["X-Cache-Status"] == "miss"
+        assert first.headers["X-Data-Stale"] == "false"
+        assert first.get_json()["computed_at"] == first.headers["X-Computed-At"]
+
+        second = client.get(url)
+        assert second.headers["X-Cache-Status"] == "fresh"
+        assert second.get_json()["computed_at"] == first.get_json()["computed_at"]
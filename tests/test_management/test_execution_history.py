@@ -0,0 +1,128 @@
+"""
+Set-based execution history engine (app.services.testing.execution_history).
+
+Covers:
+  - Last-N executions per test case from one windowed query, chronological
+  - Chunks never split a test case's history
+  - NumPy and pure-Python scoring agree
+  - FlakyTestDetector / SuiteOptimizer / top_flaky gadget query count does
+    not grow with the number of test cases
+  - Environment correlation uses the execution's cycle environment
+"""
+
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import event
+
+from app.ai.assistants.flaky_detector import FlakyTestDetector
+from app.ai.assistants.suite_optimizer import SuiteOptimizer
+from app.models import db
+from app.models.testing import TestCase, TestCycle, TestExecution, TestPlan
+from app.services import dashboard_engine
+from app.services.testing import execution_history as eh
+
+
+@contextmanager
+def _count_queries():
+    counter = {"n": 0}
+
+    def _before(*_args, **_kwargs):
+        counter["n"] += 1
+
+    engine = db.engine
+    event.listen(engine, "before_cursor_execute", _before)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, "before_cursor_execute", _before)
+
+
+def _seed(program_id, sequences, environments=("QAS",)):
+    """Create one TC per result sequence (chronological), cycling environments."""
+    plan = TestPlan(name="History Plan", program_id=program_id, status="active")
+    db.session.add(plan)
+    db.session.flush()
+    cycles = []
+    for env in environments:
+        cycle = TestCycle(name=f"Cycle {env}", plan_id=plan.id, status="in_progress", environment=env)
+        db.session.add(cycle)
+        cycles.append(cycle)
+    db.session.flush()
+
+    now = datetime.now(timezone.utc)
+    tc_ids = []
+    for i, sequence in enumerate(sequences):
+        tc = TestCase(program_id=program_id, code=f"TC-H-{i:04d}", title=f"History {i}", module="FI")
+        db.session.add(tc)
+        db.session.flush()
+        tc_ids.append(tc.id)
+        for j, result in enumerate(sequence):
+            db.session.add(TestExecution(
+                test_case_id=tc.id,
+                cycle_id=cycles[j % len(cycles)].id,
+                result=result,
+                executed_at=now - timedelta(hours=len(sequence) - j),
+            ))
+    db.session.commit()
+    return tc_ids, cycles[0].id
+
+
+class TestWindowedHistory:
+    def test_last_n_per_test_case_chronological(self, program):
+        seqs = [["fail", "pass", "pass", "fail", "pass"], ["pass"], []]
+        tc_ids, _ = _seed(program["id"], seqs, environments=("DEV", "QAS"))
+
+        chunks = list(eh.iter_history_chunks(program["id"], window=3))
+        assert len(chunks) == 1
+        chunk = chunks[0]
+        assert chunk.test_case_ids == tc_ids[:2]  # never-executed TC is absent
+        assert chunk.results == [["pass", "fail", "pass"], ["pass"]]
+        assert chunk.environments[0] == ["DEV", "QAS", "DEV"]
+
+    def test_chunks_do_not_split_test_cases(self, program):
+        _seed(program["id"], [["pass", "fail"]] * 5)
+        chunks = list(eh.iter_history_chunks(program["id"], window=10, chunk_size=2))
+        assert [len(c) for c in chunks] == [2, 2, 1]
+        assert all(r == ["pass", "fail"] for c in chunks for r in c.results)
+
+    def test_numpy_and_python_scores_agree(self, monkeypatch):
+        chunk = eh.HistoryChunk()
+        for seq in (["pass", "fail", "pass"], ["pass", "blocked", "fail", "fail"], ["fail"]):
+            chunk.append(0, [(r, None) for r in reversed(seq)])
+        vectorised = (chunk.oscillations(), chunk.pass_rates())
+        monkeypatch.setattr(eh, "np", None)
+        assert (chunk.oscillations(), chunk.pass_rates()) == vectorised
+        assert vectorised[0][0] == (100.0, 2)
+
+
+class TestConsumersAreSetBased:
+    @pytest.mark.parametrize("n_cases", [5, 40])
+    def test_query_count_independent_of_test_cases(self, program, n_cases):
+        _, cycle_id = _seed(program["id"], [["pass", "fail", "pass", "fail"]] * n_cases)
+        with _count_queries() as flaky_q:
+            result = FlakyTestDetector().analyze(program["id"])
+        with _count_queries() as opt_q:
+            SuiteOptimizer().optimize(cycle_id)
+        with _count_queries() as gadget_q:
+            gadget = dashboard_engine.DashboardEngine._GADGETS["top_flaky"]["fn"](program["id"])
+
+        assert result["flaky_count"] == n_cases
+        assert len(gadget["data"]["rows"]) == min(10, n_cases)
+        assert flaky_q["n"] <= 3
+        assert opt_q["n"] <= 8
+        assert gadget_q["n"] <= 3
+
+    def test_environment_correlation_from_cycle(self, program):
+        # Alternating DEV/PRD cycles: every PRD run fails
+        _seed(program["id"], [["pass", "fail"] * 4], environments=("DEV", "PRD"))
+        flaky = FlakyTestDetector().analyze(program["id"])["flaky_tests"]
+        assert flaky[0]["environment_correlation"] == {"environment": "PRD", "fail_ratio": 1.0}
+        assert "PRD" in flaky[0]["recommendation"]
+
+    def test_suite_optimizer_pass_rate_uses_last_five(self, program):
+        tc_ids, cycle_id = _seed(program["id"], [["fail"] * 5 + ["pass"] * 5, ["fail", "pass"]])
+        ranking = {r["test_case_id"]: r for r in SuiteOptimizer().optimize(cycle_id)["ranking"]}
+        assert ranking[tc_ids[0]]["pass_rate"] == 1.0
+        assert ranking[tc_ids[1]]["pass_rate"] == 0.5